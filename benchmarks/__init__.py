@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+# 
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Measures the throughput of concurrent ``Version.latest_version()`` calls.
+
+In "global" session mode there is only one session which can not be shared
+between threads (SQLite even refuses to use a connection in another thread),
+so all the calls are done serially. In "thread" mode every thread uses its own
+session.
+
+Run it with::
+
+  python -m benchmarks.bench_concurrent_latest_version [database_url]
+
+With the default temporary SQLite3 database the work is mostly statement
+compilation, which is bound to the GIL, so the numbers are close. Give a
+database server url to see the gain where the network latency dominates.
+"""
+
+import sys
+import threading
+
+from benchmarks.common import BenchmarkEnvironment, timed, report
+
+THREAD_COUNT = 8
+CALLS_PER_THREAD = 200
+SHOT_COUNT = 20
+VERSIONS_PER_SHOT = 10
+
+
+def create_data():
+    """creates the test data and returns the Version ids
+    """
+    from oyProjectManager import db
+    from oyProjectManager.models.auth import User
+    from oyProjectManager.models.project import Project
+    from oyProjectManager.models.sequence import Sequence
+    from oyProjectManager.models.shot import Shot
+    from oyProjectManager.models.version import Version, VersionType
+
+    project = Project("BENCH_PROJECT")
+    project.save()
+
+    sequence = Sequence(project, "BENCH_SEQ")
+    sequence.save()
+
+    user = User.query().first()
+    version_type = VersionType.query().filter_by(type_for="Shot").first()
+
+    version_ids = []
+    for i in range(SHOT_COUNT):
+        shot = Shot(sequence, i + 1)
+        shot.save()
+        for j in range(VERSIONS_PER_SHOT):
+            version = Version(shot, shot.code, version_type, user)
+            version.save()
+        version_ids.append(version.id)
+
+    db.remove_session()
+    return version_ids
+
+
+def call_latest_version(version_ids, index):
+    """does CALLS_PER_THREAD latest_version() calls
+    """
+    from oyProjectManager.models.version import Version
+
+    for i in range(CALLS_PER_THREAD):
+        version_id = version_ids[(index + i) % len(version_ids)]
+        Version.query().get(version_id).latest_version()
+
+
+def run_serial(version_ids):
+    """does all the calls in the current thread
+    """
+    for i in range(THREAD_COUNT):
+        call_latest_version(version_ids, i)
+
+
+def run_threads(version_ids):
+    """runs the latest_version() calls in THREAD_COUNT threads
+    """
+    from oyProjectManager import db
+
+    def worker(index):
+        try:
+            call_latest_version(version_ids, index)
+        finally:
+            db.remove_session()
+
+    threads = [threading.Thread(target=worker, args=(i,))
+               for i in range(THREAD_COUNT)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def bench(session_mode, database_url=None):
+    """runs the benchmark for the given session mode and returns the elapsed
+    time
+    """
+    from oyProjectManager import db
+
+    with BenchmarkEnvironment() as env:
+        db.setup(database_url or env.database_url, session_mode_in=session_mode)
+        version_ids = create_data()
+
+        if session_mode == "global":
+            elapsed, _ = timed(run_serial, version_ids)
+        else:
+            elapsed, _ = timed(run_threads, version_ids)
+
+    return elapsed
+
+
+def main():
+    total_calls = THREAD_COUNT * CALLS_PER_THREAD
+    database_url = sys.argv[1] if len(sys.argv) > 1 else None
+
+    global_time = bench("global", database_url)
+    thread_time = bench("thread", database_url)
+
+    report(
+        "%s concurrent latest_version() calls in %s threads" %
+        (total_calls, THREAD_COUNT),
+        [
+            ("global session, serial", global_time),
+            ("thread scoped sessions", thread_time),
+        ]
+    )
+    print("  %-40s %10.1f calls/s" % ("global throughput",
+                                       total_calls / global_time))
+    print("  %-40s %10.1f calls/s" % ("thread throughput",
+                                       total_calls / thread_time))
+
+
+if __name__ == "__main__":
+    main()
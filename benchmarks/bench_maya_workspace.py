@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Measures the Maya workspace setup which is done on every save_as.
+
+Maya is not needed, a stand-in ``pymel.core`` module with the file rules of
+:confval:`maya_workspace_file_content` is installed before importing
+:mod:`oyProjectManager.environments.mayaEnv`. The workspace file and folders
+are created for the same workspace over and over again, once by the old
+code (writing the file and calling ``os.makedirs()`` for every file rule) and
+once by the :class:`~oyProjectManager.environments.maya_workspace.WorkspaceProvisioner`.
+The file system calls are counted too.
+
+Run it with::
+
+  python -m benchmarks.bench_maya_workspace
+"""
+
+import os
+import re
+import sys
+import tempfile
+import shutil
+import types
+
+from benchmarks.common import timed, report
+
+SAVE_COUNT = 200
+
+FILE_RULE_RE = re.compile(r'workspace -fr "([^"]+)" "([^"]*)";')
+
+
+class StandInWorkspace(object):
+    """the pm.workspace of the stand-in pymel.core module
+    """
+
+    def __init__(self, file_rules):
+        self.fileRules = file_rules
+        self.path = None
+
+    def open(self, path):
+        self.path = path
+
+
+def install_stand_in_pm(file_rules):
+    """installs the stand-in pymel.core module and returns it
+    """
+    pymel = types.ModuleType("pymel")
+    pm = types.ModuleType("pymel.core")
+    pm.workspace = StandInWorkspace(file_rules)
+    pymel.core = pm
+    sys.modules["pymel"] = pymel
+    sys.modules["pymel.core"] = pm
+    return pm
+
+
+class CallCounter(object):
+    """counts the calls of the file system functions
+    """
+
+    names = ["makedirs", "mkdir", "listdir", "stat"]
+
+    def __init__(self):
+        self.count = 0
+        self.originals = {}
+
+    def __enter__(self):
+        for name in self.names:
+            original = getattr(os, name)
+            self.originals[name] = original
+            setattr(os, name, self._wrap(original))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for name, original in self.originals.items():
+            setattr(os, name, original)
+
+    def _wrap(self, original):
+        def wrapper(*args, **kwargs):
+            self.count += 1
+            return original(*args, **kwargs)
+        return wrapper
+
+
+def old_setup(workspace_path, file_rules, content):
+    """the workspace setup before the WorkspaceProvisioner
+    """
+    try:
+        os.makedirs(workspace_path)
+    except OSError:
+        pass
+
+    with open(os.path.join(workspace_path, "workspace.mel"), "w") as f:
+        f.write(content)
+
+    for key in file_rules:
+        try:
+            os.makedirs(os.path.join(workspace_path, file_rules[key]))
+        except OSError:
+            pass
+
+
+def main():
+    from oyProjectManager import conf
+
+    content = conf.maya_workspace_file_content
+    file_rules = dict(FILE_RULE_RE.findall(content))
+    install_stand_in_pm(file_rules)
+
+    from oyProjectManager.environments import mayaEnv
+
+    maya = mayaEnv.Maya()
+
+    temp_folder = tempfile.mkdtemp()
+    try:
+        old_path = os.path.join(temp_folder, "old", "Main")
+        new_path = os.path.join(temp_folder, "new", "Main")
+        os.makedirs(old_path)
+        os.makedirs(new_path)
+
+        def run_old():
+            for i in range(SAVE_COUNT):
+                old_setup(old_path, file_rules, content)
+
+        def run_new():
+            for i in range(SAVE_COUNT):
+                maya.create_workspace_file(new_path)
+                maya.create_workspace_folders(new_path)
+
+        with CallCounter() as old_calls:
+            old_time, _ = timed(run_old)
+
+        with CallCounter() as new_calls:
+            new_time, _ = timed(run_new)
+    finally:
+        shutil.rmtree(temp_folder)
+
+    report(
+        "setting up the same workspace %s times (%s file rules, %s folders)"
+        % (SAVE_COUNT, len(file_rules), len(set(file_rules.values()))),
+        [
+            ("writing everything on every save", old_time),
+            ("WorkspaceProvisioner", new_time),
+        ]
+    )
+    print("  %-40s %10.1f x" % ("speed up", old_time / new_time))
+    print("  %-40s %10s" % ("file system calls before", old_calls.count))
+    print("  %-40s %10s" % ("file system calls after", new_calls.count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Measures the ``db.setup()`` time for cold and warm databases.
+
+A cold database is a new one where the tables should be created and the
+database should be initialized. A warm database is already initialized with
+the same schema and config, so ``db.setup()`` should not do anything other
+than checking the stored fingerprint. The full initialization of a warm
+database (which was done on every startup before the fingerprint) is also
+measured for comparison.
+
+Run it with::
+
+  python -m benchmarks.bench_startup
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from benchmarks.common import BenchmarkEnvironment, timed, report
+
+REPEAT = 20
+
+
+class StatementCounter(object):
+    """counts the statements executed by all the engines
+    """
+
+    def __init__(self):
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self)
+
+    def __call__(self, conn, cursor, statement, parameters, context,
+                 executemany):
+        self.count += 1
+
+
+def full_initialization():
+    """does what db.setup() was doing on every startup
+    """
+    from oyProjectManager import db
+
+    db.metadata.create_all(db.engine)
+    db.__init_db__()
+
+
+def main():
+    from oyProjectManager import db
+
+    counter = StatementCounter()
+
+    with BenchmarkEnvironment() as env:
+        counter.count = 0
+        cold_time, _ = timed(db.setup, env.database_url)
+        cold_count = counter.count
+        db.session.close()
+
+        warm_time = 0
+        counter.count = 0
+        for i in range(REPEAT):
+            elapsed, _ = timed(db.setup, env.database_url)
+            warm_time += elapsed
+            db.session.close()
+        warm_count = counter.count / REPEAT
+
+        full_time = 0
+        counter.count = 0
+        for i in range(REPEAT):
+            elapsed, _ = timed(full_initialization)
+            full_time += elapsed
+        full_count = counter.count / REPEAT
+
+    report(
+        "db.setup() time (%s statements for cold, %s for warm, %s for the "
+        "full initialization of a warm database)" %
+        (cold_count, warm_count, full_count),
+        [
+            ("cold database", cold_time),
+            ("warm database", warm_time / REPEAT),
+            ("full initialization of a warm database", full_time / REPEAT),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Measures the gain of the compiled template cache while creating Versions.
+
+The same number of Versions are created twice, once by compiling the
+templates on every render (as ``jinja2.Template(source).render()`` does) and
+once by using :mod:`oyProjectManager.utils.templates`.
+
+Run it with::
+
+  python -m benchmarks.bench_template_cache
+"""
+
+import jinja2
+
+from benchmarks.common import BenchmarkEnvironment, timed, report
+
+VERSION_COUNT = 10000
+
+
+def uncached_render(source, **kwargs):
+    """renders the template without the cache
+    """
+    return jinja2.Template(source).render(**kwargs)
+
+
+def create_versions(shot, version_type, user):
+    """creates VERSION_COUNT Versions without saving them
+    """
+    from oyProjectManager.models.version import Version
+
+    for i in range(VERSION_COUNT):
+        Version(shot, shot.code, version_type, user, version_number=i + 1,
+                status="WIP")
+
+
+def main():
+    from oyProjectManager import db
+    from oyProjectManager.models.auth import User
+    from oyProjectManager.models.project import Project
+    from oyProjectManager.models.sequence import Sequence
+    from oyProjectManager.models.shot import Shot
+    from oyProjectManager.models.version import VersionType
+    from oyProjectManager.utils import templates
+
+    with BenchmarkEnvironment():
+        db.setup("sqlite://")
+
+        project = Project("BENCH_PROJECT")
+        project.save()
+        sequence = Sequence(project, "BENCH_SEQ")
+        sequence.save()
+        shot = Shot(sequence, 1)
+        shot.save()
+
+        user = User.query().first()
+        version_type = VersionType.query().filter_by(type_for="Shot").first()
+
+        cached_render = templates.render
+        templates.render = uncached_render
+        try:
+            uncached_time, _ = timed(create_versions, shot, version_type,
+                                     user)
+        finally:
+            templates.render = cached_render
+
+        cached_time, _ = timed(create_versions, shot, version_type, user)
+
+    report(
+        "creating %s Versions" % VERSION_COUNT,
+        [
+            ("compiling the templates on every render", uncached_time),
+            ("compiled template cache", cached_time),
+        ]
+    )
+    print("  %-40s %10.1f x" % ("speed up", uncached_time / cached_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+# 
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Helpers shared by the benchmark scripts.
+
+The benchmarks are not part of the test suite, run them one by one::
+
+  python -m benchmarks.bench_concurrent_latest_version
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+
+class BenchmarkEnvironment(object):
+    """Creates temporary config and repository folders and points the
+    environment variables to them, just like the tests do.
+    """
+    
+    def __init__(self):
+        self.temp_config_folder = None
+        self.temp_projects_folder = None
+    
+    def __enter__(self):
+        from oyProjectManager import conf
+        
+        self.temp_config_folder = tempfile.mkdtemp()
+        self.temp_projects_folder = tempfile.mkdtemp()
+        
+        os.environ["OYPROJECTMANAGER_PATH"] = self.temp_config_folder
+        os.environ[conf.repository_env_key] = self.temp_projects_folder
+        
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        from oyProjectManager import db
+        
+        if db.session is not None:
+            db.remove_session()
+        db.session = None
+        
+        shutil.rmtree(self.temp_config_folder)
+        shutil.rmtree(self.temp_projects_folder)
+    
+    @property
+    def database_url(self):
+        """a file based SQLite3 database url in the temp config folder
+        """
+        return "sqlite:///" + os.path.join(
+            self.temp_config_folder, "project_manager.db"
+        )
+
+
+def timed(func, *args, **kwargs):
+    """Calls the given function and returns the elapsed time and the result
+    """
+    start = time.time()
+    result = func(*args, **kwargs)
+    return time.time() - start, result
+
+
+def report(title, rows):
+    """prints a simple table of (label, seconds) pairs
+    """
+    print("")
+    print(title)
+    print("-" * len(title))
+    for label, seconds in rows:
+        print("  %-40s %10.4f s" % (label, seconds))
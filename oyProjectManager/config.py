@@ -24,6 +24,14 @@ class Config(object):
     default_config_values = dict(
 
         database_url="sqlite:///$OYPROJECTMANAGER_PATH/project_manager.db",
+        database_session_mode="global",
+        database_pool_size=5,
+        database_max_overflow=10,
+        database_pool_pre_ping=False,
+        
+        identity_cache_ttl=300,
+        
+        backup_worker_count=4,
 
         status_list=[
             'WTS',
@@ -88,6 +96,7 @@ class Config(object):
 
         file_size_format="%.2f MB",
         time_format='%d.%m.%Y %H:%M',
+        version_file_hash=False,
 
         environments=[
             {
@@ -180,6 +189,17 @@ class Config(object):
         thumbnail_format="jpg",
         thumbnail_quality=70,
         thumbnail_size=[320, 180],
+        
+        thumbnail_cache_path="~/.oypmrc/thumbnail_cache",
+        thumbnail_cache_size=512,
+        thumbnail_disk_cache_size=256,
+        thumbnail_worker_count=4,
+        
+        file_stat_cache_ttl=5,
+        file_stat_worker_count=2,
+        
+        structure_cache_ttl=60,
+        structure_worker_count=8,
 
         version_types=[
             {
@@ -357,6 +377,8 @@ class Config(object):
             }
         ],
 
+        maya_workspace_cache_ttl=600,
+
         maya_workspace_file_content="""workspace -fr "3dPaintTextures" ".mayaFiles/sourceimages/3dPaintTextures/";
 workspace -fr "Adobe(R) Illustrator(R)" ".mayaFiles/data/";
 workspace -fr "aliasWire" ".mayaFiles/data/";
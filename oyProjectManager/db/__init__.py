@@ -42,13 +42,53 @@ For a simple example, lets get all the shots for a Sequence called
 
 that's it.
 
+.. versionadded:: 0.2.5.4
+  Thread Scoped Sessions:
+  
+  By default there is only one session shared by every part of the system.
+  Setting the :confval:`database_session_mode` config value to "thread" will
+  make ``db.session`` a ``scoped_session`` where every thread gets its own
+  session. ``db.session``, ``db.query`` and ``ORMClass.query()`` work as
+  before, so no change is needed in the calling code. Worker threads should
+  call :func:`~oyProjectManager.db.remove_session` when they are done, to give
+  the connection back to the pool.
+  
+  The pool settings (:confval:`database_pool_size`,
+  :confval:`database_max_overflow` and :confval:`database_pool_pre_ping`) are
+  used according to the dialect in the :confval:`database_url`.
+
+.. versionadded:: 0.2.5.4
+  Fast Startup:
+  
+  A fingerprint of the database schema and the ``users_data`` and
+  ``version_types`` config values is stored in the ``DatabaseInfo`` table. If
+  the stored fingerprint matches the current one, ``db.setup()`` skips the
+  table creation and the initialization of the database, so a warm start
+  issues only one query.
+
+.. versionadded:: 0.2.5.4
+  Identity Cache:
+  
+  The Projects, Sequences and VersionTypes are rarely changed but are looked
+  up all the time. :func:`~oyProjectManager.db.get_cached` returns them from
+  the in-process :data:`identity_cache` without querying the database. The
+  cached instances expire after :confval:`identity_cache_ttl` seconds, and
+  ``save()`` of these classes invalidates the cached instances of the class.
+
 """
 import os
+import hashlib
 import logging
+from contextlib import contextmanager
 
 import sqlalchemy
+from sqlalchemy import event, exc, Table, Column, String
+from sqlalchemy.engine.reflection import Inspector
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.pool import StaticPool
 import oyProjectManager
 from oyProjectManager.db.declarative import Base
+from oyProjectManager.utils import cache
 
 # SQLAlchemy database engine
 engine = None
@@ -57,17 +97,31 @@ engine = None
 session = None
 query = None
 
+# the session mode, "global" or "thread"
+session_mode = None
+
 # SQLAlchemy metadata
 metadata = None
 
 database_url = None
 
+# the in-process cache of the near static instances, see get_cached()
+identity_cache = cache.IdentityCache()
+
+# holds the schema and config fingerprint of the database
+database_info = Table(
+    "DatabaseInfo", Base.metadata,
+    Column("key", String(64), primary_key=True),
+    Column("value", String(256)),
+    extend_existing=True
+)
+
 # create a logger
 logger = logging.getLogger(__name__)
 #logger.setLevel(logging.WARNING)
 logger.setLevel(logging.DEBUG)
 
-def setup(database_url_in=None):
+def setup(database_url_in=None, session_mode_in=None):
     """Utility function that helps to connect the system to the given database.
     
     Returns the created session
@@ -78,6 +132,11 @@ def setup(database_url_in=None):
         just call ``db.setup()`` and then use ``db.session`` and ``db.query``
         to get the data.
     
+    :param session_mode_in: The session mode, "global" or "thread". If skipped
+        or given as None the :confval:`database_session_mode` config value
+        will be used. In "thread" mode the returned session is a
+        ``scoped_session`` which gives every thread its own session.
+    
     :returns: sqlalchemy.orm.session
     """
     
@@ -86,6 +145,10 @@ def setup(database_url_in=None):
     global query
     global metadata
     global database_url
+    global session_mode
+    global identity_cache
+    
+    conf = oyProjectManager.conf
     
     # create engine
     # TODO: create tests for this
@@ -94,9 +157,15 @@ def setup(database_url_in=None):
         logger.debug("using the default database_url from the config file")
         
         # use the default database
-        conf = oyProjectManager.conf
         database_url_in = conf.database_url
     
+    if session_mode_in is None:
+        session_mode_in = conf.database_session_mode
+    
+    if session_mode_in not in ("global", "thread"):
+        raise ValueError('the session mode should be one of "global" or '
+                         '"thread", not %s' % session_mode_in)
+    
     # expand user and env variables if any
     # TODO: because the dialect part and the address part are now coming from
     # from one source, it is not possible to expand any variables in the path,
@@ -119,28 +188,275 @@ def setup(database_url_in=None):
         )
     
     database_url = database_url_in
+    session_mode = session_mode_in
     
     logger.debug("setting up database in %s" % database_url)
     
-    engine = sqlalchemy.create_engine(database_url, echo=False)
+    engine = sqlalchemy.create_engine(
+        database_url,
+        echo=False,
+        **_engine_kwargs(database_url, session_mode)
+    )
+    
+    if conf.database_pool_pre_ping:
+        event.listen(engine, "checkout", _ping_connection)
     
-    # create the tables
     metadata = Base.metadata
-    metadata.create_all(engine)
+    
+    # check if the database is already initialized for the current schema and
+    # config
+    fingerprint = _fingerprint()
+    initialized = _stored_fingerprint() == fingerprint
+    
+    if not initialized:
+        # create the tables
+        metadata.create_all(engine)
+        # and the columns and indexes added to already existing tables
+        _create_missing_columns()
+        _create_missing_indexes()
+    else:
+        logger.debug("the database is up to date, skipping the "
+                     "initialization")
     
     # create the Session class
     Session = sqlalchemy.orm.sessionmaker(bind=engine)
     
     # create and save session object to session
-    session = Session()
+    if session_mode == "thread":
+        session = sqlalchemy.orm.scoped_session(Session)
+    else:
+        session = Session()
     query = session.query
     
-    # initialize the db
-    __init_db__()
+    # the cached instances belong to the previous session
+    identity_cache = cache.IdentityCache(ttl=conf.identity_cache_ttl)
+    
+    if not initialized:
+        # initialize the db
+        __init_db__()
+        _store_fingerprint(fingerprint)
     
     # TODO: create a test to check if the returned session is session
     return session
 
+def get_cached(class_, **kwargs):
+    """Returns the first instance of the given class which has the given
+    attribute values by using the :data:`identity_cache`. It only queries the
+    database if the instance is not cached yet::
+    
+      project = db.get_cached(Project, name="TEST_PROJECT")
+      vtype = db.get_cached(VersionType, type_for="Shot", name="Animation")
+    
+    Use it only for the classes which invalidate the cache in their
+    ``save()`` method (Project, Sequence and VersionType).
+    
+    :returns: The instance or None if there is no such instance.
+    """
+    if session is None:
+        setup()
+    
+    key = (class_,) + tuple(sorted(kwargs.items()))
+    
+    return identity_cache.get(
+        key,
+        lambda: session.query(class_).filter_by(**kwargs).first(),
+        session
+    )
+
+def remove_session():
+    """Closes the session of the current thread.
+    
+    In "thread" session mode it disposes the session of the calling thread, so
+    the connection goes back to the pool and the next call to ``db.session``
+    or ``db.query`` in this thread will create a fresh session. In "global"
+    mode it just closes the shared session.
+    """
+    if session is None:
+        return
+    
+    if session_mode == "thread":
+        session.remove()
+    else:
+        session.close()
+
+@contextmanager
+def savepoints():
+    """A context manager which lets ``db.session.begin_nested()`` be used in
+    its block.
+    
+    pysqlite emits the BEGIN and COMMIT statements of the SQLite transactions
+    by itself and breaks the SAVEPOINTs. So, for SQLite, its transaction
+    handling is disabled only for the connection of the session and only in
+    the block, the other connections keep the default behaviour and the
+    readers don't hold their locks until they commit. The pending pysqlite
+    transaction of the session is committed when the block starts and the
+    statements which are not in a SAVEPOINT are committed right away. It
+    does nothing for the other databases.
+    
+    .. versionadded:: 0.2.5.4
+    """
+    connection = session.connection()
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+    
+    dbapi_connection = connection.connection.connection
+    isolation_level = dbapi_connection.isolation_level
+    dbapi_connection.isolation_level = None
+    try:
+        yield
+    finally:
+        dbapi_connection.isolation_level = isolation_level
+
+def _engine_kwargs(database_url_in, session_mode_in):
+    """Returns the keyword arguments for the ``create_engine`` call for the
+    given database url and session mode.
+    
+    The pool size and max overflow values are only used for the dialects
+    which are using a ``QueuePool``, SQLite uses its own pool classes.
+    """
+    conf = oyProjectManager.conf
+    url = make_url(database_url_in)
+    
+    kwargs = {}
+    
+    if url.drivername.startswith("sqlite"):
+        if session_mode_in == "thread" and \
+           url.database in (None, "", ":memory:"):
+            # share the same in-memory database between threads
+            kwargs["poolclass"] = StaticPool
+            kwargs["connect_args"] = {"check_same_thread": False}
+    else:
+        kwargs["pool_size"] = conf.database_pool_size
+        kwargs["max_overflow"] = conf.database_max_overflow
+    
+    return kwargs
+
+def _create_missing_columns():
+    """Adds the columns which are defined in the models but missing in the
+    database.
+    
+    ``create_all()`` doesn't alter the existing tables, so a column added to
+    a model is added here. The new columns should be nullable and should not
+    have a server default.
+    """
+    inspector = Inspector.from_engine(engine)
+    for table in metadata.sorted_tables:
+        existing_column_names = set(
+            column["name"] for column in inspector.get_columns(table.name)
+        )
+        if not existing_column_names:
+            # the table is not created
+            continue
+        for column in table.columns:
+            if column.name not in existing_column_names:
+                logger.debug("creating the missing column %s.%s" %
+                             (table.name, column.name))
+                preparer = engine.dialect.identifier_preparer
+                engine.execute(
+                    "ALTER TABLE %s ADD COLUMN %s %s" % (
+                        preparer.format_table(table),
+                        preparer.format_column(column),
+                        column.type.compile(dialect=engine.dialect)
+                    )
+                )
+
+def _create_missing_indexes():
+    """Creates the indexes which are defined in the models but missing in the
+    database.
+    
+    ``create_all()`` only creates the indexes of the newly created tables, so
+    an index added to an existing table needs to be created here.
+    """
+    inspector = Inspector.from_engine(engine)
+    for table in metadata.sorted_tables:
+        existing_index_names = set(
+            index["name"] for index in inspector.get_indexes(table.name)
+        )
+        for index in table.indexes:
+            if index.name not in existing_index_names:
+                logger.debug("creating the missing index %s" % index.name)
+                index.create(engine)
+
+def _fingerprint():
+    """Returns a hash of the database schema and the config values which are
+    used to initialize the database.
+    
+    Any change in the models or in the ``users_data`` and ``version_types``
+    config values results a different fingerprint.
+    """
+    conf = oyProjectManager.conf
+    
+    schema = []
+    for table in Base.metadata.sorted_tables:
+        schema.append(table.name)
+        for column in table.columns:
+            schema.append("%s.%s %s" % (table.name, column.name, column.type))
+        for index in sorted(table.indexes, key=lambda x: x.name):
+            schema.append(
+                "%s %s" % (index.name, [column.name for column in index.columns])
+            )
+    
+    data = repr((
+        schema,
+        _normalize(conf.users_data),
+        _normalize(conf.version_types)
+    ))
+    
+    return hashlib.md5(data).hexdigest()
+
+def _normalize(data):
+    """Converts the dictionaries in the given data to sorted lists of items,
+    so the repr of the data does not depend on the dictionary ordering.
+    """
+    if isinstance(data, dict):
+        return sorted((key, _normalize(value)) for key, value in data.items())
+    elif isinstance(data, (list, tuple)):
+        return [_normalize(value) for value in data]
+    return data
+
+def _stored_fingerprint():
+    """Returns the fingerprint stored in the database, or None if the database
+    is not initialized yet.
+    """
+    connection = engine.connect()
+    try:
+        return connection.execute(
+            sqlalchemy.select([database_info.c.value]).
+            where(database_info.c.key == "fingerprint")
+        ).scalar()
+    except exc.DBAPIError:
+        # there is no DatabaseInfo table
+        return None
+    finally:
+        connection.close()
+
+def _store_fingerprint(fingerprint):
+    """Stores the given fingerprint in the database
+    """
+    session.execute(
+        database_info.delete().where(database_info.c.key == "fingerprint")
+    )
+    session.execute(
+        database_info.insert().values(key="fingerprint", value=fingerprint)
+    )
+    session.commit()
+
+def _ping_connection(dbapi_connection, connection_record, connection_proxy):
+    """Checks if the connection is still alive before it is checked out from
+    the pool.
+    
+    Raises a DisconnectionError if it is not, so the pool discards it and
+    tries with a new connection.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SELECT 1")
+    except Exception:
+        raise exc.DisconnectionError()
+    finally:
+        cursor.close()
+
 def __init_db__():
     """initializes the just setup database
     
@@ -163,31 +479,33 @@ def __init_db__():
     # create the users
     from oyProjectManager.models.auth import User
     
-    # get all users from db
-    users_from_db = query(User).all()
+    # get all user names from db, Users are compared by their names
+    user_names_from_db = set(name for (name,) in query(User.name))
     
     for user_data in conf.users_data:
         name = user_data.get("name")
         initials = user_data.get("initials")
         email = user_data.get("email")
         
-        user_from_config = User(name, initials, email)
-        
-        if user_from_config not in users_from_db:
-            session.add(user_from_config)
+        if name not in user_names_from_db:
+            session.add(User(name, initials, email))
+            user_names_from_db.add(name)
     
     
     # ------------------------------------------------------
     # add the VersionTypes
     from oyProjectManager.models.version import VersionType
     
-    version_types_from_db = query(VersionType).all()
+    # VersionTypes are compared by their names
+    version_type_names_from_db = \
+        set(name for (name,) in query(VersionType.name))
     
     for version_type in conf.version_types:
-        version_type_from_conf = VersionType(**version_type)
+        name = version_type.get("name")
         
-        if version_type_from_conf not in version_types_from_db:
-            session.add(version_type_from_conf)
+        if name not in version_type_names_from_db:
+            session.add(VersionType(**version_type))
+            version_type_names_from_db.add(name)
     
     session.commit()
     
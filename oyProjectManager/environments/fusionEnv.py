@@ -264,6 +264,9 @@ class Fusion(EnvironmentBase):
         self.comp.Save(version_full_path.encode())
         self.comp.Unlock()
 
+        # store the file size and date
+        version.update_file_info()
+
         return True
 
     def export_as(self, version):
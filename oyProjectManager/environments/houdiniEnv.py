@@ -57,6 +57,9 @@ class Houdini(EnvironmentBase):
         # see
         hou.hipFile.save(file_name=str(version.full_path))
 
+        # store the file size and date
+        version.update_file_info()
+
         # set the environment variables
         self.set_environment_variables(version)
 
@@ -11,8 +11,9 @@ from pymel import core as pm
 
 from oyProjectManager import conf
 from oyProjectManager import utils
+from oyProjectManager.environments import maya_workspace
 from oyProjectManager.models.entity import EnvironmentBase
-from oyProjectManager.models.repository import Repository
+from oyProjectManager.models.repository import get_repository
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -145,6 +146,9 @@ class Maya(EnvironmentBase):
             type='mayaAscii'
         )
 
+        # store the file size and date
+        version.update_file_info()
+
         # update the reference list
         self.update_references_list(version)
 
@@ -168,6 +172,9 @@ class Maya(EnvironmentBase):
         # set the extension to ma by default
         version.extension = '.ma'
 
+        # reserve the version number before the file is written
+        version.allocate()
+
         # create the folder if it doesn't exists
         utils.createFolder(version.path)
 
@@ -179,6 +186,9 @@ class Maya(EnvironmentBase):
         # export the file
         pm.exportSelected(version.full_path, type='mayaAscii')
 
+        # store the file size and date
+        version.update_file_info()
+
         # save the version
         version.save()
 
@@ -264,7 +274,7 @@ class Maya(EnvironmentBase):
         # use the file name without extension as the namespace
         namespace = os.path.basename(version.filename)
 
-        repo = Repository()
+        repo = get_repository()
 
         workspace_path = pm.workspace.path
 
@@ -653,17 +663,10 @@ class Maya(EnvironmentBase):
         tuple
         """
 
-        # get all the valid version references
-        version_tuple_list = self.get_referenced_versions()
-
-        to_be_updated_list = []
-
-        for version_tuple in version_tuple_list:
-            version = version_tuple[0]
-
-            if not version.is_latest_published_version():
-                # add version to the update list
-                to_be_updated_list.append(version_tuple)
+        # get all the valid version references which are not the latest
+        # published versions
+        to_be_updated_list = \
+            super(Maya, self).check_referenced_versions()
 
         # sort the list according to full_path
         return sorted(to_be_updated_list, key=lambda x: x[2])
@@ -700,30 +703,16 @@ class Maya(EnvironmentBase):
 
             refs_and_paths.append((reference, temp_version_full_path))
 
-        # sort them according to path
-        # to make same paths together
-
-        refs_and_paths = sorted(refs_and_paths, None, lambda x: x[1])
-
-        prev_version = None
-        prev_full_path = ''
+        # resolve all the paths at once
+        versions = self.get_versions_from_full_paths(
+            [full_path for reference, full_path in refs_and_paths]
+        )
 
         for reference, full_path in refs_and_paths:
-            if full_path == prev_full_path:
-                # directly append the version to the list
-                valid_versions.append(
-                    (prev_version, reference, prev_full_path)
-                )
-            else:
-                # try to get a version with the given path
-                temp_version = self.get_version_from_full_path(full_path)
-
-                if temp_version:
-                    # TODO: don't use the full_path here, it can be get from version instance itself
-                    valid_versions.append((temp_version, reference, full_path))
-
-                    prev_version = temp_version
-                    prev_full_path = full_path
+            version = versions[full_path]
+            if version:
+                # TODO: don't use the full_path here, it can be get from version instance itself
+                valid_versions.append((version, reference, full_path))
 
         # return a sorted list
         return sorted(valid_versions, None, lambda x: x[2])
@@ -749,7 +738,7 @@ class Maya(EnvironmentBase):
         """update versions to the latest version
         """
 
-        repo = Repository()
+        repo = get_repository()
         repo_env_key = "$" + conf.repository_env_key
 
         previous_version_full_path = ''
@@ -997,7 +986,7 @@ class Maya(EnvironmentBase):
         logger.debug("replacing paths with mode: %i" % mode)
 
         # create a repository
-        repo = Repository()
+        repo = get_repository()
         repo_env_key = "$" + conf.repository_env_key
 
         workspace_path = pm.workspace.path
@@ -1100,37 +1089,28 @@ class Maya(EnvironmentBase):
     
     def create_workspace_file(self, path):
         """creates the workspace.mel at the given path
+        
+        .. versionchanged:: 0.2.5.4
+           The file is not written again if it already has the same content.
         """
-        content = conf.maya_workspace_file_content
-
-        # check if there is a workspace.mel at the given path
-        full_path = os.path.join(path, "workspace.mel")
-
-        #if not os.path.exists(full_path):
-        try:
-            os.makedirs(
-                os.path.dirname(full_path)
-            )
-        except OSError:
-            # dir exists
-            pass
-
-        workspace_file = file(full_path, "w")
-        workspace_file.write(content)
-        workspace_file.close()
+        maya_workspace.get_provisioner().write_file(
+            path, conf.maya_workspace_file_content
+        )
 
     def create_workspace_folders(self, path):
         """creates the workspace folders
+        
+        .. versionchanged:: 0.2.5.4
+           The same folders of the file rules are created once and only the
+           missing folders are created.
+        
         :param path: the root of the workspace
+        :returns: :class:`~oyProjectManager.utils.structure.StructureReport`
         """
-        for key in pm.workspace.fileRules:
-            rule_path = pm.workspace.fileRules[key]
-            full_path = os.path.join(path, rule_path)
-            print full_path
-            try:
-                os.makedirs(
-                    full_path
-                )
-            except OSError:
-                # dir exists
-                pass
+        file_rules = dict(
+            (key, pm.workspace.fileRules[key])
+            for key in pm.workspace.fileRules
+        )
+        return maya_workspace.get_provisioner().create_folders(
+            path, file_rules
+        )
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Maya workspace provisioning.
+
+Every :meth:`~oyProjectManager.environments.mayaEnv.Maya.save_as` needs a
+``workspace.mel`` file and the folders of the workspace file rules, but they
+rarely change between the saves. The :class:`.WorkspaceProvisioner` writes the
+``workspace.mel`` only if its content is changed, creates the unique folders
+of the file rules only once per workspace (the file rules have a lot of
+duplicates) and remembers the provisioned workspaces for
+:confval:`maya_workspace_cache_ttl` seconds::
+
+  from oyProjectManager.environments import maya_workspace
+
+  provisioner = maya_workspace.get_provisioner()
+  provisioner.write_file(workspace_path, conf.maya_workspace_file_content)
+  provisioner.create_folders(workspace_path, {"images": "images/"})
+
+This module doesn't need Maya, the file rules are given as a dictionary.
+
+.. versionadded:: 0.2.5.4
+"""
+
+import hashlib
+import os
+import threading
+
+from oyProjectManager import conf
+from oyProjectManager import utils
+from oyProjectManager.utils import cache, structure
+
+# create a logger
+import logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+WORKSPACE_FILE_NAME = "workspace.mel"
+
+
+def _encode(content):
+    """returns the bytes of the given workspace file content
+    """
+    if isinstance(content, unicode):
+        content = content.encode("utf-8")
+    return content
+
+
+def content_hash(content):
+    """Returns the md5 hash of the given workspace file content
+    """
+    return hashlib.md5(_encode(content)).hexdigest()
+
+
+def rule_folders(path, file_rules):
+    """Returns the sorted list of the unique folders of the given file rules.
+
+    :param str path: The workspace path.
+
+    :param file_rules: A dictionary of the file rule names to the paths
+      relative to the workspace, like ``pm.workspace.fileRules``.
+
+    :returns: list of str
+    """
+    folders = set()
+    for rule_path in file_rules.values():
+        if not rule_path:
+            continue
+        folders.add(os.path.normpath(os.path.join(path, rule_path)))
+    return sorted(folders)
+
+
+class WorkspaceProvisioner(object):
+    """Creates the workspace files and folders only if they are not already
+    created.
+
+    :param ttl: The time in seconds that the provisioned workspaces are
+      remembered. The default is :confval:`maya_workspace_cache_ttl`.
+
+    :param max_size: The maximum number of the remembered workspaces.
+    """
+
+    def __init__(self, ttl=None, max_size=1024):
+        if ttl is None:
+            ttl = conf.maya_workspace_cache_ttl
+        # workspace file path: content hash
+        self._files = cache.TTLStorage(ttl, max_size)
+        # workspace path: frozenset of the created folders
+        self._folders = cache.TTLStorage(ttl, max_size)
+
+    def write_file(self, path, content):
+        """Writes the ``workspace.mel`` file to the given workspace path if
+        it doesn't have the given content.
+
+        :returns: True if the file is written
+        """
+        full_path = os.path.join(path, WORKSPACE_FILE_NAME)
+        new_hash = content_hash(content)
+
+        found, old_hash = self._files.get(full_path)
+        if found and old_hash == new_hash:
+            return False
+
+        # reading the file is cheaper than writing it
+        try:
+            with open(full_path, "rb") as f:
+                old_hash = content_hash(f.read())
+        except IOError:
+            old_hash = None
+
+        if old_hash != new_hash:
+            logger.debug("writing %s" % full_path)
+            utils.mkdir(path)
+            # in binary mode, so the file is byte by byte the same with the
+            # hashed content on every operating system
+            with open(full_path, "wb") as f:
+                f.write(_encode(content))
+
+        self._files.set(full_path, new_hash)
+        return old_hash != new_hash
+
+    def create_folders(self, path, file_rules, worker_count=None):
+        """Creates the missing folders of the given file rules.
+
+        The folders which are created or found before for the same workspace
+        are not checked again.
+
+        :param str path: The workspace path.
+
+        :param file_rules: A dictionary of the file rule names to the paths
+          relative to the workspace.
+
+        :param int worker_count: The number of the threads, see
+          :func:`oyProjectManager.utils.structure.materialize`.
+
+        :returns: :class:`~oyProjectManager.utils.structure.StructureReport`
+        """
+        key = os.path.normpath(path)
+        folders = rule_folders(key, file_rules)
+
+        found, provisioned = self._folders.get(key)
+        if not found:
+            provisioned = frozenset()
+
+        missing = [folder for folder in folders if folder not in provisioned]
+        if not missing:
+            report = structure.StructureReport()
+            report.existing = folders
+            return report
+
+        report = structure.materialize(missing, root=key,
+                                       worker_count=worker_count)
+
+        self._folders.set(
+            key, provisioned.union(missing).difference(report.failed)
+        )
+        return report
+
+    def invalidate(self, path=None):
+        """Forgets the given workspace, or all of them if the path is None, so
+        its file and folders are checked again
+        """
+        if path is None:
+            self._files.invalidate()
+            self._folders.invalidate()
+            structure.get_cache().invalidate()
+        else:
+            self._files.invalidate(os.path.join(path, WORKSPACE_FILE_NAME))
+            self._folders.invalidate(os.path.normpath(path))
+            structure.get_cache().invalidate_tree(path)
+
+
+_provisioner = None
+_provisioner_lock = threading.Lock()
+
+
+def get_provisioner():
+    """Returns the WorkspaceProvisioner which is shared in this process
+    """
+    global _provisioner
+    with _provisioner_lock:
+        if _provisioner is None:
+            _provisioner = WorkspaceProvisioner()
+        return _provisioner
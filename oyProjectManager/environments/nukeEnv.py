@@ -72,6 +72,9 @@ class Nuke(EnvironmentBase):
         
         nuke.scriptSaveAs(version.full_path)
         
+        # store the file size and date
+        version.update_file_info()
+        
         return True
     
     def export_as(self, version):
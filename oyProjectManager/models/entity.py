@@ -6,20 +6,37 @@
 
 from exceptions import TypeError
 import os
-import jinja2
+import threading
 from sqlalchemy import UniqueConstraint, Column, String, Integer, ForeignKey
 from sqlalchemy.ext.declarative import synonym_for
 from sqlalchemy.orm import relationship, validates, backref
+from sqlalchemy.orm.util import identity_key
 from oyProjectManager import conf
+from oyProjectManager import db
 from oyProjectManager.db import Base
+from oyProjectManager.utils import templates
 
-from oyProjectManager.models.version import Version
+from oyProjectManager.models.version import Version, IN_CLAUSE_CHUNK_SIZE
 
 # create a logger
 import logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# the process local memo of the Version ids, keyed by the (path, filename)
+# values stored in the database
+_version_ids = {}
+_version_ids_lock = threading.Lock()
+
+
+def clear_version_path_memo():
+    """Clears the process local memo which is used by
+    :meth:`.EnvironmentBase.get_versions_from_full_paths` to find the already
+    loaded Versions without querying the database.
+    """
+    with _version_ids_lock:
+        _version_ids.clear()
+
 
 class VersionableBase(Base):
     """A base class for :class:`~oyProjectManager.models.shot.Shot` and
@@ -122,8 +139,8 @@ class VersionableBase(Base):
         path_template = ''
         filename_template = ''
         if isinstance(self, Asset):
-            path_template = jinja2.Template(conf.asset_thumbnail_path)
-            filename_template = jinja2.Template(conf.asset_thumbnail_filename)
+            path_template = conf.asset_thumbnail_path
+            filename_template = conf.asset_thumbnail_filename
 
             template_vars.update(
                 {
@@ -133,8 +150,8 @@ class VersionableBase(Base):
                 }
             )
         elif isinstance(self, Shot):
-            path_template = jinja2.Template(conf.shot_thumbnail_path)
-            filename_template = jinja2.Template(conf.shot_thumbnail_filename)
+            path_template = conf.shot_thumbnail_path
+            filename_template = conf.shot_thumbnail_filename
 
             template_vars.update(
                 {
@@ -146,8 +163,8 @@ class VersionableBase(Base):
             )
 
         # render the templates
-        path = path_template.render(**template_vars)
-        filename = filename_template.render(**template_vars)
+        path = templates.render(path_template, **template_vars)
+        filename = templates.render(filename_template, **template_vars)
 
         # the path should be $REPO relative
         thumbnail_full_path = os.path.join(
@@ -341,19 +358,81 @@ class EnvironmentBase(object):
 
         :return: :class:`~oyProjectManager.models.version.Version`
         """
+        return self.get_versions_from_full_paths([full_path])[full_path]
 
-        path, filename = os.path.split(full_path)
-        path = self.trim_server_path(path)
-
-        logger.debug('path: %s' % path)
+    def get_versions_from_full_paths(self, full_paths):
+        """Finds the Version instances from the given full_path values.
 
-        # try to get a version with that info
-        version = Version.query()\
-            .filter(Version.path==path)\
-            .filter(Version.filename==filename)\
-            .first()
-
-        return version
+        It is the batched version of
+        :meth:`~oyProjectManager.models.entity.EnvironmentBase.get_version_from_full_path`
+        which resolves all the given paths with one query (per
+        IN_CLAUSE_CHUNK_SIZE paths) over the ``ix_Versions_path_filename``
+        index. The ids of the found Versions are kept in a process local memo,
+        so the Versions which are already loaded in the current session are
+        returned without querying the database at all.
+
+        :param full_paths: A list of full paths.
+
+        :return: A dictionary with the given full paths as keys and the
+          :class:`~oyProjectManager.models.version.Version` instances, or None
+          if there is no Version with that full path, as values.
+
+        .. versionadded:: 0.2.5.4
+        """
+        # full_path: (path, filename)
+        keys = {}
+        for full_path in full_paths:
+            if full_path not in keys:
+                path, filename = os.path.split(full_path)
+                keys[full_path] = (self.trim_server_path(path), filename)
+
+        logger.debug('keys: %s' % keys)
+
+        # (path, filename): version
+        found = {}
+
+        # get the ones which are already in the session
+        with _version_ids_lock:
+            version_ids = [
+                (key, _version_ids.get(key)) for key in set(keys.values())
+            ]
+
+        identity_map = db.session.identity_map
+        for key, version_id in version_ids:
+            if version_id is None:
+                continue
+            version = identity_map.get(identity_key(Version, version_id))
+            # do not use the expired ones, it will query the db one by one
+            if version is not None \
+                    and "_path" in version.__dict__ \
+                    and "_filename" in version.__dict__ \
+                    and (version._path, version._filename) == key:
+                found[key] = version
+
+        # query the rest
+        missing_keys = sorted(set(keys.values()) - set(found.keys()))
+        for i in range(0, len(missing_keys), IN_CLAUSE_CHUNK_SIZE):
+            chunk = missing_keys[i:i + IN_CLAUSE_CHUNK_SIZE]
+            versions = db.session.query(Version)\
+                .filter(Version.path.in_(set(key[0] for key in chunk)))\
+                .filter(Version.filename.in_(set(key[1] for key in chunk)))\
+                .order_by(Version.id)\
+                .all()
+
+            chunk = set(chunk)
+            for version in versions:
+                key = (version._path, version._filename)
+                # the path and filename filters are matched separately
+                if key in chunk and key not in found:
+                    found[key] = version
+
+        with _version_ids_lock:
+            for key, version in found.items():
+                _version_ids[key] = version.id
+
+        return dict(
+            (full_path, found.get(key)) for full_path, key in keys.items()
+        )
 
     def get_current_version(self):
         """Returns the current Version instance from the environment.
@@ -394,9 +473,37 @@ class EnvironmentBase(object):
     def check_referenced_versions(self):
         """Checks the referenced versions
 
-        returns list of asset objects
+        Returns the items of the
+        :meth:`~oyProjectManager.models.entity.EnvironmentBase.get_referenced_versions`
+        list which are not the latest published versions. The items can be
+        :class:`~oyProjectManager.models.version.Version` instances or tuples
+        where the first element is the Version instance.
+
+        The latest published versions of all the references are found with
+        one query.
+
+        :returns: list
         """
-        raise NotImplemented
+        referenced_versions = self.get_referenced_versions()
+
+        versions = []
+        for item in referenced_versions:
+            if isinstance(item, tuple):
+                item = item[0]
+            versions.append(item)
+
+        latest_published_versions = \
+            Version.latest_published_versions(versions)
+
+        to_be_updated_list = []
+        for item, version, latest_published_version in \
+                zip(referenced_versions, versions, latest_published_versions):
+            # it is the same check with Version.is_latest_published_version()
+            if not version.is_published or \
+               version != latest_published_version:
+                to_be_updated_list.append(item)
+
+        return to_be_updated_list
 
     def get_referenced_versions(self):
         """Returns the :class:`~oyProjectManager.models.version.Version`
@@ -3,11 +3,71 @@
 # 
 # This module is part of oyProjectManager and is released under the BSD 2
 # License: http://www.opensource.org/licenses/BSD-2-Clause
+import os
+import re
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm.mapper import validates
 
+from oyProjectManager import scanners
 from oyProjectManager.db.declarative import Base
 
+# matches the file sequence file names, "render.%04d.exr 1-100 105"
+SEQUENCE_RE = re.compile(
+    r"^(?P<pattern>.*(?:%0?[0-9]*d|#+)[^ ]*) "
+    r"(?P<ranges>-?[0-9]+(?:--?[0-9]+)?(?: -?[0-9]+(?:--?[0-9]+)?)*)$"
+)
+
+# splits a file name to head, frame number and tail, "render.", "0001",
+# ".exr"
+FRAME_NUMBER_RE = re.compile(r"^(.*?)([0-9]+)(\.[^0-9]*)$")
+
+
+def parse_frame_ranges(ranges):
+    """Returns the sorted list of the frame numbers of the given frame ranges.
+    
+    :param str ranges: Space separated frame ranges, like "1-10 12 14-20"
+    
+    :returns: list of int
+    """
+    frames = set()
+    for range_ in ranges.split():
+        match = re.match(r"^(-?[0-9]+)(?:-(-?[0-9]+))?$", range_)
+        if not match:
+            raise ValueError("%s is not a valid frame range" % range_)
+        start, end = match.groups()
+        start = int(start)
+        end = start if end is None else int(end)
+        frames.update(xrange(start, end + 1))
+    return sorted(frames)
+
+
+def format_frame_ranges(frames):
+    """Returns the compact representation of the given frame numbers.
+    
+    [1, 2, 3, 4, 10, 12, 13] is formatted as "1-4 10 12-13"
+    
+    :param frames: The list of frame numbers.
+    
+    :returns: str
+    """
+    ranges = []
+    start = end = None
+    for frame in sorted(set(frames)):
+        if end is not None and frame == end + 1:
+            end = frame
+            continue
+        if start is not None:
+            ranges.append((start, end))
+        start = end = frame
+    if start is not None:
+        ranges.append((start, end))
+    
+    return " ".join(
+        str(start) if start == end else "%s-%s" % (start, end)
+        for start, end in ranges
+    )
+
+
 class FileLink(Base):
     """Manages file links in :class:`~oyProjectManager.models.version.Version` instances.
     
@@ -38,6 +98,19 @@ class FileLink(Base):
     FileLink.filename attribute can be a sequence of files with the correct
     file name format, which is defined in studios config.py file.
     
+    .. versionadded:: 0.2.5.4
+       
+       File sequences are first-class FileLinks. A FileLink with a file name
+       in the default ``sequence_format`` ("%h%p%t %R"), like
+       "render.%04d.exr 1-100 105", holds a whole frame sequence in one row.
+       The :attr:`.pattern`, :attr:`.frames`, :attr:`.holes` and the other
+       sequence attributes are parsed from the file name, use
+       :meth:`.from_frames` to create one and :meth:`.find_sequences` to
+       create the FileLinks of the all sequences in a folder with one listing
+       of the folder::
+         
+         version.outputs.extend(FileLink.find_sequences(render_path, "Render"))
+    
     :param path: The path of this FileLink instance, it is $REPO relative.
     
     :param filename: The filename of this FileLink instance.
@@ -96,6 +169,252 @@ class FileLink(Base):
                             "not %s" % type_.__class__.__name__)
         
         return type_
+    
+    @property
+    def is_sequence(self):
+        """Returns True if this FileLink is a file sequence
+        
+        .. versionadded:: 0.2.5.4
+        """
+        return SEQUENCE_RE.match(self.filename) is not None
+    
+    @property
+    def pattern(self):
+        """The file name pattern of the sequence, like "render.%04d.exr", or
+        the file name itself if this is not a sequence.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        match = SEQUENCE_RE.match(self.filename)
+        if match:
+            return match.group("pattern")
+        return self.filename
+    
+    @property
+    def frame_ranges(self):
+        """The frame ranges of the sequence, like "1-100 105", an empty
+        string if this is not a sequence.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        match = SEQUENCE_RE.match(self.filename)
+        if match:
+            return match.group("ranges")
+        return ""
+    
+    @property
+    def frames(self):
+        """The sorted list of the frame numbers of the sequence
+        
+        .. versionadded:: 0.2.5.4
+        """
+        return parse_frame_ranges(self.frame_ranges)
+    
+    @property
+    def start_frame(self):
+        """The first frame of the sequence, None if this is not a sequence
+        
+        .. versionadded:: 0.2.5.4
+        """
+        frames = self.frames
+        if frames:
+            return frames[0]
+    
+    @property
+    def end_frame(self):
+        """The last frame of the sequence, None if this is not a sequence
+        
+        .. versionadded:: 0.2.5.4
+        """
+        frames = self.frames
+        if frames:
+            return frames[-1]
+    
+    @property
+    def holes(self):
+        """The sorted list of the frame numbers which are missing between the
+        start and end frames of the sequence.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        frames = self.frames
+        if not frames:
+            return []
+        return sorted(set(xrange(frames[0], frames[-1] + 1)) - set(frames))
+    
+    @property
+    def full_path(self):
+        """The absolute path of the file or the sequence pattern, the
+        environment variables in the path are expanded.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        return os.path.expandvars(
+            os.path.join(self.path, self.pattern)
+        ).replace("\\", "/")
+    
+    def frame_file_name(self, frame):
+        """Returns the file name of the given frame of the sequence
+        
+        .. versionadded:: 0.2.5.4
+        """
+        def replace(match):
+            placeholder = match.group(0)
+            if placeholder.startswith("#"):
+                return "%0*d" % (len(placeholder), frame)
+            return placeholder % frame
+        
+        return scanners.FRAME_PATTERN_RE.sub(replace, self.pattern)
+    
+    @property
+    def full_paths(self):
+        """The list of the absolute paths of the all files of this FileLink,
+        the files are not checked for existence.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        if not self.is_sequence:
+            return [self.full_path]
+        
+        path = os.path.dirname(self.full_path)
+        return [
+            path + "/" + self.frame_file_name(frame) for frame in self.frames
+        ]
+    
+    def existing_frames(self, listdir=os.listdir):
+        """Returns the sorted list of the frame numbers of the sequence which
+        exist on the disk. The folder is listed once instead of checking every
+        frame.
+        
+        :param listdir: The function which lists the folders, a caching one
+          can be given to list every folder once while checking many
+          FileLinks.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        path, file_name = os.path.split(self.full_path)
+        try:
+            names = listdir(path)
+        except OSError:
+            return []
+        
+        regex = scanners.frame_pattern_regex(file_name)
+        frames = set()
+        for name in names:
+            match = regex.match(name)
+            if match:
+                frames.add(int(match.group(1)))
+        
+        return sorted(frames.intersection(self.frames))
+    
+    def missing_frames(self, listdir=os.listdir):
+        """Returns the sorted list of the frame numbers of the sequence which
+        do not exist on the disk.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        return sorted(
+            set(self.frames) - set(self.existing_frames(listdir))
+        )
+    
+    def exists(self, listdir=os.listdir):
+        """Returns True if all the files of this FileLink exist.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        if not self.is_sequence:
+            return os.path.isfile(self.full_path)
+        return not self.missing_frames(listdir)
+    
+    @classmethod
+    def from_frames(cls, path, pattern, frames, type=""):
+        """Creates a file sequence FileLink.
+        
+        :param str path: The path of the sequence.
+        
+        :param str pattern: The file name pattern of the sequence, like
+          "render.%04d.exr" or "render.####.exr".
+        
+        :param frames: The list of the frame numbers.
+        
+        :param str type: The type of the FileLink.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        if not scanners.FRAME_PATTERN_RE.search(pattern):
+            raise ValueError("%s is not a file sequence pattern" % pattern)
+        
+        if not frames:
+            raise ValueError("a file sequence should have at least one frame")
+        
+        return cls(
+            filename="%s %s" % (pattern, format_frame_ranges(frames)),
+            path=path,
+            type=type
+        )
+    
+    @classmethod
+    def find_sequences(cls, path, type="", listdir=os.listdir):
+        """Returns the FileLinks of the files in the given folder, the frames
+        of the same sequence are collected in one FileLink.
+        
+        The folder is listed once and the files are not checked one by one,
+        so the FileLinks of a folder with thousands of rendered frames are
+        created quickly.
+        
+        :param str path: The path of the folder, it is used as the path of the
+          FileLinks as it is, and expanded to list the folder.
+        
+        :param str type: The type of the FileLinks.
+        
+        :returns: A list of FileLinks sorted by their file names.
+        
+        .. versionadded:: 0.2.5.4
+        """
+        try:
+            names = listdir(os.path.expandvars(path))
+        except OSError:
+            return []
+        
+        # (head, tail): [(frame, number of digits, file name)]
+        groups = {}
+        files = []
+        for name in names:
+            match = FRAME_NUMBER_RE.match(name)
+            if not match:
+                files.append(name)
+                continue
+            head, digits, tail = match.groups()
+            groups.setdefault((head, tail), []).append(
+                (int(digits), len(digits), name)
+            )
+        
+        links = []
+        for (head, tail), members in groups.items():
+            if len(members) == 1:
+                files.append(members[0][2])
+                continue
+            
+            padding = min(length for frame, length, name in members)
+            if padding > 1:
+                placeholder = "%%0%sd" % padding
+            else:
+                placeholder = "%d"
+            
+            links.append(
+                cls.from_frames(
+                    path,
+                    head + placeholder + tail,
+                    [frame for frame, length, name in members],
+                    type
+                )
+            )
+        
+        for name in files:
+            if os.path.isfile(os.path.join(os.path.expandvars(path), name)):
+                links.append(cls(filename=name, path=path, type=type))
+        
+        return sorted(links, key=lambda x: x.filename)
 
 #class Reference(Base):
 #    """FileLinks with reference types.
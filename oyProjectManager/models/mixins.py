@@ -152,6 +152,43 @@ class IOMixin(object):
                                     output.__class__.__name__ ))
         return output
 
+    def register_outputs(self, path, type=""):
+        """Adds the files in the given folder to the outputs, the frames of
+        a sequence (a render pass) are added as one
+        :class:`~oyProjectManager.models.link.FileLink`.
+
+        The folder is listed once. The sequences which are already in the
+        outputs are updated with the new frame ranges instead of adding them
+        again, so a render folder can be registered again while it is being
+        rendered.
+
+        :param str path: The path of the folder.
+
+        :param str type: The type of the new FileLinks.
+
+        :returns: The list of the new or updated FileLinks.
+
+        .. versionadded:: 0.2.5.4
+        """
+        from oyProjectManager.models.link import FileLink
+
+        existing_links = dict(
+            ((link.path, link.pattern), link) for link in self.outputs
+        )
+
+        links = []
+        for link in FileLink.find_sequences(path, type):
+            existing_link = existing_links.get((link.path, link.pattern))
+            if existing_link is not None:
+                if existing_link.filename != link.filename:
+                    existing_link.filename = link.filename
+                links.append(existing_link)
+            else:
+                self.outputs.append(link)
+                links.append(link)
+
+        return links
+
 
 #class ReferenceMixin(object):
 #    """Adds the ability to hold references to the mixed in class.
@@ -6,15 +6,15 @@
 
 import os
 import re
-import jinja2
 from sqlalchemy import Column, Integer, Boolean, String, Float, ForeignKey
 from sqlalchemy.ext.declarative import synonym_for
 from sqlalchemy.orm import reconstructor, relationship, validates
 from oyProjectManager.db import Base
 from oyProjectManager import db
 from oyProjectManager.models.auth import Client
-from oyProjectManager.models.repository import Repository
+from oyProjectManager.models.repository import Repository, get_repository
 from oyProjectManager import utils
+from oyProjectManager.utils import structure
 
 # create a logger
 import logging
@@ -148,7 +148,7 @@ class Project(Base):
                 logger.debug("db.session is None, setting up a new session")
                 db.setup()
             
-            proj_db = Project.query().filter_by(name=name).first()
+            proj_db = db.get_cached(Project, name=name)
             
             if proj_db is not None:
                 # return the database instance
@@ -182,7 +182,7 @@ class Project(Base):
         from oyProjectManager import conf
         self.conf = conf
         
-        self.repository = Repository()
+        self.repository = get_repository()
         
         self.name = name
 
@@ -220,7 +220,7 @@ class Project(Base):
         """init when loaded from the db
         """
         
-        self.repository = Repository()
+        self.repository = get_repository()
         
         from oyProjectManager import conf
         self.conf = conf
@@ -351,31 +351,60 @@ class Project(Base):
             db.session.add(self)
         
         db.session.commit()
+        
+        db.identity_cache.invalidate(Project)
+        Repository.project_names.invalidate(self.repository)
     
-    def create(self):
+    def create(self, sequences=None, assets=None, refresh=False):
         """Creates the project directory structure and saves the project, thus
         creates the ``.metadata.db`` file in the repository.
+        
+        Only the missing folders are created, see
+        :func:`oyProjectManager.utils.structure.materialize`.
+        
+        :param sequences: A list of
+          :class:`~oyProjectManager.models.sequence.Sequence` instances to
+          create the folders of only them. The default is None which creates
+          the folders of all the Sequences.
+        
+        :param assets: A list of
+          :class:`~oyProjectManager.models.asset.Asset` instances to create
+          the folders of only them. The default is None which creates the
+          folders of all the Assets.
+        
+        :param bool refresh: If True, the cached folder listings of the
+          project are dropped first, so the folders which are deleted by other
+          programs in the last :confval:`structure_cache_ttl` seconds are
+          created again. Use it when the user asks for the structure
+          explicitly.
+        
+        :returns: :class:`~oyProjectManager.utils.structure.StructureReport`
+        
+        .. versionchanged:: 0.2.5.4
+           Only the missing folders are created and they are created in
+           parallel, the ``sequences``, ``assets`` and ``refresh`` arguments
+           are added and a report is returned.
         """
         
         # check if the folder already exists
         utils.mkdir(self.full_path)
-
+        
         # create the structure if it is not present
-        rendered_structure = jinja2.Template(self.structure).\
-                             render(project=self)
+        scope = self
+        if sequences is not None or assets is not None:
+            scope = _StructureScope(self, sequences, assets)
         
-        folders = rendered_structure.split("\n")
+        if refresh:
+            structure.get_cache().invalidate_tree(self.full_path)
         
-        if len(folders):
-            for folder in rendered_structure.split("\n"):
-                try:
-                    utils.createFolder(folder.strip())
-                except OSError:
-                    pass
+        folders = structure.render_folders(self.structure, project=scope)
+        report = structure.materialize(folders, root=self.full_path)
         
         self._exists = True
         
         self.save()
+        
+        return report
     
     @property
     def path(self):
@@ -420,3 +449,22 @@ class Project(Base):
         """
         from oyProjectManager import Asset
         return Asset.query().filter(Asset.project==self).all()
+
+
+class _StructureScope(object):
+    """exposes only the given Sequences and Assets of a Project to the
+    structure template, all of them are exposed if they are None and the
+    other attributes are read from the Project
+    """
+    
+    def __init__(self, project, sequences=None, assets=None):
+        self._project = project
+        if sequences is None:
+            sequences = project.sequences
+        if assets is None:
+            assets = project.assets
+        self.sequences = sequences
+        self.assets = assets
+    
+    def __getattr__(self, name):
+        return getattr(self._project, name)
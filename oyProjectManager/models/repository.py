@@ -6,7 +6,8 @@
 
 from exceptions import AttributeError, RuntimeError, ValueError, IOError
 import os
-from oyProjectManager import utils
+import threading
+from oyProjectManager import db, utils
 from oyProjectManager.utils import cache
 
 # create a logger
@@ -14,6 +15,16 @@ import logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# the last scanned child folders of the folders, {path: (mtime, folders)},
+# shared by all the Repository instances
+_folder_scans = {}
+_folder_scans_lock = threading.Lock()
+
+# the Repository instance shared in this process, see get_repository()
+_repository = None
+_repository_key = None
+_repository_lock = threading.Lock()
+
 
 # TODO: Remove Repository Class, it is useless
 
@@ -111,42 +122,121 @@ class Repository(object):
             raise ValueError("The %s environment variable can not be an "
                              "empty string" % self.conf.repository_env_key)
     
-#    @property
-#    @bCache.cache()
-    @cache.CachedMethod
+    @cache.cached(ttl=60, max_size=1)
     @property
     def project_names(self):
         """returns a list of project names
+        
+        The list is cached for 60 seconds, use
+        ``Repository.project_names.invalidate(repo)`` to update it earlier
+        and ``Repository.project_names.stats(repo)`` to get the cache hits
+        and misses.
+        
+        .. versionchanged:: 0.2.5.4
+           The project names are read from the Projects table instead of
+           scanning the repository, see :meth:`.reconcile_projects` to
+           compare them with the folders in the repository.
         """
         self.update_project_list()
         return self._project_names
     
     def update_project_list(self):
-        """updates the project list variable
+        """updates the project list variable from the Projects table
         """
         logger.debug("updating projects list")
         
+        # there is a circular import between Project and Repository
+        from oyProjectManager.models.project import Project
+        
+        if db.session is None:
+            logger.debug("there is no session, creating a new one")
+            db.setup()
+        
+        self._project_names = sorted(
+            code for (code,) in db.query(Project.code)
+        )
+    
+    def scan_project_folders(self):
+        """Returns the sorted list of the child folder names of the
+        repository.
+        
+        The scan is incremental, the folders are listed again only when the
+        modification time of the repository folder is changed since the last
+        scan, and only the new entries are checked for being a folder.
+        
+        :returns: list of str
+        """
+        path = self.server_path
+        
         try:
-            self._project_names = []
-            child_folders = utils.getChildFolders(self.server_path)
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            logger.warning("server path doesn't exists, %s" % path)
+            return []
+        
+        with _folder_scans_lock:
+            last_mtime, last_folders = _folder_scans.get(path, (None, []))
+        
+        if mtime == last_mtime:
+            return list(last_folders)
+        
+        known_folders = set(last_folders)
+        folders = []
+        for name in os.listdir(path):
+            if name in known_folders \
+               or os.path.isdir(os.path.join(path, name)):
+                folders.append(name)
+        folders.sort()
+        
+        with _folder_scans_lock:
+            _folder_scans[path] = (mtime, folders)
+        
+        return list(folders)
+    
+    def reconcile_projects(self, background=False, callback=None):
+        """Compares the Projects in the database with the folders in the
+        repository.
+        
+        :param bool background: Do the filesystem scan in a background
+          thread and return the thread. The database is queried in the
+          current thread.
+        
+        :param callback: A callable which is called with the result of the
+          reconciliation, mostly useful in background mode.
+        
+        :returns: A tuple of two sorted lists, the names of the folders which
+          are not registered as a Project and the names of the Projects which
+          do not have a folder. Or the started ``threading.Thread`` instance
+          if ``background`` is True.
+        """
+        # query the database in the calling thread, the session should not
+        # be used from other threads
+        Repository.project_names.invalidate(self)
+        project_names = self.project_names
+        
+        def reconcile():
+            folders = set(self.scan_project_folders())
+            projects = set(project_names)
+            
+            unregistered = sorted(folders - projects)
+            missing = sorted(projects - folders)
             
-            for folder in child_folders:
-                
-                # check if the .metadata.db file exists under the folder
-                if os.path.exists(
-                    os.path.join(
-                        self.server_path,
-                        folder,
-                        self.conf.database_file_name
-                    )
-                ):
-                    # it should be a valid project
-                    self._project_names.append(folder)
+            for name in missing:
+                logger.warning("the folder of the Project %s doesn't exist in "
+                               "the repository" % name)
             
-            self._project_names.sort()
+            result = (unregistered, missing)
+            if callback is not None:
+                callback(result)
+            return result
+        
+        if not background:
+            return reconcile()
         
-        except IOError:
-            logger.warning("server path doesn't exists, %s" % self.server_path)
+        thread = threading.Thread(target=reconcile)
+        thread.daemon = True
+        thread.start()
+        return thread
     
     @property
     def server_path(self):
@@ -220,3 +310,73 @@ class Repository(object):
         
         return path.replace(self.server_path,
                             "$" + self.conf.repository_env_key)
+    
+    def to_server_path(self, path):
+        """Converts the given path, which can be written on any operating
+        system, to a path under the current server_path.
+
+        The paths starting with the ``windows_path``, ``linux_path`` or
+        ``osx_path`` of the ``repository`` config value or with the repository
+        environment variable are converted. If "/mnt/Projects/EXPER/Comp" is
+        given it will return "M:/JOBs/EXPER/Comp" under Windows if the
+        ``osx_path`` or ``linux_path`` is "/mnt/Projects" and the $REPO is
+        "M:/JOBs". The other paths are returned as they are, only the back
+        slashes are converted to forward slashes.
+
+        .. versionadded:: 0.2.5.4
+        """
+        path = path.replace("\\", "/")
+
+        env_key = self.conf.repository_env_key
+        # (prefix, is_case_sensitive)
+        prefixes = [("$" + env_key, True), ("${%s}" % env_key, True)]
+        for os_path, is_case_sensitive in [(self.windows_path, False),
+                                           (self.linux_path, True),
+                                           (self.osx_path, True)]:
+            if os_path:
+                prefixes.append(
+                    (os.path.expanduser(os_path).rstrip("/"),
+                     is_case_sensitive)
+                )
+
+        server_path = self.server_path.replace("\\", "/").rstrip("/")
+
+        # the longest prefix wins
+        for prefix, is_case_sensitive in \
+                sorted(prefixes, key=lambda x: len(x[0]), reverse=True):
+            path_start = path[:len(prefix)]
+            if not is_case_sensitive:
+                path_start = path_start.lower()
+                prefix = prefix.lower()
+
+            if path_start == prefix and path[len(prefix):len(prefix) + 1] \
+                    in ("", "/"):
+                return server_path + path[len(prefix):]
+
+        return path
+
+
+def get_repository():
+    """Returns the Repository instance which is shared in this process.
+    
+    A new instance is created only if the repository environment variable or
+    the ``repository`` config value is changed, so the environment is not
+    validated and the config is not parsed for every Project.
+    
+    .. versionadded:: 0.2.5.4
+    """
+    global _repository
+    global _repository_key
+    
+    from oyProjectManager import conf
+    
+    key = (
+        os.environ.get(conf.repository_env_key),
+        repr(conf.repository)
+    )
+    
+    with _repository_lock:
+        if _repository is None or _repository_key != key:
+            _repository = Repository()
+            _repository_key = key
+        return _repository
@@ -92,8 +92,7 @@ class Sequence(Base):
             name = Sequence._condition_name(name)
             
             # now get it from the database
-            seq_db = db.session.query(Sequence).\
-                filter_by(name=name).first()
+            seq_db = db.get_cached(Sequence, name=name)
             
             if seq_db is not None:
                 logger.debug("found the sequence in the database")
@@ -146,12 +145,21 @@ class Sequence(Base):
 #        self.save()
 #        self.project.create()
 
-    def create(self):
+    def create(self, refresh=False):
         """creates the sequence structure
+        
+        .. versionchanged:: 0.2.5.4
+           Only the folders of this Sequence are checked and created.
+        
+        :param bool refresh: If True the cached folder listings are dropped
+          first, see :meth:`~oyProjectManager.models.project.Project.create`.
+        
+        :returns: :class:`~oyProjectManager.utils.structure.StructureReport`
         """
         
         # create the sequence structure by calling the self.project.create
-        self.project.create()
+        return self.project.create(sequences=[self], assets=[],
+                                   refresh=refresh)
     
     def save(self):
         """persists the sequence in the database
@@ -167,6 +175,8 @@ class Sequence(Base):
             db.session.add(self)
         
         db.session.commit()
+        
+        db.identity_cache.invalidate(Sequence)
     
     def add_shots(self, shot_range_formula):
         """adds new shots to the sequence
@@ -174,45 +184,64 @@ class Sequence(Base):
         shot_range_formula should be a range in on of the following format:
         #
         #,#
-        #-# (not supported anymore)
-        #,#-# (not supported anymore)
-        #,#-#,# (not supported anymore)
-        #-#,# (not supported anymore)
+        #-#
+        #,#-#
+        #,#-#,#
+        #-#,#
         etc.
-        """
         
-        ## for now consider the shot_range_formula as a string of range
-        ## do the hard work later
-        #
-        #new_shot_numbers = utils.uncompress_range(shot_range_formula)
-        #
-        ## convert the list to strings
-        #new_shot_numbers = map(str, new_shot_numbers)
+        The parts which are not a range of two integers (like "VFX91-3" or
+        "304_sb_0403_0040") are used as they are. All the new shots are
+        created in one transaction by
+        :meth:`~oyProjectManager.models.shot.Shot.bulk_create`, and a
+        ValueError is raised without creating any shot if any of them already
+        exists.
+        
+        :returns: list of the new :class:`~oyProjectManager.models.shot.Shot`
+          instances
+        
+        .. versionchanged:: 0.2.5.4
+           Ranges are supported again.
+        """
         
-        new_shot_numbers = shot_range_formula.split(",")
+        prefix = self.project.shot_number_prefix
         
-        new_shots = []
-        for shot_number in new_shot_numbers:
+        new_shot_numbers = []
+        for shot_number in shot_range_formula.split(","):
             logger.debug('shot_number: %s' % shot_number)
+            shot_number = shot_number.strip()
             
             # if the project.shot_number_prefix is not '' or None
             # the shot_number can not start with the project.shot_number_prefix
-            if self.project.shot_number_prefix != '' \
-                and self.project.shot_number_prefix is not None:
-                if shot_number.startswith(self.project.shot_number_prefix):
-                    # remove it
-                    shot_number = \
-                        shot_number[len(self.project.shot_number_prefix):]
-                    
-                    # if the shot_number starts with zeros ('0000') remove them
-                    shot_number = re.sub(r'^[0]+', '', shot_number)
+            parts = [self._remove_shot_number_prefix(part.strip(), prefix)
+                     for part in shot_number.split("-")]
             
-            # create a new shot instance
-            new_shots.append(Shot(self, shot_number))
+            if len(parts) == 2 and all(part.isdigit() for part in parts):
+                # a range like 5-8
+                new_shot_numbers.extend(
+                    map(str, utils.uncompress_range("-".join(parts)))
+                )
+            else:
+                new_shot_numbers.append(
+                    self._remove_shot_number_prefix(shot_number, prefix)
+                )
         
-        db.session.add_all(new_shots)
-        db.session.commit()
-
+        return Shot.bulk_create(self, new_shot_numbers)
+    
+    @classmethod
+    def _remove_shot_number_prefix(cls, shot_number, prefix):
+        """removes the given shot number prefix and the leading zeros coming
+        after it from the given shot number
+        """
+        if prefix != '' and prefix is not None:
+            if shot_number.startswith(prefix):
+                # remove it
+                shot_number = shot_number[len(prefix):]
+                
+                # if the shot_number starts with zeros ('0000') remove them
+                shot_number = re.sub(r'^[0]+', '', shot_number)
+        return shot_number
+    
     def add_alternative_shot(self, shot_number):
         """adds a new alternative to the given shot
         
@@ -6,6 +6,7 @@
 
 from exceptions import TypeError, ValueError
 import re
+import threading
 from sqlalchemy import UniqueConstraint, Column, Integer, ForeignKey, String
 from sqlalchemy.ext.declarative import synonym_for
 from sqlalchemy.orm import relationship, validates
@@ -18,6 +19,10 @@ import logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# holds the already queried shot numbers of the sequences in
+# Shot.bulk_create(), so the Shot.__init__ doesn't query them one by one
+_known_shot_numbers = threading.local()
+
 
 class Shot(VersionableBase):
     """The class that enables the system to manage shot data.
@@ -215,9 +220,9 @@ class Shot(VersionableBase):
         return self._duration
 
 
-    @validates("number")
-    def _validates_number(self, key, number):
-        """validates the given number value
+    @classmethod
+    def _format_number(cls, number):
+        """formats the given number value
         """
         
         if not isinstance(number, (int, str, unicode)):
@@ -238,18 +243,87 @@ class Shot(VersionableBase):
             raise ValueError("Shot.number is not in good format, please "
                              "supply something like 1, 2, 3A, 10B")
         
+        return number
+    
+    @validates("number")
+    def _validates_number(self, key, number):
+        """validates the given number value
+        """
+        
+        number = self._format_number(number)
+        
         # now check if the number is present for the current Sequence
-        shot_instance = db.session.query(Shot).\
-            filter(Shot.number==number).\
-            filter(Shot.sequence_id==self.sequence.id).\
-            first()
+        known_shot_numbers = getattr(_known_shot_numbers, "data", None)
+        if known_shot_numbers is not None:
+            # in Shot.bulk_create(), the numbers are already queried
+            exists = number in known_shot_numbers
+        else:
+            exists = db.session.query(Shot.number).\
+                filter(Shot.number==number).\
+                filter(Shot.sequence_id==self.sequence.id).\
+                first() is not None
         
-        if shot_instance is not None:
+        if exists:
             raise ValueError("Shot.number already exists for the given "
                              "sequence please give a unique shot code")
         
         return number
-
+    
+    @classmethod
+    def bulk_create(cls, sequence, numbers):
+        """Creates and saves new Shots with the given numbers in the given
+        Sequence.
+        
+        The existing shot numbers of the Sequence are checked with one query
+        and all the Shots are saved in one transaction. Nothing is created if
+        any of the numbers is not valid or already exists in the Sequence.
+        
+        :param sequence: The
+          :class:`~oyProjectManager.models.sequence.Sequence` instance.
+        
+        :param numbers: A list of shot numbers.
+        
+        :returns: list of :class:`~oyProjectManager.models.shot.Shot`
+          instances
+        """
+        
+        # format all the numbers first, so nothing is created for a bad one
+        formatted_numbers = []
+        added = set()
+        for number in numbers:
+            number = cls._format_number(number)
+            if number not in added:
+                added.add(number)
+                formatted_numbers.append(number)
+        
+        # flush the sequence and the shots created before
+        if sequence not in db.session:
+            db.session.add(sequence)
+        db.session.flush()
+        
+        existing_numbers = set(
+            number for (number,) in db.session.query(Shot.number).
+            filter(Shot.sequence_id==sequence.id)
+        )
+        
+        for number in formatted_numbers:
+            if number in existing_numbers:
+                raise ValueError("Shot.number already exists for the given "
+                                 "sequence please give a unique shot code")
+        
+        new_shots = []
+        _known_shot_numbers.data = existing_numbers
+        try:
+            for number in formatted_numbers:
+                new_shots.append(cls(sequence, number))
+        finally:
+            _known_shot_numbers.data = None
+        
+        db.session.add_all(new_shots)
+        db.session.commit()
+        
+        return new_shots
+    
     def save(self):
         """commits the shot to the database
         """
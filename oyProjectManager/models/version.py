@@ -4,25 +4,29 @@
 # This module is part of oyProjectManager and is released under the BSD 2
 # License: http://www.opensource.org/licenses/BSD-2-Clause
 
+import datetime
 import os
 import re
+import threading
 
 from copy import copy
 
-import jinja2
-
 from sqlalchemy import (UniqueConstraint, Column, Integer, ForeignKey, String,
-                        Boolean, Enum, Table)
+                        Boolean, Enum, Table, Index, func, and_, select,
+                        literal_column, BigInteger, Float, inspect, or_)
+from sqlalchemy.exc import IntegrityError, ResourceClosedError
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.declarative import synonym_for
 from sqlalchemy.ext.hybrid import Comparator, hybrid_property
-from sqlalchemy.orm import relationship, validates, synonym, backref
+from sqlalchemy.orm import (relationship, validates, synonym, backref,
+                            joinedload, aliased)
 from oyProjectManager import db
 from oyProjectManager import conf
 from oyProjectManager.db.declarative import Base
 from oyProjectManager.models.auth import User
 from oyProjectManager.models.errors import CircularDependencyError
 from oyProjectManager.models.mixins import IOMixin
+from oyProjectManager.utils import file_stats, templates
 
 # create a logger
 import logging
@@ -30,6 +34,27 @@ import logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
+# the number of times Version.allocate() tries to reserve a new version number
+# when another Version is saved with the same number in the meantime
+VERSION_NUMBER_RETRY_COUNT = 5
+
+# the maximum number of ids used in one IN clause
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# the default maximum depth of the reference graph queries
+REFERENCE_MAX_DEPTH = 100
+
+# the default number of Versions in one page of Version.series_page()
+SERIES_PAGE_SIZE = 100
+
+# holds the already resolved maximum version numbers of the series in
+# Version.bulk_create(), so the Version.__init__ doesn't query them one by one
+_known_max_versions = threading.local()
+
+# disables the circular dependency check of the Version.references validator
+# while Version.set_references() sets the references it has already checked
+_checked_references = threading.local()
+
 
 class VersionStatusComparator(str, Comparator):
     """The comparator class for Version.status
@@ -184,6 +209,34 @@ class Version(Base, IOMixin):
 
     :param bool is_published: A bool value defining this Version as a published
       one.
+
+    .. versionadded:: 0.2.5.4
+      Version Number Reservation:
+
+      Call :meth:`~oyProjectManager.models.version.Version.allocate` before
+      writing the file of a new Version. It inserts the Version to the
+      database and reserves the next available version number if the number
+      is taken by another Version in the meantime (two artists saving the
+      same series at the same time), so the
+      :attr:`~oyProjectManager.models.version.Version.filename`,
+      :attr:`~oyProjectManager.models.version.Version.path` and
+      :attr:`~oyProjectManager.models.version.Version.output_path` are final
+      before the file is written.
+
+    .. versionadded:: 0.2.5.4
+      File Info:
+
+      The size, the modification time and optionally the md5 hash of the
+      file are stored in
+      :attr:`~oyProjectManager.models.version.Version.file_size`,
+      :attr:`~oyProjectManager.models.version.Version.file_mtime` and
+      :attr:`~oyProjectManager.models.version.Version.file_hash` when the
+      file is saved or exported by an environment, so the Versions can be
+      sorted and filtered by them in the database without reading the
+      file server. Use
+      :meth:`~oyProjectManager.models.version.Version.update_file_info` or
+      :meth:`~oyProjectManager.models.version.Version.refresh_file_info` to
+      update them for the files changed outside of the environments.
     """
 
     # TODO: add audit info like date_created, date_updated, created_at and
@@ -199,6 +252,9 @@ class Version(Base, IOMixin):
     __table_args__ = (
         UniqueConstraint("version_of_id", "take_name", "_version_number",
                          "type_id"),
+        Index("ix_Versions_series", "version_of_id", "type_id", "take_name",
+              "_version_number"),
+        Index("ix_Versions_path_filename", "_path", "_filename"),
         {"extend_existing": True}
     )
 
@@ -238,6 +294,12 @@ class Version(Base, IOMixin):
         Enum(*conf.status_list, name='StatusNames'),
     )
 
+    # the info of the file, None if the file doesn't exist or the info is
+    # not updated yet
+    file_size = Column(BigInteger)
+    file_mtime = Column(Float)
+    file_hash = Column(String(32))
+
     def __init__(
         self,
         version_of,
@@ -297,10 +359,9 @@ class Version(Base, IOMixin):
         """updates the path variables
         """
         kwargs = self._template_variables()
-        self._filename = jinja2.Template(self.type.filename).render(**kwargs)
-        self._path = jinja2.Template(self.type.path).render(**kwargs)
-        self._output_path = jinja2.Template(self.type.output_path). \
-            render(**kwargs)
+        self._filename = templates.render(self.type.filename, **kwargs)
+        self._path = templates.render(self.type.path, **kwargs)
+        self._output_path = templates.render(self.type.output_path, **kwargs)
 
     @validates("_version_of")
     def _validate_version_of(self, key, version_of):
@@ -558,6 +619,103 @@ class Version(Base, IOMixin):
 
         return take_name
 
+    def _series_query(self, *entities):
+        """returns a query for the given entities filtered to the Versions in
+        the same series (same type, version_of and take_name) with this
+        Version
+        """
+        return db.session \
+            .query(*entities) \
+            .filter(Version.type == self.type) \
+            .filter(Version.version_of == self.version_of) \
+            .filter(Version.take_name == self.take_name)
+
+    def _series_key(self):
+        """returns a tuple of version_of.id, type.id and take_name which is
+        identifying the series of this Version
+        """
+        return self.version_of.id, self.type.id, self.take_name
+
+    @classmethod
+    def series_query(cls, version_of, type, take_name, published_only=False):
+        """Returns a query of the Versions of the given series, the
+        :attr:`~oyProjectManager.models.version.Version.created_by` of the
+        Versions are loaded with the same query.
+
+        :param version_of: A
+          :class:`~oyProjectManager.models.entity.VersionableBase` instance.
+
+        :param type: A :class:`~oyProjectManager.models.version.VersionType`
+          instance.
+
+        :param str take_name: The take name.
+
+        :param bool published_only: Query only the published Versions.
+        """
+        query = db.session.query(Version) \
+            .options(joinedload(Version.created_by)) \
+            .filter(Version.version_of == version_of) \
+            .filter(Version.type == type) \
+            .filter(Version.take_name == take_name)
+
+        if published_only:
+            query = query.filter(Version.is_published == True)
+
+        return query
+
+    @classmethod
+    def series_page(cls, version_of, type, take_name, published_only=False,
+                    after=None, limit=SERIES_PAGE_SIZE):
+        """Returns one page of the Versions of the given series ordered by
+        their version numbers.
+
+        The pages are queried by the version number of the last Version of
+        the previous page (keyset pagination), so every page is one query
+        over the ``ix_Versions_series`` index no matter how deep it is::
+
+          page = Version.series_page(asset, vtype, "Main")
+          while page:
+              ...
+              page = Version.series_page(
+                  asset, vtype, "Main", after=page[-1].version_number
+              )
+
+        The first four arguments are the same with :meth:`.series_query`.
+
+        :param int after: The version number of the last Version of the
+          previous page, None for the first page.
+
+        :param int limit: The maximum number of the Versions in the page.
+
+        :returns: list of :class:`~oyProjectManager.models.version.Version`
+          instances
+        """
+        query = cls.series_query(version_of, type, take_name, published_only)
+
+        if after is not None:
+            query = query.filter(Version._version_number > after)
+
+        return query.order_by(Version._version_number).limit(limit).all()
+
+    @classmethod
+    def series_window_start(cls, version_of, type, take_name, count,
+                            published_only=False):
+        """Returns the version number which the last ``count`` Versions of
+        the given series come after, to be used as the ``after`` argument of
+        :meth:`.series_page`. Returns None if there are not more than
+        ``count`` Versions.
+        """
+        query = db.session.query(Version._version_number) \
+            .filter(Version.version_of == version_of) \
+            .filter(Version.type == type) \
+            .filter(Version.take_name == take_name)
+
+        if published_only:
+            query = query.filter(Version.is_published == True)
+
+        return query.order_by(Version._version_number.desc()) \
+            .offset(count).limit(1).scalar()
+
     def latest_version(self):
         """returns the Version instance with the highest version number in this
         series
@@ -565,11 +723,7 @@ class Version(Base, IOMixin):
         :returns: :class:`~oyProjectManager.models.version.Version` instance
         """
         #            .filter(Version.base_name == self.base_name)\
-        return db.session \
-            .query(Version) \
-            .filter(Version.type == self.type) \
-            .filter(Version.version_of == self.version_of) \
-            .filter(Version.take_name == self.take_name) \
+        return self._series_query(Version) \
             .order_by(Version.version_number.desc()) \
             .first()
 
@@ -578,17 +732,34 @@ class Version(Base, IOMixin):
         """returns the maximum version number for this Version from the
         database.
 
+        It is a single aggregate query which is covered by the
+        ``ix_Versions_series`` index.
+
         :returns: int
         """
-        last_version = self.latest_version()
+        known_max_versions = getattr(_known_max_versions, "data", None)
+        if known_max_versions is not None:
+            # in Version.bulk_create(), all the series are already resolved
+            return known_max_versions.get(self._series_key(), 0)
 
-        if last_version:
-            max_version = last_version.version_number
-        else:
+        max_version = self._series_query(func.max(Version._version_number)) \
+            .scalar()
+
+        if max_version is None:
             max_version = 0
 
         return max_version
 
+    def reserve_version_number(self):
+        """Sets the version_number to the next available number in this series
+        and updates the paths.
+
+        :returns: int
+        """
+        self._version_number = self.max_version + 1
+        self.update_paths()
+        return self._version_number
+
     def _validate_version_number(self, version_number):
         """validates the given version number
         """
@@ -622,13 +793,370 @@ class Version(Base, IOMixin):
         )
     )
 
+    def allocate(self):
+        """Inserts this new Version to the database before its file is
+        written.
+
+        If the version_number is taken by another Version in the meantime,
+        only the insert of this Version is rolled back (the other changes in
+        the session are kept), the next available version number is reserved
+        and the insert is retried. So the version number and the paths of the
+        Version are final when this method returns and it is safe to write
+        the file to the
+        :attr:`~oyProjectManager.models.version.Version.full_path`. It does
+        nothing for the Versions which are already in the database.
+
+        .. versionadded:: 0.2.5.4
+        """
+        if inspect(self).has_identity:
+            return
+
+        with db.savepoints():
+            for i in range(VERSION_NUMBER_RETRY_COUNT + 1):
+                savepoint = db.session.begin_nested()
+                db.session.add(self)
+                try:
+                    db.session.flush()
+                except IntegrityError:
+                    savepoint.rollback()
+                    if i == VERSION_NUMBER_RETRY_COUNT or \
+                       self.max_version < self.version_number:
+                        # not a version number conflict or too many
+                        # conflicts
+                        raise
+                    logger.debug("version number %s is already taken, "
+                                 "reserving a new one" % self.version_number)
+                    self.reserve_version_number()
+                else:
+                    savepoint.commit()
+                    break
+
+        db.session.commit()
+
     def save(self):
         """commits the changes to the database
+
+        .. versionchanged:: 0.2.5.4
+           The version numbers are not reserved again in here, the file of
+           the Version may already be written, use
+           :meth:`~oyProjectManager.models.version.Version.allocate` for the
+           new Versions.
         """
         if self not in db.session:
             db.session.add(self)
         db.session.commit()
 
+    @property
+    def file_date(self):
+        """The modification time of the file as a datetime.datetime instance,
+        None if it is not known
+        """
+        if self.file_mtime is None:
+            return None
+        return datetime.datetime.fromtimestamp(self.file_mtime)
+
+    def update_file_info(self, compute_hash=None, stat=False):
+        """Updates the file_size, file_mtime and file_hash attributes from
+        the file of this Version, they are set to None if the file doesn't
+        exist. The changes are not committed.
+
+        :param bool compute_hash: Calculate the md5 hash of the file too, it
+          reads the whole file. The default is :confval:`version_file_hash`.
+          The hash is kept if the size and the modification time of the file
+          is not changed.
+
+        :param stat: The
+          :class:`~oyProjectManager.utils.file_stats.FileStat` of the file if
+          it is already read, None means there is no file.
+
+        :returns: True if any of the attributes is changed
+        """
+        if compute_hash is None:
+            compute_hash = conf.version_file_hash
+
+        full_path = self.full_path
+        if stat is False:
+            stat = file_stats.stat_files([full_path])[full_path]
+
+        if stat is None:
+            info = (None, None, None)
+        else:
+            hash_ = None
+            if stat.size == self.file_size and stat.mtime == self.file_mtime:
+                hash_ = self.file_hash
+            if compute_hash and hash_ is None:
+                try:
+                    hash_ = file_stats.file_hash(full_path)
+                except IOError as e:
+                    logger.warning("can not read %s: %s" % (full_path, e))
+            info = (stat.size, stat.mtime, hash_)
+
+        if info == (self.file_size, self.file_mtime, self.file_hash):
+            return False
+
+        self.file_size, self.file_mtime, self.file_hash = info
+        return True
+
+    @classmethod
+    def refresh_file_info(cls, versions, compute_hash=None):
+        """Updates the file info of the given Versions and commits the
+        changes.
+
+        The files are read with one folder listing per folder (see
+        :func:`~oyProjectManager.utils.file_stats.stat_files`), so it is much
+        faster than calling
+        :meth:`~oyProjectManager.models.version.Version.update_file_info` for
+        every Version.
+
+        :param versions: A list of Versions.
+
+        :param bool compute_hash: See
+          :meth:`~oyProjectManager.models.version.Version.update_file_info`.
+
+        :returns: The list of the Versions which are updated.
+        """
+        versions = list(versions)
+        stats = file_stats.stat_files(
+            [version.full_path for version in versions]
+        )
+
+        updated_versions = [
+            version for version in versions
+            if version.update_file_info(compute_hash,
+                                        stats[version.full_path])
+        ]
+
+        if updated_versions:
+            db.session.commit()
+
+        return updated_versions
+
+    @classmethod
+    def bulk_create(cls, specs):
+        """Creates and saves many Versions at once.
+
+        It is much faster than creating and saving the Versions one by one,
+        the maximum version numbers (and the statuses of the latest versions)
+        of all the series are resolved with one grouped query, the paths are
+        rendered with the cached templates and all the Versions are inserted
+        in one transaction.
+
+        The Versions of the same series are numbered in the given order. If
+        some of the version numbers are taken by other Versions in the
+        meantime, only the inserts of the Versions are rolled back (the other
+        changes in the session are kept) and all the Versions are numbered
+        again.
+
+        :param specs: A list of dictionaries holding the arguments of the
+          :class:`~oyProjectManager.models.version.Version` class. The
+          ``version_of`` and ``type`` values which are not saved yet are
+          flushed to the database first.
+
+        :returns: A list of (version, error) tuples in the order of the given
+          specs. The ``version`` is the created Version and ``error`` is None
+          for a successfully created Version, and ``version`` is None and
+          ``error`` is the exception for an invalid spec. Invalid specs do not
+          prevent the others to be created.
+        """
+        specs = list(specs)
+
+        # get ids for new versionables and types
+        for spec in specs:
+            for key in ("version_of", "type"):
+                value = spec.get(key)
+                if value is not None and value not in db.session:
+                    db.session.add(value)
+        db.session.flush()
+
+        with db.savepoints():
+            for i in range(VERSION_NUMBER_RETRY_COUNT + 1):
+                # only the Versions are rolled back on a conflict, the other
+                # changes in the session are kept
+                savepoint = db.session.begin_nested()
+                results = cls._create_versions(specs)
+                try:
+                    db.session.flush()
+                except IntegrityError:
+                    savepoint.rollback()
+                    if i == VERSION_NUMBER_RETRY_COUNT:
+                        raise
+                    logger.debug("some of the version numbers are already "
+                                 "taken, numbering the Versions again")
+                else:
+                    savepoint.commit()
+                    break
+
+        db.session.commit()
+        return results
+
+    @classmethod
+    def _create_versions(cls, specs):
+        """Creates the Versions of the given specs and adds them to the
+        session, see
+        :meth:`~oyProjectManager.models.version.Version.bulk_create`.
+
+        :returns: A list of (version, error) tuples.
+        """
+        latest = cls._latest_in_series(specs)
+
+        statuses = dict((key, data[1]) for key, data in latest.items())
+
+        results = []
+        versions = []
+        _known_max_versions.data = \
+            dict((key, data[0]) for key, data in latest.items())
+        try:
+            for spec in specs:
+                kwargs = dict(spec)
+                status = kwargs.get("status")
+                if status is None:
+                    # set it to the status of the latest version below
+                    kwargs["status"] = conf.status_list[0]
+                try:
+                    version = cls(**kwargs)
+                except (TypeError, ValueError) as e:
+                    results.append((None, e))
+                    continue
+
+                key = version._series_key()
+                if status is None and key in statuses:
+                    version.status = statuses[key]
+
+                # the next Version in the same series should have a bigger
+                # number and should get the same status
+                _known_max_versions.data[key] = version.version_number
+                statuses[key] = version.status
+
+                results.append((version, None))
+                versions.append(version)
+        finally:
+            _known_max_versions.data = None
+
+        db.session.add_all(versions)
+        return results
+
+    @classmethod
+    def _latest_in_series(cls, specs):
+        """Returns the maximum version number and the status of the latest
+        Version for all the series in the given Version arguments with one
+        grouped query (per IN_CLAUSE_CHUNK_SIZE versionables).
+
+        :returns: a dictionary of series keys to (max_version_number, status)
+          tuples, series without any Versions are not included.
+        """
+        version_of_ids = set()
+        type_ids = set()
+        for spec in specs:
+            version_of = spec.get("version_of")
+            type_ = spec.get("type")
+            if version_of is not None and type_ is not None:
+                version_of_ids.add(version_of.id)
+                type_ids.add(type_.id)
+
+        version_of_ids = sorted(version_of_ids)
+        type_ids = sorted(type_ids)
+
+        latest = {}
+        for i in range(0, len(version_of_ids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = version_of_ids[i:i + IN_CLAUSE_CHUNK_SIZE]
+
+            max_numbers = cls._max_numbers_subquery(
+                Version.version_of_id.in_(chunk),
+                Version.type_id.in_(type_ids)
+            )
+
+            rows = cls._join_max_numbers(
+                db.session.query(
+                    Version.version_of_id,
+                    Version.type_id,
+                    Version.take_name,
+                    Version._version_number,
+                    Version._status
+                ),
+                max_numbers
+            )
+
+            for version_of_id, type_id, take_name, number, status in rows:
+                latest[(version_of_id, type_id, take_name)] = (number, status)
+
+        return latest
+
+    @classmethod
+    def _max_numbers_subquery(cls, *criteria):
+        """Returns a subquery of the maximum version numbers of all the series
+        filtered by the given criteria, with version_of_id, type_id,
+        take_name and max_number columns.
+        """
+        query = db.session.query(
+            Version.version_of_id,
+            Version.type_id,
+            Version.take_name,
+            func.max(Version._version_number).label("max_number")
+        )
+
+        for criterion in criteria:
+            query = query.filter(criterion)
+
+        return query \
+            .group_by(Version.version_of_id, Version.type_id,
+                      Version.take_name) \
+            .subquery()
+
+    @classmethod
+    def _join_max_numbers(cls, query, max_numbers):
+        """Joins the given Version query with the given max numbers subquery,
+        so only the latest Versions of the series are left.
+        """
+        return query.join(
+            max_numbers,
+            and_(
+                Version.version_of_id == max_numbers.c.version_of_id,
+                Version.type_id == max_numbers.c.type_id,
+                Version.take_name == max_numbers.c.take_name,
+                Version._version_number == max_numbers.c.max_number
+            )
+        )
+
+    @classmethod
+    def latest_versions(cls, project, type_for):
+        """Returns the latest Versions of all the series of the Assets or
+        Shots of the given Project with one grouped query.
+
+        The creators of the Versions are loaded in the same query.
+
+        :param project: A :class:`~oyProjectManager.models.project.Project`
+          instance.
+
+        :param type_for: "Asset" or "Shot", the
+          :attr:`~oyProjectManager.models.version.VersionType.type_for` of
+          the VersionTypes.
+
+        :returns: a dictionary of (version_of_id, type_id, take_name) keys to
+          the latest :class:`~oyProjectManager.models.version.Version`
+          instances, series without any Versions are not included.
+        """
+        # there is a circular import between Version and VersionableBase
+        from oyProjectManager.models.entity import VersionableBase
+
+        max_numbers = cls._max_numbers_subquery(
+            Version.version_of_id == VersionableBase.id,
+            VersionableBase.project_id == project.id,
+            Version.type_id == VersionType.id,
+            VersionType.type_for == type_for
+        )
+
+        versions = cls._join_max_numbers(
+            db.session.query(Version).options(joinedload(Version.created_by)),
+            max_numbers
+        )
+
+        latest = {}
+        for version in versions:
+            latest[(version.version_of_id, version.type_id,
+                    version.take_name)] = version
+
+        return latest
+
     @validates("note")
     def _validate_note(self, key, note):
         """validates the given note value
@@ -667,7 +1195,8 @@ class Version(Base, IOMixin):
                              "itself")
 
         # check circular dependency
-        _check_circular_dependency(reference, self)
+        if not getattr(_checked_references, "value", False):
+            _check_circular_dependency(reference, self)
 
         return reference
 
@@ -706,6 +1235,242 @@ class Version(Base, IOMixin):
             .order_by(Version.version_number.desc()) \
             .first()
 
+    @classmethod
+    def _deep_references_cte(cls, version_ids, reverse=False, max_depth=None):
+        """Returns a recursive CTE of the ids and depths of the Versions
+        referenced by the given Versions directly or indirectly, or the
+        Versions referencing them if reverse is True.
+        """
+        if max_depth is None:
+            max_depth = REFERENCE_MAX_DEPTH
+
+        if not reverse:
+            source = Version_References.c.referencer_id
+            target = Version_References.c.reference_id
+        else:
+            source = Version_References.c.reference_id
+            target = Version_References.c.referencer_id
+
+        # the integers are rendered inline, SQLAlchemy 0.8 doesn't order the
+        # positional bind parameters of the CTEs correctly
+        def inline(value):
+            return literal_column(str(int(value)))
+
+        references = select([target.label("id"),
+                             inline(1).label("depth")]) \
+            .where(source.in_(map(inline, version_ids))) \
+            .cte("deep_references", recursive=True)
+
+        parent = references.alias("parent")
+
+        return references.union(
+            select([target, parent.c.depth + inline(1)])
+            .where(source == parent.c.id)
+            .where(parent.c.depth < inline(max_depth))
+        )
+
+    @classmethod
+    def _deep_references_query(cls, version_ids, reverse=False,
+                               max_depth=None):
+        """Returns a Version query of the results of the
+        :meth:`._deep_references_cte`
+        """
+        references = cls._deep_references_cte(version_ids, reverse,
+                                               max_depth)
+        return db.session.query(Version) \
+            .filter(Version.id.in_(select([references.c.id]))) \
+            .order_by(Version.id)
+
+    def deep_references(self, max_depth=None):
+        """Returns all the Versions referenced by this Version directly or
+        indirectly with one recursive query.
+
+        Only the references saved to the database are considered.
+
+        :param int max_depth: The maximum depth of the references, the
+          default is :data:`.REFERENCE_MAX_DEPTH`.
+
+        :return: list of :class:`~oyProjectManager.models.version.Version`
+          instances
+        """
+        if self.id is None:
+            return []
+
+        return _all_rows(
+            self._deep_references_query([self.id], max_depth=max_depth)
+        )
+
+    def deep_referenced_by(self, max_depth=None):
+        """Returns all the Versions referencing this Version directly or
+        indirectly with one recursive query.
+
+        Only the references saved to the database are considered.
+
+        :param int max_depth: The maximum depth of the references, the
+          default is :data:`.REFERENCE_MAX_DEPTH`.
+
+        :return: list of :class:`~oyProjectManager.models.version.Version`
+          instances
+        """
+        if self.id is None:
+            return []
+
+        return _all_rows(
+            self._deep_references_query([self.id], reverse=True,
+                                        max_depth=max_depth)
+        )
+
+    def depends_on(self, version, max_depth=None):
+        """Returns True if this Version references the given Version directly
+        or indirectly, checked with one recursive query.
+
+        Referencing a Version which depends on this Version creates a circular
+        dependency.
+
+        :param version: A :class:`~oyProjectManager.models.version.Version`
+          instance.
+
+        :param int max_depth: The maximum depth of the references, the
+          default is :data:`.REFERENCE_MAX_DEPTH`.
+
+        :return: bool
+        """
+        if self.id is None or version.id is None:
+            return False
+
+        return self._depends_on([self.id], version.id, max_depth)
+
+    @classmethod
+    def _depends_on(cls, version_ids, version_id, max_depth=None):
+        """returns True if any of the Versions with the given ids references
+        the Version with the given id directly or indirectly
+        """
+        references = cls._deep_references_cte(version_ids,
+                                              max_depth=max_depth)
+        # count() always returns a row, see _all_rows()
+        return db.session \
+            .query(func.count(references.c.id)) \
+            .filter(references.c.id == version_id) \
+            .scalar() > 0
+
+    @classmethod
+    def set_references(cls, references_by_version):
+        """Sets the references of many Versions at once.
+
+        The circular dependencies of all the new references are checked
+        together, the saved reference graph around the Versions is read with
+        one recursive query (per IN_CLAUSE_CHUNK_SIZE Versions) instead of one
+        query per reference. The Versions whose new references would create a
+        circular dependency are skipped and logged, their references are not
+        changed. The changes are not committed.
+
+        :param references_by_version: A list of (version, list of referenced
+          Versions) tuples, all the Versions should be saved.
+
+        :returns: The list of the Versions which are skipped.
+        """
+        references_by_version = list(references_by_version)
+        if not references_by_version:
+            return []
+
+        # the pending references should be in the graph
+        db.session.flush()
+
+        version_ids = set()
+        for version, references in references_by_version:
+            version_ids.add(version.id)
+            version_ids.update(reference.id for reference in references)
+        graph = cls._reference_graph(version_ids)
+
+        skipped_versions = []
+        for version, references in references_by_version:
+            current_ids = graph.get(version.id, set())
+            graph[version.id] = set(reference.id for reference in references)
+            if _reaches(graph, graph[version.id], version.id):
+                graph[version.id] = current_ids
+                logger.warning("the references of %s are not changed, they "
+                               "create a circular dependency" % version)
+                skipped_versions.append(version)
+                continue
+
+            _checked_references.value = True
+            try:
+                version.references = references
+            finally:
+                _checked_references.value = False
+
+        return skipped_versions
+
+    @classmethod
+    def _reference_graph(cls, version_ids):
+        """Returns the saved references of the Versions with the given ids and
+        of all the Versions they reference directly or indirectly, as a
+        dictionary of {referencer_id: set of reference_ids}
+        """
+        version_ids = sorted(version_ids)
+
+        graph = {}
+        for i in range(0, len(version_ids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = version_ids[i:i + IN_CLAUSE_CHUNK_SIZE]
+            references = cls._deep_references_cte(chunk)
+            rows = _all_rows(
+                db.session.query(Version_References.c.referencer_id,
+                                 Version_References.c.reference_id)
+                .filter(or_(
+                    Version_References.c.referencer_id.in_(chunk),
+                    Version_References.c.referencer_id.in_(
+                        select([references.c.id])
+                    )
+                ))
+            )
+            for referencer_id, reference_id in rows:
+                graph.setdefault(referencer_id, set()).add(reference_id)
+
+        return graph
+
+    @classmethod
+    def latest_published_versions(cls, versions):
+        """Returns the latest published Versions of the given Versions with
+        one grouped query (per IN_CLAUSE_CHUNK_SIZE versionables).
+
+        It is the batch version of :meth:`.latest_published_version`.
+
+        :param versions: A list of
+          :class:`~oyProjectManager.models.version.Version` instances.
+
+        :return: A list of :class:`~oyProjectManager.models.version.Version`
+          instances or None for the Versions without a published version, in
+          the same order with the given Versions.
+        """
+        keys = [(version.version_of_id, version.type_id, version.take_name)
+                for version in versions]
+
+        version_of_ids = sorted(set(key[0] for key in keys
+                                    if key[0] is not None))
+        type_ids = sorted(set(key[1] for key in keys if key[1] is not None))
+
+        latest = {}
+        for i in range(0, len(version_of_ids), IN_CLAUSE_CHUNK_SIZE):
+            chunk = version_of_ids[i:i + IN_CLAUSE_CHUNK_SIZE]
+
+            max_numbers = cls._max_numbers_subquery(
+                Version.version_of_id.in_(chunk),
+                Version.type_id.in_(type_ids),
+                Version.is_published == True
+            )
+
+            published_versions = cls._join_max_numbers(
+                db.session.query(Version)
+                .filter(Version.is_published == True),
+                max_numbers
+            )
+
+            for version in published_versions:
+                latest[(version.version_of_id, version.type_id,
+                        version.take_name)] = version
+
+        return [latest.get(key) for key in keys]
+
     @property
     def dependency_update_list(self, published_only=True):
         """Calculates a list of
@@ -743,6 +1508,39 @@ class Version(Base, IOMixin):
 
         return update_list
 
+    def deep_dependency_update_list(self, published_only=True,
+                                    max_depth=None):
+        """Returns the Versions referenced by this Version directly or
+        indirectly and have a newer version, with one recursive query.
+
+        :param bool published_only: Only consider the newer published
+          versions, the default is True.
+
+        :param int max_depth: The maximum depth of the references, the
+          default is :data:`.REFERENCE_MAX_DEPTH`.
+
+        :return: list of :class:`~oyProjectManager.models.version.Version`
+          instances
+        """
+        if self.id is None:
+            return []
+
+        newer = aliased(Version)
+        newer_versions = db.session.query(newer) \
+            .filter(newer.version_of_id == Version.version_of_id) \
+            .filter(newer.type_id == Version.type_id) \
+            .filter(newer.take_name == Version.take_name) \
+            .filter(newer._version_number > Version._version_number)
+
+        if published_only:
+            newer_versions = newer_versions \
+                .filter(newer.is_published == True)
+
+        return _all_rows(
+            self._deep_references_query([self.id], max_depth=max_depth)
+            .filter(newer_versions.exists())
+        )
+
     #    @validates('status')
     def _validate_status(self, status):
         """validates the given status value
@@ -1194,6 +1992,7 @@ class VersionType(Base):
         if self not in db.session:
             db.session.add(self)
         db.session.commit()
+        db.identity_cache.invalidate(VersionType)
 
     @validates("_type_for")
     def _validate_type_for(self, key, type_for):
@@ -1263,19 +2062,82 @@ class VersionTypeEnvironments(Base):
         return environment_name
 
 
+def _all_rows(query):
+    """Returns all the results of the given query which starts with a WITH
+    clause.
+    
+    The sqlite3 module of Python 2 doesn't set the cursor.description of the
+    statements starting with WITH when there are no rows, so SQLAlchemy
+    thinks the statement doesn't return rows at all.
+    """
+    try:
+        return query.all()
+    except ResourceClosedError:
+        return []
+
+
+def _reaches(graph, version_ids, version_id):
+    """returns True if the Version with the given id can be reached from the
+    Versions with the given ids in the given {referencer_id: set of
+    reference_ids} graph
+    """
+    visited = set()
+    ids = list(version_ids)
+    while ids:
+        id_ = ids.pop()
+        if id_ == version_id:
+            return True
+        if id_ in visited:
+            continue
+        visited.add(id_)
+        ids.extend(graph.get(id_, ()))
+    return False
+
+
 def _check_circular_dependency(version, check_for_version):
     """checks the circular dependency in version if it has check_for_version in
     its depends list
+    
+    The references which are not saved yet or already loaded are walked in
+    memory, the rest of the reference graph is checked with one recursive
+    query. The session is flushed before the query, so the references which
+    are not flushed yet (even below the Versions which are not loaded) and a
+    new check_for_version are in the database, also when autoflush is
+    disabled.
     """
-
-    for reference in version.references:
+    
+    saved_version_ids = set()
+    visited = set()
+    versions = list(version.references)
+    while versions:
+        reference = versions.pop()
         if reference is check_for_version:
             raise CircularDependencyError(
                 "version %s can not reference %s, this creates a circular "
                 "dependency" % (version, check_for_version)
             )
+        
+        if id(reference) in visited:
+            continue
+        visited.add(id(reference))
+        
+        if reference.id is None or "references" in reference.__dict__:
+            # do not trigger a lazy load
+            versions.extend(reference.references)
         else:
-            _check_circular_dependency(reference, check_for_version)
+            saved_version_ids.add(reference.id)
+    
+    if not saved_version_ids:
+        return
+    
+    db.session.flush()
+    
+    if check_for_version.id is not None and \
+       Version._depends_on(saved_version_ids, check_for_version.id):
+        raise CircularDependencyError(
+            "version %s can not reference %s, this creates a circular "
+            "dependency" % (version, check_for_version)
+        )
 
 # secondary tables
 Version_References = Table(
@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""
+Dependency Scanners
+===================
+
+The scanners read the files of the host applications without running them
+and return the paths of the files they are depending on. Each module has a
+``scan(file_path)`` function which streams the file line by line, so the
+memory usage doesn't depend on the size of the file:
+
+  * :mod:`oyProjectManager.scanners.nk`: Nuke scripts
+  * :mod:`oyProjectManager.scanners.ma`: Maya ASCII scenes
+  * :mod:`oyProjectManager.scanners.comp`: Fusion compositions
+
+:func:`.build_manifest` runs a scanner over many files in a process pool,
+maps the found paths to the current operating system by using the
+:class:`~oyProjectManager.models.repository.Repository` settings and collects
+them in a :class:`.Manifest`::
+
+  from oyProjectManager import scanners
+  from oyProjectManager.scanners import nk
+
+  manifest = scanners.build_manifest(nuke_script_paths, nk.scan)
+  for path in manifest:
+      print path, manifest.sources(path)
+
+The scanners which can tell the kind of the dependencies have a
+``scan_dependencies(file_path)`` function returning :class:`.Dependency`
+instances. :func:`.update_versions` runs them over the files of many
+Versions and stores the found references and input/output files in the
+database with one commit, :func:`.update_tree` does the same for all the
+Versions under a folder::
+
+  from oyProjectManager.scanners import ma
+
+  scanners.update_tree(project.full_path, ma.scan_dependencies, [".ma"])
+
+.. versionadded:: 0.2.5.4
+"""
+
+import json
+import os
+import re
+import multiprocessing
+from collections import OrderedDict, namedtuple
+
+# create a logger
+import logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+# matches the frame number placeholders, "####" or "%04d"
+FRAME_PATTERN_RE = re.compile(r"#+|%0?[0-9]*d")
+
+# the kinds of the dependencies
+REFERENCE = "reference"
+INPUT = "input"
+OUTPUT = "output"
+
+# a dependency found by a scanner, the kind is REFERENCE, INPUT or OUTPUT and
+# the type is the type of the FileLink which is created for it, like
+# "Texture"
+Dependency = namedtuple("Dependency", "kind type path")
+
+# matches the versioned file names of the old naming convention, like
+# "SH001_MAIN_COMP_r00_v002_oy.nk"
+SERIES_RE = re.compile(r"(.*?[0-9]+)_([a-zA-Z0-9]+).*v([0-9]+)")
+
+
+def is_frame_pattern(path):
+    """Returns True if the given path is a frame sequence pattern, like
+    "render.####.exr" or "render.%04d.exr".
+    """
+    return FRAME_PATTERN_RE.search(os.path.basename(path)) is not None
+
+
+def frame_pattern_regex(file_name):
+    """Returns a compiled regular expression which matches the names of the
+    files of the given frame sequence pattern, the frame numbers are in its
+    groups.
+
+    "render.####.exr" matches "render.0001.exr" and "render.10000.exr" but
+    not "render.001.exr".
+    """
+    parts = FRAME_PATTERN_RE.split(file_name)
+    placeholders = FRAME_PATTERN_RE.findall(file_name)
+
+    regex = ""
+    for i, part in enumerate(parts):
+        regex += re.escape(part)
+        if i < len(placeholders):
+            placeholder = placeholders[i]
+            if placeholder.startswith("#"):
+                padding = len(placeholder)
+            else:
+                padding = int(placeholder[1:-1] or 1)
+            regex += r"(-?[0-9]{%s,})" % padding
+
+    return re.compile(regex + "$")
+
+
+def expand_frame_pattern(path, listdir=os.listdir):
+    """Returns the sorted list of the existing files of the given frame
+    sequence pattern.
+
+    The directory is listed once instead of checking every frame. A caching
+    listdir function can be given to list every directory only once while
+    expanding many patterns.
+
+    :param str path: A frame sequence pattern like "/render/beauty.####.exr"
+
+    :param listdir: The function which lists the directories.
+    """
+    directory, file_name = os.path.split(path)
+    try:
+        names = listdir(directory)
+    except OSError:
+        return []
+
+    regex = frame_pattern_regex(file_name)
+    return sorted(
+        directory + "/" + name for name in names if regex.match(name)
+    )
+
+
+def is_absolute(path):
+    """Returns True if the given path is an absolute path on any operating
+    system, or starts with an environment variable.
+    """
+    return re.match(r"^([a-zA-Z]:)?[/\\]|^\$", path) is not None
+
+
+def normalize_path(path):
+    """Returns the normalized version of the given path with forward slashes
+    """
+    # os.path.normpath converts the slashes to back slashes under Windows
+    path = path.replace("\\", "/")
+
+    # keep the UNC paths
+    prefix = ""
+    if path.startswith("//"):
+        prefix = "/"
+
+    return prefix + os.path.normpath(path).replace("\\", "/")
+
+
+def group_series(file_paths):
+    """Groups the given versioned file paths to series by their names.
+
+    The file names should be in "<NAME><number>_<SUB_NAME>..._v<version>"
+    format, the other files are skipped.
+
+    :param file_paths: A list of file paths.
+
+    :returns: A dictionary of (name, sub_name) keys to the lists of the
+      file paths sorted by their version numbers.
+    """
+    series = {}
+    for file_path in file_paths:
+        match = SERIES_RE.match(file_path)
+        if not match:
+            continue
+
+        name, sub_name, version_number = match.groups()
+        series.setdefault((name, sub_name), []).append(
+            (int(version_number), file_path)
+        )
+
+    for key, versions in series.items():
+        series[key] = [file_path for number, file_path in sorted(versions)]
+
+    return series
+
+
+class Manifest(object):
+    """An ordered list of unique file paths to be backed up.
+
+    Every path keeps the paths of the files which are depending on it (its
+    sources). Frame sequence patterns (see :func:`.is_frame_pattern`) are
+    single entries.
+
+    The Manifest can be saved to and loaded from a JSON file.
+    """
+
+    def __init__(self):
+        # path: list of sources
+        self._entries = OrderedDict()
+
+    def add(self, path, source=None):
+        """Adds the given path to the manifest if it is not already added.
+
+        :param str path: The path of the file or the frame sequence pattern.
+
+        :param str source: The path of the file which depends on it, can be
+          skipped.
+        """
+        sources = self._entries.setdefault(path, [])
+        if source is not None and source not in sources:
+            sources.append(source)
+
+    def sources(self, path):
+        """Returns the paths of the files which are depending on the given
+        path
+        """
+        return list(self._entries[path])
+
+    def is_sequence(self, path):
+        """Returns True if the given path is a frame sequence pattern
+        """
+        return is_frame_pattern(path)
+
+    @property
+    def paths(self):
+        """The list of the paths in this manifest
+        """
+        return self._entries.keys()
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    def save(self, file_path):
+        """Saves the manifest to the given JSON file
+        """
+        data = [
+            {"path": path, "sources": sources}
+            for path, sources in self._entries.items()
+        ]
+
+        with open(file_path, "w") as f:
+            json.dump({"files": data}, f, indent=1)
+
+    @classmethod
+    def load(cls, file_path):
+        """Loads the manifest from the given JSON file
+        """
+        with open(file_path) as f:
+            data = json.load(f)
+
+        manifest = cls()
+        for entry in data["files"]:
+            manifest.add(entry["path"])
+            for source in entry["sources"]:
+                manifest.add(entry["path"], source)
+
+        return manifest
+
+
+def _scan(args):
+    """runs the scanner in the worker process, the errors are logged per
+    file so one broken file doesn't stop the scan of the others
+    """
+    scanner, file_path = args
+    try:
+        return file_path, scanner(file_path)
+    except Exception as e:
+        logger.warning("can not scan %s: %s: %s"
+                       % (file_path, e.__class__.__name__, e))
+        return file_path, None
+
+
+def scan_files(file_paths, scanner, processes=None):
+    """Runs the given scanner function over the given files in a process
+    pool.
+
+    :param file_paths: A list of file paths.
+
+    :param scanner: A module level scanner function (so it can be pickled)
+      like :func:`oyProjectManager.scanners.nk.scan`.
+
+    :param processes: The number of the worker processes. The default is the
+      number of the CPUs. If it is 1, or there is only one file, the files
+      are scanned in the current process.
+
+    :returns: A generator of (file_path, list of dependency paths) tuples in
+      the order of the finished scans. The list is None if the file can not
+      be read or the scanner fails on it.
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+
+    jobs = [(scanner, file_path) for file_path in file_paths]
+
+    if processes <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _scan(job)
+        return
+
+    pool = multiprocessing.Pool(min(processes, len(jobs)))
+    try:
+        for result in pool.imap_unordered(_scan, jobs):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def build_manifest(file_paths, scanner, repository=None, processes=None,
+                   root=None):
+    """Scans the given files and returns a :class:`.Manifest` of the given
+    files and all the files they are depending on.
+
+    :param file_paths: A list of file paths to be scanned.
+
+    :param scanner: The scanner function, see :func:`.scan_files`.
+
+    :param repository: A
+      :class:`~oyProjectManager.models.repository.Repository` instance which
+      is used to convert the paths of the other operating systems to the
+      current one. The default is the shared instance.
+
+    :param processes: The number of the worker processes.
+
+    :param root: If given only the paths under this path are added.
+
+    :returns: :class:`.Manifest`
+    """
+    if repository is None:
+        from oyProjectManager.models.repository import get_repository
+        repository = get_repository()
+
+    if root is not None:
+        root = normalize_path(root).rstrip("/") + "/"
+
+    def convert(path):
+        return normalize_path(repository.to_server_path(path))
+
+    file_paths = [convert(file_path) for file_path in file_paths]
+
+    manifest = Manifest()
+    for file_path in file_paths:
+        manifest.add(file_path)
+
+    # keep the order of the given files
+    results = dict(scan_files(file_paths, scanner, processes))
+
+    for file_path in file_paths:
+        for path in results[file_path] or []:
+            path = convert(path)
+            if root is None or path.startswith(root):
+                manifest.add(path, file_path)
+
+    return manifest
+
+
+def find_files(path, extensions):
+    """Returns the sorted list of the files under the given folder with the
+    given extensions, the sub folders are searched too.
+
+    :param str path: The path of the folder.
+
+    :param extensions: A list of the file extensions, like [".ma"].
+
+    :returns: list of str
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+
+    file_paths = []
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            if name.lower().endswith(extensions):
+                file_paths.append(normalize_path(os.path.join(root, name)))
+
+    return sorted(file_paths)
+
+
+def _file_link_args(paths, repository, listdir):
+    """returns the (filename, path, type) arguments of the FileLinks of the
+    given dependency paths, the frame sequence patterns are converted to
+    sequences by listing their folders
+    """
+    from oyProjectManager.models.link import format_frame_ranges
+
+    args = {}
+    for path, type_ in paths:
+        folder, file_name = os.path.split(path)
+
+        if is_frame_pattern(file_name):
+            regex = frame_pattern_regex(file_name)
+            try:
+                names = listdir(folder)
+            except OSError:
+                names = []
+            frames = []
+            for name in names:
+                match = regex.match(name)
+                if match:
+                    frames.append(int(match.group(1)))
+            if frames:
+                file_name = "%s %s" % (file_name, format_frame_ranges(frames))
+
+        args[(path, type_)] = \
+            (file_name, repository.relative_path(folder), type_)
+
+    return args
+
+
+def _merge_links(current_links, new_links):
+    """adds the new FileLinks to the given list, the existing sequences are
+    updated with the new frame ranges, returns True if anything is changed
+    """
+    existing_links = dict(
+        ((link.path, link.pattern), link) for link in current_links
+    )
+
+    is_changed = False
+    for link in new_links:
+        existing_link = existing_links.get((link.path, link.pattern))
+        if existing_link is None:
+            current_links.append(link)
+            existing_links[(link.path, link.pattern)] = link
+            is_changed = True
+        elif existing_link.filename != link.filename:
+            existing_link.filename = link.filename
+            is_changed = True
+
+    return is_changed
+
+
+def update_versions(versions, scanner, processes=None, repository=None):
+    """Scans the files of the given Versions and stores the found
+    dependencies in the database.
+
+    The files are scanned in a process pool (see :func:`.scan_files`). The
+    referenced Versions are found with one query per
+    :data:`~oyProjectManager.models.version.IN_CLAUSE_CHUNK_SIZE` paths and
+    replace the ``references`` of the Versions. The input and output files
+    are added to the ``inputs`` and ``outputs`` of the Versions as
+    :class:`~oyProjectManager.models.link.FileLink` instances, the existing
+    FileLinks are kept and the frame ranges of the existing sequences are
+    updated. All the changes are committed at once. The Versions whose files
+    can not be read, and the Versions whose new references would create a
+    circular dependency, are skipped and their current dependencies are kept
+    (see :meth:`~oyProjectManager.models.version.Version.set_references`).
+
+    :param versions: A list of
+      :class:`~oyProjectManager.models.version.Version` instances.
+
+    :param scanner: A module level function returning a list of
+      :class:`.Dependency` instances for a file, like
+      :func:`oyProjectManager.scanners.ma.scan_dependencies`.
+
+    :param processes: The number of the worker processes.
+
+    :param repository: A
+      :class:`~oyProjectManager.models.repository.Repository` instance which
+      is used to convert the paths. The default is the shared instance.
+
+    :returns: The list of the changed Versions.
+    """
+    from sqlalchemy.orm import subqueryload
+    from oyProjectManager import db
+    from oyProjectManager.models.entity import EnvironmentBase
+    from oyProjectManager.models.link import FileLink
+    from oyProjectManager.models.version import Version, IN_CLAUSE_CHUNK_SIZE
+
+    if repository is None:
+        from oyProjectManager.models.repository import get_repository
+        repository = get_repository()
+
+    def convert(path):
+        return normalize_path(repository.to_server_path(path))
+
+    versions_by_path = OrderedDict()
+    for version in versions:
+        versions_by_path.setdefault(convert(version.full_path), version)
+
+    if not versions_by_path:
+        return []
+
+    # load the current dependencies of all the Versions at once
+    version_ids = [version.id for version in versions_by_path.values()]
+    for i in range(0, len(version_ids), IN_CLAUSE_CHUNK_SIZE):
+        db.session.query(Version)\
+            .options(subqueryload(Version.references),
+                     subqueryload(Version.inputs),
+                     subqueryload(Version.outputs))\
+            .filter(Version.id.in_(version_ids[i:i + IN_CLAUSE_CHUNK_SIZE]))\
+            .all()
+
+    # {file_path: [Dependency]}
+    results = {}
+    for file_path, dependencies in scan_files(versions_by_path.keys(),
+                                              scanner, processes):
+        if dependencies is None:
+            # the file can not be read, keep the current dependencies
+            continue
+        results[file_path] = [
+            Dependency(dependency.kind, dependency.type,
+                       convert(dependency.path))
+            for dependency in dependencies
+        ]
+
+    reference_paths = set()
+    link_paths = set()
+    for dependencies in results.values():
+        for dependency in dependencies:
+            if dependency.kind == REFERENCE:
+                reference_paths.add(dependency.path)
+            else:
+                link_paths.add((dependency.path, dependency.type))
+
+    referenced_versions = EnvironmentBase().get_versions_from_full_paths(
+        sorted(reference_paths)
+    )
+
+    # list every folder once
+    listings = {}
+
+    def listdir(path):
+        if path not in listings:
+            listings[path] = os.listdir(path)
+        return listings[path]
+
+    link_args = _file_link_args(sorted(link_paths), repository, listdir)
+
+    # the Versions whose references are changed
+    references_by_version = []
+    for file_path, version in versions_by_path.items():
+        if file_path not in results:
+            continue
+
+        references = []
+        for dependency in results[file_path]:
+            if dependency.kind != REFERENCE:
+                continue
+            reference = referenced_versions.get(dependency.path)
+            if reference is not None and reference is not version \
+                    and reference not in references:
+                references.append(reference)
+
+        if references != version.references:
+            references_by_version.append((version, references))
+
+    # check the circular dependencies of the whole batch at once
+    skipped_versions = set(Version.set_references(references_by_version))
+    changed = set(version for version, references in references_by_version
+                  if version not in skipped_versions)
+
+    for file_path, version in versions_by_path.items():
+        if file_path not in results or version in skipped_versions:
+            continue
+        dependencies = results[file_path]
+
+        for kind, attribute in [(INPUT, "inputs"), (OUTPUT, "outputs")]:
+            args = []
+            for dependency in dependencies:
+                if dependency.kind == kind:
+                    key = (dependency.path, dependency.type)
+                    if link_args[key] not in args:
+                        args.append(link_args[key])
+
+            new_links = [FileLink(*arg) for arg in args]
+            if _merge_links(getattr(version, attribute), new_links):
+                changed.add(version)
+
+    changed_versions = [version for version in versions_by_path.values()
+                        if version in changed]
+
+    if changed_versions:
+        db.session.commit()
+
+    return changed_versions
+
+
+def update_tree(path, scanner, extensions, processes=None,
+                repository=None):
+    """Scans the files of all the Versions under the given folder and stores
+    the found dependencies in the database, see :func:`.update_versions`.
+
+    :param str path: The path of the folder, like the ``full_path`` of a
+      Project.
+
+    :param scanner: The dependency scanner function.
+
+    :param extensions: A list of the extensions of the files to be scanned,
+      like [".ma"].
+
+    :returns: The list of the changed Versions.
+    """
+    from oyProjectManager.models.entity import EnvironmentBase
+
+    versions = EnvironmentBase().get_versions_from_full_paths(
+        find_files(path, extensions)
+    )
+    return update_versions(
+        [version for full_path, version in sorted(versions.items())
+         if version is not None],
+        scanner, processes, repository
+    )
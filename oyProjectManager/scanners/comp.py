@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""
+Fusion composition scanner.
+
+Reads the clips of the Loader and Saver tools of a Fusion composition
+(``*.comp``) without Fusion. The composition is a Lua table, it is tokenized
+line by line and only the values of the Clip tables, the render range and the
+path maps of the composition are kept, so the memory usage doesn't depend on
+the size of the composition.
+
+The paths starting with ``Comp:`` are resolved by using the folder of the
+composition, the other path maps (like ``Project:``) are resolved by using the
+path maps saved in the composition. The files of the Loaders which are image
+sequences and the files of the Savers are returned as frame sequence patterns
+(like ``plate.####.exr``) together with their frame ranges.
+
+.. versionadded:: 0.2.5.4
+"""
+
+import os
+import re
+from collections import namedtuple
+
+from oyProjectManager.scanners import (Dependency, INPUT, OUTPUT,
+                                       is_absolute, normalize_path)
+
+# create a logger
+import logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+# the types of the tools which have file inputs or outputs
+TOOL_TYPES = {
+    "Loader": INPUT,
+    "Saver": OUTPUT,
+}
+
+# a clip of a Loader or Saver tool, the first and last frames are None for
+# the single files
+Clip = namedtuple("Clip", "tool type path first_frame last_frame")
+
+# the keys of the tables whose values are kept, other than the Clip tables
+TABLE_KEYS = ["RenderRange", "Map"]
+
+TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+    |(?P<long_comment>--\[(?P<comment_level>=*)\[)
+    |(?P<comment>--.*)
+    |(?P<string>"(?:[^"\\\n]|\\[\s\S])*"|'(?:[^'\\\n]|\\[\s\S])*')
+    |(?P<open_string>["'])
+    |(?P<long_string>\[(?P<string_level>=*)\[)
+    |(?P<number>-?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)
+    |(?P<name>[A-Za-z_][A-Za-z_0-9]*)
+    |(?P<symbol>.)
+""", re.VERBOSE)
+
+# the escape sequences of the Lua strings
+ESCAPE_RE = re.compile(r"\\([\s\S])")
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+
+# "Comp:/render/out.exr" or "Project:plates\plate.0001.exr", but not "C:/"
+PATH_MAP_RE = re.compile(r"^([A-Za-z][A-Za-z0-9_ ]+:)[/\\]?(.*)$")
+
+# the frame number at the end of a file name, "plate.0001"
+FRAME_NUMBER_RE = re.compile(r"^(.*?)([0-9]+)$")
+
+
+def unescape(value):
+    """Removes the quotes and the escape characters of the given Lua string
+    """
+    return ESCAPE_RE.sub(
+        lambda match: ESCAPES.get(match.group(1), match.group(1)),
+        value[1:-1]
+    )
+
+
+def tokenize(lines):
+    """Splits the given lines of Lua code to tokens.
+
+    The comments and the white spaces are skipped, the strings can span many
+    lines.
+
+    :param lines: An iterable of lines, like a file object.
+
+    :returns: A generator of (kind, value) tuples, the kind is one of
+      "string", "number", "name" or "symbol". The values of the strings are
+      unescaped.
+    """
+    # the closing brackets and the collected parts of the long string or
+    # comment which is not closed yet
+    long_close = None
+    long_parts = None
+    buffer = ""
+
+    for line in lines:
+        if long_close is not None:
+            end = line.find(long_close)
+            if end == -1:
+                if long_parts is not None:
+                    long_parts.append(line)
+                continue
+
+            if long_parts is not None:
+                long_parts.append(line[:end])
+                yield "string", "".join(long_parts)
+            line = line[end + len(long_close):]
+            long_close = None
+            long_parts = None
+
+        if buffer:
+            # the rest of a string which is continued with a "\"
+            line = buffer + line
+            buffer = ""
+
+        pos = 0
+        length = len(line)
+        while pos < length:
+            match = TOKEN_RE.match(line, pos)
+            kind = match.lastgroup
+            pos = match.end()
+
+            if kind in ("space", "comment"):
+                continue
+
+            if kind == "open_string":
+                buffer = line[match.start():]
+                break
+
+            if kind in ("long_comment", "long_string"):
+                is_comment = kind == "long_comment"
+                long_close = "]%s]" % match.group(
+                    "comment_level" if is_comment else "string_level"
+                )
+                long_parts = None if is_comment else []
+
+                # the first new line of a long string is skipped
+                start = pos
+                if line.startswith("\n", start):
+                    start += 1
+
+                end = line.find(long_close, start)
+                if end == -1:
+                    if long_parts is not None:
+                        long_parts.append(line[start:])
+                    break
+
+                if long_parts is not None:
+                    yield "string", line[start:end]
+                pos = end + len(long_close)
+                long_close = None
+                long_parts = None
+                continue
+
+            value = match.group(kind)
+            if kind == "string":
+                value = unescape(value)
+            yield kind, value
+
+
+class _Table(object):
+    """a table which is not closed yet
+    """
+
+    __slots__ = ["key", "type", "values", "items"]
+
+    def __init__(self, key, type_, keep_values):
+        self.key = key
+        self.type = type_
+        self.values = {} if keep_values else None
+        self.items = [] if keep_values else None
+
+
+def read_clips(file_path):
+    """Reads the given Fusion composition.
+
+    :param file_path: The path of the Fusion composition.
+
+    :returns: A tuple of the list of the (tool name, tool type, {clip key:
+      value}) tuples of the clips of the Loader and Saver tools in the order
+      they are in the composition, the render range of the composition (a
+      list of the start and end frames, can be empty) and the dictionary of
+      the path maps of the composition.
+    """
+    clips = []
+    render_range = []
+    path_maps = {}
+
+    # the tables which are not closed yet
+    tables = []
+
+    # the key of the value being read, the last name and the key in brackets
+    key = None
+    name = None
+    in_brackets = False
+    bracket_key = None
+
+    def store(value):
+        table = tables[-1] if tables else None
+        if table is None or table.values is None:
+            return
+        if key is not None:
+            table.values[key] = value
+        else:
+            table.items.append(value)
+
+    with open(file_path) as f:
+        for kind, value in tokenize(f):
+            if kind == "symbol":
+                if value == "{":
+                    keep_values = name == "Clip" or key in TABLE_KEYS
+                    tables.append(_Table(key, name, keep_values))
+                    key = None
+                    name = None
+
+                elif value == "}":
+                    if name is not None and key is not None:
+                        # a value like "Saving = true"
+                        store(name)
+                    key = None
+                    name = None
+                    if not tables:
+                        continue
+
+                    table = tables.pop()
+                    if table.type == "Clip":
+                        for parent in reversed(tables):
+                            if parent.type in TOOL_TYPES:
+                                clips.append(
+                                    (parent.key, parent.type, table.values)
+                                )
+                                break
+
+                    elif table.key == "RenderRange" and tables \
+                            and tables[-1].type == "Composition":
+                        render_range = table.items
+
+                    elif table.key == "Map" and table.values is not None:
+                        path_maps.update(table.values)
+
+                elif value == "=":
+                    key = bracket_key if bracket_key is not None else name
+                    bracket_key = None
+                    name = None
+
+                elif value == ",":
+                    if name is not None and key is not None:
+                        store(name)
+                    key = None
+                    name = None
+
+                elif value == "[":
+                    in_brackets = True
+
+                elif value == "]":
+                    in_brackets = False
+
+            elif kind == "name":
+                name = value
+
+            elif in_brackets:
+                bracket_key = value
+
+            else:
+                if kind == "number":
+                    value = float(value)
+                    if value.is_integer():
+                        value = int(value)
+                store(value)
+                key = None
+
+    return clips, render_range, path_maps
+
+
+def to_pattern(file_name, padding=None):
+    """Returns the frame sequence pattern and the frame number of the given
+    file name.
+
+    :param str file_name: The file name, like "plate.0001.exr".
+
+    :param int padding: The padding of the frame numbers which are appended
+      to the file names without a frame number, like Fusion does for the
+      Savers. If it is None, the file names without a frame number are not
+      converted.
+
+    :returns: A tuple of the pattern ("plate.####.exr") and the frame number
+      (1), or the given file name and None.
+    """
+    base_name, extension = os.path.splitext(file_name)
+    match = FRAME_NUMBER_RE.match(base_name)
+    if match:
+        prefix, number = match.groups()
+        return prefix + "#" * len(number) + extension, int(number)
+
+    if padding is None:
+        return file_name, None
+
+    return base_name + "#" * padding + extension, None
+
+
+def _resolve(path, comp_directory, path_maps, seen=None):
+    """returns the absolute version of the given clip path or None if it
+    can not be resolved, the seen argument holds the path maps which are
+    being resolved to stop at the cyclic path maps
+    """
+    path = path.replace("\\", "/")
+
+    match = PATH_MAP_RE.match(path)
+    if match:
+        path_map, rest = match.groups()
+        path_map = path_map.lower()
+        if path_map == "comp:":
+            directory = comp_directory
+        else:
+            directory = path_maps.get(path_map)
+            if not directory:
+                logger.debug("unknown path map: %s" % path)
+                return None
+            if seen is None:
+                seen = set()
+            if path_map in seen:
+                logger.warning("cyclic path map: %s" % path)
+                return None
+            seen.add(path_map)
+            directory = _resolve(directory, comp_directory, path_maps, seen)
+            if directory is None:
+                return None
+        path = directory + "/" + rest
+
+    elif not is_absolute(path):
+        path = comp_directory + "/" + path
+
+    return normalize_path(path)
+
+
+def scan_clips(file_path):
+    """Returns the clips of the Loader and Saver tools of the given Fusion
+    composition.
+
+    The frame ranges of the Loader clips are the frames of their files, from
+    ``StartFrame + TrimIn`` to ``StartFrame + TrimOut``. The frame range of
+    the Saver clips is the render range of the composition, and the file
+    names without a frame number get a four digit frame number like Fusion
+    does while rendering.
+
+    :param str file_path: The path of the Fusion composition.
+
+    :returns: A list of :class:`.Clip` instances.
+    """
+    comp_directory = normalize_path(
+        os.path.dirname(os.path.abspath(file_path))
+    )
+    clip_values, render_range, path_maps = read_clips(file_path)
+
+    # the path map names are case insensitive
+    path_maps = dict(
+        (name.lower(), directory) for name, directory in path_maps.items()
+    )
+
+    clips = []
+    for tool, type_, values in clip_values:
+        path = values.get("Filename")
+        if not isinstance(path, basestring) or not path:
+            continue
+
+        path = _resolve(path, comp_directory, path_maps)
+        if path is None:
+            continue
+
+        directory, file_name = os.path.split(path)
+        first_frame = last_frame = None
+
+        if type_ == "Loader":
+            length = values.get("Length")
+            if length != 1:
+                file_name, frame = to_pattern(file_name)
+                if frame is not None:
+                    start = values.get("StartFrame", frame)
+                    first_frame = start + values.get("TrimIn", 0)
+                    if "TrimOut" in values:
+                        last_frame = start + values["TrimOut"]
+                    elif isinstance(length, int):
+                        last_frame = start + length - 1
+                    else:
+                        last_frame = first_frame
+        else:
+            file_name, frame = to_pattern(file_name, padding=4)
+            if len(render_range) > 1:
+                first_frame, last_frame = render_range[:2]
+
+        clips.append(Clip(tool, type_, directory + "/" + file_name,
+                          first_frame, last_frame))
+
+    return clips
+
+
+def scan_dependencies(file_path):
+    """Returns the files which are read or written by the given Fusion
+    composition.
+
+    :param str file_path: The path of the Fusion composition.
+
+    :returns: A list of :class:`~oyProjectManager.scanners.Dependency`
+      instances, the files of the Loaders are
+      :data:`~oyProjectManager.scanners.INPUT` and the files of the Savers
+      are :data:`~oyProjectManager.scanners.OUTPUT` dependencies and their
+      types are the tool types.
+    """
+    dependencies = []
+    seen = set()
+    for clip in scan_clips(file_path):
+        dependency = Dependency(TOOL_TYPES[clip.type], clip.type, clip.path)
+        if dependency not in seen:
+            seen.add(dependency)
+            dependencies.append(dependency)
+
+    return dependencies
+
+
+def scan(file_path):
+    """Returns the paths of the files which are read or written by the given
+    Fusion composition.
+
+    :param str file_path: The path of the Fusion composition.
+
+    :returns: list of str
+    """
+    return [dependency.path for dependency in scan_dependencies(file_path)]
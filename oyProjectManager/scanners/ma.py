@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""
+Maya ASCII scanner.
+
+Reads the references (``file -r`` commands), the texture files of the
+``file`` nodes and the images of the ``imagePlane`` nodes of a Maya ASCII
+scene (``*.ma``) without Maya. The scene is read line by line and only the
+commands which are interesting (the references, the nodes and the path
+attributes of the file and imagePlane nodes) are collected, the other
+commands (like the mesh data) are skipped line by line without joining
+their lines, so the memory usage doesn't depend on the size of the scene.
+
+The relative paths are resolved by using the workspace of the scene, which is
+the parent of the folder of the scene for the files saved by
+:meth:`~oyProjectManager.environments.mayaEnv.Maya.save_as`. The paths
+starting with environment variables (like ``$REPO``) are returned as they
+are.
+
+.. versionadded:: 0.2.5.4
+"""
+
+import os
+import re
+
+from oyProjectManager.scanners import (Dependency, REFERENCE, INPUT,
+                                       is_absolute, normalize_path)
+
+# the attributes holding the file paths of the node types, short and long
+# names
+NODE_ATTRIBUTES = {
+    "file": ("ftn", "fileTextureName"),
+    "imagePlane": ("imn", "imageName"),
+}
+
+# the FileLink types of the node types
+NODE_TYPES = {
+    "file": "Texture",
+    "imagePlane": "Image Plane",
+}
+
+# "a string with \"escaped\" quotes"
+STRING_RE = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+# the copy number of the references which are referenced more than once,
+# "/path/to/file.ma{1}"
+COPY_NUMBER_RE = re.compile(r"\{[0-9]+\}$")
+
+# setAttr ".ftn" -type "string" "/path/to/texture.jpg";
+SET_ATTR_RE = re.compile(r'^\s*setAttr\s+(?:-[a-z]+\s+)*"\.?([^"]+)"')
+
+
+def unescape(value):
+    """Removes the escape characters of the given MEL string
+    """
+    return re.sub(r"\\(.)", r"\1", value)
+
+
+def read_statements(file_path, is_interesting):
+    """Reads the MEL commands of the given Maya ASCII file.
+
+    A command can be written in many lines and ends with a ";". Only the
+    commands which the first line of them is interesting are joined and
+    returned, the others are skipped line by line.
+
+    :param file_path: The path of the Maya ASCII file.
+
+    :param is_interesting: A callable which returns True for the first line
+      of the commands which should be returned.
+
+    :returns: A generator of the commands.
+    """
+    lines = None
+    in_command = False
+    with open(file_path) as f:
+        for line in f:
+            if not in_command:
+                in_command = True
+                if is_interesting(line):
+                    lines = []
+
+            if lines is not None:
+                lines.append(line.strip())
+
+            if line.rstrip().endswith(";"):
+                in_command = False
+                if lines is not None:
+                    yield " ".join(lines)
+                    lines = None
+
+
+def _is_interesting(line, node_type):
+    """returns True for the first line of the commands which are needed, the
+    setAttr commands are needed only for the path attributes of the file and
+    imagePlane nodes
+    """
+    if line.startswith("file ") \
+       or line.startswith("createNode ") \
+       or line.startswith("select "):
+        return True
+
+    if node_type not in NODE_ATTRIBUTES:
+        return False
+
+    match = SET_ATTR_RE.match(line)
+    return match is not None \
+        and match.group(1) in NODE_ATTRIBUTES[node_type]
+
+
+def scan_dependencies(file_path):
+    """Returns the references and the input files of the given Maya ASCII
+    scene.
+
+    :param str file_path: The path of the Maya ASCII file.
+
+    :returns: A list of :class:`~oyProjectManager.scanners.Dependency`
+      instances in the order they are found, the references are
+      :data:`~oyProjectManager.scanners.REFERENCE` and the textures and image
+      planes are :data:`~oyProjectManager.scanners.INPUT` dependencies.
+    """
+    workspace = os.path.dirname(os.path.dirname(os.path.abspath(file_path)))
+
+    def resolve(path):
+        path = COPY_NUMBER_RE.sub("", unescape(path))
+        if not is_absolute(path):
+            path = workspace + "/" + path
+        return normalize_path(path)
+
+    dependencies = []
+    found = set()
+
+    def add(kind, type_, path):
+        dependency = Dependency(kind, type_, resolve(path))
+        if dependency not in found:
+            found.add(dependency)
+            dependencies.append(dependency)
+
+    # the type of the current node, the commands are read lazily so it is
+    # already updated when the first line of the next command is checked
+    node_type = None
+    for command in read_statements(
+            file_path, lambda line: _is_interesting(line, node_type)):
+        if command.startswith("file "):
+            # only the top level references, the -rdi flag is for the
+            # references of the references
+            flags = STRING_RE.sub("", command).split()
+            strings = STRING_RE.findall(command)
+            if "-r" in flags and strings:
+                add(REFERENCE, "Reference", strings[-1])
+
+        elif command.startswith("createNode "):
+            parts = command.split()
+            node_type = parts[1] if len(parts) > 1 else None
+
+        elif command.startswith("select "):
+            node_type = None
+
+        else:
+            # the path attribute of a file or imagePlane node
+            strings = STRING_RE.findall(command)
+            if len(strings) > 1 and strings[-1]:
+                add(INPUT, NODE_TYPES[node_type], strings[-1])
+
+    return dependencies
+
+
+def scan(file_path):
+    """Returns the paths of the files which are referenced or read by the
+    given Maya ASCII scene.
+
+    :param str file_path: The path of the Maya ASCII file.
+
+    :returns: list of str
+    """
+    return [dependency.path for dependency in scan_dependencies(file_path)]
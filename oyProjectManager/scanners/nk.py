@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""
+Nuke script scanner.
+
+Reads the ``file`` knobs of the Read, ReadGeo, ReadGeo2, Write and WriteGeo
+nodes of a Nuke script (``*.nk``) without Nuke. The script is tokenized line
+by line, the knob values can be bare words, quoted strings or brace groups
+spanning many lines, and only the values of the needed knobs are kept, so the
+memory usage doesn't depend on the size of the script.
+
+The relative paths are resolved by using the ``project_directory`` knob of the
+Root node, or the directory of the script if there is no project directory.
+The most common TCL expressions in the knob values are evaluated (see
+:func:`.evaluate`), the frame number patterns (``%04d`` or ``####``) are kept
+as they are.
+
+.. versionadded:: 0.2.5.4
+"""
+
+import os
+import re
+
+from oyProjectManager.scanners import (Dependency, INPUT, OUTPUT,
+                                       is_absolute, normalize_path)
+
+# create a logger
+import logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+# the classes of the nodes which have file inputs or outputs
+NODE_CLASSES = {
+    "Read": INPUT,
+    "ReadGeo": INPUT,
+    "ReadGeo2": INPUT,
+    "Write": OUTPUT,
+    "WriteGeo": OUTPUT,
+}
+
+# the knobs which are read
+KNOBS = {
+    "Root": ("project_directory",),
+}
+KNOBS.update((node_class, ("file",)) for node_class in NODE_CLASSES)
+
+# "Read {" starts a node
+NODE_START_RE = re.compile(r"^\s*(\w+) \{\s*$")
+
+# "}" ends a node
+NODE_END_RE = re.compile(r"^\s*\}\s*$")
+
+# the first word of a knob line
+KNOB_NAME_RE = re.compile(r"^\s*([^\s{}\[\]\"]+)")
+
+# the characters which need the tokenizer
+SPECIAL_CHARS_RE = re.compile(r'[{}"\\\[]')
+
+# the innermost TCL command, "[value root.name]"
+TCL_COMMAND_RE = re.compile(r"\[([^\[\]]*)\]")
+
+
+class _Command(object):
+    """splits a TCL command to its words, the command can be fed line by
+    line
+    """
+
+    def __init__(self, keep_words=True):
+        self.keep_words = keep_words
+        self.words = []
+        self.word = None
+        self.brace_depth = 0
+        self.bracket_depth = 0
+        self.in_quote = False
+        self.is_braced = False
+
+    @property
+    def is_complete(self):
+        return self.brace_depth == 0 and not self.in_quote
+
+    def _end_word(self):
+        if self.word is not None:
+            if self.keep_words:
+                self.words.append("".join(self.word))
+            self.word = None
+            self.is_braced = False
+
+    def feed(self, line):
+        """feeds the next line of the command
+        """
+        keep = self.keep_words
+        i = 0
+        length = len(line)
+        while i < length:
+            char = line[i]
+
+            if char == "\\":
+                # escaped character, the braced words are kept as they are
+                if keep:
+                    if self.word is None:
+                        self.word = []
+                    if self.brace_depth:
+                        self.word.append(line[i:i + 2])
+                    else:
+                        self.word.append(line[i + 1:i + 2])
+                i += 2
+                continue
+
+            if self.brace_depth:
+                if char == "{":
+                    self.brace_depth += 1
+                elif char == "}":
+                    self.brace_depth -= 1
+                    if self.brace_depth == 0 and self.is_braced:
+                        # the end of a braced word
+                        if keep and self.word is None:
+                            self.word = []
+                        self._end_word()
+                        i += 1
+                        continue
+                if keep:
+                    if self.word is None:
+                        self.word = []
+                    self.word.append(char)
+                i += 1
+                continue
+
+            if self.in_quote:
+                if char == '"' and self.bracket_depth == 0:
+                    self.in_quote = False
+                    if keep and self.word is None:
+                        self.word = []
+                    self._end_word()
+                else:
+                    if char == "[":
+                        self.bracket_depth += 1
+                    elif char == "]" and self.bracket_depth:
+                        self.bracket_depth -= 1
+                    if keep:
+                        if self.word is None:
+                            self.word = []
+                        self.word.append(char)
+                i += 1
+                continue
+
+            if char.isspace() and self.bracket_depth == 0:
+                self._end_word()
+            elif char == '"' and self.word is None:
+                self.in_quote = True
+            elif char == "{" and self.word is None \
+                    and self.bracket_depth == 0:
+                self.brace_depth = 1
+                self.is_braced = True
+            else:
+                if char == "[":
+                    self.bracket_depth += 1
+                elif char == "]" and self.bracket_depth:
+                    self.bracket_depth -= 1
+                elif char == "{":
+                    self.brace_depth += 1
+                if keep:
+                    if self.word is None:
+                        self.word = []
+                    self.word.append(char)
+            i += 1
+
+        if self.is_complete:
+            self._end_word()
+
+
+def read_nodes(file_path, knobs=None):
+    """Reads the given Nuke script line by line.
+
+    :param file_path: The path of the Nuke script.
+
+    :param knobs: A dictionary of the node classes to the names of the knobs
+      which should be read. The default is :data:`KNOBS`.
+
+    :returns: A generator of (node class, {knob name: value}) tuples of the
+      nodes of the given classes, in the order they are in the script.
+    """
+    if knobs is None:
+        knobs = KNOBS
+
+    # the [node class, {knob name: value} or None] of the nodes which are not
+    # closed yet
+    nodes = []
+    command = None
+
+    def store(command):
+        if command.keep_words and len(command.words) > 1:
+            nodes[-1][1][command.words[0]] = command.words[1]
+
+    with open(file_path) as f:
+        for line in f:
+            if command is not None:
+                # the rest of a multi line knob
+                command.feed(line)
+                if command.is_complete:
+                    store(command)
+                    command = None
+                continue
+
+            match = NODE_START_RE.match(line)
+            if match:
+                node_class = match.group(1)
+                nodes.append(
+                    [node_class, {} if node_class in knobs else None]
+                )
+                continue
+
+            if NODE_END_RE.match(line):
+                if nodes:
+                    node_class, values = nodes.pop()
+                    if values is not None:
+                        yield node_class, values
+                continue
+
+            keep_words = False
+            if nodes and nodes[-1][1] is not None:
+                match = KNOB_NAME_RE.match(line)
+                keep_words = match is not None \
+                    and match.group(1) in knobs[nodes[-1][0]]
+
+            if not SPECIAL_CHARS_RE.search(line):
+                # a single line command without any quotes or braces
+                if keep_words:
+                    words = line.split()
+                    if len(words) > 1:
+                        nodes[-1][1][words[0]] = words[1]
+                continue
+
+            command = _Command(keep_words=keep_words)
+            command.feed(line)
+            if command.is_complete:
+                store(command)
+                command = None
+
+
+def evaluate(value, script_path):
+    """Evaluates the TCL expressions in the given knob value.
+
+    The following commands are evaluated, None is returned if there are
+    other commands:
+
+      * ``[value root.name]``: The path of the script.
+      * ``[file dirname <path>]``, ``[file tail <path>]`` and
+        ``[file rootname <path>]``
+      * ``[getenv <name>]``
+      * ``[python nuke.script_directory()]`` or
+        ``[python {nuke.script_directory()}]``: The directory of the script.
+
+    :param str value: The knob value.
+
+    :param str script_path: The path of the Nuke script.
+
+    :returns: str or None
+    """
+    script_path = script_path.replace("\\", "/")
+
+    def run(match):
+        words = match.group(1).replace("{", "").replace("}", "").split()
+        if words == ["value", "root.name"]:
+            return script_path
+        if len(words) == 3 and words[0] == "file":
+            if words[1] == "dirname":
+                return os.path.dirname(words[2])
+            if words[1] == "tail":
+                return os.path.basename(words[2])
+            if words[1] == "rootname":
+                return os.path.splitext(words[2])[0]
+        if len(words) == 2 and words[0] == "getenv":
+            return os.environ.get(words[1], "")
+        if words == ["python", "nuke.script_directory()"]:
+            return os.path.dirname(script_path)
+        raise ValueError(match.group(0))
+
+    while "[" in value:
+        try:
+            value, count = TCL_COMMAND_RE.subn(run, value)
+        except ValueError as e:
+            logger.debug("can not evaluate %s" % e)
+            return None
+        if not count:
+            return None
+
+    return value
+
+
+def read_knobs(file_path):
+    """Reads the given Nuke script line by line.
+
+    :returns: A tuple of the project directory (None if it is not set) and
+      the list of (node class, file knob value) tuples.
+    """
+    project_directory = None
+    files = []
+
+    for node_class, values in read_nodes(file_path):
+        if node_class == "Root":
+            project_directory = values.get("project_directory") or None
+        elif values.get("file"):
+            files.append((node_class, values["file"]))
+
+    return project_directory, files
+
+
+def scan_dependencies(file_path):
+    """Returns the files which are read or written by the given Nuke script.
+
+    :param str file_path: The path of the Nuke script.
+
+    :returns: A list of :class:`~oyProjectManager.scanners.Dependency`
+      instances, the files of the Read nodes are
+      :data:`~oyProjectManager.scanners.INPUT` and the files of the Write
+      nodes are :data:`~oyProjectManager.scanners.OUTPUT` dependencies and
+      their types are the node classes.
+    """
+    script_path = os.path.abspath(file_path)
+    script_directory = os.path.dirname(script_path)
+
+    project_directory, files = read_knobs(file_path)
+    if project_directory:
+        project_directory = evaluate(project_directory, script_path)
+    if not project_directory:
+        project_directory = script_directory
+    elif not is_absolute(project_directory):
+        project_directory = script_directory + "/" + project_directory
+
+    dependencies = []
+    seen = set()
+    for node_class, path in files:
+        path = evaluate(path, script_path)
+        if not path:
+            continue
+        if not is_absolute(path):
+            path = project_directory + "/" + path
+        dependency = Dependency(NODE_CLASSES[node_class], node_class,
+                                normalize_path(path))
+        if dependency not in seen:
+            seen.add(dependency)
+            dependencies.append(dependency)
+
+    return dependencies
+
+
+def scan(file_path):
+    """Returns the paths of the files which are read or written by the given
+    Nuke script.
+
+    The relative paths are converted to absolute paths by using the project
+    directory.
+
+    :param str file_path: The path of the Nuke script.
+
+    :returns: list of str
+    """
+    return [dependency.path for dependency in scan_dependencies(file_path)]
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Asynchronous file stats for the UIs.
+
+The :class:`.FileStatService` reads the sizes and the modification times of
+the files in a pool of worker threads by using the shared
+:class:`~oyProjectManager.utils.file_stats.FileStatCache`, and calls the
+callbacks on the GUI thread::
+
+  from oyProjectManager.ui import file_stat_service
+
+  def fill_cells(stats):
+      # called on the GUI thread, {path: FileStat or None}
+      ...
+
+  file_stat_service.get_service().request(paths, fill_cells)
+
+.. versionadded:: 0.2.5.4
+"""
+
+import os
+import threading
+import logging
+from multiprocessing.pool import ThreadPool
+
+from oyProjectManager import conf
+from oyProjectManager.utils import file_stats
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+qt_module_key = "PREFERRED_QT_MODULE"
+qt_module = "PyQt4"
+
+if os.environ.has_key(qt_module_key):
+    qt_module = os.environ[qt_module_key]
+
+if qt_module == "PySide":
+    from PySide import QtCore
+    Signal = QtCore.Signal
+elif qt_module == "PyQt4":
+    import sip
+    sip.setapi('QString', 2)
+    sip.setapi('QVariant', 2)
+    from PyQt4 import QtCore
+    Signal = QtCore.pyqtSignal
+
+
+class FileStatService(QtCore.QObject):
+    """Reads the file stats asynchronously.
+
+    It should be created on the GUI thread, use :func:`.get_service` to get
+    the shared instance.
+
+    :param int worker_count: The number of the worker threads. The default
+      is :confval:`file_stat_worker_count`.
+
+    :param stat_cache: The
+      :class:`~oyProjectManager.utils.file_stats.FileStatCache` instance. The
+      default is the shared one.
+    """
+
+    _stats_loaded = Signal(object, object)
+
+    def __init__(self, worker_count=None, stat_cache=None, parent=None):
+        super(FileStatService, self).__init__(parent)
+
+        if worker_count is None:
+            worker_count = conf.file_stat_worker_count
+
+        if stat_cache is None:
+            stat_cache = file_stats.get_cache()
+
+        self.stat_cache = stat_cache
+        self._pool = ThreadPool(worker_count)
+
+        self._stats_loaded.connect(self._call)
+
+    def request(self, paths, callback):
+        """Requests the stats of the given files.
+
+        The callback is called on the GUI thread with a dictionary of the
+        paths to :class:`~oyProjectManager.utils.file_stats.FileStat`
+        instances, or to None for the missing files. It is called immediately
+        if all the stats are cached.
+
+        :returns: True if the callback is already called
+        """
+        paths = list(paths)
+
+        stats = {}
+        for path in paths:
+            found, stat = self.stat_cache.get_cached(path)
+            if not found:
+                break
+            stats[path] = stat
+        else:
+            self._call(callback, stats)
+            return True
+
+        self._pool.apply_async(
+            self._load,
+            (paths,),
+            callback=lambda stats: self._stats_loaded.emit(callback, stats)
+        )
+        return False
+
+    def invalidate(self, path=None):
+        """Removes the stat of the given file, or all of them if the path is
+        None
+        """
+        self.stat_cache.invalidate(path)
+
+    def _load(self, paths):
+        """reads the stats in a worker thread
+        """
+        try:
+            return self.stat_cache.stat(paths)
+        except Exception as e:
+            # the callback should be called in any case
+            logger.warning("can not read the file stats: %s" % e)
+            return dict.fromkeys(paths)
+
+    @classmethod
+    def _call(cls, callback, stats):
+        """runs on the GUI thread when the stats are loaded
+        """
+        try:
+            callback(stats)
+        except RuntimeError:
+            # the widget which requested the stats is deleted
+            pass
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """Returns the shared FileStatService, creates it on the first call,
+    which should be done on the GUI thread.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = FileStatService()
+        return _service
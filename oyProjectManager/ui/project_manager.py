@@ -382,5 +382,24 @@ class MainDialog(QtGui.QDialog, project_manager_UI.Ui_dialog):
         
         proj = self.get_current_project()
         
-        if proj:
-            proj.create()
+        if proj is None:
+            return
+        
+        # refresh only the current sequence, the folders of the other
+        # sequences are not touched, the cached folder listings are not
+        # trusted, the folders may be deleted by other programs
+        sequence = self.get_current_sequence()
+        if sequence is not None:
+            report = sequence.create(refresh=True)
+        else:
+            report = proj.create(refresh=True)
+        
+        if report.failed:
+            QtGui.QMessageBox.warning(
+                self,
+                "Error",
+                "Could not create %s folders:\n\n%s" % (
+                    len(report.failed),
+                    "\n".join(sorted(report.failed)[:10])
+                )
+            )
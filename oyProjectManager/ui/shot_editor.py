@@ -147,9 +147,12 @@ class MainDialog(QtGui.QDialog, shot_editor_UI.Ui_Dialog):
         #    self.shot,
         #    self.thumbnail_graphicsView
         #)
+        # the gView is rendered to the thumbnail when the dialog is accepted
+        # so wait for the image
         ui_utils.update_gview_with_image_file(
             thumbnail_full_path,
-            self.thumbnail_graphicsView
+            self.thumbnail_graphicsView,
+            wait=True
         )
     
     def dialog_accepted(self):
@@ -7,7 +7,7 @@
 import os
 import sys
 import logging
-from sqlalchemy.sql.expression import distinct, func
+from sqlalchemy.sql.expression import func
 
 import oyProjectManager
 from oyProjectManager import config, db, utils
@@ -16,6 +16,7 @@ from oyProjectManager.models.project import Project
 from oyProjectManager.models.sequence import Sequence
 from oyProjectManager.models.shot import Shot
 from oyProjectManager.models.version import Version, VersionType
+from oyProjectManager.ui import thumbnails
 
 logger = logging.getLogger('beaker.container')
 logger.setLevel(logging.WARNING)
@@ -44,6 +45,20 @@ elif qt_module == "PyQt4":
 
 
 
+def get_take_names(latest_versions):
+    """returns a dictionary of versionable ids to the sorted take names from
+    the result of :meth:`~oyProjectManager.models.version.Version.latest_versions`
+    """
+    take_names_of = {}
+    for version_of_id, type_id, take_name in latest_versions:
+        take_names_of.setdefault(version_of_id, set()).add(take_name)
+    
+    for version_of_id in take_names_of:
+        take_names_of[version_of_id] = sorted(take_names_of[version_of_id])
+    
+    return take_names_of
+
+
 def UI():
     """the UI to call the dialog by itself
     """
@@ -200,6 +215,33 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
             # update the assets_tableWidget
             self.fill_assets_tableWidget()
     
+    def load_thumbnails(self, table_widget, items):
+        """loads the thumbnails of the given thumbnail cells in the background
+        and sets them as the background of the cells when they are ready
+        """
+        # the thumbnails of the previous fill of the table are ignored
+        generation = getattr(table_widget, 'thumbnail_generation', 0) + 1
+        table_widget.thumbnail_generation = generation
+        
+        service = thumbnails.get_service()
+        width = conf.thumbnail_size[0] / 2
+        height = conf.thumbnail_size[1] / 2
+        
+        for item in items:
+            def set_thumbnail(pixmap, item=item):
+                if pixmap is None or \
+                   table_widget.thumbnail_generation != generation:
+                    return
+                
+                brush = QtGui.QBrush(pixmap)
+                item.setBackground(brush)
+                
+                # scale the row height
+                table_widget.setRowHeight(item.row(), height)
+            
+            service.request(item.thumbnail_full_path, width, height,
+                            set_thumbnail)
+    
     def fill_assets_tableWidget(self):
         """fills the asset_tableWidget
         """
@@ -211,8 +253,6 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
             .order_by(VersionType.name)\
             .all()
         
-        asset_vtype_codes = map(lambda x: x.code, asset_vtypes)
-        
         labels = ['Thumbnail', 'Type', 'Name', 'Take']
         labels.extend(map(lambda x: x.code, asset_vtypes))
         
@@ -233,22 +273,18 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
             .order_by(Asset.type)\
             .all()
         
+        # get the latest versions of all the assets with one query
+        latest_versions = Version.latest_versions(project, 'Asset')
+        take_names_of = get_take_names(latest_versions)
+        
         # feed the assets to the list
         items = []
         
         row = 0
         column = 0
         for asset in assets:
-           # get the distinct take names
-            take_names = map(
-                lambda x: x[0],
-                db.query(distinct(Version.take_name))
-                    .filter(Version.version_of==asset)
-                    .all()
-            )
-            
-            if not len(take_names):
-                take_names = ['-']
+            # get the distinct take names
+            take_names = take_names_of.get(asset.id, ['-'])
             
             for take_name in take_names:
                 
@@ -256,21 +292,8 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
                 column = 0
                 item = QtGui.QTableWidgetItem()
                 item.setTextAlignment(0x0004 | 0x0080)
-                # set the thumbnail
-                if os.path.exists(asset.thumbnail_full_path):
-                    thumbnail_full_path = asset.thumbnail_full_path
-                    pixmap = QtGui.QPixmap(thumbnail_full_path)
-                    pixmap = pixmap.scaled(
-                        conf.thumbnail_size[0] / 2,
-                        conf.thumbnail_size[1] / 2,
-                        QtCore.Qt.KeepAspectRatio,
-                        QtCore.Qt.SmoothTransformation
-                    )
-                    brush = QtGui.QBrush(pixmap)
-                    item.has_thumbnail = True
-                    item.setBackground(brush)
-                else:
-                    item.has_thumbnail = False
+                # the thumbnail is set when it is loaded
+                item.thumbnail_full_path = asset.thumbnail_full_path
                 items.append(item)
                 
                 column = 1
@@ -291,21 +314,16 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
                 #self.assets_tableWidget.setItem(row, column, item)
                 items.append(item)
                 
-                for type_code in asset_vtype_codes:
+                for vtype in asset_vtypes:
                     column += 1
                     
                     # now for every asset vtype create two rows instead of one
                     # and show the users name on the second row
                     
                     # get the latest version of that type and take
-                    version = Version.query()\
-                        .join(VersionType)\
-                        .filter(Version.version_of==asset)\
-                        .filter(Version.type_id==VersionType.id)\
-                        .filter(VersionType.code==type_code)\
-                        .filter(Version.take_name==take_name)\
-                        .order_by(Version.version_number.desc())\
-                        .first()
+                    version = latest_versions.get(
+                        (asset.id, vtype.id, take_name)
+                    )
                     
                     if version:
                         # mark the status of that type in that take
@@ -368,16 +386,11 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
         self.assets_tableWidget.resizeRowsToContents()
         
         # need to pass over the first rows again
-        # to resize the thumbnail cell
-        for r in range(row):
-            item_index = r * (column + 1)
-            item = items[item_index]
-            if item.has_thumbnail:
-                # scale the row height
-                self.assets_tableWidget.setRowHeight(
-                    r,
-                    conf.thumbnail_size[1] / 2
-                )
+        # to load the thumbnails
+        self.load_thumbnails(
+            self.assets_tableWidget,
+            [items[r * (column + 1)] for r in range(row)]
+        )
         
         # resize columns to fit the content
         self.assets_tableWidget.resizeColumnsToContents()
@@ -399,8 +412,6 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
             .order_by(VersionType.name)\
             .all()
         
-        shot_vtype_codes = map(lambda x: x.code, shot_vtypes)
-        
         labels = ['Thumbnail', 'Sequence', 'Number', 'Take']
         labels.extend(map(lambda x: x.code, shot_vtypes))
         
@@ -430,6 +441,10 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
         # set the row count for all shots in that sequence
         self.shots_tableWidget.setRowCount(shot_count)
         
+        # get the latest versions of all the shots with one query
+        latest_versions = Version.latest_versions(project, 'Shot')
+        take_names_of = get_take_names(latest_versions)
+        
         items = []
         row = 0
         column = 0
@@ -448,36 +463,15 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
             
             previous_shot = None
             for shot in shots:
-                take_names = map(
-                    lambda x: x[0],
-                    db.query(distinct(Version.take_name))
-                        .filter(Version.version_of==shot)
-                        .all()
-                )
-                
-                if not len(take_names):
-                    take_names = ['-']
+                take_names = take_names_of.get(shot.id, ['-'])
                 
                 for take_name in take_names:
                     # add the seq name to the first column
                     column = 0
                     item = QtGui.QTableWidgetItem()
                     item.setTextAlignment(0x0004 | 0x0080)
-                    #set the thumbnail
-                    if os.path.exists(shot.thumbnail_full_path):
-                        thumbnail_full_path = shot.thumbnail_full_path
-                        pixmap = QtGui.QPixmap(thumbnail_full_path)
-                        pixmap = pixmap.scaled(
-                            conf.thumbnail_size[0] / 2,
-                            conf.thumbnail_size[1] / 2,
-                            QtCore.Qt.KeepAspectRatio,
-                            QtCore.Qt.SmoothTransformation
-                        )
-                        brush = QtGui.QBrush(pixmap)
-                        item.has_thumbnail = True
-                        item.setBackground(brush)
-                    else:
-                        item.has_thumbnail = False
+                    # the thumbnail is set when it is loaded
+                    item.thumbnail_full_path = shot.thumbnail_full_path
                     items.append(item)
                     
                     column = 1
@@ -500,18 +494,13 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
                     #self.assets_tableWidget.setItem(row, column, item)
                     items.append(item)
                 
-                    for type_code in shot_vtype_codes:
+                    for vtype in shot_vtypes:
                         column += 1
                         
                         # get the latest version of that type and take
-                        version = Version.query()\
-                            .join(VersionType)\
-                            .filter(Version.version_of==shot)\
-                            .filter(Version.type_id==VersionType.id)\
-                            .filter(VersionType.code==type_code)\
-                            .filter(Version.take_name==take_name)\
-                            .order_by(Version.version_number.desc())\
-                            .first()
+                        version = latest_versions.get(
+                            (shot.id, vtype.id, take_name)
+                        )
                         
                         if version:
                             # mark the status of that type in that take
@@ -574,16 +563,11 @@ class MainDialog(QtGui.QDialog, status_manager_UI.Ui_Dialog):
         self.shots_tableWidget.resizeRowsToContents()
         
         # need to pass over the first rows again
-        # to resize the thumbnail cell
-        for r in range(row):
-            item_index = r * (column + 1)
-            item = items[item_index]
-            if item.has_thumbnail:
-                # scale the row height
-                self.shots_tableWidget.setRowHeight(
-                    r,
-                    conf.thumbnail_size[1] / 2
-                )
+        # to load the thumbnails
+        self.load_thumbnails(
+            self.shots_tableWidget,
+            [items[r * (column + 1)] for r in range(row)]
+        )
         
         # resize columns to fit the content
         self.shots_tableWidget.resizeColumnsToContents()
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Asynchronous thumbnail loading.
+
+Reading and smooth scaling a thumbnail on the GUI thread blocks the event
+loop, especially when the repository is on a network share. The
+:class:`.ThumbnailService` decodes and scales the images in a pool of worker
+threads, keeps the resulting QPixmaps in a bounded LRU cache and keeps the
+scaled images in a bounded on-disk cache (:confval:`thumbnail_cache_path`),
+both are keyed by the source path, its modification time and the requested
+size (see :mod:`oyProjectManager.utils.thumbnail_cache`)::
+
+  from oyProjectManager.ui import thumbnails
+
+  def show(pixmap):
+      # called on the GUI thread, pixmap is None if there is no image
+      ...
+
+  thumbnails.get_service().request(path, 160, 90, show)
+
+Only QImages are used in the worker threads, the QPixmaps are created on the
+GUI thread.
+
+.. versionadded:: 0.2.5.4
+"""
+
+import os
+import threading
+import logging
+from multiprocessing.pool import ThreadPool
+
+from oyProjectManager import conf
+from oyProjectManager.utils import file_stats
+from oyProjectManager.utils.thumbnail_cache import MemoryCache, get_disk_cache
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+qt_module_key = "PREFERRED_QT_MODULE"
+qt_module = "PyQt4"
+
+if os.environ.has_key(qt_module_key):
+    qt_module = os.environ[qt_module_key]
+
+if qt_module == "PySide":
+    from PySide import QtGui, QtCore
+    Signal = QtCore.Signal
+elif qt_module == "PyQt4":
+    import sip
+    sip.setapi('QString', 2)
+    sip.setapi('QVariant', 2)
+    from PyQt4 import QtGui, QtCore
+    Signal = QtCore.pyqtSignal
+
+
+def load_image(image_full_path, width, height, mtime=None):
+    """Loads the given image scaled to fit in the given size by using the
+    on-disk cache. It is safe to call it outside of the GUI thread.
+
+    :param float mtime: The modification time of the image, it is read from
+      the disk if it is None.
+
+    :returns: QtGui.QImage or None if there is no such image
+    """
+    if mtime is None:
+        try:
+            mtime = os.stat(image_full_path).st_mtime
+        except OSError:
+            return None
+
+    disk_cache = get_disk_cache()
+    cache_file_path = disk_cache.get_file_path(image_full_path, mtime, width,
+                                               height)
+
+    if disk_cache.touch(cache_file_path):
+        image = QtGui.QImage(cache_file_path)
+        if not image.isNull():
+            return image
+
+    image = QtGui.QImage(image_full_path)
+    if image.isNull():
+        logger.warning("can not read image: %s" % image_full_path)
+        return None
+
+    image = image.scaled(
+        width, height,
+        QtCore.Qt.KeepAspectRatio,
+        QtCore.Qt.SmoothTransformation
+    )
+
+    # save it to a temp file first so the other processes never read a half
+    # written file
+    try:
+        os.makedirs(os.path.dirname(cache_file_path))
+    except OSError:
+        # dir exists
+        pass
+
+    temp_file_path = "%s.%s.tmp" % (cache_file_path, os.getpid())
+    if image.save(temp_file_path, conf.thumbnail_format,
+                  conf.thumbnail_quality):
+        # the image is still usable if it can not be cached
+        disk_cache.add(temp_file_path, cache_file_path)
+
+    return image
+
+
+class ThumbnailService(QtCore.QObject):
+    """Loads the thumbnails asynchronously and caches them.
+
+    It should be created on the GUI thread, use :func:`.get_service` to get
+    the shared instance.
+
+    :param int worker_count: The number of the worker threads. The default
+      is :confval:`thumbnail_worker_count`.
+
+    :param int cache_size: The maximum number of QPixmaps kept in memory. The
+      default is :confval:`thumbnail_cache_size`.
+    """
+
+    _image_loaded = Signal(object, object)
+
+    def __init__(self, worker_count=None, cache_size=None, parent=None):
+        super(ThumbnailService, self).__init__(parent)
+
+        if worker_count is None:
+            worker_count = conf.thumbnail_worker_count
+
+        if cache_size is None:
+            cache_size = conf.thumbnail_cache_size
+
+        self.cache_size = cache_size
+        self._pool = ThreadPool(worker_count)
+
+        # (path, mtime, width, height): QPixmap, the missing images are not
+        # cached
+        self._pixmaps = MemoryCache(cache_size)
+        # (path, width, height): [callbacks]
+        self._pending = {}
+
+        self._image_loaded.connect(self._store_image)
+
+    def get_cached(self, image_full_path, width, height):
+        """Returns (True, pixmap) if the thumbnail of the current version of
+        the image is in the memory cache and (False, None) otherwise.
+
+        The modification time of the image is taken from the shared
+        :class:`~oyProjectManager.utils.file_stats.FileStatCache`, the disk is
+        not touched, so it is a miss if the stat of the image is not cached.
+        """
+        found, stat = file_stats.get_cache().get_cached(image_full_path)
+        if not found or stat is None:
+            return False, None
+
+        return self._pixmaps.get(image_full_path, stat.mtime, width, height)
+
+    def request(self, image_full_path, width, height, callback):
+        """Requests the thumbnail of the given image.
+
+        The callback is called with the QPixmap, or with None if there is no
+        such image, on the GUI thread. It is called immediately if the
+        thumbnail is in the memory cache.
+
+        :returns: True if the callback is already called
+        """
+        found, pixmap = self.get_cached(image_full_path, width, height)
+        if found:
+            callback(pixmap)
+            return True
+
+        key = (image_full_path, width, height)
+        callbacks = self._pending.get(key)
+        if callbacks is not None:
+            # it is already being loaded
+            callbacks.append(callback)
+            return False
+
+        self._pending[key] = [callback]
+        self._pool.apply_async(
+            self._load,
+            (key,),
+            callback=lambda result: self._image_loaded.emit(key, result)
+        )
+        return False
+
+    def load(self, image_full_path, width, height):
+        """Returns the thumbnail of the given image as a QPixmap by loading it
+        in the current thread if it is not in the memory cache. Returns None
+        if there is no such image.
+        """
+        found, pixmap = self.get_cached(image_full_path, width, height)
+        if found:
+            return pixmap
+
+        key = (image_full_path, width, height)
+        return self._store_pixmap(key, *self._load(key))
+
+    def invalidate(self, image_full_path):
+        """Removes the thumbnails of the given image from the memory cache
+        and its cached stat, so the next request reads its modification time
+        again. The on-disk cache is keyed by the modification time of the
+        image so it doesn't need to be invalidated.
+        """
+        self._pixmaps.invalidate(image_full_path)
+        file_stats.get_cache().invalidate(image_full_path)
+
+    def clear(self):
+        """Removes all the thumbnails from the memory cache
+        """
+        self._pixmaps.invalidate()
+
+    def _load(self, key):
+        """loads the image in a worker thread, returns the modification time
+        of the image and the cached QPixmap or the loaded QImage, or
+        (None, None) if there is no such image
+        """
+        image_full_path, width, height = key
+        try:
+            stat = file_stats.get_cache().stat([image_full_path])\
+                .get(image_full_path)
+            if stat is None:
+                return None, None
+
+            # the stat may be expired while the pixmap is still cached
+            found, pixmap = self._pixmaps.get(image_full_path, stat.mtime,
+                                              width, height)
+            if found:
+                return stat.mtime, pixmap
+
+            return stat.mtime, load_image(image_full_path, width, height,
+                                          stat.mtime)
+        except Exception as e:
+            # the callback should be called in any case
+            logger.warning("can not load thumbnail %s: %s" % (key[0], e))
+            return None, None
+
+    @classmethod
+    def _to_pixmap(cls, image):
+        """converts the QImage to a QPixmap
+        """
+        if image is None or isinstance(image, QtGui.QPixmap):
+            return image
+        return QtGui.QPixmap.fromImage(image)
+
+    def _store_pixmap(self, key, mtime, image):
+        """converts the image to a QPixmap and stores it in the memory cache,
+        the missing images are not stored
+        """
+        pixmap = self._to_pixmap(image)
+        if pixmap is not None:
+            image_full_path, width, height = key
+            self._pixmaps.set(image_full_path, mtime, width, height, pixmap)
+        return pixmap
+
+    def _store_image(self, key, result):
+        """runs on the GUI thread when an image is loaded
+        """
+        pixmap = self._store_pixmap(key, *result)
+
+        for callback in self._pending.pop(key, []):
+            try:
+                callback(pixmap)
+            except RuntimeError:
+                # the widget which requested the thumbnail is deleted
+                pass
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """Returns the shared ThumbnailService, creates it on the first call,
+    which should be done on the GUI thread.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ThumbnailService()
+        return _service
@@ -10,6 +10,7 @@ import os
 import logging
 from oyProjectManager import conf
 from oyProjectManager.models.entity import VersionableBase
+from oyProjectManager.ui import thumbnails
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
@@ -65,16 +66,29 @@ def update_gview_with_versionable_thumbnail(versionable, gView):
         gView
     )
 
-def update_gview_with_image_file(image_full_path, gView):
+def update_gview_with_image_file(image_full_path, gView, wait=False):
     """updates the QGraphicsView with the given image
+    
+    The image is loaded and scaled in the background by the
+    :class:`~oyProjectManager.ui.thumbnails.ThumbnailService` and shown when
+    it is ready, unless it is the last requested image of the gView.
+    
+    :param str image_full_path: The full path of the image.
+    
+    :param gView: A QtGui.QGraphicsView instance
+    
+    :param bool wait: Load the image in the current thread, so it is shown
+      in the gView when the function returns.
     """
     
-    if not isinstance(gView, QtGui.QGraphicsView) and \
-        not isinstance(versionable, VersionableBase):
+    if not isinstance(gView, QtGui.QGraphicsView):
         return
     
     clear_thumbnail(gView)
     
+    # the last requested image of this gView
+    gView.thumbnail_full_path = image_full_path
+    
     if image_full_path != "":
         logger.debug("creating pixmap from: %s" % image_full_path)
         
@@ -82,15 +96,20 @@ def update_gview_with_image_file(image_full_path, gView):
         width = size[0]
         height = size[1]
         
-        if os.path.exists(image_full_path):
-            pixmap = QtGui.QPixmap(image_full_path, format='JPG').scaled(
-                width, height,
-                QtCore.Qt.KeepAspectRatio,
-                QtCore.Qt.SmoothTransformation
-            )
+        def show_pixmap(pixmap):
+            if pixmap is None or \
+               getattr(gView, "thumbnail_full_path", None) != image_full_path:
+                # no image or another one is requested in the meantime
+                return
             
             scene = gView.scene()
             scene.addPixmap(pixmap)
+        
+        service = thumbnails.get_service()
+        if wait:
+            show_pixmap(service.load(image_full_path, width, height))
+        else:
+            service.request(image_full_path, width, height, show_pixmap)
 
 def upload_thumbnail(versionable, thumbnail_source_full_path, size=conf.thumbnail_size):
     """Uploads the given thumbnail for the given versionable
@@ -131,6 +150,9 @@ def upload_thumbnail(versionable, thumbnail_source_full_path, size=conf.thumbnai
         conf.thumbnail_format,
         conf.thumbnail_quality
     )
+    
+    # the old thumbnail should not be shown anymore
+    thumbnails.get_service().invalidate(thumbnail_full_path)
 
 def choose_thumbnail(parent):
     """shows a dialog for thumbnail upload
@@ -166,3 +188,6 @@ def render_image_from_gview(gview, image_full_path):
         pixmap.save(
             image_full_path
         )
+        
+        # the old image should not be shown anymore
+        thumbnails.get_service().invalidate(image_full_path)
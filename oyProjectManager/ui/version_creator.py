@@ -8,7 +8,6 @@ import os
 import re
 import sys
 import logging
-import datetime
 from sqlalchemy.exc import IntegrityError
 
 from sqlalchemy.sql.expression import distinct
@@ -17,7 +16,8 @@ import oyProjectManager
 from oyProjectManager import (config, db, utils, Asset, User, EnvironmentBase,
                               Project, Sequence, Shot, Version,
                               VersionType, VersionTypeEnvironments)
-from oyProjectManager.ui import create_asset_dialog, version_updater, ui_utils
+from oyProjectManager.ui import (create_asset_dialog, version_updater,
+                                ui_utils, versions_model)
 
 logger = logging.getLogger('beaker.container')
 logger.setLevel(logging.WARNING)
@@ -183,22 +183,17 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
         self.assets_tableWidget.assets = []
         self.shots_listWidget.shots = []
         self.input_dialog = None
-        self.previous_versions_tableWidget.versions = []
+
+        # the previous versions are loaded page by page while scrolling
+        self.previous_versions_model = \
+            versions_model.VersionsTableModel(parent=self)
+        self.previous_versions_tableWidget.setModel(
+            self.previous_versions_model
+        )
 
         # set the asset_tableWidget.labels
         self.assets_tableWidget.labels = ['Type', 'Name']
 
-        # set previous_versions_tableWidget.labels
-        self.previous_versions_tableWidget.labels = [
-            "Version",
-            "User",
-            "Status",
-            "File Size",
-            "Date",
-            "Note",
-            #"Path"
-        ]
-
         # setup signals
         self._setup_signals()
 
@@ -364,7 +359,7 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
             # add double clicking to previous_versions_tableWidget
             QtCore.QObject.connect(
                 self.previous_versions_tableWidget,
-                QtCore.SIGNAL("cellDoubleClicked(int,int)"),
+                QtCore.SIGNAL("doubleClicked(QModelIndex)"),
                 self.chose_pushButton_clicked
             )
         else:
@@ -372,7 +367,7 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
             # add double clicking to previous_versions_tableWidget
             QtCore.QObject.connect(
                 self.previous_versions_tableWidget,
-                QtCore.SIGNAL("cellDoubleClicked(int,int)"),
+                QtCore.SIGNAL("doubleClicked(QModelIndex)"),
                 self.open_pushButton_clicked
             )
 
@@ -470,12 +465,11 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
         global_position = \
             self.previous_versions_tableWidget.mapToGlobal(position)
 
-        item = self.previous_versions_tableWidget.itemAt(position)
-        if not item:
+        index = self.previous_versions_tableWidget.indexAt(position)
+        if not index.isValid():
             return
 
-        index = item.row()
-        version = self.previous_versions_tableWidget.versions[index]
+        version = self.previous_versions_model.version_at(index.row())
 
         # create the menu
         menu = QtGui.QMenu()
@@ -1148,14 +1142,7 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
     def clear_previous_versions_tableWidget(self):
         """clears the previous_versions_tableWidget properly
         """
-        # clear the data
-        self.previous_versions_tableWidget.clear()
-        self.previous_versions_tableWidget.versions = []
-
-        # reset the labels
-        self.previous_versions_tableWidget.setHorizontalHeaderLabels(
-            self.previous_versions_tableWidget.labels
-        )
+        self.previous_versions_model.clear()
 
     def update_previous_versions_tableWidget(self):
         """updates the previous_versions_tableWidget
@@ -1173,8 +1160,6 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
         if version_type_name != '':
             logger.debug("version_type_name: %s" % version_type_name)
         else:
-            # delete the versions cache
-            self.previous_versions_tableWidget.versions = []
             return
 
         # take name
@@ -1188,160 +1173,19 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
         else:
             return
 
-        # query the Versions of this type and take
-        query = Version.query().join(VersionType) \
-            .filter(VersionType.name == version_type_name) \
-            .filter(Version.version_of == versionable) \
-            .filter(Version.take_name == take_name)
-
-        # get the published only
-        if self.show_published_only_checkBox.isChecked():
-            query = query.filter(Version.is_published == True)
-
-        # show how many
-        count = self.version_count_spinBox.value()
-
-        versions = query.order_by(Version.version_number.desc()) \
-            .limit(count).all()
-
-        versions.reverse()
-
-        # set the versions cache by adding them to the widget
-        self.previous_versions_tableWidget.versions = versions
-
-        self.previous_versions_tableWidget.setRowCount(len(versions))
-
-        def set_font(item):
-            """sets the font for the given item
-
-            :param item: the a QTableWidgetItem
-            """
-            my_font = item.font()
-            my_font.setBold(True)
-
-            item.setFont(my_font)
-
-            foreground = item.foreground()
-            foreground.setColor(QtGui.QColor(0, 192, 0))
-            item.setForeground(foreground)
-
-        # update the previous versions list
-        for i, vers in enumerate(versions):
-
-            is_published = vers.is_published
-
-            # ------------------------------------
-            # version_number
-            item = QtGui.QTableWidgetItem(str(vers.version_number))
-            # align to center and vertical center
-            item.setTextAlignment(0x0004 | 0x0080)
-
-            if is_published:
-                set_font(item)
-
-            self.previous_versions_tableWidget.setItem(i, 0, item)
-            # ------------------------------------
-
-            # ------------------------------------
-            # user.name
-            item = QtGui.QTableWidgetItem(vers.created_by.name)
-            # align to left and vertical center
-            item.setTextAlignment(0x0001 | 0x0080)
-
-            if is_published:
-                set_font(item)
-
-            self.previous_versions_tableWidget.setItem(i, 1, item)
-            # ------------------------------------
-
-            # ------------------------------------
-            # status
-            item = QtGui.QTableWidgetItem(vers.status)
-            # align to left and vertical center
-            item.setTextAlignment(0x0004 | 0x0080)
-
-            #if is_published:
-            #    set_font(item)
-
-            # colorize the item
-            index = conf.status_list.index(vers.status)
-            bgcolor = conf.status_bg_colors[index]
-            fgcolor = conf.status_fg_colors[index]
-
-            bg = item.background()
-            bg.setColor(QtGui.QColor(*bgcolor))
-            item.setBackground(bg)
-
-            fg = item.foreground()
-            fg.setColor(QtGui.QColor(*fgcolor))
-
-            try:
-                item.setBackgroundColor(QtGui.QColor(*bgcolor))
-            except AttributeError:  # gives error with PySide
-                pass
-
-            self.previous_versions_tableWidget.setItem(i, 2, item)
-            # ------------------------------------
-
-
-            # ------------------------------------
-            # filesize
-
-            # get the file size
-            #file_size_format = "%.2f MB"
-            file_size = -1
-            if os.path.exists(vers.full_path):
-                file_size = float(
-                    os.path.getsize(vers.full_path)) / 1024 / 1024
-
-            item = QtGui.QTableWidgetItem(conf.file_size_format % file_size)
-            # align to left and vertical center
-            item.setTextAlignment(0x0001 | 0x0080)
-
-            if is_published:
-                set_font(item)
-
-            self.previous_versions_tableWidget.setItem(i, 3, item)
-            # ------------------------------------
-
-            # ------------------------------------
-            # date
-
-            # get the file date
-            file_date = datetime.datetime.today()
-            if os.path.exists(vers.full_path):
-                file_date = datetime.datetime.fromtimestamp(
-                    os.path.getmtime(vers.full_path)
-                )
-            item = QtGui.QTableWidgetItem(
-                file_date.strftime(conf.time_format)
-            )
-
-            # align to left and vertical center
-            item.setTextAlignment(0x0001 | 0x0080)
-
-            if is_published:
-                set_font(item)
-
-            self.previous_versions_tableWidget.setItem(i, 4, item)
-            # ------------------------------------
+        version_type = db.get_cached(VersionType, name=version_type_name)
 
-            # ------------------------------------
-            # note
-            item = QtGui.QTableWidgetItem(vers.note)
-            # align to left and vertical center
-            item.setTextAlignment(0x0001 | 0x0080)
-
-            if is_published:
-                set_font(item)
-
-            self.previous_versions_tableWidget.setItem(i, 5, item)
-            # ------------------------------------
+        # show the last versions of this type and take, the model loads them
+        # page by page, and the cells are built only when they are shown
+        self.previous_versions_model.set_series(
+            versionable,
+            version_type,
+            take_name,
+            published_only=self.show_published_only_checkBox.isChecked(),
+            count=self.version_count_spinBox.value()
+        )
 
-        # resize the first column
-        self.previous_versions_tableWidget.resizeRowsToContents()
         self.previous_versions_tableWidget.resizeColumnsToContents()
-        self.previous_versions_tableWidget.resizeRowsToContents()
 
     def create_asset_pushButton_clicked(self):
         """displays an input dialog and creates a new asset if everything is ok
@@ -1438,10 +1282,11 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
             version_type_name = item.text()
 
         # get the version type instance
-        return VersionType.query() \
-            .filter(VersionType.type_for == type_for) \
-            .filter(VersionType.name == version_type_name) \
-            .first()
+        return db.get_cached(
+            VersionType,
+            type_for=type_for,
+            name=version_type_name
+        )
 
     def get_current_project(self):
         """Returns the currently selected project instance in the
@@ -1558,7 +1403,7 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
         # it the current selection
         if ok:
             # get the type
-            vers_type = VersionType.query().filter_by(name=type_name).first()
+            vers_type = db.get_cached(VersionType, name=type_name)
 
             try:
                 self.add_type(vers_type)
@@ -1654,13 +1499,8 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
         instance from the UI by looking at the previous_versions_tableWidget
         """
 
-        index = self.previous_versions_tableWidget.currentRow()
-
-        try:
-            version = self.previous_versions_tableWidget.versions[index]
-            return version
-        except IndexError:
-            return None
+        index = self.previous_versions_tableWidget.currentIndex()
+        return self.previous_versions_model.version_at(index.row())
 
     def get_user(self):
         """returns the current User instance from the interface by looking at
@@ -1683,7 +1523,15 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
 
         # call the environments export_as method
         if self.environment is not None:
-            self.environment.export_as(new_version)
+            # reserve the version number before the file is written
+            new_version.allocate()
+
+            try:
+                self.environment.export_as(new_version)
+            except RuntimeError as e:
+                self.release_version(new_version)
+                QtGui.QMessageBox.critical(self, 'Error', str(e))
+                return None
 
             # inform the user about what happened
             if logger.level != logging.DEBUG:
@@ -1708,11 +1556,16 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
             QtGui.QMessageBox.critical(self, "Error", e)
             return None
 
+        # reserve the version number before the file is written, so the
+        # file of another Version saved in the meantime is not overwritten
+        new_version.allocate()
+
         # call the environments save_as method
         if self.environment and isinstance(self.environment, EnvironmentBase):
             try:
                 self.environment.save_as(new_version)
             except RuntimeError as e:
+                self.release_version(new_version)
                 QtGui.QMessageBox.critical(self, 'Error', str(e))
                 return None
         else:
@@ -1747,9 +1600,8 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
                 QtGui.QMessageBox.Ok
             )
 
-        # save the new version to the database
-        db.session.add(new_version)
-        db.session.commit()
+        # save the changes of the new version to the database
+        new_version.save()
 
         # save the last user
         conf.last_user_id = new_version.created_by.id
@@ -1761,6 +1613,13 @@ class MainDialog(QtGui.QDialog, version_creator_UI.Ui_Dialog):
             # refresh the UI
             self.project_changed()
 
+    def release_version(self, version):
+        """deletes the given allocated Version from the database, if its file
+        could not be written
+        """
+        db.session.delete(version)
+        db.session.commit()
+
     def chose_pushButton_clicked(self):
         """runs when the chose_pushButton clicked
         """
@@ -351,27 +351,13 @@ class Ui_Dialog(object):
         self.version_count_spinBox.setObjectName(_fromUtf8("version_count_spinBox"))
         self.horizontalLayout_10.addWidget(self.version_count_spinBox)
         self.verticalLayout_7.addLayout(self.horizontalLayout_10)
-        self.previous_versions_tableWidget = QtGui.QTableWidget(self.previous_versions_groupBox)
+        self.previous_versions_tableWidget = QtGui.QTableView(self.previous_versions_groupBox)
         self.previous_versions_tableWidget.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
         self.previous_versions_tableWidget.setAlternatingRowColors(True)
         self.previous_versions_tableWidget.setSelectionMode(QtGui.QAbstractItemView.SingleSelection)
         self.previous_versions_tableWidget.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
         self.previous_versions_tableWidget.setShowGrid(False)
-        self.previous_versions_tableWidget.setColumnCount(6)
         self.previous_versions_tableWidget.setObjectName(_fromUtf8("previous_versions_tableWidget"))
-        self.previous_versions_tableWidget.setRowCount(0)
-        item = QtGui.QTableWidgetItem()
-        self.previous_versions_tableWidget.setHorizontalHeaderItem(0, item)
-        item = QtGui.QTableWidgetItem()
-        self.previous_versions_tableWidget.setHorizontalHeaderItem(1, item)
-        item = QtGui.QTableWidgetItem()
-        self.previous_versions_tableWidget.setHorizontalHeaderItem(2, item)
-        item = QtGui.QTableWidgetItem()
-        self.previous_versions_tableWidget.setHorizontalHeaderItem(3, item)
-        item = QtGui.QTableWidgetItem()
-        self.previous_versions_tableWidget.setHorizontalHeaderItem(4, item)
-        item = QtGui.QTableWidgetItem()
-        self.previous_versions_tableWidget.setHorizontalHeaderItem(5, item)
         self.previous_versions_tableWidget.horizontalHeader().setStretchLastSection(True)
         self.previous_versions_tableWidget.verticalHeader().setStretchLastSection(False)
         self.verticalLayout_7.addWidget(self.previous_versions_tableWidget)
@@ -465,18 +451,6 @@ class Ui_Dialog(object):
         self.show_published_only_checkBox.setText(QtGui.QApplication.translate("Dialog", "Show Published Only", None, QtGui.QApplication.UnicodeUTF8))
         self.show_only_label.setText(QtGui.QApplication.translate("Dialog", "Show Only", None, QtGui.QApplication.UnicodeUTF8))
         self.previous_versions_tableWidget.setToolTip(QtGui.QApplication.translate("Dialog", "<html><head/><body><p>Right click to:</p><ul style=\"margin-top: 0px; margin-bottom: 0px; margin-left: 0px; margin-right: 0px; -qt-list-indent: 1;\"><li style=\" margin-top:12px; margin-bottom:0px; margin-left:0px; margin-right:0px; -qt-block-indent:0; text-indent:0px;\"><span style=\" font-weight:600;\">Change Status</span></li><li style=\" margin-top:0px; margin-bottom:12px; margin-left:0px; margin-right:0px; -qt-block-indent:0; text-indent:0px;\"><span style=\" font-weight:600;\">Browse Outputs</span></li></ul><p>Double click to:</p><ul style=\"margin-top: 0px; margin-bottom: 0px; margin-left: 0px; margin-right: 0px; -qt-list-indent: 1;\"><li style=\" margin-top:12px; margin-bottom:12px; margin-left:0px; margin-right:0px; -qt-block-indent:0; text-indent:0px;\"><span style=\" font-weight:600;\">Open</span></li></ul></body></html>", None, QtGui.QApplication.UnicodeUTF8))
-        item = self.previous_versions_tableWidget.horizontalHeaderItem(0)
-        item.setText(QtGui.QApplication.translate("Dialog", "Version", None, QtGui.QApplication.UnicodeUTF8))
-        item = self.previous_versions_tableWidget.horizontalHeaderItem(1)
-        item.setText(QtGui.QApplication.translate("Dialog", "User", None, QtGui.QApplication.UnicodeUTF8))
-        item = self.previous_versions_tableWidget.horizontalHeaderItem(2)
-        item.setText(QtGui.QApplication.translate("Dialog", "Status", None, QtGui.QApplication.UnicodeUTF8))
-        item = self.previous_versions_tableWidget.horizontalHeaderItem(3)
-        item.setText(QtGui.QApplication.translate("Dialog", "File Size", None, QtGui.QApplication.UnicodeUTF8))
-        item = self.previous_versions_tableWidget.horizontalHeaderItem(4)
-        item.setText(QtGui.QApplication.translate("Dialog", "Date", None, QtGui.QApplication.UnicodeUTF8))
-        item = self.previous_versions_tableWidget.horizontalHeaderItem(5)
-        item.setText(QtGui.QApplication.translate("Dialog", "Note", None, QtGui.QApplication.UnicodeUTF8))
         self.chose_pushButton.setText(QtGui.QApplication.translate("Dialog", "Choose", None, QtGui.QApplication.UnicodeUTF8))
         self.open_pushButton.setText(QtGui.QApplication.translate("Dialog", "Open", None, QtGui.QApplication.UnicodeUTF8))
         self.reference_pushButton.setText(QtGui.QApplication.translate("Dialog", "Reference", None, QtGui.QApplication.UnicodeUTF8))
@@ -22,6 +22,8 @@ elif qt_module == "PyQt4":
     from PyQt4 import QtGui, QtCore
     from oyProjectManager.ui import version_updater_UI_pyqt4 as version_updater_UI
 
+from oyProjectManager.models.version import Version
+
 def UI(environment):
     """the UI to call the dialog by itself
     """
@@ -171,10 +173,15 @@ class MainDialog(QtGui.QDialog, version_updater_UI.Ui_Dialog):
         
         unpublished_versions = []
         
+        # get the latest published versions of all the versions at once
+        latest_published_versions = Version.latest_published_versions(
+            [version_info[0] for version_info in self._version_tuple_list]
+        )
+        
         for i,version_info in enumerate(self._version_tuple_list):
             version = version_info[0]
             # TODO: there is a problem about unpublished versions
-            latest_published_version = version.latest_published_version()
+            latest_published_version = latest_published_versions[i]
             if latest_published_version is None:
                 # just skip this one or at least warn the user
                 unpublished_versions.append(version)
@@ -220,7 +227,7 @@ class MainDialog(QtGui.QDialog, version_updater_UI.Ui_Dialog):
             # ------------------------------------
             # latest version
             latest_published_version_number = \
-                str(version.latest_published_version().version_number)
+                str(latest_published_version.version_number)
             item = \
                 QtGui.QTableWidgetItem(latest_published_version_number)
             # align to horizontal and vertical center
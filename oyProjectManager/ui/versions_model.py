@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""A lazily loaded table model of the Versions of a series.
+
+The :class:`.VersionsTableModel` loads the Versions page by page with
+:meth:`~oyProjectManager.models.version.Version.series_page` while the view
+is scrolled, and builds the cells only when the view asks for them, so
+showing a series with thousands of Versions takes the same time with showing
+a few of them::
+
+  model = VersionsTableModel()
+  view.setModel(model)
+  model.set_series(asset, version_type, "Main", count=5000)
+
+The file sizes and dates are read from the database, the stats of the
+Versions without the file info are read asynchronously by the
+:mod:`~oyProjectManager.ui.file_stat_service`.
+
+.. versionadded:: 0.2.5.4
+"""
+
+import datetime
+import os
+import logging
+
+from oyProjectManager import conf
+from oyProjectManager.models.version import Version, SERIES_PAGE_SIZE
+from oyProjectManager.ui import file_stat_service
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+qt_module_key = "PREFERRED_QT_MODULE"
+qt_module = "PyQt4"
+
+if os.environ.has_key(qt_module_key):
+    qt_module = os.environ[qt_module_key]
+
+if qt_module == "PySide":
+    from PySide import QtGui, QtCore
+elif qt_module == "PyQt4":
+    import sip
+    sip.setapi('QString', 2)
+    sip.setapi('QVariant', 2)
+    from PyQt4 import QtGui, QtCore
+
+
+class VersionsTableModel(QtCore.QAbstractTableModel):
+    """A table model of the Versions of a series.
+
+    :param int page_size: The number of the Versions loaded at once.
+    """
+
+    labels = [
+        "Version",
+        "User",
+        "Status",
+        "File Size",
+        "Date",
+        "Note",
+    ]
+
+    def __init__(self, page_size=SERIES_PAGE_SIZE, parent=None):
+        super(VersionsTableModel, self).__init__(parent)
+        self.page_size = page_size
+        self._series = None
+        self._versions = []
+        self._last_version_number = None
+        self._has_more = False
+        self._limit = None
+
+        # full_path: FileStat or None, for the Versions without file info
+        self._stats = {}
+        # the paths waiting for the next request and the requested ones
+        self._requested_paths = set()
+        self._pending_paths = set()
+
+    @property
+    def versions(self):
+        """The list of the loaded Versions
+        """
+        return list(self._versions)
+
+    def version_at(self, row):
+        """Returns the Version at the given row, or None
+        """
+        if 0 <= row < len(self._versions):
+            return self._versions[row]
+        return None
+
+    def clear(self):
+        """Removes all the Versions
+        """
+        self.beginResetModel()
+        self._series = None
+        self._versions = []
+        self._last_version_number = None
+        self._has_more = False
+        self._stats = {}
+        self._requested_paths = set()
+        self._pending_paths = set()
+        self.endResetModel()
+
+    def set_series(self, version_of, type, take_name, published_only=False,
+                   count=None):
+        """Shows the Versions of the given series, the first page is loaded
+        immediately.
+
+        :param int count: Show only the last ``count`` Versions, None shows
+          all of them.
+        """
+        self.beginResetModel()
+        self._series = (version_of, type, take_name, published_only)
+        self._versions = []
+        self._stats = {}
+        self._requested_paths = set()
+        self._pending_paths = set()
+        self._limit = count
+        self._last_version_number = None
+        if count is not None:
+            self._last_version_number = Version.series_window_start(
+                version_of, type, take_name, count, published_only
+            )
+        self._add_page(self._query_page())
+        self.endResetModel()
+
+    def _query_page(self):
+        """queries and returns the Versions of the next page, the model is not
+        changed
+        """
+        limit = self.page_size
+        if self._limit is not None:
+            limit = min(limit, self._limit - len(self._versions))
+
+        if limit <= 0:
+            return []
+
+        version_of, type, take_name, published_only = self._series
+        return Version.series_page(
+            version_of, type, take_name, published_only,
+            after=self._last_version_number,
+            limit=limit
+        )
+
+    def _add_page(self, versions):
+        """appends the given page of Versions to the model
+        """
+        self._versions.extend(versions)
+        if versions:
+            self._last_version_number = versions[-1].version_number
+
+        self._has_more = len(versions) == self.page_size and \
+            (self._limit is None or len(self._versions) < self._limit)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        """returns True if there are more Versions to load
+        """
+        if parent.isValid():
+            return False
+        return self._has_more
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        """loads the next page when the view is scrolled to the end
+        """
+        if parent.isValid() or not self._has_more:
+            return
+
+        # the rows are added between beginInsertRows() and endInsertRows()
+        versions = self._query_page()
+        if not versions:
+            self._has_more = False
+            return
+
+        first_row = len(self._versions)
+        self.beginInsertRows(QtCore.QModelIndex(), first_row,
+                             first_row + len(versions) - 1)
+        self._add_page(versions)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._versions)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.labels)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and \
+           role == QtCore.Qt.DisplayRole:
+            return self.labels[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        """builds the cells on demand
+        """
+        version = self.version_at(index.row())
+        if version is None:
+            return None
+
+        column = index.column()
+
+        if role == QtCore.Qt.DisplayRole:
+            return self._text(version, column)
+
+        elif role == QtCore.Qt.TextAlignmentRole:
+            if column in (0, 2):
+                # align to center and vertical center
+                return int(QtCore.Qt.AlignHCenter | QtCore.Qt.AlignVCenter)
+            # align to left and vertical center
+            return int(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+
+        elif role == QtCore.Qt.FontRole:
+            font = QtGui.QFont()
+            font.setBold(version.is_published and column != 2)
+            return font
+
+        elif role == QtCore.Qt.ForegroundRole:
+            if column == 2:
+                status_index = conf.status_list.index(version.status)
+                return QtGui.QBrush(
+                    QtGui.QColor(*conf.status_fg_colors[status_index])
+                )
+            elif version.is_published:
+                return QtGui.QBrush(QtGui.QColor(0, 192, 0))
+
+        elif role == QtCore.Qt.BackgroundRole:
+            if column == 2:
+                status_index = conf.status_list.index(version.status)
+                return QtGui.QBrush(
+                    QtGui.QColor(*conf.status_bg_colors[status_index])
+                )
+
+        return None
+
+    def _text(self, version, column):
+        """returns the text of the given column of the given Version
+        """
+        if column == 0:
+            return str(version.version_number)
+        elif column == 1:
+            return version.created_by.name
+        elif column == 2:
+            return version.status
+        elif column == 5:
+            return version.note
+
+        # the file size and date
+        size, mtime = version.file_size, version.file_mtime
+        if mtime is None:
+            full_path = version.full_path
+            if full_path not in self._stats:
+                if full_path not in self._pending_paths:
+                    self._request_stat(full_path)
+                return ""
+            stat = self._stats[full_path]
+            if stat is not None:
+                size, mtime = stat.size, stat.mtime
+
+        if column == 3:
+            if size is None:
+                size = -1
+            else:
+                size = float(size) / 1024 / 1024
+            return conf.file_size_format % size
+        else:
+            if mtime is None:
+                date = datetime.datetime.today()
+            else:
+                date = datetime.datetime.fromtimestamp(mtime)
+            return date.strftime(conf.time_format)
+
+    def _request_stat(self, full_path):
+        """requests the stat of the given file, the stats of the visible
+        cells are requested together
+        """
+        if not self._requested_paths:
+            QtCore.QTimer.singleShot(0, self._request_stats)
+        self._requested_paths.add(full_path)
+        self._pending_paths.add(full_path)
+
+    def _request_stats(self):
+        """requests the stats of the files of the visible cells
+        """
+        paths = list(self._requested_paths)
+        self._requested_paths = set()
+        if not paths:
+            return
+
+        series = self._series
+
+        def update(stats):
+            if self._series is not series:
+                # the model is reset in the meantime
+                return
+            self._stats.update(stats)
+            self._pending_paths.difference_update(stats)
+            rows = [
+                row for row, version in enumerate(self._versions)
+                if version.file_mtime is None and version.full_path in stats
+            ]
+            if rows:
+                self.dataChanged.emit(self.index(min(rows), 3),
+                                      self.index(max(rows), 4))
+
+        file_stat_service.get_service().request(paths, update)
@@ -9,8 +9,8 @@ The backup script for the system.
 It accepts a ``project`` name and an ``output_path`` which is the output of 
 the filtered files.
 
-The system creates filter rules to be used with ``rsync`` command and then calls
-the ``rsync`` command on the server.
+The system copies the files which are changed since the last backup to the
+output path, see :class:`~oyProjectManager.utils.backup.IncrementalCopier`.
 
 Because the pipeline ends at a Nuke file, all the source files which needs to
 be backed up are listed in this nuke (*.nk) file. So the script searches for the
@@ -49,7 +49,245 @@ Examples::
 #:arg --sequence, -s: The name of the sequence. It should match the exact 
 #  sequence name, and if skipped, all the sequences under the given project 
 #  will be filtered and backed up.
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+from oyProjectManager import conf, db, scanners, utils
+from oyProjectManager.models.entity import VersionableBase
 from oyProjectManager.models.project import Project
+from oyProjectManager.models.version import Version
+from oyProjectManager.scanners import nk
+from oyProjectManager.utils.file_stats import file_hash
+
+# create a logger
+import logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+# the state of an IncrementalCopier is saved after this many copied files
+STATE_SAVE_INTERVAL = 100
+
+# the result of a backup, all the values are lists of source file paths
+# except the manifest
+BackUpReport = namedtuple(
+    "BackUpReport", "manifest copied skipped missing failed"
+)
+
+
+class IncrementalCopier(object):
+    """Copies the files of a :class:`~oyProjectManager.scanners.Manifest`
+    which are changed since the last run.
+    
+    The size, modification time and optionally the md5 hash of every copied
+    file is stored in a JSON state file. A file is copied again only if its
+    size or modification time is changed, and if ``verify_hash`` is True,
+    only if its content is changed too.
+    
+    The frame sequence patterns in the manifest are expanded with one
+    directory listing per directory, and the files are copied by a bounded
+    pool of worker threads. Every file is copied to a temporary file and then
+    renamed, and the state is saved regularly, so an interrupted backup
+    continues from where it is left when it is run again.
+    
+    :param str source_root: The root of the files in the manifest.
+    
+    :param str destination_root: The files under the source_root are copied
+      to the same relative paths under this path.
+    
+    :param str state_path: The path of the JSON state file.
+    
+    :param int worker_count: The number of the worker threads. The default is
+      :confval:`backup_worker_count`.
+    
+    :param bool verify_hash: Compare the md5 hashes of the files which have a
+      different size or modification time before copying them.
+    """
+    
+    def __init__(self, source_root, destination_root, state_path,
+                 worker_count=None, verify_hash=False):
+        self.source_root = \
+            scanners.normalize_path(source_root).rstrip("/") + "/"
+        self.destination_root = destination_root
+        self.state_path = state_path
+        if worker_count is None:
+            worker_count = conf.backup_worker_count
+        self.worker_count = worker_count
+        self.verify_hash = verify_hash
+        
+        # source path: [size, mtime, hash]
+        self.state = {}
+    
+    def destination_path(self, path):
+        """Returns the destination of the given source path
+        """
+        if not path.startswith(self.source_root):
+            raise ValueError("%s is not under %s" % (path, self.source_root))
+        
+        return os.path.join(
+            self.destination_root,
+            path[len(self.source_root):]
+        ).replace("\\", "/")
+    
+    def load_state(self):
+        """Loads the state of the last run
+        """
+        self.state = {}
+        try:
+            with open(self.state_path) as f:
+                self.state = json.load(f)["files"]
+        except (IOError, ValueError, KeyError):
+            logger.debug("there is no valid state file %s" % self.state_path)
+        return self.state
+    
+    def save_state(self):
+        """Saves the state, the state file is replaced atomically
+        """
+        utils.mkdir(os.path.dirname(self.state_path))
+        
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"files": self.state}, f)
+        
+        if os.path.exists(self.state_path):
+            # os.rename can not replace a file under Windows
+            os.remove(self.state_path)
+        os.rename(temp_path, self.state_path)
+    
+    def expand(self, manifest):
+        """Returns the list of the existing files of the given manifest and
+        the list of the missing paths, the frame sequence patterns are
+        expanded with one listing per directory.
+        """
+        listings = {}
+        
+        def listdir(directory):
+            if directory not in listings:
+                listings[directory] = os.listdir(directory)
+            return listings[directory]
+        
+        files = []
+        missing = []
+        for path in manifest:
+            if scanners.is_frame_pattern(path):
+                frames = scanners.expand_frame_pattern(path, listdir)
+                if frames:
+                    files.extend(frames)
+                else:
+                    missing.append(path)
+            elif os.path.isfile(path):
+                files.append(path)
+            else:
+                missing.append(path)
+        
+        return files, missing
+    
+    def _copy(self, args):
+        """copies the file in a worker thread, returns the path, the new state
+        of the file, True if it is copied and the error if any
+        """
+        path, size, mtime, old_hash = args
+        try:
+            hash_ = None
+            if self.verify_hash:
+                hash_ = file_hash(path)
+                if hash_ == old_hash:
+                    # only the modification time is changed
+                    return path, [size, mtime, hash_], False, None
+            
+            destination = self.destination_path(path)
+            utils.mkdir(os.path.dirname(destination))
+            
+            temp_path = destination + ".part"
+            shutil.copy2(path, temp_path)
+            if os.path.exists(destination):
+                os.remove(destination)
+            os.rename(temp_path, destination)
+            
+            return path, [size, mtime, hash_], True, None
+        except (IOError, OSError) as e:
+            return path, None, False, e
+    
+    def run(self, manifest):
+        """Copies the changed files of the given manifest.
+        
+        :returns: :class:`.BackUpReport`
+        """
+        self.load_state()
+        
+        files, missing = self.expand(manifest)
+        
+        skipped = []
+        jobs = []
+        for path in files:
+            if not path.startswith(self.source_root):
+                logger.warning("skipping %s, it is not under %s" %
+                               (path, self.source_root))
+                missing.append(path)
+                continue
+            
+            try:
+                stat = os.stat(path)
+            except OSError:
+                missing.append(path)
+                continue
+            
+            size, mtime = stat.st_size, stat.st_mtime
+            old_state = self.state.get(path)
+            
+            if old_state is not None and old_state[:2] == [size, mtime]:
+                skipped.append(path)
+                continue
+            
+            if old_state is None:
+                # check the destination, an interrupted backup may have copied
+                # it without saving the state
+                try:
+                    destination_stat = os.stat(self.destination_path(path))
+                    # copy2 can not keep the sub-microsecond part of the
+                    # modification time
+                    if destination_stat.st_size == size and \
+                       abs(destination_stat.st_mtime - mtime) < 0.001:
+                        self.state[path] = [size, mtime, None]
+                        skipped.append(path)
+                        continue
+                except OSError:
+                    pass
+            
+            old_hash = old_state[2] if old_state else None
+            jobs.append((path, size, mtime, old_hash))
+        
+        copied = []
+        failed = []
+        
+        if jobs:
+            pool = ThreadPool(max(1, min(self.worker_count, len(jobs))))
+            try:
+                for i, (path, state, is_copied, error) in \
+                        enumerate(pool.imap_unordered(self._copy, jobs)):
+                    if error is not None:
+                        logger.warning("can not copy %s: %s" % (path, error))
+                        failed.append(path)
+                        continue
+                    
+                    self.state[path] = state
+                    if is_copied:
+                        copied.append(path)
+                    else:
+                        skipped.append(path)
+                    
+                    if (i + 1) % STATE_SAVE_INTERVAL == 0:
+                        self.save_state()
+            finally:
+                pool.close()
+                pool.join()
+                self.save_state()
+        else:
+            self.save_state()
+        
+        return BackUpReport(manifest, copied, skipped, missing, failed)
 
 
 class BackUp(object):
@@ -73,6 +311,12 @@ class BackUp(object):
     
     :param output: The output of the backed up files. If skipped a ValueError
       will be raised
+    
+    :param worker_count: The number of the threads copying the files. The
+      default is :confval:`backup_worker_count`.
+    
+    :param verify_hash: Compare the md5 hashes of the changed files before
+      copying them, see :class:`.IncrementalCopier`. Default is False.
     """
     
 #   TODO: add individual sequences
@@ -90,7 +334,9 @@ class BackUp(object):
                  project=None,
                  output=None,
                  number_of_versions=None,
-                 extra_filter_rules=None):
+                 extra_filter_rules=None,
+                 worker_count=None,
+                 verify_hash=False):
         
         self._project = self._validate_project(project)
         self._extra_filter_rules = \
@@ -98,33 +344,103 @@ class BackUp(object):
         self._output = self._validate_output(output)
         self._number_of_versions = \
             self._validate_number_of_versions(number_of_versions)
+        self.worker_count = worker_count
+        self.verify_hash = verify_hash
         
 
     def doBackup(self):
         """Does the backup process.
         
-        Calls ``rsync`` with the appropriate filters. Creates the output path
-        if it doesn't exists.
+        Scans the Nuke scripts returned by
+        :meth:`~oyProjectManager.utils.backup.BackUp.get_nuke_scripts` in a
+        process pool and saves the manifest of the scripts and the files in
+        the project which are read or written by them to
+        :attr:`~oyProjectManager.utils.backup.BackUp.manifest_path`. Then
+        copies the files which are changed since the last backup to the
+        ``<output>/<project code>`` folder with an :class:`.IncrementalCopier`.
+        Creates the output path if it doesn't exists.
+        
+        :returns: :class:`.BackUpReport`
+        
+        .. versionchanged:: 0.2.5.4
+           It was only printing the sequences of the project.
         """
+        manifest = scanners.build_manifest(
+            self.get_nuke_scripts(),
+            nk.scan,
+            repository=self.project.repository,
+            root=self.project.full_path
+        )
         
-        print self.project
-        print self.project.full_path
+        output = os.path.expanduser(self.output)
+        utils.mkdir(output)
+        manifest.save(self.manifest_path)
         
-        # get the last compositing
-        for sequence in self.project.sequences():
-            print sequence.name
-            print sequence.full_path
-            comp_Assets = sequence.getAllAssetsForType("COMP")
-            print comp_Assets
+        copier = IncrementalCopier(
+            self.project.full_path,
+            os.path.join(output, self.project.code),
+            os.path.join(output, "%s_state.json" % self.project.code),
+            worker_count=self.worker_count,
+            verify_hash=self.verify_hash
+        )
         
+        return copier.run(manifest)
     
+    def get_nuke_scripts(self):
+        """Returns the full paths of the last
+        :attr:`~oyProjectManager.utils.backup.BackUp.num_of_versions`
+        Versions of all the Nuke script (``*.nk``) series of the project, or
+        all of them if num_of_versions is negative. The Versions are grouped
+        to series by their Asset or Shot, type and take name with one query.
+        
+        :returns: list of str
+        """
+        rows = db.session.query(
+            Version.version_of_id,
+            Version.type_id,
+            Version.take_name,
+            Version._path,
+            Version._filename
+        ) \
+            .join(VersionableBase,
+                  Version.version_of_id == VersionableBase.id) \
+            .filter(VersionableBase.project_id == self.project.id) \
+            .filter(Version._extension == ".nk") \
+            .order_by(Version._version_number) \
+            .all()
+        
+        series = {}
+        for version_of_id, type_id, take_name, path, filename in rows:
+            series.setdefault((version_of_id, type_id, take_name), []).append(
+                os.path.join(self.project.path, path, filename)
+                .replace("\\", "/")
+            )
+        
+        number_of_versions = self.num_of_versions
+        
+        nuke_scripts = []
+        for key in sorted(series.keys()):
+            full_paths = series[key]
+            if number_of_versions >= 0:
+                full_paths = full_paths[len(full_paths) - number_of_versions:]
+            nuke_scripts.extend(full_paths)
+        
+        return nuke_scripts
+    
+    @property
+    def manifest_path(self):
+        """The path of the manifest file in the output path
+        """
+        return os.path.join(
+            os.path.expanduser(self.output),
+            "%s_manifest.json" % self.project.code
+        ).replace("\\", "/")
     
     def _validate_project(self, project):
         """validates the given project value
         """
         
-        if not isinstance(project, Project) and \
-           not isinstance(project, str):
+        if not isinstance(project, (Project, str, unicode)):
             raise TypeError("BackUp.project should be an instance of"
                             "oyProjectManager.models.project.Project instance")
         
@@ -134,7 +450,7 @@ class BackUp(object):
         if isinstance(project, (str, unicode)):
             project = Project(name=project)
         
-        if not project.exists:
+        if project.id is None:
             raise RuntimeError("The project doesn't exists, so it can not be "
                                "backup")
         
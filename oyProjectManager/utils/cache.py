@@ -1,19 +1,181 @@
 # -*- coding: utf-8 -*-
 # Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
-# 
+#
 # This module is part of oyProjectManager and is released under the BSD 2
 # License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Caching decorators for methods and properties.
 
+The results are stored per instance, keyed by the call arguments, expire
+after a given time (TTL) and the least recently used ones are dropped when
+there are more than a given number of them::
+
+  from oyProjectManager.utils import cache
+
+  class Repository(object):
+
+      @cache.cached(ttl=60)
+      @property
+      def project_names(self):
+          ...
+
+      @cache.cached(ttl=None, max_size=1000)
+      def relative_path(self, path):
+          ...
+
+  # invalidate the cached values of one instance
+  Repository.project_names.invalidate(repo)
+  repo.relative_path.invalidate("/mnt/Projects/TestProject")
+
+  # and get the hit/miss statistics
+  Repository.project_names.stats(repo)
+  repo.relative_path.stats()
+
+.. versionchanged:: 0.2.5.4
+   :class:`.CachedMethod` is rewritten, it was storing the instance on the
+   decorator (so the instances of the same class were overwriting each
+   other) and the TTL was fixed to 60 seconds. It is now thread safe, keys
+   the results by the call arguments, and supports TTL, LRU eviction,
+   invalidation and statistics. :class:`.InputBasedCachedMethod` is now
+   based on it and keeps its old behaviour, its values never expire and its
+   size is not limited.
+
+.. versionadded:: 0.2.5.4
+   :class:`.IdentityCache`, which keeps the database instances of the near
+   static entities, see :func:`oyProjectManager.db.get_cached`.
+
+.. versionadded:: 0.2.5.4
+   :class:`.TTLStorage`, the thread safe storage of the cached values, which
+   can be used by the other modules to build their own caches.
+"""
+
+import threading
 import time
+from collections import OrderedDict, namedtuple
 
-class CachedMethod(object):
-    """caches the result of a class method inside the instance
+# the default settings of the cached() decorator
+DEFAULT_TTL = 60
+DEFAULT_MAX_SIZE = 128
+
+CacheStats = namedtuple("CacheStats", "hits misses evictions size")
+
+# guards the creation of the per instance storages
+_storage_lock = threading.Lock()
+
+
+class TTLStorage(object):
+    """A thread safe key/value storage whose values expire after a given time
+    and the least recently used values are dropped when there are more than
+    a given number of them. It keeps the cached values of one method of one
+    instance for the :class:`.CachedMethod`.
+
+    :param ttl: The time in seconds that the values are valid. None means
+      they never expire.
+
+    :param max_size: The maximum number of the values. None means unlimited.
     """
 
-    def __init__(self, method):
-        # record the unbound-method and the name
-        #print "running __init__ in CachedMethod"
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        # key: (expire_time, value)
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, is_valid=None):
+        """returns (True, value) for a valid cached value and (False, None)
+        otherwise, the is_valid callable can be used to reject the value
+        """
+        with self.lock:
+            item = self.data.pop(key, None)
+            if item is not None:
+                expire_time, value = item
+                if (expire_time is None or time.time() < expire_time) \
+                        and (is_valid is None or is_valid(value)):
+                    # move it to the end as the most recently used one
+                    self.data[key] = item
+                    self.hits += 1
+                    return True, value
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        """stores the value and drops the least recently used values
+        """
+        expire_time = None
+        if self.ttl is not None:
+            expire_time = time.time() + self.ttl
 
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = (expire_time, value)
+            if self.max_size is not None:
+                while len(self.data) > self.max_size:
+                    self.data.popitem(last=False)
+                    self.evictions += 1
+
+    def invalidate(self, key=None):
+        """removes the value with the given key or all of them if the key is
+        None
+        """
+        with self.lock:
+            if key is None:
+                self.data.clear()
+            else:
+                self.data.pop(key, None)
+
+    def invalidate_matching(self, predicate):
+        """removes the values of the keys which the predicate returns True for
+        """
+        with self.lock:
+            for key in self.data.keys():
+                if predicate(key):
+                    del self.data[key]
+
+    def stats(self):
+        """returns the CacheStats
+        """
+        with self.lock:
+            return CacheStats(self.hits, self.misses, self.evictions,
+                              len(self.data))
+
+
+# separates the args and kwargs in the keys
+_kwargs_mark = object()
+
+
+def _make_key(args, kwargs):
+    """creates the cache key from the given arguments, returns None if they
+    are not hashable
+    """
+    key = args
+    if kwargs:
+        key += (_kwargs_mark,) + tuple(sorted(kwargs.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class CachedMethod(object):
+    """Caches the results of a method or a property per instance.
+
+    Use the :func:`.cached` function to set the TTL and the maximum size.
+
+    :param method: The method or property to be cached.
+
+    :param ttl: The time in seconds that the cached values are valid. None
+      means they never expire. The default is 60.
+
+    :param max_size: The maximum number of the cached values per instance,
+      the least recently used values are dropped. None means unlimited. The
+      default is 128.
+    """
+
+    def __init__(self, method, ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
         if not isinstance(method, property):
             self._method = method
             self._name = method.__name__
@@ -23,126 +185,191 @@ class CachedMethod(object):
             self._name = method.fget.__name__
             self._isProperty = True
 
-        self._obj = None
+        self.__doc__ = self._method.__doc__
+        self.ttl = ttl
+        self.max_size = max_size
+        self._storage_name = "_cached_" + self._name
 
     def __get__(self, inst, cls):
-        """use __get__ to get the instance object and create the attributes
-        
-        if it is a property call __call__
+        """returns the decorator itself when called from the class, the value
+        for properties and a bound cached method for methods
+        """
+        if inst is None:
+            return self
+
+        if self._isProperty:
+            return self.call(inst)
+        else:
+            return _BoundCachedMethod(self, inst)
+
+    def _storage(self, inst):
+        """returns the storage of the given instance
         """
-        #print "running __get__ in CachedMethod"
+        storage = inst.__dict__.get(self._storage_name)
+        if storage is None:
+            with _storage_lock:
+                storage = inst.__dict__.get(self._storage_name)
+                if storage is None:
+                    storage = TTLStorage(self.ttl, self.max_size)
+                    inst.__dict__[self._storage_name] = storage
+        return storage
 
-        self._obj = inst
+    def call(self, inst, *args, **kwargs):
+        """returns the cached value for the given instance and arguments,
+        calls the method if there is no valid cached value
+        """
+        storage = self._storage(inst)
+        key = _make_key(args, kwargs)
+        if key is None:
+            # not hashable, can not be cached
+            with storage.lock:
+                storage.misses += 1
+            return self._method(inst, *args, **kwargs)
 
-        if not hasattr(self._obj, self._name + "._data"):
-            #print "creating the data"
-            setattr(self._obj, self._name + "._data", None)
-            setattr(self._obj, self._name + "._lastQueryTime", 0)
-            setattr(self._obj, self._name + "._maxTimeDelta", 60)
-            #print "finished creating data"
+        found, value = storage.get(key)
+        if found:
+            return value
 
-        if self._isProperty:
-            return self.__call__()
+        # call the method outside of the lock, calling it twice in two
+        # threads is harmless
+        value = self._method(inst, *args, **kwargs)
+        storage.set(key, value)
+        return value
+
+    def invalidate(self, inst, *args, **kwargs):
+        """removes the cached value of the given instance for the given
+        arguments, or all the cached values of the instance if no argument is
+        given
+        """
+        storage = self._storage(inst)
+        if args or kwargs:
+            storage.invalidate(_make_key(args, kwargs))
         else:
-            return self
+            storage.invalidate()
 
-    def __call__(self, *args, **kwargs):
+    def stats(self, inst):
+        """returns the hits, misses, evictions and size of the cache of the
+        given instance as a CacheStats named tuple
         """
+        return self._storage(inst).stats()
+
+    def __repr__(self):
+        """Return the function's representation
         """
-        #print "running __call__ in CachedMethod"
+        return '<cached method ' + self._name + '>'
 
-        delta = time.time() -\
-                getattr(self._obj, self._name + "._lastQueryTime")
 
-        if delta > getattr(self._obj, self._name + "._maxTimeDelta")\
-            or getattr(self._obj, self._name + "._data") is None:
-            
-            # call the function and store the result as a cache
-            #print "caching the data"
-            data = self._method(self._obj, *args, **kwargs)
-            setattr(self._obj, self._name + "._data", data)
+class InputBasedCachedMethod(CachedMethod):
+    """Caches the results of a method per instance and call arguments.
 
-            # zero the time
-#            lastQueryTime = time.time()
-            setattr(self._obj, self._name + "._lastQueryTime", time.time())
-        #else:
-            #print "returning the cached data"
+    The cached values never expire and the size of the cache is not limited,
+    use the :func:`.cached` function to set a TTL or a maximum size.
+    """
 
-        return getattr(self._obj, self._name + "._data")
+    def __init__(self, method):
+        super(InputBasedCachedMethod, self).__init__(method, ttl=None,
+                                                     max_size=None)
 
 
+class _BoundCachedMethod(object):
+    """a CachedMethod bound to an instance
+    """
+
+    def __init__(self, cached_method, inst):
+        self._cached_method = cached_method
+        self._obj = inst
+        self.__doc__ = cached_method.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self._cached_method.call(self._obj, *args, **kwargs)
+
+    def invalidate(self, *args, **kwargs):
+        """removes the cached value for the given arguments, or all the
+        cached values if no argument is given
+        """
+        self._cached_method.invalidate(self._obj, *args, **kwargs)
+
+    def stats(self):
+        """returns the CacheStats
+        """
+        return self._cached_method.stats(self._obj)
+
     def __repr__(self):
         """Return the function's representation
         """
         objectsRepr = str(self._obj)
         objectsName = objectsRepr.split(' ')[0].split('.')[-1]
 
-        cachedObjectsRepr =\
-            '<cached bound method ' + objectsName + '.' + self._name + \
-            ' of ' + objectsRepr + '>'
+        return '<cached bound method ' + objectsName + '.' + \
+            self._cached_method._name + ' of ' + objectsRepr + '>'
+
 
-        return cachedObjectsRepr
+class IdentityCache(object):
+    """A read-through cache of the database instances of the near static
+    entities (Projects, Sequences, VersionTypes etc.).
 
+    The keys should be tuples starting with the class of the instances. An
+    instance is returned from the cache only if it is still in the given
+    session, so the instances of a closed session or the deleted instances
+    are loaded again. The instances of a class should be invalidated when
+    any of them is saved.
 
-class InputBasedCachedMethod(object):
-    """caches the result of a class method inside the instance based on the input parameters
+    :param ttl: The time in seconds that the instances are kept. None means
+      they are kept until they are invalidated.
+
+    :param max_size: The maximum number of the cached instances.
     """
 
-    def __init__(self, method):
-        # record the unbound-method and the name
-        #print "running __init__ in InputBasedCachedMethod"
+    def __init__(self, ttl=DEFAULT_TTL, max_size=1024):
+        self._storage = TTLStorage(ttl, max_size)
 
-        self._method = method
-        self._name = method.__name__
-        self._obj = None
+    def get(self, key, loader, session):
+        """Returns the cached instance for the given key, calls the loader to
+        get it if it is not cached. None values are not cached.
 
-    def __get__(self, inst, cls):
-        """use __get__ just to get the instance object
-        """
-        #print "running __get__ in InputBasedCachedMethod"
+        :param key: A tuple starting with the class of the instance.
 
-        self._obj = inst
-        if not hasattr(self._obj, self._name + "._outputData"):
-            #print "creating the data"
-            setattr(self._obj, self._name + "._outputData", list())
-            setattr(self._obj, self._name + "._inputData", list())
-            #print "finished creating data"
+        :param loader: A callable which returns the instance or None.
 
-        return self
+        :param session: The session that the instance should belong to.
+        """
+        found, instance = self._storage.get(
+            key,
+            lambda x: x in session
+        )
+        if found:
+            return instance
+
+        instance = loader()
+        if instance is not None:
+            self._storage.set(key, instance)
+        return instance
 
-    def __call__(self, *args, **keys):
-        """for now it uses only one argument
+    def invalidate(self, class_=None):
+        """Removes the instances of the given class, or all the instances if
+        the class is None
         """
-        #print "running __call__ in InputBasedCachedMethod"
+        if class_ is None:
+            self._storage.invalidate()
+        else:
+            self._storage.invalidate_matching(lambda key: key[0] is class_)
 
-        outputData = getattr(self._obj, self._name + "._outputData")
-        inputData = getattr(self._obj, self._name + "._inputData")
+    def stats(self):
+        """returns the CacheStats
+        """
+        return self._storage.stats()
 
-        # combine args and keys
-        argsKeysCombined = list()
-        argsKeysCombined.append(args)
-        argsKeysCombined.append(keys)
 
-        if (not argsKeysCombined in inputData) or outputData is None:
-            #print "calculating new data"
-            data = self._method(self._obj, *args, **keys)
-            inputData.append(argsKeysCombined)
-            outputData.append(data)
-            setattr(self._obj, self._name + "._inputdata", inputData)
-            setattr(self._obj, self._name + "._outputData", outputData)
+def cached(ttl=DEFAULT_TTL, max_size=DEFAULT_MAX_SIZE):
+    """Returns a decorator which caches the results of a method or a property
+    per instance, see :class:`.CachedMethod`.
 
-            return data
-        else:
-            #print "returning cached data"
-            return outputData[inputData.index(argsKeysCombined)]
+    :param ttl: The time in seconds that the cached values are valid. None
+      means they never expire.
 
-    def __repr__(self):
-        """Return the function's repr
-        """
-        #print "running __repr_ in InputBasedCachedMethod"
-        objectsRepr = str(self._obj)
-        objectsName = objectsRepr.split(' ')[0].split('.')[-1]
-        cachedObjectsRepr = \
-            '<cached bound method ' + objectsName + '.' + self._name + \
-            ' of ' + objectsRepr + '>'
-        return cachedObjectsRepr 
+    :param max_size: The maximum number of the cached values per instance.
+      None means unlimited.
+    """
+    def decorator(method):
+        return CachedMethod(method, ttl=ttl, max_size=max_size)
+    return decorator
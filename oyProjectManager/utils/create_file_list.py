@@ -10,8 +10,8 @@ The backup script for the system.
 It accepts a ``project`` name and an ``output_path`` which is the output of 
 the filtered files.
 
-The system creates filter rules to be used with ``rsync`` command and then calls
-the ``rsync`` command on the server.
+The system copies the files which are changed since the last backup to the
+output path, see :class:`~oyProjectManager.utils.backup.IncrementalCopier`.
 
 Because the pipeline ends at a Nuke file, all the source files which needs to
 be backed up are listed in this nuke (*.nk) file. So the script searches for the
@@ -47,7 +47,10 @@ Examples::
 
 import glob
 import os
-import re
+from oyProjectManager import scanners
+from oyProjectManager.models.repository import get_repository
+from oyProjectManager.scanners import nk
+from oyProjectManager.utils import backup
 
 class BackUp(object):
     """Holds information about the backup process.
@@ -89,7 +92,8 @@ class BackUp(object):
                  number_of_versions=None,
                  extra_filter_rules=None):
         
-        self.projects_path = os.path.expanduser("~/M/JOBs")
+        self.repository = get_repository()
+        self.projects_path = self.repository.server_path
         
         self._project_name = self._validate_project(project_name)
         self._extra_filter_rules = \
@@ -102,8 +106,11 @@ class BackUp(object):
     def doBackup(self):
         """Does the backup process.
         
-        Calls ``rsync`` with the appropriate filters. Creates the output path
-        if it doesn't exists.
+        Copies the files which are changed since the last backup by using a
+        :class:`~oyProjectManager.utils.backup.IncrementalCopier`. Creates
+        the output path if it doesn't exists.
+        
+        :returns: :class:`~oyProjectManager.utils.backup.BackUpReport`
         """
         
         project_full_path = os.path.join(self.projects_path,
@@ -114,7 +121,7 @@ class BackUp(object):
         # get all the sequences
         seqs_folders = glob.glob(project_full_path + "/*")
         
-        files_to_backup = []
+        files_to_backup = set()
         for seq_folder in seqs_folders:
             if not os.path.isdir(seq_folder):
                 continue
@@ -132,150 +139,35 @@ class BackUp(object):
                         if file.endswith(".nk"):
                             comp_files.append(current_dir + "/" + file)
             
-            shot_containers = []
-            for comp_file in comp_files:
-                match_obj = re.match(
-                    r"(.*?[0-9]+)_([a-zA-Z0-9]+).*v([0-9]+)",
-                    comp_file
-                )
-                
-                if match_obj:
-                    name = match_obj.groups()[0]
-                    sub_name = match_obj.groups()[1]
-                    version_number = match_obj.groups()[2]
-                    
-                    appended = False
-                    if len(shot_containers) > 0:
-                        for shot_container in shot_containers:
-                            if shot_container.name == name and \
-                                shot_container.sub_name == sub_name:
-#                                print "found a suitable shot container"
-                                shot_container.versions.append(comp_file)
-                                appended = True
-                                break
-                    
-                    if not appended:
-#                        print "creating new shot_container"
-                        new_shot_container = ShotContainer()
-                        new_shot_container.name = name
-                        new_shot_container.sub_name = sub_name
-                        new_shot_container.versions.append(comp_file)
-                        shot_containers.append(new_shot_container)
-                        
-            
-            
-            for shot_container in shot_containers:
-#                print "---------------------"
-#                print "name     :", shot_container.name
-#                print "sub_name :", shot_container.sub_name
-#                print "versions:"
-#                for version in shot_container.versions:
-#                    print version
-                
-                # now parse all the final versions of the nuke files
-                # and get the Read, Write, ReadGeo, WriteGeo
-                
-                for version in shot_container.versions[-1:]:
-                    last_version_file_path = version
-                    content = open(last_version_file_path).read()
-                    
-                    temp_data = re.findall(
-                        r"project_directory (.*?[\w%#./:]*)",
-                        content
-                    )
-                    
-                    project_directory = temp_data[0] if len(temp_data) > 0 else ""
-                    
-#                    print "project_directory:", project_directory
-#                    print "seq_folder:", seq_folder
-                    
-#                    files_to_backup = []
-#                    files_not_to_backup = []
-                    
-                    for file_path in re.findall(r"file (.*?[\w%#./:]*)", content):
-                        if not os.path.isabs(file_path):
-                            file_path = project_directory + "/" + file_path
-                        
-                        file_path = os.path.normpath(file_path)
-                        
-                        file_path = file_path.replace("\\", "/")
-                        file_path = file_path.replace("M:/", "/home/Administrator/M/")
-                        file_path = file_path.replace("/mnt/M/", "/home/Administrator/M/")
-                        file_path = file_path.replace("//", "/")
-                        file_path = os.path.expanduser(file_path)
-                        file_path = os.path.normpath(file_path)
-                        
-#                        print file_path
-                        
-                        if seq_folder in file_path:
-#                            print "appending, ", file_path
-                            files_to_backup.append(file_path)
-        
-#        files_to_backup = list(set(files_to_backup))
-        
-        new_file_list = []
-        new_file_list.append("#!/bin/sh\n")
-        
-        for i, file_ in enumerate(files_to_backup):
-            
-            # replace "###"
-            file_ = re.sub(r"[#]+", "*", file_)
-            
-            # replace "%03d"
-            file_ = re.sub(r"%0[0-9]+d", "*", file_)
-            
-#            # include all the paths to the object
-#            file_ = file_.replace(project_full_path + "/", "")
-#            
-#            prev = ""
-#            for split in file_.split("/"):
-#                prev = os.path.join(prev, split)
-#                new_file_list.append("+ " + prev + "\n")
+            # scan the last versions of the nuke files and get the files
+            # of the Read, Write, ReadGeo, WriteGeo nodes in this sequence
+            series = scanners.group_series(comp_files)
+            nuke_scripts = [versions[-1] for versions in series.values()]
             
-            # echo command
-            new_file_list.append(
-                "echo " + str(i + 1) + "/" + str(len(files_to_backup)) + \
-                " copying " + file_.replace("*", "\\*") + "\n"
+            manifest = scanners.build_manifest(
+                nuke_scripts,
+                nk.scan,
+                repository=self.repository,
+                root=seq_folder
             )
             
-            # mkdir if not exists
-            new_file_list.append(
-                "mkdir -p " + \
-                os.path.dirname(
-                    file_.replace(
-                        project_full_path + "/",
-                        os.path.join(
-                            self.output,
-                            self.project + "/"
-                        )
-                    )
-                ) + "/\n"
-            )
-            
-            # the cp file
-            new_file_list.append(
-                "cp " + file_ + " " + \
-                os.path.dirname(
-                    file_.replace(
-                        project_full_path + "/",
-                        os.path.join(
-                            self.output,
-                            self.project + "/"
-                        )
-                    )
-                ) + "/\n"
-            )
-        
-#        print os.curdir
-        
-#        # sort the list
-#        new_file_list = list(set(new_file_list))
-#        new_file_list.sort()
-        
-        rule_file = open("python_file_list", "w")
-        rule_file.writelines(new_file_list)
-        rule_file.close()
-        os.chmod("python_file_list", 0777)
+            for file_path in manifest:
+                if manifest.sources(file_path):
+                    files_to_backup.add(file_path)
+        
+        # copy the changed files, the frame sequences are copied as a whole
+        copier = backup.IncrementalCopier(
+            project_full_path,
+            os.path.join(os.path.expanduser(self.output), self.project),
+            os.path.join(os.path.expanduser(self.output),
+                         "%s_state.json" % self.project)
+        )
+        
+        manifest = scanners.Manifest()
+        for file_path in sorted(files_to_backup):
+            manifest.add(file_path)
+        
+        return copier.run(manifest)
 
     def __repr__(self):
         return super(BackUp, self).__repr__()
@@ -398,13 +290,6 @@ class BackUp(object):
 
 
 
-class ShotContainer(object):
-    
-    def __init__(self):
-        self.name = None
-        self.sub_name = None
-        self.versions = []
-
 import argparse
 
 if __name__=="__main__":
@@ -416,5 +301,10 @@ if __name__=="__main__":
     
     backup_obj = BackUp(project_name=args.project, output=args.output)
     
-    backup_obj.doBackup()
+    report = backup_obj.doBackup()
+    
+    print "copied: %s, skipped: %s, missing: %s, failed: %s" % (
+        len(report.copied), len(report.skipped), len(report.missing),
+        len(report.failed)
+    )
     
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Batched and cached file stats.
+
+Checking the size and the modification time of many files one by one costs
+a couple of round trips per file on a network share. :func:`.stat_files`
+groups the files by their folders, lists every folder once and stats only
+the files which exist in the listing. :class:`.FileStatCache` keeps the
+results for a short time (:confval:`file_stat_cache_ttl`), so the UIs can
+ask for the same files again without touching the disk::
+
+  from oyProjectManager.utils import file_stats
+
+  stats = file_stats.get_cache().stat([version.full_path
+                                       for version in versions])
+  for path, stat in stats.items():
+      if stat is not None:
+          print path, stat.size, stat.mtime
+
+The `scandir`_ package is used to list the folders if it is installed.
+
+.. _scandir: https://github.com/benhoyt/scandir
+
+.. versionadded:: 0.2.5.4
+"""
+
+import hashlib
+import os
+import threading
+from collections import namedtuple
+from stat import S_ISREG
+
+from oyProjectManager import conf
+from oyProjectManager.utils import cache
+
+try:
+    from scandir import scandir
+except ImportError:
+    scandir = None
+
+# create a logger
+import logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+FileStat = namedtuple("FileStat", "size mtime")
+
+
+def _list_files(path):
+    """returns a dictionary of the file names in the given folder to their
+    scandir entries, or to None if scandir is not available
+    """
+    if scandir is not None:
+        return dict((entry.name, entry) for entry in scandir(path))
+    return dict.fromkeys(os.listdir(path))
+
+
+def stat_files(paths):
+    """Returns the sizes and modification times of the given files.
+
+    The files are grouped by their folders and every folder is listed once,
+    the missing files do not cost any other call.
+
+    :param paths: A list of file paths.
+
+    :returns: A dictionary of the paths to :class:`.FileStat` instances, or
+      to None for the missing files.
+    """
+    folders = {}
+    for path in paths:
+        folder, name = os.path.split(path)
+        folders.setdefault(folder, []).append((name, path))
+
+    stats = {}
+    for folder, files in folders.items():
+        try:
+            entries = _list_files(folder or ".")
+        except OSError:
+            entries = {}
+
+        for name, path in files:
+            stats[path] = None
+            if name not in entries:
+                continue
+
+            try:
+                entry = entries[name]
+                if entry is not None:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                else:
+                    stat = os.stat(path)
+                    if not S_ISREG(stat.st_mode):
+                        continue
+            except OSError:
+                # deleted after the folder is listed
+                continue
+
+            stats[path] = FileStat(stat.st_size, stat.st_mtime)
+
+    return stats
+
+
+def file_hash(file_path, block_size=1048576):
+    """Returns the md5 hash of the given file by reading it block by block
+    """
+    md5 = hashlib.md5()
+    with open(file_path, "rb") as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            md5.update(data)
+    return md5.hexdigest()
+
+
+class FileStatCache(object):
+    """Keeps the results of :func:`.stat_files` for a short time.
+
+    It is thread safe, so it can be used by the worker threads of the UIs.
+
+    :param ttl: The time in seconds that the stats are kept. The default is
+      :confval:`file_stat_cache_ttl`.
+
+    :param max_size: The maximum number of the cached stats.
+    """
+
+    def __init__(self, ttl=None, max_size=4096):
+        if ttl is None:
+            ttl = conf.file_stat_cache_ttl
+        self._storage = cache.TTLStorage(ttl, max_size)
+
+    def get_cached(self, path):
+        """Returns (True, stat) if the stat of the given file is cached and
+        (False, None) otherwise. The stat is None for the missing files.
+        """
+        return self._storage.get(path)
+
+    def stat(self, paths):
+        """Returns the stats of the given files, only the files which are not
+        cached are checked.
+
+        :param paths: A list of file paths.
+
+        :returns: A dictionary of the paths to :class:`.FileStat` instances,
+          or to None for the missing files.
+        """
+        stats = {}
+        missing_paths = []
+        for path in paths:
+            found, stat = self.get_cached(path)
+            if found:
+                stats[path] = stat
+            else:
+                missing_paths.append(path)
+
+        if missing_paths:
+            for path, stat in stat_files(missing_paths).items():
+                self._storage.set(path, stat)
+                stats[path] = stat
+
+        return stats
+
+    def invalidate(self, path=None):
+        """Removes the stat of the given file, or all of them if the path is
+        None
+        """
+        self._storage.invalidate(path)
+
+    def stats(self):
+        """returns the CacheStats
+        """
+        return self._storage.stats()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the FileStatCache which is shared in this process
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FileStatCache()
+        return _cache
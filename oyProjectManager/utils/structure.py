@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Incremental creation of the folder structures.
+
+Checking and creating the folders of a project one by one costs a couple of
+round trips per folder on a network share, even if all of them already
+exist. :func:`.materialize` compares the folders with the listings of their
+parent folders, which are kept in a shared :class:`.ListingCache` for
+:confval:`structure_cache_ttl` seconds, creates only the missing ones in a
+pool of :confval:`structure_worker_count` threads and returns a
+:class:`.StructureReport`::
+
+  from oyProjectManager.utils import structure
+
+  folders = structure.render_folders(project.structure, project=project)
+  report = structure.materialize(folders, root=project.full_path)
+  for path, error in report.failed.items():
+      print path, error
+
+The folders are created level by level, so the parents are always created
+before their children, and the children of a newly created folder are known
+to be missing without listing it.
+
+.. versionadded:: 0.2.5.4
+"""
+
+import errno
+import os
+import threading
+from multiprocessing.pool import ThreadPool
+
+from oyProjectManager import conf
+from oyProjectManager.utils import cache, templates
+
+# create a logger
+import logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+def render_folders(template_source, **kwargs):
+    """Renders the given folder structure template and returns the list of
+    the unique folder paths in it in the order they are rendered.
+
+    Every line of the rendered template is a folder path, the empty lines are
+    skipped.
+
+    :param str template_source: The Jinja2 template code, like
+      :confval:`project_structure`.
+
+    :param kwargs: The template variables.
+
+    :returns: list of str
+    """
+    rendered = templates.render(template_source, **kwargs)
+
+    folders = []
+    added = set()
+    for line in rendered.split("\n"):
+        folder = line.strip()
+        if not folder:
+            continue
+
+        folder = os.path.normpath(folder)
+        if folder not in added:
+            added.add(folder)
+            folders.append(folder)
+
+    return folders
+
+
+class StructureReport(object):
+    """The result of :func:`.materialize`.
+
+    :ivar created: The list of the created folders.
+
+    :ivar existing: The list of the folders which are already existing.
+
+    :ivar failed: A dictionary of the folders which could not be created to
+      the error messages.
+    """
+
+    def __init__(self):
+        self.created = []
+        self.existing = []
+        self.failed = {}
+
+    @property
+    def ok(self):
+        """True if all the folders are created or already existing
+        """
+        return not self.failed
+
+    def __repr__(self):
+        return "<StructureReport created=%s existing=%s failed=%s>" % (
+            len(self.created), len(self.existing), len(self.failed)
+        )
+
+
+class ListingCache(object):
+    """Keeps the names in the folders for a short time.
+
+    It is thread safe, so the folders can be listed in worker threads.
+
+    :param ttl: The time in seconds that the listings are kept. The default is
+      :confval:`structure_cache_ttl`.
+
+    :param max_size: The maximum number of the cached listings.
+    """
+
+    def __init__(self, ttl=None, max_size=4096):
+        if ttl is None:
+            ttl = conf.structure_cache_ttl
+        self._storage = cache.TTLStorage(ttl, max_size)
+
+    def listdir(self, path):
+        """Returns the frozenset of the names in the given folder, or None if
+        it can not be listed
+        """
+        found, names = self._storage.get(path)
+        if found:
+            return names
+
+        try:
+            names = frozenset(os.listdir(path))
+        except OSError:
+            names = None
+
+        self._storage.set(path, names)
+        return names
+
+    def add(self, path):
+        """Records the given newly created folder, so it is not listed again
+        """
+        parent, name = os.path.split(path)
+        found, names = self._storage.get(parent)
+        if found and names is not None:
+            self._storage.set(parent, names.union([name]))
+        self._storage.set(path, frozenset())
+
+    def invalidate(self, path=None):
+        """Removes the listing of the given folder, or all of them if the path
+        is None
+        """
+        self._storage.invalidate(path)
+
+    def invalidate_tree(self, path):
+        """Removes the listings of the given folder and all the folders under
+        it
+        """
+        path = os.path.normpath(path)
+        prefix = path + os.sep
+        self._storage.invalidate_matching(
+            lambda key: key == path or key.startswith(prefix)
+        )
+
+    def stats(self):
+        """returns the CacheStats
+        """
+        return self._storage.stats()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the ListingCache which is shared in this process
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ListingCache()
+        return _cache
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(worker_count):
+    """Returns the ThreadPool with the given number of workers which is
+    shared in this process, creates it on the first call
+    """
+    with _pools_lock:
+        pool = _pools.get(worker_count)
+        if pool is None:
+            pool = _pools[worker_count] = ThreadPool(worker_count)
+        return pool
+
+
+def _make_dir(path):
+    """creates the given folder in a worker thread, returns a tuple of a bool
+    showing if it is created and the error message
+    """
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno == errno.EEXIST and os.path.isdir(path):
+            # created by someone else in the meantime
+            return False, None
+        return False, str(e)
+    return True, None
+
+
+def materialize(folders, root=None, worker_count=None, listing_cache=None):
+    """Creates the missing folders.
+
+    :param folders: A list of folder paths, see :func:`.render_folders`.
+
+    :param str root: An already existing folder. The parents of the given
+      folders under this folder are checked and created too, so they are
+      created level by level.
+
+    :param int worker_count: The number of the threads which list and create
+      the folders, they are shared by the calls with the same number of
+      threads (see :func:`.get_pool`). The default is
+      :confval:`structure_worker_count`.
+
+    :param listing_cache: The :class:`.ListingCache` instance. The default is
+      the shared one.
+
+    :returns: :class:`.StructureReport`
+    """
+    if worker_count is None:
+        worker_count = conf.structure_worker_count
+
+    if listing_cache is None:
+        listing_cache = get_cache()
+
+    targets = set(os.path.normpath(folder) for folder in folders)
+
+    if root is not None:
+        root = os.path.normpath(root) + os.sep
+        for folder in list(targets):
+            parent = os.path.dirname(folder)
+            while parent.startswith(root) and parent not in targets:
+                targets.add(parent)
+                parent = os.path.dirname(parent)
+
+    levels = {}
+    for folder in targets:
+        levels.setdefault(folder.count(os.sep), []).append(folder)
+
+    report = StructureReport()
+
+    map_ = map
+    if worker_count > 1 and len(targets) > 1:
+        map_ = get_pool(worker_count).map
+
+    # the folders which are created or failed in the previous levels
+    created = set()
+    failed = set()
+
+    for depth in sorted(levels):
+        level = sorted(levels[depth])
+
+        # the newly created folders are empty, don't list them
+        parents = sorted(set(
+            os.path.dirname(folder) for folder in level
+        ).difference(created, failed))
+        listings = dict(zip(parents, map_(listing_cache.listdir, parents)))
+
+        missing = []
+        found = []
+        for folder in level:
+            parent, name = os.path.split(folder)
+            if parent in failed:
+                report.failed[folder] = "can not create %s" % parent
+                failed.add(folder)
+            elif parent in created:
+                missing.append(folder)
+            else:
+                names = listings[parent]
+                if names is not None and name in names:
+                    found.append(folder)
+                else:
+                    missing.append(folder)
+
+        # the listings have the files too
+        for folder, is_dir in zip(found, map_(os.path.isdir, found)):
+            if is_dir:
+                report.existing.append(folder)
+            else:
+                error = "%s exists and is not a folder" % folder
+                logger.warning("can not create %s: %s" % (folder, error))
+                report.failed[folder] = error
+                failed.add(folder)
+
+        for folder, (is_created, error) in \
+                zip(missing, map_(_make_dir, missing)):
+            if is_created:
+                report.created.append(folder)
+                created.add(folder)
+                listing_cache.add(folder)
+            elif error is None:
+                report.existing.append(folder)
+                listing_cache.invalidate(os.path.dirname(folder))
+            else:
+                logger.warning("can not create %s: %s" % (folder, error))
+                report.failed[folder] = error
+                failed.add(folder)
+
+    return report
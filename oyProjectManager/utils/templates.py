@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""Compiled Jinja2 templates.
+
+Compiling a Jinja2 template is far more expensive than rendering it, and the
+same handful of template codes (VersionType.filename, VersionType.path,
+thumbnail paths, the project structure etc.) are rendered over and over
+again. So all the templates in the system are compiled in one shared
+environment and the compiled templates are kept in a bounded LRU cache keyed
+by their source code::
+
+  from oyProjectManager.utils import templates
+
+  filename = templates.render(version_type.filename, version=version)
+
+.. versionadded:: 0.2.5.4
+"""
+
+import threading
+from collections import OrderedDict
+
+import jinja2
+
+# the maximum number of compiled templates kept in the cache
+CACHE_SIZE = 256
+
+# the shared environment, jinja2.Template() uses the same default settings
+environment = jinja2.Environment()
+
+_templates = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_template(source):
+    """Returns the compiled jinja2.Template for the given template source.
+
+    The template is compiled only once, and the least recently used templates
+    are dropped when there are more than :data:`CACHE_SIZE` of them.
+
+    :param source: A string holding the Jinja2 template code.
+
+    :returns: jinja2.Template
+    """
+    with _lock:
+        template = _templates.pop(source, None)
+        if template is not None:
+            # move it to the end as the most recently used one
+            _templates[source] = template
+            return template
+
+    # compile it outside of the lock, compiling the same source twice in two
+    # threads is harmless
+    template = environment.from_string(source)
+
+    with _lock:
+        _templates[source] = template
+        while len(_templates) > CACHE_SIZE:
+            _templates.popitem(last=False)
+
+    return template
+
+
+def render(source, **kwargs):
+    """Renders the given template source with the given variables by using
+    the cached compiled template.
+
+    :param source: A string holding the Jinja2 template code.
+
+    :returns: str
+    """
+    return get_template(source).render(**kwargs)
+
+
+def clear():
+    """Removes all the compiled templates from the cache
+    """
+    with _lock:
+        _templates.clear()
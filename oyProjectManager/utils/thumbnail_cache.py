@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+"""The caches of the thumbnails.
+
+These are the Qt free parts of :mod:`oyProjectManager.ui.thumbnails`.
+:class:`.MemoryCache` keeps the loaded thumbnails keyed by the path and the
+modification time of the image and the requested size, so a changed image
+is never served from it. :class:`.DiskCache` keeps the scaled images in
+:confval:`thumbnail_cache_path` and removes the least recently used ones when
+they are larger than :confval:`thumbnail_disk_cache_size` in total::
+
+  from oyProjectManager.utils import thumbnail_cache
+
+  disk_cache = thumbnail_cache.get_disk_cache()
+  cache_file_path = disk_cache.get_file_path(path, mtime, 160, 90)
+  if disk_cache.touch(cache_file_path):
+      # read the cached image
+      ...
+  else:
+      # scale the image, save it to a temp file and add it to the cache
+      disk_cache.add(temp_file_path, cache_file_path)
+
+.. versionadded:: 0.2.5.4
+"""
+
+import hashlib
+import os
+import threading
+
+from oyProjectManager import conf
+from oyProjectManager.utils import cache
+
+# create a logger
+import logging
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+# the evicted files are removed until the total size is this ratio of the
+# maximum size, so every write doesn't evict the files again
+EVICTION_RATIO = 0.8
+
+
+class MemoryCache(object):
+    """Keeps the loaded thumbnails in memory and drops the least recently
+    used ones when there are more than the given number of them.
+
+    The thumbnails are keyed by the path and the modification time of the
+    image and the size of the thumbnail. None values (the missing images) are
+    not stored, so the images which are created later are found. It is
+    thread safe.
+
+    :param int max_size: The maximum number of the thumbnails. The default is
+      :confval:`thumbnail_cache_size`.
+    """
+
+    def __init__(self, max_size=None):
+        if max_size is None:
+            max_size = conf.thumbnail_cache_size
+        self._storage = cache.TTLStorage(None, max_size)
+
+    def get(self, image_full_path, mtime, width, height):
+        """Returns (True, thumbnail) if the thumbnail is cached and
+        (False, None) otherwise.
+        """
+        return self._storage.get((image_full_path, mtime, width, height))
+
+    def set(self, image_full_path, mtime, width, height, thumbnail):
+        """Stores the thumbnail, a None thumbnail is not stored.
+        """
+        if thumbnail is None:
+            return
+        self._storage.set((image_full_path, mtime, width, height), thumbnail)
+
+    def invalidate(self, image_full_path=None):
+        """Removes the thumbnails of the given image, or all of them if the
+        path is None
+        """
+        if image_full_path is None:
+            self._storage.invalidate()
+        else:
+            self._storage.invalidate_matching(
+                lambda key: key[0] == image_full_path
+            )
+
+    def stats(self):
+        """returns the CacheStats
+        """
+        return self._storage.stats()
+
+
+class DiskCache(object):
+    """Keeps the scaled images in a folder and removes the least recently
+    used ones when the total size of the folder exceeds the given size.
+
+    The files are written by :meth:`.add` and their modification times are
+    updated by :meth:`.touch` when they are used, the files with the oldest
+    modification times are removed first. The total size is read once and
+    then tracked in memory, the folder is listed again only when the files
+    are evicted, so the files written by the other processes are counted
+    eventually. It is thread safe.
+
+    :param str path: The path of the cache folder. The default is
+      :confval:`thumbnail_cache_path`.
+
+    :param int max_size: The maximum total size of the files in bytes. The
+      default is :confval:`thumbnail_disk_cache_size` megabytes.
+    """
+
+    def __init__(self, path=None, max_size=None):
+        if path is None:
+            path = os.path.expanduser(conf.thumbnail_cache_path)
+
+        if max_size is None:
+            max_size = conf.thumbnail_disk_cache_size * 1024 * 1024
+
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # the total size of the files, None until the folder is listed
+        self._size = None
+
+    def get_file_path(self, image_full_path, mtime, width, height):
+        """Returns the path of the scaled image in the cache.
+
+        :param str image_full_path: The full path of the source image.
+
+        :param float mtime: The modification time of the source image.
+
+        :param int width: The width of the thumbnail.
+
+        :param int height: The height of the thumbnail.
+
+        :returns: str
+        """
+        key = hashlib.md5(
+            "%s|%r|%sx%s" % (image_full_path, mtime, width, height)
+        ).hexdigest()
+
+        return os.path.join(
+            self.path,
+            key[:2],
+            "%s.%s" % (key, conf.thumbnail_format)
+        )
+
+    def touch(self, cache_file_path):
+        """Marks the given cached file as used.
+
+        :returns: False if the file is not in the cache
+        """
+        try:
+            os.utime(cache_file_path, None)
+        except OSError:
+            return False
+        return True
+
+    def add(self, temp_file_path, cache_file_path):
+        """Moves the given temp file to its place in the cache and removes
+        the least recently used files if the cache is too large. The temp
+        file should be written next to the cache file, so the other processes
+        never read a half written file.
+
+        :returns: False if the file can not be added to the cache, the temp
+          file is removed in that case
+        """
+        try:
+            size = os.path.getsize(temp_file_path)
+            os.rename(temp_file_path, cache_file_path)
+        except OSError:
+            # the cache is not writable or the rename is not atomic on this
+            # platform
+            logger.debug("can not cache the thumbnail %s" % cache_file_path)
+            try:
+                os.remove(temp_file_path)
+            except OSError:
+                pass
+            return False
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for mtime, size, path in self._files())
+            else:
+                self._size += size
+
+            if self._size > self.max_size:
+                self._evict()
+
+        return True
+
+    def size(self):
+        """Returns the total size of the cached files in bytes
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for mtime, size, path in self._files())
+            return self._size
+
+    def _files(self):
+        """returns a list of (mtime, size, path) tuples of the cached files
+        """
+        files = []
+        for root, dirs, file_names in os.walk(self.path):
+            for file_name in file_names:
+                path = os.path.join(root, file_name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # removed by another process
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict(self):
+        """removes the least recently used files until the total size is
+        below the EVICTION_RATIO of the maximum size
+        """
+        files = sorted(self._files())
+        total_size = sum(size for mtime, size, path in files)
+        target_size = self.max_size * EVICTION_RATIO
+
+        for mtime, size, path in files:
+            if total_size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # removed by another process or still open on Windows
+                continue
+            total_size -= size
+
+        self._size = total_size
+
+
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_disk_cache():
+    """Returns the DiskCache of the current :confval:`thumbnail_cache_path`
+    which is shared in this process
+    """
+    global _disk_cache
+    path = os.path.expanduser(conf.thumbnail_cache_path)
+    with _disk_cache_lock:
+        if _disk_cache is None or _disk_cache.path != path:
+            _disk_cache = DiskCache(path)
+        return _disk_cache
+
+
+def get_cache_file_path(image_full_path, mtime, width, height):
+    """Returns the path of the scaled image in the shared DiskCache, see
+    :meth:`.DiskCache.get_file_path`.
+    """
+    return get_disk_cache().get_file_path(image_full_path, mtime, width,
+                                          height)
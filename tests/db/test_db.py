@@ -7,8 +7,10 @@
 import os
 import shutil
 import tempfile
+import threading
 import unittest
 
+import sqlalchemy
 from oyProjectManager import db, conf
 
 class DB_Tester(unittest.TestCase):
@@ -35,6 +37,9 @@ class DB_Tester(unittest.TestCase):
         # set the db.session to None
         db.session = None
         
+        # restore the session mode
+        conf.database_session_mode = "global"
+        
         # delete the temp folder
         shutil.rmtree(self.temp_config_folder)
         shutil.rmtree(self.temp_projects_folder)
@@ -47,3 +52,349 @@ class DB_Tester(unittest.TestCase):
         db.setup()
         db.setup()
     
+
+    def test_db_setup_session_mode_is_global_by_default(self):
+        """testing if the db.session is a normal session shared by all the
+        threads by default
+        """
+        db.setup()
+        self.assertEqual(db.session_mode, "global")
+        self.assertIsInstance(db.session, sqlalchemy.orm.Session)
+    
+    def test_db_setup_session_mode_is_not_valid(self):
+        """testing if a ValueError will be raised when the session mode is
+        not one of "global" or "thread"
+        """
+        self.assertRaises(ValueError, db.setup, None, "process")
+    
+    def test_db_setup_session_mode_from_config(self):
+        """testing if the session mode is read from the config when it is not
+        given
+        """
+        conf.database_session_mode = "thread"
+        db.setup()
+        self.assertEqual(db.session_mode, "thread")
+    
+    def test_db_setup_session_mode_thread_creates_one_session_per_thread(self):
+        """testing if every thread has its own session in "thread" mode
+        """
+        db.setup(session_mode_in="thread")
+        
+        main_session = db.session()
+        sessions = []
+        
+        def worker():
+            sessions.append(db.session())
+            db.remove_session()
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        
+        self.assertIs(main_session, db.session())
+        self.assertIsNot(main_session, sessions[0])
+    
+    def test_db_setup_session_mode_thread_shares_the_data(self):
+        """testing if the data committed in one thread is reachable from the
+        ORMClass.query() of another thread in "thread" mode
+        """
+        db.setup(session_mode_in="thread")
+        
+        from oyProjectManager.models.auth import User
+        new_user = User("Thread User", "tu")
+        new_user.save()
+        
+        results = []
+        
+        def worker():
+            results.append(
+                User.query().filter_by(name="Thread User").first().initials
+            )
+            db.remove_session()
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        
+        self.assertEqual(results, ["tu"])
+    
+    def test_remove_session_gives_a_new_session_in_thread_mode(self):
+        """testing if the remove_session() will dispose the session of the
+        current thread in "thread" mode
+        """
+        db.setup(session_mode_in="thread")
+        session1 = db.session()
+        db.remove_session()
+        session2 = db.session()
+        self.assertIsNot(session1, session2)
+    
+    def test_engine_kwargs_for_sqlite(self):
+        """testing if the pool size and max overflow values are not used for
+        SQLite databases
+        """
+        kwargs = db._engine_kwargs("sqlite:///some/file.db", "thread")
+        self.assertNotIn("pool_size", kwargs)
+        self.assertNotIn("max_overflow", kwargs)
+    
+    def test_engine_kwargs_for_database_servers(self):
+        """testing if the pool size and max overflow values are read from the
+        config for database servers
+        """
+        kwargs = db._engine_kwargs("postgresql://user@localhost/db", "thread")
+        self.assertEqual(kwargs["pool_size"], conf.database_pool_size)
+        self.assertEqual(kwargs["max_overflow"], conf.database_max_overflow)
+    
+    def test_db_setup_with_pool_pre_ping(self):
+        """testing if the connections are still usable when the
+        database_pool_pre_ping is True
+        """
+        conf.database_pool_pre_ping = True
+        try:
+            db.setup()
+            from oyProjectManager.models.auth import User
+            self.assertTrue(len(User.query().all()) > 0)
+        finally:
+            conf.database_pool_pre_ping = False
+    
+    def test_db_setup_stores_the_fingerprint(self):
+        """testing if the schema and config fingerprint is stored in the
+        database
+        """
+        db.setup()
+        self.assertEqual(db._stored_fingerprint(), db._fingerprint())
+    
+    def test_db_setup_skips_initialization_for_an_up_to_date_database(self):
+        """testing if the db.setup() will not initialize the database again if
+        the fingerprint is not changed
+        """
+        database_url = "sqlite:///" + os.path.join(
+            self.temp_config_folder, "test.db"
+        )
+        db.setup(database_url)
+        
+        from oyProjectManager.models.auth import User
+        admin = User.query().filter_by(name="Administrator").first()
+        db.session.delete(admin)
+        db.session.commit()
+        db.session.close()
+        
+        # a warm start should not create the user again
+        db.setup(database_url)
+        self.assertIsNone(
+            User.query().filter_by(name="Administrator").first()
+        )
+        db.session.close()
+    
+    def test_db_setup_initializes_the_database_if_the_config_is_changed(self):
+        """testing if the db.setup() will initialize the database again if
+        the users_data or version_types config values are changed
+        """
+        database_url = "sqlite:///" + os.path.join(
+            self.temp_config_folder, "test.db"
+        )
+        db.setup(database_url)
+        db.session.close()
+        
+        users_data = conf.users_data
+        conf.users_data = users_data + [{"name": "New User",
+                                         "initials": "nu"}]
+        try:
+            db.setup(database_url)
+        finally:
+            conf.users_data = users_data
+        
+        from oyProjectManager.models.auth import User
+        self.assertIsNotNone(User.query().filter_by(name="New User").first())
+        db.session.close()
+    
+    def test_db_setup_does_not_duplicate_users_and_version_types(self):
+        """testing if initializing an already initialized database will not
+        add the Users and VersionTypes again
+        """
+        db.setup()
+        db.__init_db__()
+        
+        from oyProjectManager.models.auth import User
+        from oyProjectManager.models.version import VersionType
+        self.assertEqual(len(User.query().all()), len(conf.users_data))
+        self.assertEqual(
+            len(VersionType.query().all()), len(conf.version_types)
+        )
+    
+    def test_db_setup_creates_missing_indexes_for_existing_tables(self):
+        """testing if the indexes added to the models are created for the
+        already existing tables
+        """
+        database_url = "sqlite:///" + os.path.join(
+            self.temp_config_folder, "test.db"
+        )
+        db.setup(database_url)
+        db.session.close()
+        
+        db.engine.execute("DROP INDEX ix_Versions_series")
+        db.engine.execute("DELETE FROM DatabaseInfo")
+        
+        db.setup(database_url)
+        
+        from sqlalchemy.engine.reflection import Inspector
+        index_names = [
+            index["name"]
+            for index in Inspector.from_engine(db.engine).get_indexes(
+                "Versions"
+            )
+        ]
+        self.assertIn("ix_Versions_series", index_names)
+        db.session.close()
+    
+    def test_db_setup_creates_missing_columns_for_existing_tables(self):
+        """testing if the columns added to the models are created for the
+        already existing tables
+        """
+        database_url = "sqlite:///" + os.path.join(
+            self.temp_config_folder, "test.db"
+        )
+        db.setup(database_url)
+        db.session.close()
+        
+        # an old Versions table without the file info
+        db.engine.execute("DROP TABLE Versions")
+        db.engine.execute(
+            "CREATE TABLE Versions (id INTEGER PRIMARY KEY, _filename VARCHAR)"
+        )
+        db.engine.execute("DELETE FROM DatabaseInfo")
+        
+        db.setup(database_url)
+        
+        from sqlalchemy.engine.reflection import Inspector
+        column_names = [
+            column["name"]
+            for column in Inspector.from_engine(db.engine).get_columns(
+                "Versions"
+            )
+        ]
+        for column_name in ["_filename", "file_size", "file_mtime",
+                            "file_hash"]:
+            self.assertIn(column_name, column_names)
+        db.session.close()
+    
+    def test_get_cached_returns_the_cached_instances(self):
+        """testing if the db.get_cached() queries the database only once for
+        the same instance and the save() invalidates the cache
+        """
+        from oyProjectManager.models.project import Project
+        from oyProjectManager.models.version import VersionType
+        
+        db.setup()
+        
+        project = Project("TEST_PROJECT")
+        project.save()
+        
+        queries = []
+        original_query = db.session.query
+        def counting_query(*args, **kwargs):
+            queries.append(args)
+            return original_query(*args, **kwargs)
+        
+        db.session.query = counting_query
+        try:
+            self.assertIs(project, Project("TEST_PROJECT"))
+            self.assertIs(project, Project("TEST_PROJECT"))
+            self.assertEqual(1, len(queries))
+            
+            vtype = db.get_cached(VersionType, type_for="Shot",
+                                  name="Animation")
+            self.assertEqual("Animation", vtype.name)
+            self.assertIs(
+                vtype,
+                db.get_cached(VersionType, name="Animation", type_for="Shot")
+            )
+            self.assertEqual(2, len(queries))
+            
+            # saving invalidates the cached instances of the class
+            project.save()
+            self.assertIs(project, Project("TEST_PROJECT"))
+            self.assertEqual(3, len(queries))
+            
+            # missing instances are not cached
+            self.assertIsNone(db.get_cached(VersionType, name="Missing"))
+            self.assertIsNone(db.get_cached(VersionType, name="Missing"))
+            self.assertEqual(5, len(queries))
+        finally:
+            db.session.query = original_query
+    
+    def test_db_setup_clears_the_identity_cache(self):
+        """testing if the db.setup() clears the identity cache, the cached
+        instances belong to the previous session
+        """
+        from oyProjectManager.models.version import VersionType
+        
+        db.setup()
+        vtype = db.get_cached(VersionType, name="Animation")
+        
+        db.setup()
+        self.assertIsNot(vtype, db.get_cached(VersionType, name="Animation"))
+
+    
+    def test_readers_do_not_block_the_writers_of_other_connections(self):
+        """testing if a session which has read from an SQLite database but
+        not committed yet doesn't lock the database for the writers of the
+        other connections (other processes)
+        """
+        database_path = os.path.join(self.temp_config_folder, "test.db")
+        db.setup("sqlite:///" + database_path)
+        
+        from oyProjectManager.models.auth import User
+        
+        # the reader doesn't commit or close its session
+        self.assertNotEqual([], User.query().all())
+        
+        # don't wait for the lock, fail immediately
+        writer = sqlalchemy.create_engine(
+            "sqlite:///" + database_path,
+            connect_args={"timeout": 0}
+        )
+        writer.execute(
+            User.__table__.insert(),
+            name="Writer", initials="wr", email="wr@test.com"
+        )
+        
+        self.assertIsNotNone(User.query().filter_by(name="Writer").first())
+        db.session.close()
+    
+    def test_savepoints_lets_the_savepoints_to_be_rolled_back(self):
+        """testing if the SAVEPOINTs can be rolled back in the savepoints()
+        block and the other pending changes are kept
+        """
+        database_path = os.path.join(self.temp_config_folder, "test.db")
+        db.setup("sqlite:///" + database_path)
+        
+        from oyProjectManager.models.auth import User
+        
+        kept = User(name="Kept", initials="kp", email="kp@test.com")
+        db.session.add(kept)
+        
+        with db.savepoints():
+            savepoint = db.session.begin_nested()
+            db.session.add(
+                User(name="Dropped", initials="dr", email="dr@test.com")
+            )
+            db.session.flush()
+            savepoint.rollback()
+        
+        db.session.commit()
+        
+        # the other connections see only the kept User
+        reader = sqlalchemy.create_engine("sqlite:///" + database_path)
+        names = [
+            name for (name,) in reader.execute(
+                sqlalchemy.select([User.__table__.c.name])
+            )
+        ]
+        self.assertIn("Kept", names)
+        self.assertNotIn("Dropped", names)
+        
+        # the transaction handling of the connection is restored
+        self.assertEqual(
+            "", db.session.connection().connection.connection.isolation_level
+        )
+        db.session.close()
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import tempfile
+import unittest
+from oyProjectManager.environments import maya_workspace
+
+
+class WorkspaceProvisionerTester(unittest.TestCase):
+    """Tests the oyProjectManager.environments.maya_workspace module
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        self.temp_folder = tempfile.mkdtemp()
+        self.workspace_path = os.path.join(self.temp_folder, "Main")
+        os.mkdir(self.workspace_path)
+
+        self.file_rules = {
+            "images": "images/",
+            "renderScenes": ".mayaFiles/scenes/",
+            "scene": ".mayaFiles/scenes/",
+            "mayaAscii": ".mayaFiles/scenes",
+            "textures": ".mayaFiles/sourceimages/",
+            "offlineEdit": "",
+        }
+
+        self.provisioner = maya_workspace.WorkspaceProvisioner(ttl=None)
+
+        # count the created folders
+        self.created = []
+        self.original_makedirs = os.makedirs
+
+        def makedirs(path, *args):
+            self.created.append(path)
+            return self.original_makedirs(path, *args)
+
+        os.makedirs = makedirs
+
+    def tearDown(self):
+        """clean up the test
+        """
+        os.makedirs = self.original_makedirs
+        shutil.rmtree(self.temp_folder)
+
+    def test_rule_folders_is_working_properly(self):
+        """testing if rule_folders() returns the unique folders of the file
+        rules
+        """
+        self.assertEqual(
+            [
+                "/ws/.mayaFiles/scenes",
+                "/ws/.mayaFiles/sourceimages",
+                "/ws/images",
+            ],
+            maya_workspace.rule_folders("/ws", self.file_rules)
+        )
+
+    def test_write_file_writes_only_the_changed_content(self):
+        """testing if write_file() writes the workspace.mel file only if its
+        content is changed
+        """
+        full_path = os.path.join(self.workspace_path, "workspace.mel")
+
+        self.assertTrue(
+            self.provisioner.write_file(self.workspace_path, "content 1")
+        )
+        with open(full_path) as f:
+            self.assertEqual("content 1", f.read())
+
+        self.assertFalse(
+            self.provisioner.write_file(self.workspace_path, "content 1")
+        )
+        self.assertTrue(
+            self.provisioner.write_file(self.workspace_path, "content 2")
+        )
+        with open(full_path) as f:
+            self.assertEqual("content 2", f.read())
+
+        # an up to date file which is not written by this provisioner
+        provisioner = maya_workspace.WorkspaceProvisioner(ttl=None)
+        self.assertFalse(
+            provisioner.write_file(self.workspace_path, "content 2")
+        )
+
+    def test_write_file_writes_the_hashed_bytes(self):
+        """testing if write_file() writes the file in binary mode, so the
+        file on disk matches the hash of the content and it is not written
+        again by another provisioner
+        """
+        full_path = os.path.join(self.workspace_path, "workspace.mel")
+        content = u'workspace -fr "scene" "scenes";\n' \
+            u'workspace -fr "\xe7" "x";\n'
+
+        self.assertTrue(
+            self.provisioner.write_file(self.workspace_path, content)
+        )
+        with open(full_path, "rb") as f:
+            self.assertEqual(content.encode("utf-8"), f.read())
+
+        provisioner = maya_workspace.WorkspaceProvisioner(ttl=None)
+        self.assertFalse(provisioner.write_file(self.workspace_path, content))
+
+    def test_create_folders_creates_the_folders_once(self):
+        """testing if create_folders() creates the unique folders once and
+        doesn't check them again for the same workspace
+        """
+        report = self.provisioner.create_folders(self.workspace_path,
+                                                 self.file_rules)
+        folders = maya_workspace.rule_folders(self.workspace_path,
+                                              self.file_rules)
+        for folder in folders:
+            self.assertTrue(os.path.isdir(folder))
+        self.assertTrue(report.ok)
+        self.assertEqual(
+            sorted(folders +
+                   [os.path.join(self.workspace_path, ".mayaFiles")]),
+            sorted(self.created)
+        )
+
+        self.created = []
+        report = self.provisioner.create_folders(self.workspace_path,
+                                                 self.file_rules)
+        self.assertEqual([], self.created)
+        self.assertEqual(folders, report.existing)
+
+        # a new rule
+        self.file_rules["diskCache"] = "data/"
+        report = self.provisioner.create_folders(self.workspace_path,
+                                                 self.file_rules)
+        self.assertEqual([os.path.join(self.workspace_path, "data")],
+                         report.created)
+
+        # and forgetting the workspace
+        shutil.rmtree(os.path.join(self.workspace_path, "images"))
+        self.provisioner.invalidate(self.workspace_path)
+        self.provisioner.create_folders(self.workspace_path, self.file_rules)
+        self.assertTrue(
+            os.path.isdir(os.path.join(self.workspace_path, "images"))
+        )
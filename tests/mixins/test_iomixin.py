@@ -349,3 +349,32 @@ class IOMixin_DB_Tester(unittest.TestCase):
         
         self.assertEqual(b.inputs, self.kwargs['inputs'])
         self.assertEqual(b.outputs, self.kwargs['outputs'])
+    
+    def test_register_outputs(self):
+        """testing if the register_outputs() adds the render passes in the
+        given folder as one FileLink per pass and updates the already
+        registered ones
+        """
+        for i in range(1, 11):
+            open(os.path.join(self.temp_projects_folder,
+                              "beauty.%04d.exr" % i), "w").close()
+        
+        new_io_mixed_in_obj = IOMixedInClass()
+        links = new_io_mixed_in_obj.register_outputs(
+            self.temp_projects_folder, "Render"
+        )
+        self.assertEqual(1, len(links))
+        self.assertEqual(links, new_io_mixed_in_obj.outputs)
+        self.assertEqual("beauty.%04d.exr 1-10", links[0].filename)
+        
+        for i in range(11, 21):
+            open(os.path.join(self.temp_projects_folder,
+                              "beauty.%04d.exr" % i), "w").close()
+        
+        new_links = new_io_mixed_in_obj.register_outputs(
+            self.temp_projects_folder
+        )
+        self.assertIs(links[0], new_links[0])
+        self.assertEqual(links, new_io_mixed_in_obj.outputs)
+        self.assertEqual("beauty.%04d.exr 1-20", links[0].filename)
+
@@ -9,6 +9,7 @@ import tempfile
 import unittest
 
 from oyProjectManager import db, conf
+from oyProjectManager.models import link
 from oyProjectManager.models.link import FileLink
 
 class FileLinkTester(unittest.TestCase):
@@ -193,3 +194,109 @@ class FileLinkTester(unittest.TestCase):
         self.test_file_link.type = test_value
         self.assertEqual(test_value, self.test_file_link.type)
     
+    
+    def create_frames(self, pattern, frames):
+        """creates the files of the given frames under the temp projects
+        folder
+        """
+        for frame in frames:
+            open(
+                os.path.join(self.temp_projects_folder, pattern % frame), "w"
+            ).close()
+    
+    def test_frame_ranges_are_parsed_and_formatted(self):
+        """testing if the parse_frame_ranges() and format_frame_ranges() are
+        working properly
+        """
+        frames = [1, 2, 3, 4, 10, 12, 13]
+        self.assertEqual("1-4 10 12-13", link.format_frame_ranges(frames))
+        self.assertEqual(frames, link.parse_frame_ranges("1-4 10 12-13"))
+        self.assertEqual("", link.format_frame_ranges([]))
+        self.assertRaises(ValueError, link.parse_frame_ranges, "1-a")
+    
+    def test_sequence_attributes(self):
+        """testing if the sequence attributes are parsed from the filename
+        """
+        new_file_link = FileLink("render.%04d.exr 1-3 5 8-9", "$REPO/Render")
+        self.assertTrue(new_file_link.is_sequence)
+        self.assertEqual("render.%04d.exr", new_file_link.pattern)
+        self.assertEqual("1-3 5 8-9", new_file_link.frame_ranges)
+        self.assertEqual([1, 2, 3, 5, 8, 9], new_file_link.frames)
+        self.assertEqual(1, new_file_link.start_frame)
+        self.assertEqual(9, new_file_link.end_frame)
+        self.assertEqual([4, 6, 7], new_file_link.holes)
+        self.assertEqual("render.0005.exr", new_file_link.frame_file_name(5))
+        self.assertEqual(
+            self.temp_projects_folder + "/Render/render.0008.exr",
+            new_file_link.full_paths[-2]
+        )
+        
+        self.assertFalse(self.test_file_link.is_sequence)
+        self.assertEqual("test_file_name.txt", self.test_file_link.pattern)
+        self.assertEqual([], self.test_file_link.frames)
+        self.assertIsNone(self.test_file_link.start_frame)
+        self.assertEqual(
+            ["/some/path/to/an/unknown/place/test_file_name.txt"],
+            self.test_file_link.full_paths
+        )
+    
+    def test_from_frames(self):
+        """testing if the from_frames() creates a sequence FileLink
+        """
+        new_file_link = FileLink.from_frames(
+            "/tmp", "render.####.exr", [3, 1, 2, 10], "Render"
+        )
+        self.assertEqual("render.####.exr 1-3 10", new_file_link.filename)
+        self.assertEqual("Render", new_file_link.type)
+        self.assertEqual("render.0010.exr", new_file_link.frame_file_name(10))
+        
+        self.assertRaises(ValueError, FileLink.from_frames, "/tmp",
+                          "render.exr", [1])
+        self.assertRaises(ValueError, FileLink.from_frames, "/tmp",
+                          "render.%04d.exr", [])
+    
+    def test_missing_frames_lists_the_folder_once(self):
+        """testing if the existing and missing frames of a sequence are found
+        with one listing of the folder
+        """
+        self.create_frames("render.%04d.exr", [1, 2, 4])
+        new_file_link = FileLink.from_frames(
+            self.temp_projects_folder, "render.%04d.exr", range(1, 6)
+        )
+        
+        listings = []
+        def listdir(path):
+            listings.append(path)
+            return os.listdir(path)
+        
+        self.assertEqual([1, 2, 4], new_file_link.existing_frames(listdir))
+        self.assertEqual(1, len(listings))
+        self.assertEqual([3, 5], new_file_link.missing_frames())
+        self.assertFalse(new_file_link.exists())
+        
+        self.create_frames("render.%04d.exr", [3, 5])
+        self.assertTrue(new_file_link.exists())
+    
+    def test_find_sequences(self):
+        """testing if the find_sequences() collects the frames of the
+        sequences in one FileLink
+        """
+        self.create_frames("beauty.%04d.exr", range(1, 101) + [105])
+        self.create_frames("shadow.%d.exr", range(8, 12))
+        self.create_frames("scene_v%03d.ma", [1])
+        os.mkdir(os.path.join(self.temp_projects_folder, "folder1"))
+        
+        links = FileLink.find_sequences(self.temp_projects_folder, "Render")
+        self.assertEqual(
+            ["beauty.%04d.exr 1-100 105", "scene_v001.ma",
+             "shadow.%d.exr 8-11"],
+            [new_link.filename for new_link in links]
+        )
+        self.assertTrue(all(new_link.type == "Render" for new_link in links))
+        self.assertEqual(
+            [self.temp_projects_folder] * 3,
+            [new_link.path for new_link in links]
+        )
+        
+        self.assertEqual([], FileLink.find_sequences("/not/existing/path"))
+
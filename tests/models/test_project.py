@@ -145,6 +145,83 @@ class Project_DB_Tester(unittest.TestCase):
         new_proj1.create()
         new_proj2.create()
 
+    def test_create_creates_only_the_missing_folders(self):
+        """testing if the create method creates only the missing folders of the
+        structure and returns a report of them
+        """
+        new_proj = Project("TEST_PROJECT")
+        new_proj.create()
+        
+        seq1 = Sequence(new_proj, "TEST_SEQ1")
+        seq1.save()
+        seq1.add_shots("1-2")
+        
+        report = new_proj.create()
+        self.assertTrue(report.ok)
+        self.assertTrue(
+            os.path.join(new_proj.full_path, "Sequences", "TEST_SEQ1",
+                         "Shots", "SH001", "Plate") in report.created
+        )
+        for folder in report.created:
+            self.assertTrue(os.path.isdir(folder))
+        
+        report = new_proj.create()
+        self.assertEqual([], report.created)
+        self.assertTrue(len(report.existing) > 0)
+
+    def test_create_with_sequences_creates_only_their_folders(self):
+        """testing if the create method creates the folders of only the given
+        sequences and Sequence.create() creates only its own folders
+        """
+        new_proj = Project("TEST_PROJECT")
+        new_proj.create()
+        
+        seq1 = Sequence(new_proj, "TEST_SEQ1")
+        seq1.save()
+        seq2 = Sequence(new_proj, "TEST_SEQ2")
+        seq2.save()
+        
+        sequences_path = os.path.join(new_proj.full_path, "Sequences")
+        
+        report = seq1.create()
+        self.assertTrue(report.ok)
+        self.assertTrue(
+            os.path.isdir(os.path.join(sequences_path, "TEST_SEQ1", "Edit"))
+        )
+        self.assertFalse(
+            os.path.exists(os.path.join(sequences_path, "TEST_SEQ2"))
+        )
+        
+        new_proj.create(sequences=[seq2])
+        self.assertTrue(
+            os.path.isdir(os.path.join(sequences_path, "TEST_SEQ2", "Edit"))
+        )
+
+    def test_create_with_refresh_creates_the_deleted_folders_again(self):
+        """testing if the create method with refresh=True doesn't trust the
+        cached folder listings and creates the folders which are deleted in
+        the meantime
+        """
+        new_proj = Project("TEST_PROJECT")
+        new_proj.create()
+        
+        seq1 = Sequence(new_proj, "TEST_SEQ1")
+        seq1.save()
+        seq1.create()
+        
+        edit_path = os.path.join(new_proj.full_path, "Sequences", "TEST_SEQ1",
+                                 "Edit")
+        self.assertTrue(os.path.isdir(edit_path))
+        shutil.rmtree(edit_path)
+        
+        # the cached listings still have it
+        seq1.create()
+        self.assertFalse(os.path.exists(edit_path))
+        
+        report = seq1.create(refresh=True)
+        self.assertTrue(edit_path in report.created)
+        self.assertTrue(os.path.isdir(edit_path))
+
     #    def test_creating_two_different_projects_with_same_name_and_calling_create_in_mixed_order(self):
     #        """testing no error will be raised when creating two Project instances
     #        and calling their create method in mixed order
@@ -10,7 +10,7 @@ import tempfile
 import unittest
 
 from oyProjectManager import conf, db
-from oyProjectManager.models.repository import Repository
+from oyProjectManager.models.repository import Repository, get_repository
 
 class RepositoryTester(unittest.TestCase):
     """tests the oyProjectManager.models.repository.Repository class
@@ -113,6 +113,146 @@ class RepositoryTester(unittest.TestCase):
 #        repo = Repository()
 #        self.assertItemsEqual(real_projects, repo.project_names)
     
+    def test_project_names_is_cached(self):
+        """testing if the project_names is cached per Repository instance and
+        can be invalidated
+        """
+        repo1 = Repository()
+        repo2 = Repository()
+        
+        calls = []
+        def update_project_list():
+            calls.append(1)
+            repo1._project_names = ["TEST%s" % len(calls)]
+        repo1.update_project_list = update_project_list
+        repo2.update_project_list = lambda: None
+        
+        self.assertEqual(["TEST1"], repo1.project_names)
+        self.assertEqual([], repo2.project_names)
+        self.assertEqual(["TEST1"], repo1.project_names)
+        self.assertEqual(1, len(calls))
+        self.assertEqual(1, Repository.project_names.stats(repo1).hits)
+        
+        Repository.project_names.invalidate(repo1)
+        self.assertEqual(["TEST2"], repo1.project_names)
+    
+    def test_get_repository_returns_a_shared_instance(self):
+        """testing if the get_repository() returns the same Repository
+        instance until the repository environment variable is changed
+        """
+        repo = get_repository()
+        self.assertIsInstance(repo, Repository)
+        self.assertIs(repo, get_repository())
+        
+        from oyProjectManager.models.project import Project
+        self.assertIs(repo, Project("TEST_PROJECT").repository)
+        
+        os.environ[conf.repository_env_key] = self.temp_config_folder
+        new_repo = get_repository()
+        self.assertIsNot(repo, new_repo)
+        self.assertEqual(self.temp_config_folder, new_repo.server_path)
+    
+    def test_get_repository_validates_the_environment(self):
+        """testing if the get_repository() raises a RuntimeError when the
+        repository environment variable is not set
+        """
+        get_repository()
+        os.environ.pop(conf.repository_env_key)
+        self.assertRaises(RuntimeError, get_repository)
+    
+    def test_saving_a_project_invalidates_the_project_names(self):
+        """testing if saving a Project updates the project_names of the shared
+        Repository
+        """
+        from oyProjectManager.models.project import Project
+        
+        repo = get_repository()
+        self.assertEqual([], repo.project_names)
+        Project("TEST1").save()
+        self.assertEqual(["TEST1"], repo.project_names)
+    
+    def test_project_names_is_read_from_the_database(self):
+        """testing if the project_names attribute returns the codes of the
+        Projects in the database without checking the folders
+        """
+        from oyProjectManager.models.project import Project
+        
+        for name in ["TEST2", "TEST1"]:
+            Project(name).save()
+        
+        # a folder which is not a project
+        os.mkdir(os.path.join(self.temp_projects_folder, "FAKE_PROJ1"))
+        
+        repo = Repository()
+        self.assertEqual(["TEST1", "TEST2"], repo.project_names)
+    
+    def test_scan_project_folders_is_working_properly(self):
+        """testing if the scan_project_folders returns the child folders of
+        the repository and lists them again only when the repository folder
+        is modified
+        """
+        os.mkdir(os.path.join(self.temp_projects_folder, "B"))
+        os.mkdir(os.path.join(self.temp_projects_folder, "A"))
+        open(os.path.join(self.temp_projects_folder, "file.txt"), "w").close()
+        
+        repo = Repository()
+        self.assertEqual(["A", "B"], repo.scan_project_folders())
+        
+        listed = []
+        original_listdir = os.listdir
+        def listdir(path):
+            listed.append(path)
+            return original_listdir(path)
+        
+        os.listdir = listdir
+        try:
+            self.assertEqual(["A", "B"], repo.scan_project_folders())
+            self.assertEqual([], listed)
+            
+            os.mkdir(os.path.join(self.temp_projects_folder, "C"))
+            # make sure the mtime is changed on filesystems with low
+            # resolution
+            stat = os.stat(self.temp_projects_folder)
+            os.utime(self.temp_projects_folder,
+                     (stat.st_atime, stat.st_mtime + 10))
+            
+            self.assertEqual(["A", "B", "C"], repo.scan_project_folders())
+            self.assertEqual([self.temp_projects_folder], listed)
+        finally:
+            os.listdir = original_listdir
+    
+    def test_reconcile_projects_is_working_properly(self):
+        """testing if the reconcile_projects returns the unregistered folders
+        and the Projects without a folder
+        """
+        from oyProjectManager.models.project import Project
+        
+        Project("TEST1").create()
+        Project("TEST2").save()
+        os.mkdir(os.path.join(self.temp_projects_folder, "FAKE_PROJ1"))
+        
+        repo = Repository()
+        self.assertEqual(
+            (["FAKE_PROJ1"], ["TEST2"]),
+            repo.reconcile_projects()
+        )
+    
+    def test_reconcile_projects_in_background(self):
+        """testing if the reconcile_projects scans the folders in a
+        background thread and calls the callback
+        """
+        from oyProjectManager.models.project import Project
+        
+        Project("TEST1").save()
+        
+        results = []
+        repo = Repository()
+        thread = repo.reconcile_projects(background=True,
+                                         callback=results.append)
+        thread.join()
+        
+        self.assertEqual([([], ["TEST1"])], results)
+    
     def test_get_project_name_is_working_properly(self):
         """testing if the get_project_name method is working properly
         """
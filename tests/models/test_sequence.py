@@ -594,6 +594,94 @@ class Sequence_DB_Tester(unittest.TestCase):
         shot = seq1.shots[0]
         self.assertEqual(shot.code, shot_code)
     
+    def test_add_shots_method_is_working_properly_with_ranges(self):
+        """testing if the add_shots method will expand the #-# ranges in the
+        given shot_range_formula
+        """
+        proj1 = Project('Test Project 1')
+        proj1.save()
+        
+        seq1 = Sequence(proj1, 'Test Sequence 1')
+        seq1.save()
+        
+        new_shots = seq1.add_shots("5-8,10,12-15,SH020-SH022")
+        
+        expected_shot_numbers = [
+            '5', '6', '7', '8', '10', '12', '13', '14', '15', '20', '21', '22'
+        ]
+        
+        self.assertEqual(
+            expected_shot_numbers,
+            [shot.number for shot in new_shots]
+        )
+        self.assertEqual(
+            sorted(expected_shot_numbers),
+            sorted([shot.number for shot in seq1.shots])
+        )
+    
+    def test_add_shots_method_skips_the_duplicate_numbers_in_the_formula(self):
+        """testing if the add_shots method will create only one shot for the
+        numbers repeated in the shot_range_formula
+        """
+        proj1 = Project('Test Project 1')
+        proj1.save()
+        
+        seq1 = Sequence(proj1, 'Test Sequence 1')
+        seq1.save()
+        
+        seq1.add_shots("1-3,2,3-4")
+        
+        self.assertEqual(
+            ['1', '2', '3', '4'],
+            sorted([shot.number for shot in seq1.shots])
+        )
+    
+    def test_add_shots_method_raises_ValueError_for_existing_shots(self):
+        """testing if the add_shots method will raise a ValueError without
+        creating any shot if any of the shots already exists
+        """
+        proj1 = Project('Test Project 1')
+        proj1.save()
+        
+        seq1 = Sequence(proj1, 'Test Sequence 1')
+        seq1.save()
+        
+        seq1.add_shots("3")
+        
+        self.assertRaises(ValueError, seq1.add_shots, "1-5")
+        db.session.rollback()
+        
+        self.assertEqual(['3'], [shot.number for shot in seq1.shots])
+    
+    def test_add_shots_method_checks_the_existing_shots_only_once(self):
+        """testing if the add_shots method will not query the existing shot
+        numbers one by one
+        """
+        proj1 = Project('Test Project 1')
+        proj1.save()
+        
+        seq1 = Sequence(proj1, 'Test Sequence 1')
+        seq1.save()
+        
+        # load the expired sequence attributes before counting
+        seq1.project.shot_number_prefix
+        
+        queries = []
+        original_query = db.session.query
+        def counting_query(*args, **kwargs):
+            queries.append(args)
+            return original_query(*args, **kwargs)
+        
+        db.session.query = counting_query
+        try:
+            new_shots = seq1.add_shots("1-2000")
+        finally:
+            db.session.query = original_query
+        
+        self.assertEqual(2000, len(new_shots))
+        self.assertEqual(1, len(queries))
+        self.assertEqual(2000, Shot.query().filter_by(sequence=seq1).count())
+    
     def test_deleting_a_sequence_will_not_delete_the_related_project(self):
         """testing if deleting a sequence will not delete the related project
         """
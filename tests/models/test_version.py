@@ -4,11 +4,13 @@
 # This module is part of oyProjectManager and is released under the BSD 2
 # License: http://www.opensource.org/licenses/BSD-2-Clause
 
+import datetime
 import os
 
 import shutil
 import tempfile
 import unittest
+from sqlalchemy.exc import IntegrityError
 from oyProjectManager import conf, db
 from oyProjectManager.models.asset import Asset
 from oyProjectManager.models.auth import User
@@ -474,6 +476,261 @@ class VersionTester(unittest.TestCase):
         self.assertEqual(new_vers1.version_number, 1)
         self.assertEqual(new_vers1.version_number, 1)
 
+    def test_allocate_reserves_a_new_version_number_if_it_is_taken(self):
+        """testing if the allocate() will reserve the next available version
+        number and update the paths if the version_number is taken by another
+        Version in the meantime, without losing the other pending changes
+        """
+        self.kwargs.pop("version_number")
+        self.kwargs["base_name"] = "Race"
+
+        # both of them are created before any of them is saved
+        new_version1 = Version(**self.kwargs)
+        new_version2 = Version(**self.kwargs)
+        self.assertEqual(new_version1.version_number, 1)
+        self.assertEqual(new_version2.version_number, 1)
+
+        new_version1.allocate()
+
+        # an unrelated change which is not committed yet
+        shot2 = Shot(self.test_sequence, 2)
+        db.session.add(shot2)
+
+        new_version2.allocate()
+
+        self.assertEqual(new_version1.version_number, 1)
+        self.assertEqual(new_version2.version_number, 2)
+        self.assertIn("v002", new_version2.filename)
+
+        db.session.expire_all()
+        self.assertEqual(
+            [1, 2],
+            [number for (number,) in db.session.query(
+                Version._version_number).filter_by(base_name="Race")
+             .order_by(Version._version_number)]
+        )
+        self.assertIn(shot2, self.test_sequence.shots)
+
+    def test_save_does_not_change_the_version_number(self):
+        """testing if the save() doesn't reserve a new version number for a
+        Version whose number is taken in the meantime, its file may already
+        be written
+        """
+        self.kwargs.pop("version_number")
+        self.kwargs["base_name"] = "Race"
+
+        new_version1 = Version(**self.kwargs)
+        new_version2 = Version(**self.kwargs)
+        new_version1.save()
+
+        self.assertRaises(IntegrityError, new_version2.save)
+        db.session.rollback()
+        self.assertEqual(new_version2.version_number, 1)
+
+    def test_reserve_version_number_returns_the_next_available_number(self):
+        """testing if the reserve_version_number() returns the next available
+        version number in the series and updates the filename
+        """
+        self.kwargs.pop("version_number")
+        for i in range(3):
+            Version(**self.kwargs).save()
+
+        new_version = Version(**self.kwargs)
+        new_version.version_number = 10
+        self.assertEqual(new_version.reserve_version_number(), 4)
+        self.assertEqual(new_version.version_number, 4)
+        self.assertIn("v004", new_version.filename)
+
+    def test_bulk_create_creates_and_saves_the_versions(self):
+        """testing if the bulk_create() creates and saves the Versions for
+        all the given specs
+        """
+        shot2 = Shot(self.test_sequence, 2)
+        shot2.save()
+
+        specs = []
+        for shot in [self.test_shot, shot2]:
+            for i in range(3):
+                specs.append({
+                    "version_of": shot,
+                    "type": self.test_versionType,
+                    "base_name": shot.code,
+                    "created_by": self.test_user,
+                    "extension": ".ma"
+                })
+
+        results = Version.bulk_create(specs)
+
+        self.assertEqual(len(results), 6)
+        for version, error in results:
+            self.assertIsNone(error)
+            self.assertIsNotNone(version.id)
+
+        self.assertEqual(
+            [version.version_number for version, error in results],
+            [1, 2, 3, 1, 2, 3]
+        )
+        self.assertIn("v003", results[2][0].filename)
+        self.assertEqual(len(Version.query().all()), 6)
+
+    def test_bulk_create_continues_the_existing_series(self):
+        """testing if the bulk_create() numbers the Versions after the
+        already existing Versions in the same series
+        """
+        self.kwargs.pop("version_number")
+        self.kwargs.pop("status")
+        for i in range(2):
+            Version(**self.kwargs).save()
+
+        results = Version.bulk_create([self.kwargs, self.kwargs])
+
+        self.assertEqual(
+            [version.version_number for version, error in results], [3, 4]
+        )
+        # the status should be the status of the latest version
+        self.assertEqual(results[0][0].status, conf.status_list[0])
+
+    def test_bulk_create_uses_the_status_of_the_latest_version(self):
+        """testing if the bulk_create() uses the status of the latest version
+        in the series when the status is skipped
+        """
+        self.kwargs.pop("version_number")
+        self.kwargs["status"] = conf.status_list[2]
+        Version(**self.kwargs).save()
+
+        self.kwargs.pop("status")
+        results = Version.bulk_create([self.kwargs])
+
+        self.assertEqual(results[0][0].status, conf.status_list[2])
+
+    def test_bulk_create_numbers_the_versions_again_on_conflict(self):
+        """testing if the bulk_create() numbers the Versions again if the
+        version numbers are taken in the meantime
+        """
+        self.kwargs.pop("version_number")
+        Version(**self.kwargs).save()
+
+        # simulate another Version saved after the max numbers are resolved
+        latest_in_series = Version.__dict__["_latest_in_series"]
+        calls = []
+
+        def stale_latest_in_series(cls, specs):
+            calls.append(specs)
+            if len(calls) == 1:
+                return {}
+            return latest_in_series.__get__(None, cls)(specs)
+
+        Version._latest_in_series = classmethod(stale_latest_in_series)
+        try:
+            results = Version.bulk_create([self.kwargs])
+        finally:
+            Version._latest_in_series = latest_in_series
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results[0][0].version_number, 2)
+        self.assertIn("v002", results[0][0].filename)
+
+    def test_bulk_create_keeps_the_other_pending_changes_on_conflict(self):
+        """testing if the bulk_create() rolls back only the Versions and
+        keeps the other pending changes in the session when the version
+        numbers are taken in the meantime
+        """
+        self.kwargs.pop("version_number")
+        Version(**self.kwargs).save()
+
+        # an unrelated change which is not committed yet
+        shot2 = Shot(self.test_sequence, 2)
+        db.session.add(shot2)
+
+        latest_in_series = Version.__dict__["_latest_in_series"]
+        calls = []
+
+        def stale_latest_in_series(cls, specs):
+            calls.append(specs)
+            if len(calls) == 1:
+                return {}
+            return latest_in_series.__get__(None, cls)(specs)
+
+        Version._latest_in_series = classmethod(stale_latest_in_series)
+        try:
+            results = Version.bulk_create([self.kwargs])
+        finally:
+            Version._latest_in_series = latest_in_series
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results[0][0].version_number, 2)
+
+        db.session.expire_all()
+        self.assertIn(shot2, self.test_sequence.shots)
+        self.assertIsNotNone(shot2.id)
+
+    def test_bulk_create_reports_invalid_specs(self):
+        """testing if the bulk_create() reports the invalid specs and still
+        creates the valid ones
+        """
+        invalid_kwargs = dict(self.kwargs)
+        invalid_kwargs["base_name"] = "'^+'^"
+
+        results = Version.bulk_create([self.kwargs, invalid_kwargs])
+
+        self.assertIsNotNone(results[0][0].id)
+        self.assertIsNone(results[0][1])
+        self.assertIsNone(results[1][0])
+        self.assertIsInstance(results[1][1], ValueError)
+
+    def test_max_version_is_zero_for_a_new_series(self):
+        """testing if the max_version is 0 when there are no Versions in the
+        series
+        """
+        self.assertEqual(self.test_version.max_version, 0)
+
+    def test_latest_versions_returns_the_latest_version_of_all_series(self):
+        """testing if the latest_versions() returns the latest Versions of
+        all the series of the given project and type_for
+        """
+        self.kwargs.pop("version_number")
+        shot2 = Shot(self.test_sequence, 2)
+        shot2.save()
+        
+        latest = {}
+        for shot in [self.test_shot, shot2]:
+            for take_name in ["Main", "Take1"]:
+                self.kwargs["version_of"] = shot
+                self.kwargs["take_name"] = take_name
+                for i in range(3):
+                    version = Version(**self.kwargs)
+                    version.save()
+                latest[(shot.id, self.test_versionType.id, take_name)] = \
+                    version
+        
+        # an asset version and a shot version in another project should not
+        # be included
+        asset_vtype = VersionType.query().filter_by(type_for="Asset").first()
+        asset = Asset(self.test_project, "Test Asset")
+        asset.save()
+        Version(asset, asset.code, asset_vtype, self.test_user).save()
+        
+        project2 = Project("TEST_PROJ2")
+        project2.save()
+        sequence2 = Sequence(project2, "TEST_SEQ2")
+        sequence2.save()
+        shot3 = Shot(sequence2, 1)
+        shot3.save()
+        self.kwargs["version_of"] = shot3
+        Version(**self.kwargs).save()
+        
+        result = Version.latest_versions(self.test_project, "Shot")
+        
+        self.assertEqual(latest, result)
+        # the creators are loaded in the same query
+        for version in result.values():
+            self.assertIn("created_by", version.__dict__)
+        
+        self.assertEqual(
+            [(asset.id, asset_vtype.id, "Main")],
+            Version.latest_versions(self.test_project, "Asset").keys()
+        )
+    
     # TODO: update this test
 #    def test_max_version_returns_the_maximum_version_number_from_the_database_for_changing_types(self):
 #        """testing if the max_version is returning the maximum version number
@@ -915,6 +1172,165 @@ class VersionTester(unittest.TestCase):
             vers1.references.append, vers2
         )
     
+    def test_references_attribute_checks_the_references_not_flushed_yet(self):
+        """testing if a CyclicDependencyError will be raised for the circular
+        references which are not flushed yet and are below the Versions
+        whose references are not loaded, also when autoflush is disabled
+        """
+        self.kwargs.pop("version_number")
+        
+        versions = []
+        for base_name in ["A", "B", "C"]:
+            self.kwargs["base_name"] = base_name
+            version = Version(**self.kwargs)
+            version.save()
+            versions.append(version)
+        vers_a, vers_b, vers_c = versions
+        
+        # B -> C is saved
+        vers_b.references.append(vers_c)
+        db.session.commit()
+        db.session.expire_all()
+        
+        # C -> A is not flushed and the references of C are not loaded
+        vers_a.referenced_by.append(vers_c)
+        self.assertNotIn("references", vers_c.__dict__)
+        db.session.autoflush = False
+        try:
+            self.assertRaises(CircularDependencyError,
+                vers_a.references.append, vers_b
+            )
+        finally:
+            db.session.autoflush = True
+    
+    def create_reference_chain(self, count):
+        """creates count Versions where every Version references the next one
+        """
+        versions = []
+        for i in range(count):
+            self.kwargs["base_name"] = "Test Version %s" % i
+            version = Version(**self.kwargs)
+            version.save()
+            versions.append(version)
+        
+        for i in range(count - 1):
+            versions[i].references.append(versions[i + 1])
+        
+        db.session.commit()
+        return versions
+    
+    def test_deep_references_returns_all_the_references(self):
+        """testing if the deep_references returns the direct and indirect
+        references of the Version
+        """
+        self.kwargs.pop("version_number")
+        vers = self.create_reference_chain(4)
+        
+        self.assertEqual(vers[1:], vers[0].deep_references())
+        self.assertEqual(vers[2:], vers[1].deep_references())
+        self.assertEqual([], vers[3].deep_references())
+        self.assertEqual([vers[1]], vers[0].deep_references(max_depth=1))
+    
+    def test_deep_referenced_by_returns_all_the_referencers(self):
+        """testing if the deep_referenced_by returns the Versions which
+        reference the Version directly or indirectly
+        """
+        self.kwargs.pop("version_number")
+        vers = self.create_reference_chain(4)
+        
+        self.assertEqual(vers[:3], vers[3].deep_referenced_by())
+        self.assertEqual([], vers[0].deep_referenced_by())
+        self.assertEqual(vers[1:3], vers[3].deep_referenced_by(max_depth=2))
+    
+    def test_depends_on_is_working_properly(self):
+        """testing if the depends_on returns True only for the direct and
+        indirect references
+        """
+        self.kwargs.pop("version_number")
+        vers = self.create_reference_chain(4)
+        
+        self.assertTrue(vers[0].depends_on(vers[3]))
+        self.assertTrue(vers[2].depends_on(vers[3]))
+        self.assertFalse(vers[3].depends_on(vers[0]))
+        self.assertFalse(vers[0].depends_on(vers[3], max_depth=2))
+    
+    def test_references_attribute_checks_the_deep_circular_references_in_one_query(self):
+        """testing if the circular reference check doesn't load the
+        references of the saved Versions one by one
+        """
+        self.kwargs.pop("version_number")
+        vers = self.create_reference_chain(10)
+        
+        statements = []
+        recording = [True]
+        def count(conn, cursor, statement, parameters, context,
+                  executemany):
+            if recording[0]:
+                statements.append(statement)
+        
+        # the listener can not be removed in SQLAlchemy 0.8, the engine is
+        # disposed with the test anyway
+        from sqlalchemy import event
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            self.assertRaises(CircularDependencyError,
+                              vers[9].references.append, vers[0])
+        finally:
+            recording[0] = False
+        
+        # loading vers[9] and vers[0], their references and the graph query
+        self.assertTrue(len(statements) <= 5)
+    
+    def test_deep_dependency_update_list_returns_the_deep_references_with_newer_versions(self):
+        """testing if the deep_dependency_update_list returns the direct and
+        indirect references which have newer published versions
+        """
+        self.kwargs.pop("version_number")
+        self.kwargs["is_published"] = True
+        
+        versions = {}
+        for take_name in ["Take1", "Take2", "Take3", "Take4"]:
+            self.kwargs["take_name"] = take_name
+            for i in range(2):
+                version = Version(**self.kwargs)
+                version.save()
+                versions[take_name, i + 1] = version
+        
+        # Main -> A1 -> B1 -> C2, C2 is the latest so it doesn't need update
+        versionMain = versions["Take4", 2]
+        versionRef_A1 = versions["Take1", 1]
+        versionRef_B1 = versions["Take2", 1]
+        versionRef_C2 = versions["Take3", 2]
+        versionMain.references.append(versionRef_A1)
+        versionRef_A1.references.append(versionRef_B1)
+        versionRef_B1.references.append(versionRef_C2)
+        db.session.commit()
+        
+        self.assertEqual(
+            [versionRef_A1, versionRef_B1],
+            versionMain.deep_dependency_update_list()
+        )
+        self.assertEqual(
+            [versionRef_A1],
+            versionMain.deep_dependency_update_list(max_depth=1)
+        )
+        
+        # a newer unpublished version
+        versions["Take3", 2].is_published = False
+        db.session.commit()
+        self.kwargs["take_name"] = "Take3"
+        self.kwargs["is_published"] = False
+        Version(**self.kwargs).save()
+        
+        self.assertEqual(
+            [versionRef_A1, versionRef_B1],
+            versionMain.deep_dependency_update_list()
+        )
+        self.assertEqual(
+            [versionRef_A1, versionRef_B1, versionRef_C2],
+            versionMain.deep_dependency_update_list(published_only=False)
+        )
+    
     def test__eq__operator(self):
         """testing the equality operator
         """
@@ -1499,6 +1915,188 @@ class VersionTester(unittest.TestCase):
         self.assertEqual(vers6.is_latest_published_version(), False)
         self.assertEqual(vers7.is_latest_published_version(), False)
     
+    def test_latest_published_versions_is_working_properly(self):
+        """testing if the latest_published_versions returns the latest
+        published versions of all the given versions in the same order
+        """
+        self.kwargs.pop("version_number")
+        
+        versions = {}
+        for take_name in ["Take1", "Take2", "Take3"]:
+            self.kwargs["take_name"] = take_name
+            for is_published in [True, True, False]:
+                if take_name == "Take3":
+                    is_published = False
+                self.kwargs["is_published"] = is_published
+                version = Version(**self.kwargs)
+                version.save()
+                versions.setdefault(take_name, []).append(version)
+        
+        queries = []
+        original_query = db.session.query
+        def counting_query(*args, **kwargs):
+            queries.append(args)
+            return original_query(*args, **kwargs)
+        
+        given_versions = [
+            versions["Take2"][2], versions["Take1"][0], versions["Take3"][0],
+            versions["Take1"][1]
+        ]
+        
+        # refresh the expired versions before counting
+        for version in given_versions:
+            version.take_name
+        
+        db.session.query = counting_query
+        try:
+            result = Version.latest_published_versions(given_versions)
+        finally:
+            db.session.query = original_query
+        
+        self.assertEqual(
+            [versions["Take2"][1], versions["Take1"][1], None,
+             versions["Take1"][1]],
+            result
+        )
+        # one for the subquery and one for the Versions
+        self.assertEqual(2, len(queries))
+        
+        for version, latest_published_version in zip(given_versions, result):
+            self.assertEqual(version.latest_published_version(),
+                             latest_published_version)
+    
+    def test_check_referenced_versions_returns_the_outdated_references(self):
+        """testing if the EnvironmentBase.check_referenced_versions returns
+        the references which are not the latest published versions
+        """
+        from oyProjectManager.models.entity import EnvironmentBase
+        
+        self.kwargs.pop("version_number")
+        
+        self.kwargs["is_published"] = True
+        vers1 = Version(**self.kwargs)
+        vers1.save()
+        vers2 = Version(**self.kwargs)
+        vers2.save()
+        
+        self.kwargs["is_published"] = False
+        vers3 = Version(**self.kwargs)
+        vers3.save()
+        
+        references = [(vers1, "ref1"), (vers2, "ref2"), (vers3, "ref3")]
+        
+        class TestEnvironment(EnvironmentBase):
+            def get_referenced_versions(self):
+                return references
+        
+        env = TestEnvironment()
+        self.assertEqual(
+            [(vers1, "ref1"), (vers3, "ref3")],
+            env.check_referenced_versions()
+        )
+    
+    def test_get_versions_from_full_paths_is_working_properly(self):
+        """testing if the EnvironmentBase.get_versions_from_full_paths returns
+        the Versions of all the given full paths with one query
+        """
+        from oyProjectManager.models import entity
+        entity.clear_version_path_memo()
+        
+        self.kwargs.pop("version_number")
+        
+        versions = []
+        for take_name in ["Take1", "Take2", "Take3"]:
+            self.kwargs["take_name"] = take_name
+            version = Version(**self.kwargs)
+            version.save()
+            versions.append(version)
+        
+        missing_full_path = os.path.join(
+            versions[0].path, "missing.ma"
+        ).replace("\\", "/")
+        
+        full_paths = [
+            versions[2].full_path, versions[0].full_path, missing_full_path,
+            versions[2].full_path
+        ]
+        
+        queries = []
+        original_query = db.session.query
+        def counting_query(*args, **kwargs):
+            queries.append(args)
+            return original_query(*args, **kwargs)
+        
+        env = entity.EnvironmentBase()
+        
+        db.session.query = counting_query
+        try:
+            result = env.get_versions_from_full_paths(full_paths)
+        finally:
+            db.session.query = original_query
+        
+        self.assertEqual(
+            {
+                versions[0].full_path: versions[0],
+                versions[2].full_path: versions[2],
+                missing_full_path: None
+            },
+            result
+        )
+        self.assertEqual(1, len(queries))
+        
+        self.assertEqual(
+            versions[1],
+            env.get_version_from_full_path(versions[1].full_path)
+        )
+        self.assertIsNone(env.get_version_from_full_path(missing_full_path))
+    
+    def test_get_versions_from_full_paths_uses_the_memo(self):
+        """testing if the EnvironmentBase.get_versions_from_full_paths doesn't
+        query the database for the Versions which are already found and are
+        still loaded in the session
+        """
+        from oyProjectManager.models import entity
+        entity.clear_version_path_memo()
+        
+        self.test_version.save()
+        env = entity.EnvironmentBase()
+        full_path = self.test_version.full_path
+        self.assertEqual(
+            self.test_version,
+            env.get_version_from_full_path(full_path)
+        )
+        
+        queries = []
+        original_query = db.session.query
+        def counting_query(*args, **kwargs):
+            queries.append(args)
+            return original_query(*args, **kwargs)
+        
+        db.session.query = counting_query
+        try:
+            self.assertEqual(
+                self.test_version,
+                env.get_version_from_full_path(full_path)
+            )
+            self.assertEqual(0, len(queries))
+            
+            # expired versions are queried again
+            db.session.expire(self.test_version)
+            self.assertEqual(
+                self.test_version,
+                env.get_version_from_full_path(full_path)
+            )
+            self.assertEqual(1, len(queries))
+            
+            entity.clear_version_path_memo()
+            self.assertEqual(
+                self.test_version,
+                env.get_version_from_full_path(full_path)
+            )
+            self.assertEqual(2, len(queries))
+        finally:
+            db.session.query = original_query
+    
     def test_status_argument_is_skipped_will_set_status_to_WTS_for_new_versions(self):
         """testing if the status argument is skipped the status will be set to
         WTS for new versions
@@ -1641,4 +2239,150 @@ class VersionTester(unittest.TestCase):
         new_version.outputs = outputs
         self.assertEqual(outputs, new_version.outputs)
     
+    def test_update_file_info_is_working_properly(self):
+        """testing if the update_file_info() sets the file_size, file_mtime
+        and file_hash attributes from the file
+        """
+        self.assertIsNone(self.test_version.file_size)
+        self.assertIsNone(self.test_version.file_date)
+        
+        # no file
+        self.assertFalse(self.test_version.update_file_info())
+        
+        os.makedirs(self.test_version.path)
+        with open(self.test_version.full_path, "w") as f:
+            f.write("12345")
+        
+        self.assertTrue(self.test_version.update_file_info())
+        self.assertEqual(5, self.test_version.file_size)
+        self.assertEqual(
+            os.path.getmtime(self.test_version.full_path),
+            self.test_version.file_mtime
+        )
+        self.assertIsNone(self.test_version.file_hash)
+        self.assertEqual(
+            datetime.datetime.fromtimestamp(self.test_version.file_mtime),
+            self.test_version.file_date
+        )
+        
+        self.assertTrue(self.test_version.update_file_info(compute_hash=True))
+        self.assertEqual("827ccb0eea8a706c4c34a16891f84e7b",
+                         self.test_version.file_hash)
+        
+        # the hash is kept until the file is changed
+        self.assertFalse(self.test_version.update_file_info())
+        self.assertEqual("827ccb0eea8a706c4c34a16891f84e7b",
+                         self.test_version.file_hash)
+        
+        os.remove(self.test_version.full_path)
+        self.assertTrue(self.test_version.update_file_info())
+        self.assertIsNone(self.test_version.file_size)
+        self.assertIsNone(self.test_version.file_hash)
+    
+    def test_refresh_file_info_is_working_properly(self):
+        """testing if the refresh_file_info() updates the file info of the
+        given Versions and commits the changes, and the Versions can be
+        filtered by the file info in the database
+        """
+        self.kwargs.pop("version_number")
+        
+        versions = []
+        for i in range(3):
+            version = Version(**self.kwargs)
+            version.save()
+            versions.append(version)
+        
+        os.makedirs(versions[0].path)
+        for i, version in enumerate(versions[:2]):
+            with open(version.full_path, "w") as f:
+                f.write("1" * (i + 1) * 10)
+        
+        self.assertEqual(versions[:2], Version.refresh_file_info(versions))
+        self.assertEqual([], Version.refresh_file_info(versions))
+        
+        db.session.expire_all()
+        self.assertEqual(
+            [versions[1]],
+            Version.query().filter(Version.file_size > 10).all()
+        )
+        self.assertEqual(
+            [versions[2]],
+            Version.query().filter(Version.file_mtime == None).all()
+        )
+    
+    def test_series_page_is_working_properly(self):
+        """testing if the series_page() returns the Versions of the series
+        page by page with one query per page and the creators are loaded with
+        the Versions
+        """
+        self.kwargs.pop("version_number")
+        
+        versions = []
+        for i in range(7):
+            version = Version(**self.kwargs)
+            version.is_published = i % 2 == 0
+            version.save()
+            versions.append(version)
+        
+        # the Versions and the User should be loaded again
+        for version in versions:
+            db.session.expire(version)
+        db.session.expire(self.test_user)
+        
+        args = (self.test_shot, self.test_versionType, self.kwargs["take_name"])
+        
+        # load the expired series before counting the queries
+        self.test_shot.id
+        self.test_versionType.id
+        
+        queries = []
+        original_query = db.session.query
+        def counting_query(*args, **kwargs):
+            queries.append(args)
+            return original_query(*args, **kwargs)
+        
+        db.session.query = counting_query
+        try:
+            page1 = Version.series_page(*args, limit=3)
+            page2 = Version.series_page(
+                *args, after=page1[-1].version_number, limit=3
+            )
+            page3 = Version.series_page(
+                *args, after=page2[-1].version_number, limit=3
+            )
+            names = [version.created_by.name
+                     for version in page1 + page2 + page3]
+        finally:
+            db.session.query = original_query
+        
+        self.assertEqual(3, len(queries))
+        self.assertEqual(
+            [version.id for version in versions],
+            [version.id for version in page1 + page2 + page3]
+        )
+        self.assertEqual([self.test_user.name] * 7, names)
+        
+        # published only
+        self.assertEqual(
+            [1, 3, 5, 7],
+            [version.version_number
+             for version in Version.series_page(*args, published_only=True)]
+        )
     
+    def test_series_window_start_is_working_properly(self):
+        """testing if the series_window_start() returns the version number
+        which the last given number of Versions come after
+        """
+        self.kwargs.pop("version_number")
+        for i in range(5):
+            Version(**self.kwargs).save()
+        
+        args = (self.test_shot, self.test_versionType, self.kwargs["take_name"])
+        
+        self.assertEqual(3, Version.series_window_start(*args, count=2))
+        self.assertEqual(
+            [4, 5],
+            [version.version_number for version in
+             Version.series_page(*args, after=3)]
+        )
+        self.assertIsNone(Version.series_window_start(*args, count=5))
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import tempfile
+import unittest
+from oyProjectManager import conf, db, scanners
+from oyProjectManager.models.auth import User
+from oyProjectManager.models.project import Project
+from oyProjectManager.models.sequence import Sequence
+from oyProjectManager.models.shot import Shot
+from oyProjectManager.models.version import Version, VersionType
+from oyProjectManager.scanners import comp
+
+
+class FusionScannerTester(unittest.TestCase):
+    """Tests the oyProjectManager.scanners.comp module
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        conf.database_url = "sqlite://"
+
+        self.temp_config_folder = tempfile.mkdtemp()
+        self.temp_projects_folder = tempfile.mkdtemp()
+
+        os.environ["OYPROJECTMANAGER_PATH"] = self.temp_config_folder
+        os.environ[conf.repository_env_key] = self.temp_projects_folder
+
+        self.comp_folder = os.path.join(self.temp_projects_folder, "Comp")
+        self.comp_path = os.path.join(self.comp_folder, "shot.comp")
+        os.makedirs(self.comp_folder)
+
+    def tearDown(self):
+        """clean up the test
+        """
+        db.session = None
+        shutil.rmtree(self.temp_config_folder)
+        shutil.rmtree(self.temp_projects_folder)
+
+    def write_comp(self, file_path, lines):
+        """writes the given lines to the given file
+        """
+        with open(file_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def test_scan_clips_finds_the_loader_and_saver_clips(self):
+        """testing if scan_clips() finds the clips of the Loader and Saver
+        tools with their frame ranges and resolves the path maps
+        """
+        self.write_comp(self.comp_path, [
+            "Composition {",
+            "\tCurrentTime = 1001,",
+            "\tRenderRange = { 1001, 1100, },",
+            "\tGlobalRange = { 1, 2000, },",
+            "\tTools = ordered() {",
+            "\t\tLoader1 = Loader {",
+            "\t\t\tClips = {",
+            "\t\t\t\tClip {",
+            '\t\t\t\t\tID = "Clip1",',
+            '\t\t\t\t\tFilename = "Project:plates\\\\plate.1001.exr",',
+            '\t\t\t\t\tFormatID = "OpenEXRFormat",',
+            "\t\t\t\t\tStartFrame = 1001,",
+            "\t\t\t\t\tLength = 100,",
+            "\t\t\t\t\tTrimIn = 0,",
+            "\t\t\t\t\tTrimOut = 99,",
+            "\t\t\t\t\tGlobalStart = 1001,",
+            "\t\t\t\t\tGlobalEnd = 1100",
+            "\t\t\t\t}",
+            "\t\t\t},",
+            "\t\t\tInputs = {",
+            '\t\t\t\tComments = Input { Value = "a } tricky { comment", },',
+            "\t\t\t},",
+            "\t\t},",
+            '\t\t-- Loader3 = Loader { Clips = { Clip { Filename = "x" } } }',
+            "\t\tLoader2 = Loader {",
+            "\t\t\tClips = {",
+            "\t\t\t\tClip {",
+            '\t\t\t\t\tFilename = "/mnt/M/JOBs/logo.png",',
+            "\t\t\t\t\tLength = 1,",
+            "\t\t\t\t}",
+            "\t\t\t},",
+            "\t\t},",
+            "\t\tGroup1 = GroupOperator {",
+            "\t\t\tTools = ordered() {",
+            "\t\t\t\tLoader4 = Loader {",
+            "\t\t\t\t\tClips = {",
+            '\t\t\t\t\t\tClip { Filename = "Temp:/cache.0001.exr", },',
+            "\t\t\t\t\t\tClip { Filename = [[",
+            "textures/grain.0001.tif]], StartFrame = 1, Length = 10, },",
+            "\t\t\t\t\t},",
+            "\t\t\t\t},",
+            "\t\t\t},",
+            "\t\t},",
+            "\t\tSaver1 = Saver {",
+            "\t\t\tInputs = {",
+            "\t\t\t\tClip = Input {",
+            "\t\t\t\t\tValue = Clip {",
+            '\t\t\t\t\t\tFilename = "Comp:\\\\render\\\\shot_v001_.exr",',
+            "\t\t\t\t\t\tSaving = true,",
+            "\t\t\t\t\t\tGlobalStart = -2000000000,",
+            "\t\t\t\t\t},",
+            "\t\t\t\t},",
+            "\t\t\t},",
+            "\t\t},",
+            "\t},",
+            "\tPrefs = {",
+            "\t\tComp = {",
+            "\t\t\tPaths = {",
+            "\t\t\t\tMap = {",
+            '\t\t\t\t\t["project:"] = "$REPO/PROJ",',
+            "\t\t\t\t},",
+            "\t\t\t},",
+            "\t\t},",
+            "\t},",
+            "}",
+        ])
+
+        comp_folder = self.comp_folder.replace("\\", "/")
+        self.assertEqual(
+            [
+                comp.Clip("Loader1", "Loader",
+                          "$REPO/PROJ/plates/plate.####.exr", 1001, 1100),
+                comp.Clip("Loader2", "Loader", "/mnt/M/JOBs/logo.png",
+                          None, None),
+                comp.Clip("Loader4", "Loader",
+                          comp_folder + "/textures/grain.####.tif", 1, 10),
+                comp.Clip("Saver1", "Saver",
+                          comp_folder + "/render/shot_v001_####.exr",
+                          1001, 1100),
+            ],
+            comp.scan_clips(self.comp_path)
+        )
+        self.assertEqual(
+            [
+                scanners.Dependency("input", "Loader",
+                                    "$REPO/PROJ/plates/plate.####.exr"),
+                scanners.Dependency("input", "Loader",
+                                    "/mnt/M/JOBs/logo.png"),
+                scanners.Dependency("input", "Loader",
+                                    comp_folder + "/textures/grain.####.tif"),
+                scanners.Dependency("output", "Saver",
+                                    comp_folder +
+                                    "/render/shot_v001_####.exr"),
+            ],
+            comp.scan_dependencies(self.comp_path)
+        )
+
+    def test_scan_clips_skips_the_clips_of_cyclic_path_maps(self):
+        """testing if scan_clips() skips the clips whose path maps refer to
+        themselves instead of recursing forever
+        """
+        self.write_comp(self.comp_path, [
+            "Composition {",
+            "\tTools = ordered() {",
+            "\t\tLoader1 = Loader {",
+            "\t\t\tClips = {",
+            '\t\t\t\tClip { Filename = "Plates:plate.0001.exr", },',
+            '\t\t\t\tClip { Filename = "Shots:shot.0001.exr", },',
+            '\t\t\t\tClip { Filename = "Textures:grain.0001.tif", },',
+            "\t\t\t},",
+            "\t\t},",
+            "\t},",
+            "\tPrefs = {",
+            "\t\tComp = {",
+            "\t\t\tPaths = {",
+            "\t\t\t\tMap = {",
+            '\t\t\t\t\t["Plates:"] = "Plates:sub",',
+            '\t\t\t\t\t["Shots:"] = "Cuts:shots",',
+            '\t\t\t\t\t["Cuts:"] = "Shots:cuts",',
+            '\t\t\t\t\t["Textures:"] = "Assets:textures",',
+            '\t\t\t\t\t["Assets:"] = "/mnt/M/JOBs/assets",',
+            "\t\t\t\t},",
+            "\t\t\t},",
+            "\t\t},",
+            "\t},",
+            "}",
+        ])
+
+        self.assertEqual(
+            [comp.Clip("Loader1", "Loader",
+                       "/mnt/M/JOBs/assets/textures/grain.####.tif",
+                       1, 1)],
+            comp.scan_clips(self.comp_path)
+        )
+
+    def test_update_versions_stores_the_inputs_and_outputs(self):
+        """testing if update_tree() stores the files of the Loaders as inputs
+        and the files of the Savers as outputs of the Versions
+        """
+        project = Project("TEST_PROJ")
+        project.create()
+        sequence = Sequence(project, "TEST_SEQ")
+        sequence.save()
+        shot = Shot(sequence, 1)
+        shot.save()
+        user = User(name="Test User", initials="tu", email="tu@test.com")
+        version_type = VersionType.query()\
+            .filter(VersionType.type_for == "Shot").first()
+
+        versions = []
+        for i in range(2):
+            version = Version(shot, shot.code, version_type, user,
+                              take_name="Main", extension=".comp",
+                              version_number=i + 1)
+            version.save()
+            versions.append(version)
+            if not os.path.exists(version.path):
+                os.makedirs(version.path)
+
+        plates = os.path.join(self.temp_projects_folder, "plates")
+        os.makedirs(plates)
+        for frame in [1, 2, 3, 5]:
+            open(os.path.join(plates, "plate.%04d.exr" % frame), "w").close()
+
+        for i, version in enumerate(versions):
+            self.write_comp(version.full_path, [
+                "Composition {",
+                "\tTools = ordered() {",
+                "\t\tLoader1 = Loader {",
+                "\t\t\tClips = {",
+                '\t\t\t\tClip { Filename = "$REPO/plates/plate.0001.exr", },',
+                "\t\t\t},",
+                "\t\t},",
+                "\t\tSaver1 = Saver {",
+                "\t\t\tInputs = {",
+                "\t\t\t\tClip = Input {",
+                '\t\t\t\t\tValue = Clip { Filename = '
+                '"$REPO/renders/comp_v%03d_.exr", },' % (i + 1),
+                "\t\t\t\t},",
+                "\t\t\t},",
+                "\t\t},",
+                "\t},",
+                "}",
+            ])
+
+        changed_versions = scanners.update_tree(
+            self.temp_projects_folder, comp.scan_dependencies, [".comp"],
+            processes=2
+        )
+        self.assertItemsEqual(versions, changed_versions)
+
+        db.session.expire_all()
+        for i, version in enumerate(versions):
+            self.assertEqual(
+                [("plate.####.exr 1-3 5", "$REPO/plates", "Loader")],
+                [(link.filename, link.path, link.type)
+                 for link in version.inputs]
+            )
+            self.assertEqual(
+                [("comp_v%03d_####.exr" % (i + 1), "$REPO/renders", "Saver")],
+                [(link.filename, link.path, link.type)
+                 for link in version.outputs]
+            )
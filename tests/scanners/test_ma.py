@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import tempfile
+import unittest
+from oyProjectManager import conf, db, scanners
+from oyProjectManager.models.auth import User
+from oyProjectManager.models.project import Project
+from oyProjectManager.models.sequence import Sequence
+from oyProjectManager.models.shot import Shot
+from oyProjectManager.models.version import Version, VersionType
+from oyProjectManager.scanners import ma
+
+
+class MayaScannerTester(unittest.TestCase):
+    """Tests the oyProjectManager.scanners.ma module
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        conf.database_url = "sqlite://"
+
+        self.temp_config_folder = tempfile.mkdtemp()
+        self.temp_projects_folder = tempfile.mkdtemp()
+
+        os.environ["OYPROJECTMANAGER_PATH"] = self.temp_config_folder
+        os.environ[conf.repository_env_key] = self.temp_projects_folder
+
+        self.workspace = os.path.join(self.temp_projects_folder, "Main")
+        self.scene_path = os.path.join(self.workspace, "scenes", "scene.ma")
+        os.makedirs(os.path.dirname(self.scene_path))
+
+    def tearDown(self):
+        """clean up the test
+        """
+        db.session = None
+        shutil.rmtree(self.temp_config_folder)
+        shutil.rmtree(self.temp_projects_folder)
+
+    def write_scene(self, file_path, lines):
+        """writes the given lines to the given file
+        """
+        with open(file_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def test_scan_dependencies_finds_references_textures_and_image_planes(self):
+        """testing if scan_dependencies() finds the top level references, the
+        file textures and the image planes and skips the other commands
+        """
+        self.write_scene(self.scene_path, [
+            "//Maya ASCII 2014 scene",
+            'file -rdi 1 -ns "char" -rfn "charRN" "$REPO/PROJ/char.ma";',
+            'file -rdi 2 -ns "eyes" -rfn "char:eyesRN" "$REPO/PROJ/eyes.ma";',
+            'file -r -ns "char" -dr 1 -rfn "charRN" -typ "mayaAscii"',
+            '\t\t"$REPO/PROJ/char.ma";',
+            'file -r -ns "char1" -dr 1 -rfn "char1RN" "$REPO/PROJ/char.ma{1}";',
+            'requires maya "2014";',
+            'createNode mesh -n "pCubeShape1" -p "pCube1";',
+            '\tsetAttr -s 8 ".vt[0:7]"  -0.5 -0.5 0.5 0.5 -0.5 0.5',
+            '\t\t -0.5 0.5 0.5 0.5 0.5 0.5;',
+            '\tsetAttr ".ftn" -type "string" "not/a/texture.jpg";',
+            'createNode file -n "file1";',
+            '\tsetAttr ".ftn" -type "string" "sourceimages/wood.jpg";',
+            'createNode file -n "file2";',
+            '\tsetAttr ".fileTextureName" -type "string" '
+            '"$REPO/PROJ/tex/\\"quoted\\".####.exr";',
+            'createNode file -n "file3";',
+            '\tsetAttr ".ftn" -type "string" "";',
+            'createNode imagePlane -n "imagePlaneShape1";',
+            '\tsetAttr -k off ".v";',
+            '\tsetAttr ".imn" -type "string" "/mnt/M/JOBs/plate.%04d.jpg";',
+            'select -ne :defaultRenderGlobals;',
+            '\tsetAttr ".ftn" -type "string" "not/a/texture/either.jpg";',
+        ])
+
+        self.assertEqual(
+            [
+                scanners.Dependency("reference", "Reference",
+                                    "$REPO/PROJ/char.ma"),
+                scanners.Dependency("input", "Texture",
+                                    self.workspace +
+                                    "/sourceimages/wood.jpg"),
+                scanners.Dependency("input", "Texture",
+                                    '$REPO/PROJ/tex/"quoted".####.exr'),
+                scanners.Dependency("input", "Image Plane",
+                                    "/mnt/M/JOBs/plate.%04d.jpg"),
+            ],
+            ma.scan_dependencies(self.scene_path)
+        )
+        self.assertEqual(
+            ["$REPO/PROJ/char.ma",
+             self.workspace + "/sourceimages/wood.jpg",
+             '$REPO/PROJ/tex/"quoted".####.exr',
+             "/mnt/M/JOBs/plate.%04d.jpg"],
+            ma.scan(self.scene_path)
+        )
+
+    def test_scan_dependencies_does_not_buffer_the_mesh_data(self):
+        """testing if scan_dependencies() skips the setAttr commands of the
+        nodes other than the file and imagePlane nodes without joining their
+        lines, so the buffered commands stay small for big meshes
+        """
+        with open(self.scene_path, "w") as f:
+            f.write('createNode mesh -n "bigShape" -p "big";\n')
+            for attribute in (".vt[0:99999]", ".uvst[0].uvsp[0:99999]"):
+                f.write('\tsetAttr -s 100000 "%s"\n' % attribute)
+                for i in range(20000):
+                    f.write("\t\t 0.5 -0.5 0.5 0.5 -0.5 0.5 0.5 -0.5 0.5\n")
+                f.write("\t\t 0.5;\n")
+            f.write('createNode file -n "file1";\n')
+            f.write('\tsetAttr ".ftn" -type "string" "/mnt/tex/wood.jpg";\n')
+
+        read_statements = ma.read_statements
+        commands = []
+
+        def recording_read_statements(file_path, is_interesting):
+            for command in read_statements(file_path, is_interesting):
+                commands.append(command)
+                yield command
+
+        ma.read_statements = recording_read_statements
+        try:
+            dependencies = ma.scan_dependencies(self.scene_path)
+        finally:
+            ma.read_statements = read_statements
+
+        self.assertEqual(
+            [scanners.Dependency("input", "Texture", "/mnt/tex/wood.jpg")],
+            dependencies
+        )
+        self.assertEqual(3, len(commands))
+        self.assertTrue(all(len(command) < 100 for command in commands))
+
+    def test_update_versions_stores_the_references_and_inputs(self):
+        """testing if update_versions() stores the scanned references and the
+        input files of the Versions in the database
+        """
+        project = Project("TEST_PROJ")
+        project.create()
+        sequence = Sequence(project, "TEST_SEQ")
+        sequence.save()
+        shot = Shot(sequence, 1)
+        shot.save()
+        user = User(name="Test User", initials="tu", email="tu@test.com")
+        version_type = VersionType.query()\
+            .filter(VersionType.type_for == "Shot").first()
+
+        versions = []
+        for i in range(3):
+            version = Version(shot, shot.code, version_type, user,
+                              take_name="Main", extension=".ma",
+                              version_number=i + 1)
+            version.save()
+            versions.append(version)
+
+        for version in versions:
+            if not os.path.exists(version.path):
+                os.makedirs(version.path)
+
+        plates = os.path.join(self.temp_projects_folder, "plates")
+        os.makedirs(plates)
+        for frame in [1, 2, 3, 5]:
+            open(os.path.join(plates, "plate.%04d.jpg" % frame), "w").close()
+
+        # version 3 references version 1 and 2, and reads a texture and a
+        # plate sequence
+        self.write_scene(versions[2].full_path, [
+            'file -r -ns "a" -rfn "aRN" "%s";' % versions[0].full_path,
+            'file -r -ns "b" -rfn "bRN" "$REPO/%s";' %
+            versions[1].full_path[len(self.temp_projects_folder) + 1:],
+            'file -r -ns "c" -rfn "cRN" "/not/a/version.ma";',
+            'createNode file -n "file1";',
+            '\tsetAttr ".ftn" -type "string" "$REPO/textures/wood.jpg";',
+            'createNode imagePlane -n "imagePlaneShape1";',
+            '\tsetAttr ".imn" -type "string" "$REPO/plates/plate.####.jpg";',
+        ])
+        self.write_scene(versions[1].full_path, [
+            'file -r -ns "a" -rfn "aRN" "%s";' % versions[0].full_path,
+        ])
+        self.write_scene(versions[0].full_path, ["requires maya \"2014\";"])
+
+        changed_versions = scanners.update_tree(
+            self.temp_projects_folder, ma.scan_dependencies, [".ma"],
+            processes=1
+        )
+        self.assertItemsEqual(versions[1:], changed_versions)
+
+        db.session.expire_all()
+        self.assertEqual([versions[0], versions[1]], versions[2].references)
+        self.assertEqual([versions[0]], versions[1].references)
+        self.assertEqual([], versions[0].references)
+
+        self.assertEqual(
+            [("wood.jpg", "$REPO/textures", "Texture"),
+             ("plate.####.jpg 1-3 5", "$REPO/plates", "Image Plane")],
+            [(link.filename, link.path, link.type)
+             for link in versions[2].inputs]
+        )
+
+        # scanning again doesn't change anything
+        self.assertEqual(
+            [],
+            scanners.update_versions(versions, ma.scan_dependencies,
+                                     processes=2)
+        )
+        self.assertEqual(2, len(versions[2].inputs))
+
+    def test_update_versions_keeps_the_dependencies_of_unreadable_files(self):
+        """testing if update_versions() doesn't clear the references and the
+        input files of the Versions whose files can not be read
+        """
+        project = Project("TEST_PROJ")
+        project.create()
+        sequence = Sequence(project, "TEST_SEQ")
+        sequence.save()
+        shot = Shot(sequence, 1)
+        shot.save()
+        user = User(name="Test User", initials="tu", email="tu@test.com")
+        version_type = VersionType.query()\
+            .filter(VersionType.type_for == "Shot").first()
+
+        versions = []
+        for i in range(2):
+            version = Version(shot, shot.code, version_type, user,
+                              take_name="Main", extension=".ma",
+                              version_number=i + 1)
+            version.save()
+            versions.append(version)
+            if not os.path.exists(version.path):
+                os.makedirs(version.path)
+
+        self.write_scene(versions[0].full_path, ["requires maya \"2014\";"])
+        self.write_scene(versions[1].full_path, [
+            'file -r -ns "a" -rfn "aRN" "%s";' % versions[0].full_path,
+            'createNode file -n "file1";',
+            '\tsetAttr ".ftn" -type "string" "$REPO/textures/wood.jpg";',
+        ])
+        scanners.update_versions(versions, ma.scan_dependencies, processes=1)
+        self.assertEqual([versions[0]], versions[1].references)
+
+        # the file is missing now
+        os.remove(versions[1].full_path)
+        self.assertEqual(
+            [],
+            scanners.update_versions(versions, ma.scan_dependencies,
+                                     processes=1)
+        )
+
+        db.session.expire_all()
+        self.assertEqual([versions[0]], versions[1].references)
+        self.assertEqual(1, len(versions[1].inputs))
+
+    def test_update_versions_skips_the_versions_of_circular_references(self):
+        """testing if update_versions() skips the Versions whose scanned
+        references create a circular dependency, updates the other Versions
+        and checks all the references with a single recursive query
+        """
+        project = Project("TEST_PROJ")
+        project.create()
+        sequence = Sequence(project, "TEST_SEQ")
+        sequence.save()
+        shot = Shot(sequence, 1)
+        shot.save()
+        user = User(name="Test User", initials="tu", email="tu@test.com")
+        version_type = VersionType.query()\
+            .filter(VersionType.type_for == "Shot").first()
+
+        statements = []
+        recording = [False]
+        def count(conn, cursor, statement, parameters, context,
+                  executemany):
+            if recording[0] and "RECURSIVE" in statement.upper():
+                statements.append(statement)
+
+        # the listener can not be removed in SQLAlchemy 0.8, the engine is
+        # disposed with the test anyway, the connections which are already
+        # open don't call it, so it is added before the session connects
+        from sqlalchemy import event
+        event.listen(db.engine, "before_cursor_execute", count)
+
+        versions = []
+        for i in range(4):
+            version = Version(shot, shot.code, version_type, user,
+                              take_name="Main", extension=".ma",
+                              version_number=i + 1)
+            version.save()
+            versions.append(version)
+            if not os.path.exists(version.path):
+                os.makedirs(version.path)
+
+        # version 2 references version 1 in the database
+        versions[1].references.append(versions[0])
+        versions[1].save()
+
+        # version 1 references version 2 in its file now, version 3 and 4
+        # reference version 1
+        self.write_scene(versions[0].full_path, [
+            'file -r -ns "b" -rfn "bRN" "%s";' % versions[1].full_path,
+            'createNode file -n "file1";',
+            '\tsetAttr ".ftn" -type "string" "$REPO/textures/wood.jpg";',
+        ])
+        self.write_scene(versions[1].full_path, [
+            'file -r -ns "a" -rfn "aRN" "%s";' % versions[0].full_path,
+        ])
+        for version in versions[2:]:
+            self.write_scene(version.full_path, [
+                'file -r -ns "a" -rfn "aRN" "%s";' % versions[0].full_path,
+            ])
+
+        recording[0] = True
+        try:
+            changed_versions = scanners.update_versions(
+                versions, ma.scan_dependencies, processes=1
+            )
+        finally:
+            recording[0] = False
+
+        self.assertEqual(versions[2:], changed_versions)
+        self.assertEqual(1, len(statements))
+
+        db.session.rollback()
+        db.session.expire_all()
+        self.assertEqual([], versions[0].references)
+        self.assertEqual([], versions[0].inputs)
+        self.assertEqual([versions[0]], versions[1].references)
+        self.assertEqual([versions[0]], versions[2].references)
+        self.assertEqual([versions[0]], versions[3].references)
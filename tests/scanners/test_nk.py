@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+# 
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import tempfile
+import unittest
+import jinja2
+from oyProjectManager import conf, db, scanners
+from oyProjectManager.models.auth import User
+from oyProjectManager.models.project import Project
+from oyProjectManager.models.sequence import Sequence
+from oyProjectManager.models.shot import Shot
+from oyProjectManager.models.version import Version, VersionType
+from oyProjectManager.scanners import nk
+
+
+class NukeScannerTester(unittest.TestCase):
+    """Tests the oyProjectManager.scanners.nk module
+    """
+    
+    def setUp(self):
+        """setup the test
+        """
+        self.temp_folder = tempfile.mkdtemp()
+        self.project_dir = os.path.join(self.temp_folder, "SEQ1")
+        self.nuke_file_path = os.path.join(self.temp_folder, "comp.nk")
+        
+        template_path = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            "backup_test_files",
+            "nuke_file_template.nk"
+        )
+        with open(template_path) as f:
+            template = jinja2.Template(f.read())
+        
+        with open(self.nuke_file_path, "w") as f:
+            f.write(
+                template.render(
+                    project_dir=self.project_dir,
+                    comp_file_path=self.nuke_file_path
+                )
+            )
+    
+    def tearDown(self):
+        """clean up the test
+        """
+        shutil.rmtree(self.temp_folder)
+    
+    def test_scan_returns_the_files_of_the_read_and_write_nodes(self):
+        """testing if the scan() returns the absolute paths of the files of
+        the Read and Write nodes
+        """
+        self.assertEqual(
+            [
+                self.project_dir +
+                "/SHOTS/SH001/FX/OUTPUT/MAIN/test_image_seq2.###.jpg",
+                self.project_dir +
+                "/SHOTS/SH001/FX/OUTPUT/MAIN/test_image_seq3.###.jpg",
+                self.project_dir + "/SHOTS/SH001/COMPOSITING/OUTPUT/MAIN/"
+                "SH001_MAIN_OUTPUT_r00_v002_oy.%03d.jpg",
+            ],
+            nk.scan(self.nuke_file_path)
+        )
+    
+    def test_scan_handles_quotes_and_other_nodes(self):
+        """testing if the scan() removes the quotes and skips the nodes which
+        are not reading or writing files
+        """
+        with open(self.nuke_file_path, "w") as f:
+            f.write("\n".join([
+                "Root {",
+                " inputs 0",
+                "}",
+                "ReadGeo2 {",
+                ' file "/mnt/M/JOBs/path with spaces/geo.obj"',
+                "}",
+                "Camera2 {",
+                " file /mnt/M/JOBs/camera.fbx",
+                "}",
+                "WriteGeo {",
+                " file {geo/out.abc}",
+                "}",
+            ]))
+        
+        self.assertEqual(
+            ["/mnt/M/JOBs/path with spaces/geo.obj",
+             self.temp_folder + "/geo/out.abc"],
+            nk.scan(self.nuke_file_path)
+        )
+    
+    def test_scan_dependencies_handles_multi_line_values_and_groups(self):
+        """testing if the scan_dependencies() reads the values spanning many
+        lines, skips the other knobs with braces and quotes and finds the
+        nodes in the groups
+        """
+        with open(self.nuke_file_path, "w") as f:
+            f.write("\n".join([
+                "define_window_layout_xml {<?xml version=\"1.0\"?>",
+                "<layout>",
+                "Read {",
+                " file /not/a/read/node.exr",
+                "}",
+                "</layout>",
+                "}",
+                "Root {",
+                " inputs 0",
+                " project_directory \"\\[python \\{nuke.script_directory()\\}]\"",
+                "}",
+                "Group {",
+                " inputs 0",
+                " name Group1",
+                "}",
+                " Roto {",
+                "  curves {{{v x3f99999a}",
+                "  {f 0}",
+                "  {n",
+                "   {layer Root}}}}",
+                "  name Roto1",
+                " }",
+                " Read {",
+                "  inputs 0",
+                "  label \"file \\\"/not/a/path.exr\\\" \\{\"",
+                "  file {plates/plate with spaces.####.exr}",
+                "  name Read1",
+                " }",
+                "end_group",
+                "set N1 [stack 0]",
+                "Write {",
+                " file \"\\[file dirname \\[value root.name]]/out/comp.%04d.exr\"",
+                " name Write1",
+                "}",
+                "Write {",
+                " file \"\\[knob Write1.file]\"",
+                " name Write2",
+                "}",
+            ]))
+        
+        self.assertEqual(
+            [
+                scanners.Dependency(
+                    "input", "Read",
+                    self.temp_folder + "/plates/plate with spaces.####.exr"
+                ),
+                scanners.Dependency(
+                    "output", "Write",
+                    self.temp_folder + "/out/comp.%04d.exr"
+                ),
+            ],
+            nk.scan_dependencies(self.nuke_file_path)
+        )
+    
+    def test_evaluate_is_working_properly(self):
+        """testing if the evaluate() evaluates the supported TCL commands
+        """
+        script_path = "/mnt/M/JOBs/PROJ/comp/comp.nk"
+        os.environ["NK_TEST_VAR"] = "/mnt/M/JOBs"
+        
+        self.assertEqual(
+            "/mnt/M/JOBs/PROJ/comp/comp_v001",
+            nk.evaluate("[file rootname [value root.name]]_v001",
+                        script_path)
+        )
+        self.assertEqual(
+            "comp.nk", nk.evaluate("[file tail [value root.name]]",
+                                   script_path)
+        )
+        self.assertEqual(
+            "/mnt/M/JOBs/PROJ",
+            nk.evaluate("[getenv NK_TEST_VAR]/PROJ", script_path)
+        )
+        self.assertEqual(
+            "/mnt/M/JOBs/PROJ/comp",
+            nk.evaluate("[python nuke.script_directory()]", script_path)
+        )
+        self.assertIsNone(nk.evaluate("[frame]", script_path))
+        self.assertEqual("/a/b.exr", nk.evaluate("/a/b.exr", script_path))
+    
+    def test_update_versions_stores_the_inputs_and_outputs(self):
+        """testing if the scanners.update_versions() stores the files of the
+        Read nodes as inputs and the files of the Write nodes as outputs of
+        the Versions
+        """
+        conf.database_url = "sqlite://"
+        temp_config_folder = tempfile.mkdtemp()
+        os.environ["OYPROJECTMANAGER_PATH"] = temp_config_folder
+        os.environ[conf.repository_env_key] = self.temp_folder
+        
+        try:
+            project = Project("TEST_PROJ")
+            project.create()
+            sequence = Sequence(project, "TEST_SEQ")
+            sequence.save()
+            shot = Shot(sequence, 1)
+            shot.save()
+            user = User(name="Test User", initials="tu", email="tu@test.com")
+            version_type = VersionType.query()\
+                .filter(VersionType.type_for == "Shot").first()
+            
+            versions = []
+            for i in range(2):
+                version = Version(shot, shot.code, version_type, user,
+                                  take_name="Main", extension=".nk",
+                                  version_number=i + 1)
+                version.save()
+                versions.append(version)
+                if not os.path.exists(version.path):
+                    os.makedirs(version.path)
+                with open(version.full_path, "w") as f:
+                    f.write("\n".join([
+                        "Read {",
+                        " file $REPO/plates/plate.%04d.exr",
+                        "}",
+                        "Write {",
+                        " file $REPO/comp/comp_v%03d.%%04d.exr" % (i + 1),
+                        "}",
+                    ]))
+            
+            self.assertEqual(
+                versions,
+                scanners.update_versions(versions, nk.scan_dependencies,
+                                         processes=2)
+            )
+            
+            db.session.expire_all()
+            for i, version in enumerate(versions):
+                self.assertEqual(
+                    [("plate.%04d.exr", "$REPO/plates", "Read")],
+                    [(link.filename, link.path, link.type)
+                     for link in version.inputs]
+                )
+                self.assertEqual(
+                    [("comp_v%03d.%%04d.exr" % (i + 1), "$REPO/comp",
+                      "Write")],
+                    [(link.filename, link.path, link.type)
+                     for link in version.outputs]
+                )
+        finally:
+            db.session = None
+            shutil.rmtree(temp_config_folder)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+# 
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import tempfile
+import unittest
+from oyProjectManager import conf, scanners
+from oyProjectManager.models.repository import Repository
+
+
+def scan_lines(file_path):
+    """a scanner which returns the lines of the file
+    """
+    with open(file_path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def scan_lines_or_fail(file_path):
+    """a scanner which fails for the files named "broken.txt"
+    """
+    if os.path.basename(file_path) == "broken.txt":
+        raise ValueError("unexpected token")
+    return scan_lines(file_path)
+
+
+class ScannersTester(unittest.TestCase):
+    """Tests the oyProjectManager.scanners module
+    """
+    
+    def setUp(self):
+        """setup the test
+        """
+        self.temp_projects_folder = tempfile.mkdtemp()
+        os.environ[conf.repository_env_key] = self.temp_projects_folder
+        
+        self.original_repository = conf.repository
+        conf.repository = {
+            "name": "Test",
+            "windows_path": "M:/JOBs",
+            "linux_path": "/mnt/M/JOBs",
+            "osx_path": "/Volumes/M/JOBs"
+        }
+        self.repository = Repository()
+    
+    def tearDown(self):
+        """clean up the test
+        """
+        conf.repository = self.original_repository
+        shutil.rmtree(self.temp_projects_folder)
+    
+    def create_file(self, name, lines):
+        """creates a file in the temp folder with the given lines
+        """
+        file_path = os.path.join(self.temp_projects_folder, name)
+        with open(file_path, "w") as f:
+            f.write("\n".join(lines))
+        return file_path
+    
+    def test_is_frame_pattern(self):
+        """testing if the is_frame_pattern() finds the frame sequence patterns
+        """
+        self.assertTrue(scanners.is_frame_pattern("/tmp/render.####.exr"))
+        self.assertTrue(scanners.is_frame_pattern("/tmp/render.%04d.exr"))
+        self.assertTrue(scanners.is_frame_pattern("/tmp/render.%d.exr"))
+        self.assertFalse(scanners.is_frame_pattern("/tmp/render.0001.exr"))
+        self.assertFalse(scanners.is_frame_pattern("/tmp/#1/render.exr"))
+    
+    def test_expand_frame_pattern(self):
+        """testing if the expand_frame_pattern() returns the existing frames
+        of the given pattern with one directory listing
+        """
+        names = ["render.0001.exr", "render.0002.exr", "render.10000.exr",
+                 "render.001.exr", "render.0001.jpg", "other.0001.exr"]
+        for name in names:
+            self.create_file(name, [])
+        
+        listings = []
+        def listdir(path):
+            listings.append(path)
+            return os.listdir(path)
+        
+        root = self.temp_projects_folder
+        expected = [root + "/render.0001.exr", root + "/render.0002.exr",
+                    root + "/render.10000.exr"]
+        self.assertEqual(
+            expected,
+            scanners.expand_frame_pattern(root + "/render.####.exr", listdir)
+        )
+        self.assertEqual(
+            expected,
+            scanners.expand_frame_pattern(root + "/render.%04d.exr")
+        )
+        self.assertEqual(1, len(listings))
+        
+        self.assertEqual(
+            [],
+            scanners.expand_frame_pattern(root + "/missing/render.####.exr")
+        )
+    
+    def test_group_series(self):
+        """testing if the group_series() groups the files by their names and
+        sorts them by their version numbers
+        """
+        self.assertEqual(
+            {
+                ("SH001", "MAIN"): [
+                    "SH001_MAIN_COMP_r00_v002_oy.nk",
+                    "SH001_MAIN_COMP_r00_v010_oy.nk"
+                ],
+                ("SH002", "MAIN"): ["SH002_MAIN_COMP_r00_v001_oy.nk"]
+            },
+            scanners.group_series([
+                "SH001_MAIN_COMP_r00_v010_oy.nk",
+                "SH002_MAIN_COMP_r00_v001_oy.nk",
+                "SH001_MAIN_COMP_r00_v002_oy.nk",
+                "not_versioned.nk"
+            ])
+        )
+    
+    def test_repository_to_server_path(self):
+        """testing if the Repository.to_server_path() converts the paths of
+        all the operating systems to the current server path
+        """
+        server_path = self.temp_projects_folder
+        for path in ["M:/JOBs/PROJ/file.nk", "m:\\JOBs\\PROJ\\file.nk",
+                     "/mnt/M/JOBs/PROJ/file.nk",
+                     "/Volumes/M/JOBs/PROJ/file.nk",
+                     "$REPO/PROJ/file.nk"]:
+            self.assertEqual(
+                server_path + "/PROJ/file.nk",
+                self.repository.to_server_path(path)
+            )
+        
+        # other paths are not changed
+        self.assertEqual(
+            "/mnt/M/JOBs_BACKUP/file.nk",
+            self.repository.to_server_path("/mnt/M/JOBs_BACKUP/file.nk")
+        )
+        self.assertEqual(
+            "/mnt/m/JOBs/file.nk",
+            self.repository.to_server_path("/mnt/m/JOBs/file.nk")
+        )
+    
+    def test_build_manifest(self):
+        """testing if the build_manifest() scans the files, converts the
+        paths and removes the duplicates
+        """
+        file1 = self.create_file(
+            "file1.txt",
+            ["M:/JOBs/PROJ/a.exr", "/mnt/M/JOBs/PROJ/a.exr",
+             "/mnt/M/JOBs/PROJ/b.####.exr", "/other/c.exr"]
+        )
+        file2 = self.create_file(
+            "file2.txt",
+            ["/Volumes/M/JOBs/PROJ/b.####.exr"]
+        )
+        
+        manifest = scanners.build_manifest(
+            [file1, file2], scan_lines, repository=self.repository,
+            processes=2
+        )
+        
+        root = self.temp_projects_folder
+        self.assertEqual(
+            [file1, file2, root + "/PROJ/a.exr", root + "/PROJ/b.####.exr",
+             "/other/c.exr"],
+            manifest.paths
+        )
+        self.assertEqual([file1, file2],
+                         manifest.sources(root + "/PROJ/b.####.exr"))
+        self.assertTrue(manifest.is_sequence(root + "/PROJ/b.####.exr"))
+        
+        # filter by root
+        manifest = scanners.build_manifest(
+            [file1], scan_lines, repository=self.repository, processes=1,
+            root=root + "/PROJ"
+        )
+        self.assertNotIn("/other/c.exr", manifest)
+        self.assertEqual(3, len(manifest))
+    
+    def test_scan_files_skips_the_files_which_the_scanner_fails_on(self):
+        """testing if the scan_files() returns None for the files which the
+        scanner raises an error for and still scans the other files
+        """
+        file1 = self.create_file("file1.txt", ["/tmp/a.exr"])
+        broken = self.create_file("broken.txt", ["/tmp/b.exr"])
+        file2 = self.create_file("file2.txt", ["/tmp/c.exr"])
+        
+        for processes in (1, 2):
+            results = dict(
+                scanners.scan_files([file1, broken, file2],
+                                    scan_lines_or_fail, processes=processes)
+            )
+            self.assertEqual(
+                {file1: ["/tmp/a.exr"], broken: None, file2: ["/tmp/c.exr"]},
+                results
+            )
+    
+    def test_manifest_save_and_load(self):
+        """testing if the Manifest can be saved and loaded
+        """
+        manifest = scanners.Manifest()
+        manifest.add("/tmp/a.nk")
+        manifest.add("/tmp/b.####.exr", "/tmp/a.nk")
+        
+        file_path = os.path.join(self.temp_projects_folder, "manifest.json")
+        manifest.save(file_path)
+        
+        loaded = scanners.Manifest.load(file_path)
+        self.assertEqual(manifest.paths, loaded.paths)
+        self.assertEqual(["/tmp/a.nk"], loaded.sources("/tmp/b.####.exr"))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from oyProjectManager.ui import file_stat_service
+from oyProjectManager.utils import file_stats
+
+import sip
+sip.setapi('QString', 2)
+sip.setapi('QVariant', 2)
+from PyQt4 import QtGui
+
+
+class FileStatServiceTester(unittest.TestCase):
+    """tests the oyProjectManager.ui.file_stat_service module
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        self.temp_folder = tempfile.mkdtemp()
+
+        self.app = QtGui.QApplication.instance()
+        if self.app is None:
+            self.app = QtGui.QApplication(sys.argv)
+
+        self.file_full_path = os.path.join(self.temp_folder, "file.ma")
+        with open(self.file_full_path, "w") as f:
+            f.write("12345")
+
+        self.missing_full_path = os.path.join(self.temp_folder, "missing.ma")
+
+    def tearDown(self):
+        """clean up the test
+        """
+        shutil.rmtree(self.temp_folder)
+
+    def wait_for(self, results, count=1, timeout=5):
+        """processes the events until there are enough results
+        """
+        start = time.time()
+        while len(results) < count and time.time() - start < timeout:
+            self.app.processEvents()
+            time.sleep(0.01)
+
+    def test_request_calls_the_callback_with_the_stats(self):
+        """testing if the request reads the stats in the background and calls
+        the callback with them
+        """
+        service = file_stat_service.FileStatService(
+            worker_count=1,
+            stat_cache=file_stats.FileStatCache(ttl=None)
+        )
+        paths = [self.file_full_path, self.missing_full_path]
+        results = []
+        self.assertFalse(service.request(paths, results.append))
+        self.wait_for(results)
+
+        self.assertEqual(1, len(results))
+        self.assertEqual(5, results[0][self.file_full_path].size)
+        self.assertIsNone(results[0][self.missing_full_path])
+
+        # now they are cached
+        self.assertTrue(service.request(paths, results.append))
+        self.assertEqual(results[0], results[1])
+
+        # and invalidated
+        service.invalidate(self.file_full_path)
+        self.assertFalse(service.request(paths, results.append))
+        self.wait_for(results, 3)
+        self.assertEqual(3, len(results))
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+from oyProjectManager import conf
+from oyProjectManager.ui import thumbnails
+from oyProjectManager.utils import file_stats, thumbnail_cache
+
+import sip
+sip.setapi('QString', 2)
+sip.setapi('QVariant', 2)
+from PyQt4 import QtGui
+
+
+class ThumbnailsTester(unittest.TestCase):
+    """tests the oyProjectManager.ui.thumbnails module
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        self.temp_folder = tempfile.mkdtemp()
+        self.original_cache_path = conf.thumbnail_cache_path
+        conf.thumbnail_cache_path = os.path.join(self.temp_folder, "cache")
+
+        self.app = QtGui.QApplication.instance()
+        if self.app is None:
+            self.app = QtGui.QApplication(sys.argv)
+
+        self.image_full_path = os.path.join(self.temp_folder, "image.png")
+        self.save_image(self.image_full_path, 64, 32)
+        file_stats.get_cache().invalidate()
+
+    def tearDown(self):
+        """clean up the test
+        """
+        conf.thumbnail_cache_path = self.original_cache_path
+        shutil.rmtree(self.temp_folder)
+
+    def save_image(self, image_full_path, width, height):
+        """saves a black image of the given size
+        """
+        image = QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+        image.fill(0)
+        image.save(image_full_path)
+
+    def wait_for(self, results, count=1, timeout=5):
+        """processes the events until there are enough results
+        """
+        start = time.time()
+        while len(results) < count and time.time() - start < timeout:
+            self.app.processEvents()
+            time.sleep(0.01)
+
+    def test_load_image_scales_the_image(self):
+        """testing if the load_image returns the scaled image
+        """
+        image = thumbnails.load_image(self.image_full_path, 16, 16)
+        self.assertEqual(16, image.width())
+        self.assertEqual(8, image.height())
+
+    def test_load_image_returns_None_for_missing_images(self):
+        """testing if the load_image returns None if there is no image
+        """
+        self.assertIsNone(
+            thumbnails.load_image(
+                os.path.join(self.temp_folder, "missing.png"), 16, 16
+            )
+        )
+
+    def test_load_image_caches_the_scaled_image_on_disk(self):
+        """testing if the load_image saves the scaled image to the cache
+        folder and the cache is keyed by the modification time of the image
+        """
+        thumbnails.load_image(self.image_full_path, 16, 16)
+
+        mtime = os.stat(self.image_full_path).st_mtime
+        cache_file_path = thumbnail_cache.get_cache_file_path(
+            self.image_full_path, mtime, 16, 16
+        )
+        self.assertTrue(os.path.exists(cache_file_path))
+
+        self.assertNotEqual(
+            cache_file_path,
+            thumbnail_cache.get_cache_file_path(
+                self.image_full_path, mtime + 1, 16, 16
+            )
+        )
+
+    def test_request_calls_the_callback_with_the_pixmap(self):
+        """testing if the request loads the image in the background and calls
+        the callback with the QPixmap
+        """
+        service = thumbnails.ThumbnailService(worker_count=2)
+        results = []
+        self.assertFalse(
+            service.request(self.image_full_path, 16, 16, results.append)
+        )
+        self.wait_for(results)
+
+        self.assertEqual(1, len(results))
+        self.assertIsInstance(results[0], QtGui.QPixmap)
+        self.assertEqual(16, results[0].width())
+
+        # now it is in the memory cache
+        self.assertTrue(
+            service.request(self.image_full_path, 16, 16, results.append)
+        )
+        self.assertIs(results[0], results[1])
+
+    def test_request_calls_the_callback_with_None_for_missing_images(self):
+        """testing if the callback is called with None if there is no image
+        """
+        service = thumbnails.ThumbnailService(worker_count=2)
+        results = []
+        service.request(os.path.join(self.temp_folder, "missing.png"), 16, 16,
+                        results.append)
+        self.wait_for(results)
+
+        self.assertEqual([None], results)
+
+    def test_memory_cache_is_bounded(self):
+        """testing if the least recently used pixmaps are dropped from the
+        memory cache
+        """
+        service = thumbnails.ThumbnailService(worker_count=1, cache_size=2)
+        for size in [8, 16, 32]:
+            service.load(self.image_full_path, size, size)
+
+        self.assertFalse(service.get_cached(self.image_full_path, 8, 8)[0])
+        self.assertTrue(service.get_cached(self.image_full_path, 16, 16)[0])
+        self.assertTrue(service.get_cached(self.image_full_path, 32, 32)[0])
+
+    def test_invalidate(self):
+        """testing if the invalidate removes the pixmaps of the given image
+        from the memory cache
+        """
+        service = thumbnails.ThumbnailService(worker_count=1)
+        service.load(self.image_full_path, 16, 16)
+        service.invalidate(self.image_full_path)
+        self.assertFalse(service.get_cached(self.image_full_path, 16, 16)[0])
+
+    def test_request_does_not_cache_the_missing_images(self):
+        """testing if the missing images are not cached, so they are found
+        when they are created later
+        """
+        service = thumbnails.ThumbnailService(worker_count=1)
+        image_full_path = os.path.join(self.temp_folder, "later.png")
+        self.assertIsNone(service.load(image_full_path, 16, 16))
+
+        self.save_image(image_full_path, 64, 32)
+        file_stats.get_cache().invalidate(image_full_path)
+        self.assertIsInstance(service.load(image_full_path, 16, 16),
+                              QtGui.QPixmap)
+
+    def test_memory_cache_is_keyed_by_the_modification_time(self):
+        """testing if the changed images are not served from the memory
+        cache
+        """
+        service = thumbnails.ThumbnailService(worker_count=1)
+        self.assertEqual(
+            8, service.load(self.image_full_path, 16, 16).height()
+        )
+
+        self.save_image(self.image_full_path, 32, 32)
+        mtime = os.stat(self.image_full_path).st_mtime + 10
+        os.utime(self.image_full_path, (mtime, mtime))
+        file_stats.get_cache().invalidate(self.image_full_path)
+
+        self.assertFalse(service.get_cached(self.image_full_path, 16, 16)[0])
+        self.assertEqual(
+            16, service.load(self.image_full_path, 16, 16).height()
+        )
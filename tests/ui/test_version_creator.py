@@ -1032,30 +1032,30 @@ class VersionCreatorTester(unittest.TestCase):
 
         # the row count should be 1
         self.assertEqual(
-            dialog.previous_versions_tableWidget.rowCount(),
+            dialog.previous_versions_model.rowCount(),
             1
         )
 
         # now check if the previous versions tableWidget has the info
         self.assertEqual(
-            int(dialog.previous_versions_tableWidget.item(0, 0).text()),
+            int(dialog.previous_versions_model.index(0, 0).data()),
             vers1.version_number
         )
 
         self.assertEqual(
-            dialog.previous_versions_tableWidget.item(0, 1).text(),
+            dialog.previous_versions_model.index(0, 1).data(),
             vers1.created_by.name
         )
 
         #self.assertEqual(
-        #    dialog.previous_versions_tableWidget.item(0, 3).text(),
+        #    dialog.previous_versions_model.index(0, 3).data(),
         #    datetime.datetime.fromtimestamp(
         #            os.path.getmtime(vers1.full_path)
         #    ).strftime(conf.time_format)
         #)
 
         #self.assertEqual(
-        #    dialog.previous_versions_tableWidget.item(0, 4).text(),
+        #    dialog.previous_versions_model.index(0, 4).data(),
         #    vers1.note
         #)
 
@@ -1169,7 +1169,7 @@ class VersionCreatorTester(unittest.TestCase):
 
         # the row count should be 2
         self.assertEqual(
-            dialog.previous_versions_tableWidget.rowCount(),
+            dialog.previous_versions_model.rowCount(),
             2
         )
 
@@ -1179,26 +1179,26 @@ class VersionCreatorTester(unittest.TestCase):
         for i in range(2):
 
             self.assertEqual(
-                int(dialog.previous_versions_tableWidget.item(i, 0).text()),
+                int(dialog.previous_versions_model.index(i, 0).data()),
                 versions[i].version_number
             )
 
             self.assertEqual(
-                dialog.previous_versions_tableWidget.item(i, 1).text(),
+                dialog.previous_versions_model.index(i, 1).data(),
                 versions[i].created_by.name
             )
 
             # TODO: add test for file size column
 
             #self.assertEqual(
-            #    dialog.previous_versions_tableWidget.item(i, 3).text(),
+            #    dialog.previous_versions_model.index(i, 3).data(),
             #    datetime.datetime.fromtimestamp(
             #        os.path.getmtime(versions[i].full_path)
             #    ).strftime(conf.time_format)
             #)
 
             #self.assertEqual(
-            #    dialog.previous_versions_tableWidget.item(i, 4).text(),
+            #    dialog.previous_versions_model.index(i, 4).data(),
             #    versions[i].note
             #)
 
@@ -2268,27 +2268,27 @@ class VersionCreatorTester(unittest.TestCase):
         
         # check if ver3 and vers5 is written with bold font
         self.assertEqual(
-            dialog.previous_versions_tableWidget.item(0, 0).font().bold(),
+            dialog.previous_versions_model.index(0, 0).data(QtCore.Qt.FontRole).bold(),
             False
         )
 
         self.assertEqual(
-            dialog.previous_versions_tableWidget.item(1, 0).font().bold(),
+            dialog.previous_versions_model.index(1, 0).data(QtCore.Qt.FontRole).bold(),
             False
         )
         
         self.assertEqual(
-            dialog.previous_versions_tableWidget.item(2, 0).font().bold(),
+            dialog.previous_versions_model.index(2, 0).data(QtCore.Qt.FontRole).bold(),
             True
         )
 
         self.assertEqual(
-            dialog.previous_versions_tableWidget.item(3, 0).font().bold(),
+            dialog.previous_versions_model.index(3, 0).data(QtCore.Qt.FontRole).bold(),
             False
         )
         
         self.assertEqual(
-            dialog.previous_versions_tableWidget.item(4, 0).font().bold(),
+            dialog.previous_versions_model.index(4, 0).data(QtCore.Qt.FontRole).bold(),
             True
         )
     
@@ -2357,7 +2357,7 @@ class VersionCreatorTester(unittest.TestCase):
         
         # test there is 4 versions in the list
         self.assertEqual(
-            dialog.previous_versions_tableWidget.rowCount(),
+            dialog.previous_versions_model.rowCount(),
             4
         )
         
@@ -2366,12 +2366,12 @@ class VersionCreatorTester(unittest.TestCase):
         
         # check if only 2 items are shown
         self.assertEqual(
-            dialog.previous_versions_tableWidget.rowCount(),
+            dialog.previous_versions_model.rowCount(),
             2
         )
         
         # and the versions are vers3 and vers4
-        all_vers = dialog.previous_versions_tableWidget.versions
+        all_vers = dialog.previous_versions_model.versions
         self.assertTrue(vers1 not in all_vers)
         self.assertTrue(vers2 not in all_vers)
         self.assertTrue(vers3 in all_vers)
@@ -2440,7 +2440,7 @@ class VersionCreatorTester(unittest.TestCase):
         
         # test there is 8 versions in the list
         self.assertEqual(
-            dialog.previous_versions_tableWidget.rowCount(),
+            dialog.previous_versions_model.rowCount(),
             10
         )
         
@@ -2449,22 +2449,69 @@ class VersionCreatorTester(unittest.TestCase):
         
         # check if only the last 5 are visible
         self.assertEqual(
-            dialog.previous_versions_tableWidget.rowCount(),
+            dialog.previous_versions_model.rowCount(),
             3
         )
 
         self.assertTrue(
-            versions[-1] in dialog.previous_versions_tableWidget.versions
+            versions[-1] in dialog.previous_versions_model.versions
         )
 
         self.assertTrue(
-            versions[-2] in dialog.previous_versions_tableWidget.versions
+            versions[-2] in dialog.previous_versions_model.versions
         )
         
         self.assertTrue(
-            versions[-3] in dialog.previous_versions_tableWidget.versions
+            versions[-3] in dialog.previous_versions_model.versions
         )
     
+    def test_previous_versions_tableWidget_loads_the_versions_page_by_page(self):
+        """testing if the previous versions are loaded page by page by the
+        previous_versions_model
+        """
+        project = Project("Test Project")
+        project.save()
+
+        asset1 = Asset(project, "Test Asset 1")
+        asset1.save()
+
+        aTypes = VersionType.query().filter_by(type_for="Asset").all()
+
+        user = User("Test User")
+
+        versions = []
+        for i in range(12):
+            vers = Version(asset1, asset1.code, aTypes[0], user)
+            vers.save()
+            versions.append(vers)
+
+        dialog = version_creator.MainDialog()
+        dialog.previous_versions_model.page_size = 5
+        dialog.version_count_spinBox.setValue(10)
+
+        # set to assets
+        dialog.tabWidget.setCurrentIndex(0)
+
+        # select Asset
+        dialog.assets_tableWidget.selectRow(0)
+
+        model = dialog.previous_versions_model
+
+        # only the first page of the last 10 versions is loaded
+        self.assertEqual(5, model.rowCount())
+        self.assertEqual(versions[2:7], model.versions)
+        self.assertTrue(model.canFetchMore())
+
+        model.fetchMore()
+        self.assertEqual(versions[2:], model.versions)
+        self.assertFalse(model.canFetchMore())
+
+        self.assertEqual(
+            str(versions[-1].version_number),
+            model.index(9, 0).data()
+        )
+        self.assertEqual(user.name, model.index(9, 1).data())
+
     def test_shots_listWidgets_gets_empty_for_a_new_project_without_sequence(self):
         """testing if shots_listWidget becomes empty when switched from a
         project with sequences to a project without sequences
@@ -3112,7 +3159,7 @@ class VersionCreator_Environment_Relation_Tester(unittest.TestCase):
         self.test_dialog.takes_listWidget.setCurrentRow(0)
         
         # get the first version from the previous_versions_tableWidget
-        version = self.test_dialog.previous_versions_tableWidget.versions[0]
+        version = self.test_dialog.previous_versions_model.versions[0]
         
         # get it by using the UI
         version_from_UI = self.test_dialog.get_previous_version()
@@ -500,3 +500,266 @@
 #        
 #        
 #
+
+import os
+import shutil
+import tempfile
+import unittest
+from oyProjectManager import conf, db
+from oyProjectManager.models.auth import User
+from oyProjectManager.models.project import Project
+from oyProjectManager.models.sequence import Sequence
+from oyProjectManager.models.shot import Shot
+from oyProjectManager.models.version import Version, VersionType
+from oyProjectManager.scanners import Manifest
+from oyProjectManager.utils import backup
+from oyProjectManager.utils.backup import BackUp, IncrementalCopier
+
+
+class BackUpManifestTester(unittest.TestCase):
+    """tests the manifest creation of the
+    :class:`~oyProjectManager.utils.backup.BackUp` class
+    """
+    
+    def setUp(self):
+        """setup the test
+        """
+        conf.database_url = "sqlite://"
+        
+        self.temp_config_folder = tempfile.mkdtemp()
+        self.temp_projects_folder = tempfile.mkdtemp()
+        self.output = tempfile.mkdtemp()
+        
+        os.environ["OYPROJECTMANAGER_PATH"] = self.temp_config_folder
+        os.environ[conf.repository_env_key] = self.temp_projects_folder
+        
+        self.test_project = Project("BACKUP_TEST_PROJECT")
+        self.test_project.create()
+        
+        self.test_sequence = Sequence(self.test_project, "SEQ1")
+        self.test_sequence.save()
+        
+        self.test_shot = Shot(self.test_sequence, 1)
+        self.test_shot.save()
+        
+        self.comp_type = VersionType.query()\
+            .filter_by(type_for="Shot", code="Comp").first()
+        
+        self.test_user = User.query().first()
+        
+        self.nuke_scripts = []
+        for take_name in ["Main", "Main", "Main", "Other"]:
+            version = Version(
+                self.test_shot, self.test_shot.code, self.comp_type,
+                self.test_user, take_name=take_name, extension=".nk"
+            )
+            version.save()
+            self.nuke_scripts.append(version.full_path)
+            
+            try:
+                os.makedirs(os.path.dirname(version.full_path))
+            except OSError:
+                pass
+            
+            with open(version.full_path, "w") as f:
+                f.write("\n".join([
+                    "Read {",
+                    " file %s/%s/render.####.exr" % (
+                        self.test_project.full_path, take_name
+                    ),
+                    "}",
+                    "Read {",
+                    " file /outside/of/the/project.exr",
+                    "}",
+                ]))
+    
+    def tearDown(self):
+        """cleanup the test
+        """
+        db.session = None
+        shutil.rmtree(self.temp_config_folder)
+        shutil.rmtree(self.temp_projects_folder)
+        shutil.rmtree(self.output)
+    
+    def test_get_nuke_scripts_returns_the_last_versions(self):
+        """testing if the get_nuke_scripts() returns the last
+        number_of_versions versions of every series
+        """
+        backup = BackUp(self.test_project.name, self.output)
+        self.assertEqual(
+            [self.nuke_scripts[2], self.nuke_scripts[3]],
+            backup.get_nuke_scripts()
+        )
+        
+        backup.num_of_versions = 2
+        self.assertEqual(
+            [self.nuke_scripts[1], self.nuke_scripts[2], self.nuke_scripts[3]],
+            backup.get_nuke_scripts()
+        )
+        
+        backup.num_of_versions = -1
+        self.assertEqual(self.nuke_scripts, backup.get_nuke_scripts())
+    
+    def test_doBackup_saves_the_manifest(self):
+        """testing if the doBackup() saves the manifest of the nuke scripts
+        and the files in the project which are used by them
+        """
+        backup = BackUp(self.test_project.name, self.output)
+        manifest = backup.doBackup().manifest
+        
+        project_path = self.test_project.full_path
+        self.assertEqual(
+            [self.nuke_scripts[2], self.nuke_scripts[3],
+             project_path + "/Main/render.####.exr",
+             project_path + "/Other/render.####.exr"],
+            manifest.paths
+        )
+        
+        self.assertEqual(
+            manifest.paths,
+            Manifest.load(backup.manifest_path).paths
+        )
+    
+    def test_doBackup_copies_the_files(self):
+        """testing if the doBackup() copies the nuke scripts and the frames of
+        the sequences used by them to the output
+        """
+        project_path = self.test_project.full_path
+        os.makedirs(project_path + "/Main")
+        for frame in [1, 2]:
+            with open(project_path + "/Main/render.%04d.exr" % frame,
+                      "w") as f:
+                f.write("frame %s" % frame)
+        
+        report = BackUp(self.test_project.name, self.output).doBackup()
+        
+        output_path = os.path.join(self.output, self.test_project.code)
+        for path in [self.nuke_scripts[2], self.nuke_scripts[3],
+                     project_path + "/Main/render.0001.exr",
+                     project_path + "/Main/render.0002.exr"]:
+            self.assertIn(path, report.copied)
+            self.assertTrue(
+                os.path.exists(path.replace(project_path, output_path))
+            )
+        
+        self.assertEqual([project_path + "/Other/render.####.exr"],
+                         report.missing)
+
+
+class IncrementalCopierTester(unittest.TestCase):
+    """tests the :class:`~oyProjectManager.utils.backup.IncrementalCopier`
+    class
+    """
+    
+    def setUp(self):
+        """setup the test
+        """
+        self.source = tempfile.mkdtemp()
+        self.output = tempfile.mkdtemp()
+        self.destination = os.path.join(self.output, "PROJ")
+        self.state_path = os.path.join(self.output, "state.json")
+        
+        os.makedirs(os.path.join(self.source, "renders"))
+        self.frames = []
+        for frame in range(1, 6):
+            self.frames.append(
+                self.create_file("renders/beauty.%04d.exr" % frame,
+                                 "frame %s" % frame)
+            )
+        self.scene = self.create_file("scene.nk", "Root {\n}")
+        
+        self.manifest = Manifest()
+        self.manifest.add(self.scene)
+        self.manifest.add(self.source + "/renders/beauty.####.exr")
+    
+    def tearDown(self):
+        """cleanup the test
+        """
+        shutil.rmtree(self.source)
+        shutil.rmtree(self.output)
+    
+    def create_file(self, name, content):
+        """creates a file with the given content under the source
+        """
+        path = os.path.join(self.source, name).replace("\\", "/")
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+    
+    def copier(self, **kwargs):
+        """returns a new IncrementalCopier
+        """
+        return IncrementalCopier(self.source, self.destination,
+                                 self.state_path, worker_count=2, **kwargs)
+    
+    def test_run_copies_only_the_changed_files(self):
+        """testing if the files which are not changed since the last run are
+        skipped
+        """
+        report = self.copier().run(self.manifest)
+        self.assertItemsEqual([self.scene] + self.frames, report.copied)
+        self.assertEqual([], report.skipped)
+        
+        with open(self.destination + "/renders/beauty.0003.exr") as f:
+            self.assertEqual("frame 3", f.read())
+        
+        # change one frame and add a new one
+        self.create_file("renders/beauty.0003.exr", "changed frame 3")
+        new_frame = self.create_file("renders/beauty.0006.exr", "frame 6")
+        
+        report = self.copier().run(self.manifest)
+        self.assertItemsEqual([self.frames[2], new_frame], report.copied)
+        self.assertEqual(5, len(report.skipped))
+        
+        with open(self.destination + "/renders/beauty.0003.exr") as f:
+            self.assertEqual("changed frame 3", f.read())
+    
+    def test_run_resumes_an_interrupted_backup(self):
+        """testing if the files which are copied but not saved to the state
+        are not copied again
+        """
+        self.copier().run(self.manifest)
+        os.remove(self.state_path)
+        
+        report = self.copier().run(self.manifest)
+        self.assertEqual([], report.copied)
+        self.assertEqual(6, len(report.skipped))
+    
+    def test_run_checks_the_hashes(self):
+        """testing if the files with the same content are not copied again if
+        verify_hash is True
+        """
+        self.copier(verify_hash=True).run(self.manifest)
+        
+        # only change the modification time
+        stat = os.stat(self.scene)
+        os.utime(self.scene, (stat.st_atime, stat.st_mtime + 10))
+        
+        report = self.copier(verify_hash=True).run(self.manifest)
+        self.assertEqual([], report.copied)
+        
+        self.create_file("scene.nk", "Root {\n name changed\n}")
+        report = self.copier(verify_hash=True).run(self.manifest)
+        self.assertEqual([self.scene], report.copied)
+    
+    def test_run_reports_missing_files(self):
+        """testing if the missing files and sequences are reported
+        """
+        self.manifest.add(self.source + "/missing.nk")
+        self.manifest.add(self.source + "/renders/missing.%04d.exr")
+        
+        report = self.copier().run(self.manifest)
+        self.assertEqual(
+            [self.source + "/missing.nk",
+             self.source + "/renders/missing.%04d.exr"],
+            report.missing
+        )
+    
+    def test_file_hash(self):
+        """testing if the file_hash() returns the md5 hash of the file
+        """
+        self.assertEqual(
+            "d41d8cd98f00b204e9800998ecf8427e",
+            backup.file_hash(self.create_file("empty", ""))
+        )
+
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import threading
+import time
+import unittest
+from oyProjectManager.utils import cache
+
+
+class Counter(object):
+    """a class with cached methods which counts the real calls
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    @cache.cached(ttl=None)
+    @property
+    def value(self):
+        self.calls += 1
+        return self.name
+
+    @cache.cached(ttl=None, max_size=2)
+    def double(self, number):
+        self.calls += 1
+        return number * 2
+
+    @cache.InputBasedCachedMethod
+    def triple(self, number):
+        self.calls += 1
+        return number * 3
+
+    @cache.cached(ttl=0.05)
+    def short_lived(self):
+        self.calls += 1
+        return self.calls
+
+
+class CacheTester(unittest.TestCase):
+    """Tests the oyProjectManager.utils.cache module
+    """
+
+    def test_property_is_cached(self):
+        """testing if the cached property calls the method only once
+        """
+        counter = Counter("a")
+        self.assertEqual("a", counter.value)
+        self.assertEqual("a", counter.value)
+        self.assertEqual(1, counter.calls)
+
+    def test_values_are_stored_per_instance(self):
+        """testing if the instances of the same class have their own cached
+        values
+        """
+        counter1 = Counter("a")
+        counter2 = Counter("b")
+        self.assertEqual("a", counter1.value)
+        self.assertEqual("b", counter2.value)
+        self.assertEqual("a", counter1.value)
+        self.assertEqual(1, counter1.calls)
+        self.assertEqual(1, counter2.calls)
+
+    def test_method_is_cached_based_on_the_arguments(self):
+        """testing if the cached method is called once for every argument
+        """
+        counter = Counter("a")
+        self.assertEqual(2, counter.double(1))
+        self.assertEqual(4, counter.double(2))
+        self.assertEqual(2, counter.double(1))
+        self.assertEqual(4, counter.double(number=2))
+        self.assertEqual(3, counter.calls)
+
+    def test_least_recently_used_values_are_dropped(self):
+        """testing if the least recently used values are dropped when there
+        are more than max_size values
+        """
+        counter = Counter("a")
+        counter.double(1)
+        counter.double(2)
+        counter.double(1)
+        counter.double(3) # drops 2
+        self.assertEqual(3, counter.calls)
+
+        counter.double(1)
+        self.assertEqual(3, counter.calls)
+
+        counter.double(2)
+        self.assertEqual(4, counter.calls)
+
+        self.assertEqual(2, counter.double.stats().evictions)
+
+    def test_values_expire_after_ttl(self):
+        """testing if the cached values are recalculated after the ttl
+        """
+        counter = Counter("a")
+        self.assertEqual(1, counter.short_lived())
+        self.assertEqual(1, counter.short_lived())
+        time.sleep(0.1)
+        self.assertEqual(2, counter.short_lived())
+
+    def test_input_based_cached_method_never_expires_or_drops_values(self):
+        """testing if the InputBasedCachedMethod keeps all the values forever
+        like it was doing before
+        """
+        counter = Counter("a")
+        for number in range(cache.DEFAULT_MAX_SIZE * 2):
+            counter.triple(number)
+        for number in range(cache.DEFAULT_MAX_SIZE * 2):
+            self.assertEqual(number * 3, counter.triple(number))
+
+        self.assertEqual(cache.DEFAULT_MAX_SIZE * 2, counter.calls)
+        self.assertEqual(0, counter.triple.stats().evictions)
+        self.assertEqual(None, Counter.triple.ttl)
+
+    def test_unhashable_arguments_are_not_cached(self):
+        """testing if the method is called every time for unhashable
+        arguments
+        """
+        counter = Counter("a")
+        self.assertEqual([1, 1], counter.double([1]))
+        self.assertEqual([1, 1], counter.double([1]))
+        self.assertEqual(2, counter.calls)
+
+    def test_invalidate(self):
+        """testing if the invalidate() removes the cached values
+        """
+        counter = Counter("a")
+        counter.value
+        Counter.value.invalidate(counter)
+        counter.value
+        self.assertEqual(2, counter.calls)
+
+        counter.double(1)
+        counter.double(2)
+        counter.double.invalidate(1)
+        counter.double(1)
+        counter.double(2)
+        self.assertEqual(5, counter.calls)
+
+        counter.double.invalidate()
+        counter.double(2)
+        self.assertEqual(6, counter.calls)
+
+    def test_stats(self):
+        """testing if the stats() returns the hits, misses and size
+        """
+        counter = Counter("a")
+        counter.value
+        counter.value
+        counter.value
+        self.assertEqual(
+            cache.CacheStats(hits=2, misses=1, evictions=0, size=1),
+            Counter.value.stats(counter)
+        )
+
+    def test_thread_safety(self):
+        """testing if the cached method can be called from many threads
+        """
+        counter = Counter("a")
+        errors = []
+
+        def worker():
+            try:
+                for i in range(1000):
+                    self.assertEqual((i % 5) * 2, counter.double(i % 5))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        stats = counter.double.stats()
+        self.assertEqual(8000, stats.hits + stats.misses)
+        self.assertTrue(stats.size <= 2)
+
+
+class IdentityCacheTester(unittest.TestCase):
+    """Tests the oyProjectManager.utils.cache.IdentityCache class
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        self.identity_cache = cache.IdentityCache(ttl=None)
+        self.session = set()
+        self.calls = []
+
+    def loader(self, value):
+        """returns a loader which returns the given value and counts the calls
+        """
+        def load():
+            self.calls.append(value)
+            return value
+        return load
+
+    def test_get_calls_the_loader_once(self):
+        """testing if the instance is loaded once and then returned from the
+        cache
+        """
+        instance = Counter("a")
+        self.session.add(instance)
+        key = (Counter, ("name", "a"))
+        self.assertIs(
+            instance,
+            self.identity_cache.get(key, self.loader(instance), self.session)
+        )
+        self.assertIs(
+            instance,
+            self.identity_cache.get(key, self.loader(instance), self.session)
+        )
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual(
+            cache.CacheStats(hits=1, misses=1, evictions=0, size=1),
+            self.identity_cache.stats()
+        )
+
+    def test_instances_which_are_not_in_the_session_are_loaded_again(self):
+        """testing if the instance is loaded again when it is not in the
+        session anymore
+        """
+        instance = Counter("a")
+        self.session.add(instance)
+        key = (Counter, ("name", "a"))
+        self.identity_cache.get(key, self.loader(instance), self.session)
+
+        self.session.remove(instance)
+        self.identity_cache.get(key, self.loader(instance), self.session)
+        self.assertEqual(2, len(self.calls))
+
+    def test_None_is_not_cached(self):
+        """testing if the loader is called again if it returned None
+        """
+        key = (Counter, ("name", "a"))
+        self.assertIsNone(
+            self.identity_cache.get(key, self.loader(None), self.session)
+        )
+        self.identity_cache.get(key, self.loader(None), self.session)
+        self.assertEqual(2, len(self.calls))
+
+    def test_invalidate(self):
+        """testing if the invalidate() removes the instances of the given
+        class or all of them
+        """
+        instance1 = Counter("a")
+        instance2 = IdentityCacheTester("test_invalidate")
+        self.session.update([instance1, instance2])
+        key1 = (Counter, ("name", "a"))
+        key2 = (IdentityCacheTester, ("name", "a"))
+
+        self.identity_cache.get(key1, self.loader(instance1), self.session)
+        self.identity_cache.get(key2, self.loader(instance2), self.session)
+
+        self.identity_cache.invalidate(Counter)
+        self.identity_cache.get(key1, self.loader(instance1), self.session)
+        self.identity_cache.get(key2, self.loader(instance2), self.session)
+        self.assertEqual([instance1, instance2, instance1], self.calls)
+
+        self.identity_cache.invalidate()
+        self.identity_cache.get(key2, self.loader(instance2), self.session)
+        self.assertEqual(4, len(self.calls))
+
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from oyProjectManager.utils import file_stats
+
+
+class FileStatsTester(unittest.TestCase):
+    """Tests the oyProjectManager.utils.file_stats module
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        self.temp_folder = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.temp_folder, "folder1"))
+
+        self.file1 = os.path.join(self.temp_folder, "file1.ma")
+        self.file2 = os.path.join(self.temp_folder, "folder1", "file2.ma")
+        self.missing_file = os.path.join(self.temp_folder, "missing.ma")
+        self.missing_folder_file = \
+            os.path.join(self.temp_folder, "missing", "file.ma")
+
+        with open(self.file1, "w") as f:
+            f.write("12345")
+        with open(self.file2, "w") as f:
+            f.write("1")
+
+        self.paths = [self.file1, self.file2, self.missing_file,
+                      self.missing_folder_file,
+                      os.path.join(self.temp_folder, "folder1")]
+
+        # count the folder listings
+        self.listings = []
+        self.original_list_files = file_stats._list_files
+
+        def list_files(path):
+            self.listings.append(path)
+            return self.original_list_files(path)
+
+        file_stats._list_files = list_files
+
+    def tearDown(self):
+        """clean up the test
+        """
+        file_stats._list_files = self.original_list_files
+        shutil.rmtree(self.temp_folder)
+
+    def test_stat_files(self):
+        """testing if the stat_files() returns the sizes and the modification
+        times of the files and lists every folder once
+        """
+        stats = file_stats.stat_files(self.paths)
+
+        self.assertEqual(5, stats[self.file1].size)
+        self.assertEqual(os.path.getmtime(self.file1), stats[self.file1].mtime)
+        self.assertEqual(1, stats[self.file2].size)
+
+        # missing files and folders are None
+        self.assertIsNone(stats[self.missing_file])
+        self.assertIsNone(stats[self.missing_folder_file])
+        self.assertIsNone(stats[os.path.join(self.temp_folder, "folder1")])
+
+        self.assertEqual(3, len(self.listings))
+
+    def test_FileStatCache_caches_the_stats(self):
+        """testing if the FileStatCache.stat() reads only the files which are
+        not cached
+        """
+        stat_cache = file_stats.FileStatCache(ttl=None)
+        stats = stat_cache.stat(self.paths)
+        self.assertEqual(3, len(self.listings))
+
+        self.assertEqual(stats, stat_cache.stat(self.paths))
+        self.assertEqual(3, len(self.listings))
+        self.assertEqual((True, None),
+                         stat_cache.get_cached(self.missing_file))
+
+        # only the invalidated file is read again
+        stat_cache.invalidate(self.file2)
+        stat_cache.stat(self.paths)
+        self.assertEqual(4, len(self.listings))
+        self.assertEqual(
+            [os.path.join(self.temp_folder, "folder1")],
+            self.listings[3:]
+        )
+
+    def test_FileStatCache_ttl(self):
+        """testing if the stats expire after the ttl
+        """
+        stat_cache = file_stats.FileStatCache(ttl=0.05)
+        stat_cache.stat([self.file1])
+
+        with open(self.file1, "w") as f:
+            f.write("1234567890")
+
+        self.assertEqual(5, stat_cache.stat([self.file1])[self.file1].size)
+
+        time.sleep(0.1)
+        self.assertEqual(10, stat_cache.stat([self.file1])[self.file1].size)
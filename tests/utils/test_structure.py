@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import tempfile
+import unittest
+from oyProjectManager.utils import structure
+
+
+class StructureTester(unittest.TestCase):
+    """Tests the oyProjectManager.utils.structure module
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        self.temp_folder = tempfile.mkdtemp()
+        self.root = os.path.join(self.temp_folder, "PROJ")
+        os.mkdir(self.root)
+        os.makedirs(os.path.join(self.root, "Sequences", "SEQ1", "Edit"))
+
+        self.folders = [
+            os.path.join(self.root, "Sequences", "SEQ1", "Edit"),
+            os.path.join(self.root, "Sequences", "SEQ1", "Shots", "SH001",
+                         "Plate"),
+            os.path.join(self.root, "Sequences", "SEQ1", "Shots", "SH002",
+                         "Plate"),
+            os.path.join(self.root, "Sequences", "SEQ2", "Edit"),
+        ]
+
+        # count the folder listings
+        self.listed = []
+        self.original_listdir = os.listdir
+
+        def listdir(path):
+            self.listed.append(path)
+            return self.original_listdir(path)
+
+        os.listdir = listdir
+
+    def tearDown(self):
+        """clean up the test
+        """
+        os.listdir = self.original_listdir
+        shutil.rmtree(self.temp_folder)
+
+    def test_render_folders_is_working_properly(self):
+        """testing if render_folders() returns the unique folders of the
+        rendered template in order
+        """
+        template = """
+            {% for name in names %}
+                /tmp/{{name}}/
+                /tmp/{{name}}
+                /tmp/shared
+            {% endfor %}
+        """
+        self.assertEqual(
+            ["/tmp/a", "/tmp/shared", "/tmp/b"],
+            structure.render_folders(template, names=["a", "b"])
+        )
+
+    def test_materialize_creates_the_missing_folders(self):
+        """testing if materialize() creates the missing folders and their
+        parents under the root and reports them
+        """
+        report = structure.materialize(
+            self.folders, root=self.root, worker_count=4,
+            listing_cache=structure.ListingCache()
+        )
+
+        for folder in self.folders:
+            self.assertTrue(os.path.isdir(folder))
+
+        join = os.path.join
+        seq1 = join(self.root, "Sequences", "SEQ1")
+        seq2 = join(self.root, "Sequences", "SEQ2")
+        self.assertEqual(
+            sorted([
+                join(seq1, "Shots"),
+                join(seq1, "Shots", "SH001"),
+                join(seq1, "Shots", "SH001", "Plate"),
+                join(seq1, "Shots", "SH002"),
+                join(seq1, "Shots", "SH002", "Plate"),
+                seq2,
+                join(seq2, "Edit"),
+            ]),
+            sorted(report.created)
+        )
+        self.assertEqual(
+            sorted([join(self.root, "Sequences"), seq1, join(seq1, "Edit")]),
+            sorted(report.existing)
+        )
+        self.assertTrue(report.ok)
+
+        # the new folders are not listed
+        self.assertEqual(
+            sorted([self.root, join(self.root, "Sequences"), seq1]),
+            sorted(self.listed)
+        )
+
+    def test_materialize_uses_the_cached_listings(self):
+        """testing if materialize() doesn't list the folders again if it is
+        called again with the same ListingCache
+        """
+        listing_cache = structure.ListingCache()
+        structure.materialize(self.folders, root=self.root,
+                              listing_cache=listing_cache)
+        self.listed = []
+
+        report = structure.materialize(self.folders, root=self.root,
+                                       listing_cache=listing_cache)
+        self.assertEqual([], report.created)
+        self.assertEqual(10, len(report.existing))
+        self.assertEqual([], self.listed)
+
+    def test_materialize_without_root(self):
+        """testing if materialize() creates the missing parents of the folders
+        if there is no root
+        """
+        folder = os.path.join(self.temp_folder, "a", "b", "c")
+        report = structure.materialize(
+            [folder], listing_cache=structure.ListingCache()
+        )
+        self.assertTrue(os.path.isdir(folder))
+        self.assertEqual([folder], report.created)
+
+    def test_materialize_reports_the_failed_folders(self):
+        """testing if materialize() reports the folders which can not be
+        created and continues with the others
+        """
+        blocking_file = os.path.join(self.root, "Sequences", "SEQ2")
+        with open(blocking_file, "w") as f:
+            f.write("")
+
+        report = structure.materialize(
+            self.folders, root=self.root,
+            listing_cache=structure.ListingCache()
+        )
+        self.assertFalse(report.ok)
+        self.assertEqual(
+            sorted([blocking_file, os.path.join(blocking_file, "Edit")]),
+            sorted(report.failed.keys())
+        )
+        self.assertNotIn(blocking_file, report.existing)
+        self.assertTrue(
+            os.path.isdir(os.path.join(self.root, "Sequences", "SEQ1",
+                                       "Shots", "SH002", "Plate"))
+        )
+
+    def test_materialize_reuses_the_thread_pool(self):
+        """testing if materialize() uses the shared thread pool instead of
+        creating one in every call
+        """
+        pool = structure.get_pool(4)
+        self.assertIs(pool, structure.get_pool(4))
+
+        original_thread_pool = structure.ThreadPool
+
+        def thread_pool(*args, **kwargs):
+            raise AssertionError("a new ThreadPool is created")
+
+        structure.ThreadPool = thread_pool
+        try:
+            report = structure.materialize(
+                self.folders, root=self.root, worker_count=4,
+                listing_cache=structure.ListingCache()
+            )
+        finally:
+            structure.ThreadPool = original_thread_pool
+
+        self.assertTrue(report.ok)
+        self.assertTrue(
+            os.path.isdir(os.path.join(self.root, "Sequences", "SEQ2", "Edit"))
+        )
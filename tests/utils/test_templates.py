@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+# 
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import unittest
+from oyProjectManager.utils import templates
+
+class TemplatesTester(unittest.TestCase):
+    """Tests the oyProjectManager.utils.templates module
+    """
+    
+    def setUp(self):
+        """clean the cache before every test
+        """
+        templates.clear()
+        self.cache_size = templates.CACHE_SIZE
+    
+    def tearDown(self):
+        """restore the cache size
+        """
+        templates.CACHE_SIZE = self.cache_size
+        templates.clear()
+    
+    def test_render_is_working_properly(self):
+        """testing if the render() renders the given template with the given
+        variables
+        """
+        self.assertEqual(
+            templates.render("{{a}}_v{{'%03d'|format(b)}}", a="Test", b=3),
+            "Test_v003"
+        )
+    
+    def test_get_template_returns_the_same_compiled_template(self):
+        """testing if the get_template() compiles the same source only once
+        """
+        template1 = templates.get_template("{{a}}")
+        template2 = templates.get_template("{{a}}")
+        self.assertIs(template1, template2)
+    
+    def test_get_template_drops_the_least_recently_used_template(self):
+        """testing if the least recently used template is dropped when the
+        cache is full
+        """
+        templates.CACHE_SIZE = 2
+        template1 = templates.get_template("{{a}}")
+        template2 = templates.get_template("{{b}}")
+        
+        # use the first one so the second becomes the least recently used one
+        templates.get_template("{{a}}")
+        templates.get_template("{{c}}")
+        
+        self.assertIs(templates.get_template("{{a}}"), template1)
+        self.assertIsNot(templates.get_template("{{b}}"), template2)
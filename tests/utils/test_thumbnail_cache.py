@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2009-2014, Erkan Ozgur Yilmaz
+#
+# This module is part of oyProjectManager and is released under the BSD 2
+# License: http://www.opensource.org/licenses/BSD-2-Clause
+
+import os
+import shutil
+import tempfile
+import unittest
+from oyProjectManager import conf
+from oyProjectManager.utils import thumbnail_cache
+
+
+class ThumbnailCacheTester(unittest.TestCase):
+    """Tests the oyProjectManager.utils.thumbnail_cache module
+    """
+
+    def setUp(self):
+        """setup the test
+        """
+        self.temp_folder = tempfile.mkdtemp()
+        self.original_cache_path = conf.thumbnail_cache_path
+        conf.thumbnail_cache_path = os.path.join(self.temp_folder, "cache")
+        self.image_full_path = os.path.join(self.temp_folder, "image.png")
+
+    def tearDown(self):
+        """clean up the test
+        """
+        conf.thumbnail_cache_path = self.original_cache_path
+        shutil.rmtree(self.temp_folder)
+
+    def add_file(self, disk_cache, name, size, mtime):
+        """writes a file of the given size to the given DiskCache
+        """
+        cache_file_path = disk_cache.get_file_path(name, 1.0, 16, 16)
+        if not os.path.exists(os.path.dirname(cache_file_path)):
+            os.makedirs(os.path.dirname(cache_file_path))
+
+        temp_file_path = cache_file_path + ".tmp"
+        with open(temp_file_path, "wb") as f:
+            f.write("x" * size)
+        self.assertTrue(disk_cache.add(temp_file_path, cache_file_path))
+        os.utime(cache_file_path, (mtime, mtime))
+        return cache_file_path
+
+    def test_memory_cache_is_keyed_by_the_modification_time(self):
+        """testing if the MemoryCache doesn't return the thumbnail of an
+        older version of the image
+        """
+        memory_cache = thumbnail_cache.MemoryCache(max_size=10)
+        memory_cache.set(self.image_full_path, 1.0, 16, 16, "thumbnail")
+
+        self.assertEqual(
+            (True, "thumbnail"),
+            memory_cache.get(self.image_full_path, 1.0, 16, 16)
+        )
+        self.assertEqual(
+            (False, None),
+            memory_cache.get(self.image_full_path, 2.0, 16, 16)
+        )
+        self.assertEqual(
+            (False, None),
+            memory_cache.get(self.image_full_path, 1.0, 32, 32)
+        )
+
+    def test_memory_cache_does_not_store_the_missing_images(self):
+        """testing if the MemoryCache doesn't store the None thumbnails of
+        the missing images
+        """
+        memory_cache = thumbnail_cache.MemoryCache(max_size=10)
+        memory_cache.set(self.image_full_path, None, 16, 16, None)
+        self.assertEqual(
+            (False, None),
+            memory_cache.get(self.image_full_path, None, 16, 16)
+        )
+        self.assertEqual(0, memory_cache.stats().size)
+
+    def test_memory_cache_is_bounded(self):
+        """testing if the least recently used thumbnails are dropped from the
+        MemoryCache
+        """
+        memory_cache = thumbnail_cache.MemoryCache(max_size=2)
+        for size in [8, 16, 32]:
+            memory_cache.set(self.image_full_path, 1.0, size, size, size)
+
+        self.assertFalse(memory_cache.get(self.image_full_path, 1.0, 8, 8)[0])
+        self.assertTrue(
+            memory_cache.get(self.image_full_path, 1.0, 16, 16)[0]
+        )
+        self.assertTrue(
+            memory_cache.get(self.image_full_path, 1.0, 32, 32)[0]
+        )
+
+    def test_memory_cache_invalidate(self):
+        """testing if the invalidate removes the thumbnails of the given
+        image from the MemoryCache
+        """
+        other_image_full_path = os.path.join(self.temp_folder, "other.png")
+        memory_cache = thumbnail_cache.MemoryCache(max_size=10)
+        memory_cache.set(self.image_full_path, 1.0, 16, 16, "thumbnail")
+        memory_cache.set(self.image_full_path, 2.0, 32, 32, "thumbnail")
+        memory_cache.set(other_image_full_path, 1.0, 16, 16, "thumbnail")
+
+        memory_cache.invalidate(self.image_full_path)
+        self.assertFalse(
+            memory_cache.get(self.image_full_path, 1.0, 16, 16)[0]
+        )
+        self.assertFalse(
+            memory_cache.get(self.image_full_path, 2.0, 32, 32)[0]
+        )
+        self.assertTrue(
+            memory_cache.get(other_image_full_path, 1.0, 16, 16)[0]
+        )
+
+    def test_get_file_path_is_keyed_by_the_modification_time(self):
+        """testing if the cache file paths of the different versions and
+        sizes of the image are different
+        """
+        disk_cache = thumbnail_cache.get_disk_cache()
+        cache_file_path = disk_cache.get_file_path(self.image_full_path,
+                                                   1.0, 16, 16)
+        self.assertTrue(
+            cache_file_path.startswith(conf.thumbnail_cache_path)
+        )
+        self.assertEqual(
+            cache_file_path,
+            thumbnail_cache.get_cache_file_path(self.image_full_path,
+                                                1.0, 16, 16)
+        )
+        self.assertNotEqual(
+            cache_file_path,
+            disk_cache.get_file_path(self.image_full_path, 2.0, 16, 16)
+        )
+        self.assertNotEqual(
+            cache_file_path,
+            disk_cache.get_file_path(self.image_full_path, 1.0, 32, 32)
+        )
+
+    def test_get_disk_cache_follows_the_cache_path(self):
+        """testing if get_disk_cache returns a DiskCache of the current
+        thumbnail_cache_path
+        """
+        disk_cache = thumbnail_cache.get_disk_cache()
+        self.assertIs(disk_cache, thumbnail_cache.get_disk_cache())
+        self.assertEqual(conf.thumbnail_cache_path, disk_cache.path)
+
+        conf.thumbnail_cache_path = os.path.join(self.temp_folder, "cache2")
+        self.assertEqual(conf.thumbnail_cache_path,
+                         thumbnail_cache.get_disk_cache().path)
+
+    def test_disk_cache_evicts_the_least_recently_used_files(self):
+        """testing if the DiskCache removes the least recently used files
+        when the total size exceeds the maximum size
+        """
+        disk_cache = thumbnail_cache.DiskCache(conf.thumbnail_cache_path,
+                                               max_size=1000)
+        file1 = self.add_file(disk_cache, "image1.png", 400, 1000)
+        file2 = self.add_file(disk_cache, "image2.png", 400, 2000)
+        self.assertEqual(800, disk_cache.size())
+
+        # image1 is used after image2
+        self.assertTrue(disk_cache.touch(file1))
+
+        file3 = self.add_file(disk_cache, "image3.png", 400, 3000)
+        self.assertTrue(os.path.exists(file1))
+        self.assertFalse(os.path.exists(file2))
+        self.assertTrue(os.path.exists(file3))
+        self.assertEqual(800, disk_cache.size())
+
+        self.assertFalse(disk_cache.touch(file2))
+
+    def test_disk_cache_counts_the_existing_files(self):
+        """testing if the DiskCache counts the files which are already in the
+        cache folder
+        """
+        disk_cache = thumbnail_cache.DiskCache(conf.thumbnail_cache_path,
+                                               max_size=1000)
+        file1 = self.add_file(disk_cache, "image1.png", 600, 1000)
+
+        # a new process
+        disk_cache = thumbnail_cache.DiskCache(conf.thumbnail_cache_path,
+                                               max_size=1000)
+        file2 = self.add_file(disk_cache, "image2.png", 600, 2000)
+        self.assertFalse(os.path.exists(file1))
+        self.assertTrue(os.path.exists(file2))
+        self.assertEqual(600, disk_cache.size())
+
+    def test_disk_cache_add_removes_the_temp_file_on_errors(self):
+        """testing if the DiskCache.add removes the temp file if it can not
+        be moved to the cache
+        """
+        disk_cache = thumbnail_cache.DiskCache(conf.thumbnail_cache_path,
+                                               max_size=1000)
+        temp_file_path = os.path.join(self.temp_folder, "image.png.tmp")
+        with open(temp_file_path, "wb") as f:
+            f.write("x")
+
+        # the folder of the cache file doesn't exist
+        self.assertFalse(
+            disk_cache.add(
+                temp_file_path,
+                os.path.join(self.temp_folder, "missing", "image.png")
+            )
+        )
+        self.assertFalse(os.path.exists(temp_file_path))